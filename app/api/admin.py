@@ -0,0 +1,51 @@
+# app/api/admin.py
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+
+from app.core.config import settings
+from app.core.profiling import PROFILE_DIR, sample_process
+
+def _require_profiling(x_admin_token: str | None = Header(None)):
+    """Solo disponible con PROFILING_ENABLED (y ADMIN_TOKEN si está configurado)."""
+    if not settings.PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiling deshabilitado")
+    if settings.ADMIN_TOKEN and x_admin_token != settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Token de administración inválido")
+
+router = APIRouter(prefix="/admin", tags=["Admin"], dependencies=[Depends(_require_profiling)])
+
+
+@router.post("/profile")
+async def profile_process(seconds: float = 10.0, interval_ms: float | None = None):
+    """
+    Muestrea todos los hilos del proceso durante N segundos y guarda
+    collapsed stacks en logs/profiles/. Devuelve los frames más calientes.
+    """
+    seconds = max(0.1, min(seconds, settings.PROFILING_MAX_SECONDS))
+    interval = interval_ms / 1000 if interval_ms else None
+
+    sampler, path = await run_in_threadpool(sample_process, seconds, interval)
+
+    return {
+        "status": "ok",
+        "seconds": seconds,
+        "samples": sampler.samples,
+        "file": path.name,
+        "top": sampler.top()
+    }
+
+
+@router.get("/profiles")
+async def list_profiles():
+    files = sorted(PROFILE_DIR.glob("*"), reverse=True) if PROFILE_DIR.exists() else []
+    return {"profiles": [{"file": f.name, "bytes": f.stat().st_size} for f in files]}
+
+
+@router.get("/profiles/{name}")
+async def download_profile(name: str):
+    path = (PROFILE_DIR / name).resolve()
+    if path.parent != PROFILE_DIR.resolve() or not path.is_file():
+        raise HTTPException(status_code=404, detail="Perfil no encontrado")
+    return FileResponse(path)
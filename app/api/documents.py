@@ -0,0 +1,92 @@
+# app/api/documents.py
+
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException
+from collections import Counter
+import shutil
+import time
+
+from app.api.ingest import upload_path
+from app.core.logger import logger
+from app.core.scheduler import ingest_quota, scheduler
+from app.core.tenancy import get_tenant
+from app.core.tracing import debug_payload
+from app.rag.embeddings import Provider
+from app.rag.ingestion import ingest_file_to_pinecone, delete_document
+from app.vectorstore.manifest import manifest
+
+router = APIRouter(prefix="/documents", tags=["Documentos"])
+
+@router.get("/")
+async def list_documents(doc_type: str | None = None, provider: str | None = None,
+                         tenant: str = Depends(get_tenant)):
+    """
+    Lista los documentos del tenant registrados en el manifest con
+    conteos totales de chunks por doc_type y provider.
+    """
+    docs = manifest.list(tenant)
+    if doc_type:
+        docs = [d for d in docs if d.get("doc_type") == doc_type]
+    if provider:
+        docs = [d for d in docs if d.get("provider") == provider]
+
+    return {
+        "total_documentos": len(docs),
+        "total_chunks": sum(d.get("chunks", 0) for d in docs),
+        "por_doc_type": dict(Counter(d.get("doc_type") for d in docs)),
+        "por_provider": dict(Counter(d.get("provider") for d in docs)),
+        "documents": docs
+    }
+
+
+@router.delete("/{document_id}")
+async def remove_document(document_id: str, tenant: str = Depends(get_tenant)):
+    """
+    Borra los vectores del documento (en lotes) y lo quita del manifest.
+    """
+    result = await scheduler.run(tenant, "ingest", delete_document, document_id, tenant=tenant)
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"Documento no encontrado: {document_id}")
+
+    return {"status": "deleted", **result}
+
+
+@router.put("/{document_id}")
+async def replace_document(
+    document_id: str,
+    file: UploadFile = File(...),
+    provider: Provider = Form("hf"),
+    source_name: str = Form("upload"),
+    tenant: str = Depends(get_tenant)
+):
+    """
+    Reemplaza el contenido de un documento existente (o lo crea con ese ID).
+    Solo se re-embeben los chunks que cambiaron; los que ya no existen
+    se borran del índice.
+    """
+    start = time.time()
+
+    ingest_quota.acquire(tenant)
+
+    dest = upload_path(tenant, file.filename)
+    with open(dest, "wb") as f:
+        shutil.copyfileobj(file.file, f)
+
+    logger.info(f"Reemplazo de documento {document_id}: {dest} usando proveedor '{provider}' (tenant={tenant})")
+
+    result = await scheduler.run(
+        tenant, "ingest", ingest_file_to_pinecone,
+        str(dest),
+        source_name=source_name,
+        provider=provider,
+        document_id=document_id,
+        tenant=tenant
+    )
+
+    elapsed = round(time.time() - start, 2)
+    return {
+        "status": "ok",
+        "elapsed_seconds": elapsed,
+        "filename": file.filename,
+        "result": result,
+        **debug_payload()       # timings / spans con el header de debug
+    }
@@ -1,15 +1,14 @@
 # app/api/feedback.py
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from pathlib import Path
-import json
 import time
 
-router = APIRouter(prefix="/feedback", tags=["Feedback"])
+from app.core.feedback_store import feedback_store
+from app.core.tenancy import get_tenant
 
-FEEDBACK_LOG = Path("storages/feedback_log.json")
-FEEDBACK_LOG.parent.mkdir(parents=True, exist_ok=True)
+router = APIRouter(prefix="/feedback", tags=["Feedback"])
 
 class Feedback(BaseModel):
     question: str
@@ -17,21 +16,25 @@ class Feedback(BaseModel):
     correct: bool
     comment: str | None = None
     doc_type: str | None = None
+    provider: str | None = None
+    # document_id de las fuentes que respaldan la respuesta (sources[].document_id);
+    # con correct=true sirven como etiquetas para evaluar el retrieval
+    document_ids: list[str] | None = None
 
 @router.post("/")
-async def save_feedback(data: Feedback):
-    """Guarda feedback en un archivo JSON para futuras mejoras."""
+async def save_feedback(data: Feedback, tenant: str = Depends(get_tenant)):
+    """Encola el feedback en el log JSONL (append-only) para futuras mejoras."""
     entry = data.dict()
+    entry["tenant"] = tenant
     entry["timestamp"] = time.strftime("%Y-%m-%d %H:%M:%S")
 
-    previous = []
-    if FEEDBACK_LOG.exists():
-        try:
-            previous = json.loads(FEEDBACK_LOG.read_text())
-        except:
-            previous = []
+    feedback_store.append(entry)
 
-    previous.append(entry)
-    FEEDBACK_LOG.write_text(json.dumps(previous, indent=2, ensure_ascii=False))
+    # stats() espera la carga inicial del historial: fuera del event loop
+    stats = await run_in_threadpool(feedback_store.stats, tenant)
+    return {"status": "feedback_saved", "count": stats["total"]}
 
-    return {"status": "feedback_saved", "count": len(previous)}
+@router.get("/stats")
+async def feedback_stats(tenant: str = Depends(get_tenant)):
+    """Precisión del tenant por doc_type y provider (contadores incrementales)."""
+    return await run_in_threadpool(feedback_store.stats, tenant)
@@ -1,11 +1,15 @@
 # app/api/ingest.py
 
-from fastapi import APIRouter, UploadFile, File, Form
+from fastapi import APIRouter, Depends, UploadFile, File, Form
 from pathlib import Path
 import shutil
 import time
 
 from app.core.logger import logger
+from app.core.scheduler import ingest_quota, scheduler
+from app.core.tenancy import get_tenant, is_default
+from app.core.tracing import debug_payload
+from app.rag.embeddings import Provider
 from app.rag.ingestion import ingest_file_to_pinecone
 
 router = APIRouter(prefix="/ingest", tags=["Ingesta"])
@@ -13,11 +17,20 @@ router = APIRouter(prefix="/ingest", tags=["Ingesta"])
 UPLOAD_DIR = Path("storages/uploads")
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
+
+def upload_path(tenant: str, filename: str) -> Path:
+    """Los tenants no por defecto guardan en su subcarpeta (mismo nombre, distinto documento)."""
+    folder = UPLOAD_DIR if is_default(tenant) else UPLOAD_DIR / tenant
+    folder.mkdir(parents=True, exist_ok=True)
+    return folder / filename
+
 @router.post("/")
 async def ingest_document(
     file: UploadFile = File(...),
-    provider: str = Form("hf"),               # <--- NUEVO: HF o OpenAI
-    source_name: str = Form("upload")
+    provider: Provider = Form("hf"),               # <--- NUEVO: HF o OpenAI
+    source_name: str = Form("upload"),
+    document_id: str | None = Form(None),     # ID externo (CRM) para re-ingestas
+    tenant: str = Depends(get_tenant)         # header X-Tenant-Id
 ):
     """
     Sube un archivo y lo procesa:
@@ -25,23 +38,29 @@ async def ingest_document(
       - detecta tipo
       - chunk + embeddings con HF u OpenAI
       - analiza imágenes si es PDF
-      - sube a Pinecone
+      - sube a Pinecone (solo chunks nuevos/modificados si el documento ya existía)
       - devuelve metadata para el backend .NET
     """
 
     start = time.time()
 
-    dest = UPLOAD_DIR / file.filename
+    # Cuota por tenant antes de tocar disco (429 + Retry-After)
+    ingest_quota.acquire(tenant)
+
+    dest = upload_path(tenant, file.filename)
     with open(dest, "wb") as f:
         shutil.copyfileobj(file.file, f)
 
-    logger.info(f"Archivo recibido: {dest} usando proveedor '{provider}'")
+    logger.info(f"Archivo recibido: {dest} usando proveedor '{provider}' (tenant={tenant})")
 
-    # 🔥 Pasamos el provider hacia la pipeline RAG
-    result = ingest_file_to_pinecone(
+    # 🔥 Pasamos el provider hacia la pipeline RAG (en el scheduler, fuera del event loop)
+    result = await scheduler.run(
+        tenant, "ingest", ingest_file_to_pinecone,
         str(dest),
         source_name=source_name,
-        provider=provider
+        provider=provider,
+        document_id=document_id,
+        tenant=tenant
     )
 
     elapsed = round(time.time() - start, 2)
@@ -49,5 +68,6 @@ async def ingest_document(
         "status": "ok",
         "elapsed_seconds": elapsed,
         "filename": file.filename,
-        "result": result
+        "result": result,
+        **debug_payload()       # timings / spans con el header de debug
     }
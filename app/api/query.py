@@ -1,39 +1,159 @@
 # app/api/query.py
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+import asyncio
+import json
 import time
 
-from app.rag.pipeline import answer_question
+from app.core.config import settings
+from app.core.logger import logger
+from app.core.scheduler import scheduler
+from app.core.tenancy import TenantQuotaExceeded, get_tenant
+from app.core.tracing import debug_payload
+from app.rag.embeddings import Provider
+from app.rag.pipeline import answer_prepared, answer_question, prepare_batch
 
 router = APIRouter(prefix="/query", tags=["Consulta RAG"])
 
 class QueryRequest(BaseModel):
     query: str
     doc_type: str | None = None
-    provider: str = "openai"   # openai | hf
+    provider: Provider = "openai"   # openai | hf | sentence_transformers
 
 @router.post("/")
-async def query_rag(q: QueryRequest):
+async def query_rag(q: QueryRequest, tenant: str = Depends(get_tenant)):
 
     start = time.time()
 
-    # Llamada correcta al pipeline (usa question=)
-    result = answer_question(
+    # Se ejecuta en el scheduler (hilos, round-robin por tenant):
+    # no bloquea el event loop ni deja que un tenant acapare los workers
+    result = await scheduler.run(
+        tenant, "query", answer_question,
         question=q.query,       # <-- CORRECTO
         top_k=15,
         doc_type=q.doc_type,
-        provider=q.provider
+        provider=q.provider,
+        tenant=tenant
     )
 
     elapsed = round(time.time() - start, 2)
 
     return {
         "query": q.query,
+        "tenant": tenant,
         "provider": q.provider,
         "doc_type": result["doc_type"],
         "answer": result["answer"],
         "sources": result["sources"],
         "compressed_context": result["compressed_context"],
-        "elapsed_seconds": elapsed
+        "prompt_tokens": result["prompt_tokens"],
+        "elapsed_seconds": elapsed,
+        **debug_payload()       # timings / spans con el header de debug
     }
+
+
+# ============================================================
+# /query/batch — N preguntas, respuestas en NDJSON a medida que terminan
+# ============================================================
+class BatchQuestion(BaseModel):
+    query: str
+    id: str | None = None            # p.ej. id de la cuenta del CRM
+    doc_type: str | None = None
+
+
+class BatchQueryRequest(BaseModel):
+    questions: list[BatchQuestion]
+    provider: Provider = "openai"
+
+
+def _ndjson(obj: dict) -> str:
+    return json.dumps(obj, ensure_ascii=False, default=str) + "\n"
+
+
+@router.post("/batch")
+async def query_batch(q: BatchQueryRequest, tenant: str = Depends(get_tenant)):
+    """
+    Embeddings, búsquedas y rerank se hacen una vez para todo el lote
+    (prepare_batch); las llamadas al LLM corren en el scheduler con a lo
+    sumo QUERY_BATCH_LLM_CONCURRENCY a la vez y cada respuesta se emite
+    como una línea JSON en cuanto termina (el orden no es el de entrada:
+    usar "index" / "id"). La última línea es {"done": true, ...}.
+    """
+    if not q.questions:
+        raise HTTPException(status_code=400, detail="El lote no tiene preguntas")
+    if len(q.questions) > settings.QUERY_BATCH_MAX_QUESTIONS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Máximo {settings.QUERY_BATCH_MAX_QUESTIONS} preguntas por lote"
+        )
+
+    start = time.time()
+    prepared = await scheduler.run(
+        tenant, "batch", prepare_batch,
+        questions=[item.query for item in q.questions],
+        top_k=15,
+        doc_types=[item.doc_type for item in q.questions],
+        provider=q.provider,
+        tenant=tenant
+    )
+    logger.info(f"📦 Lote de {len(prepared)} preguntas preparado en {time.time() - start:.2f}s (tenant={tenant})")
+
+    async def stream():
+        queue = iter(enumerate(prepared))
+        pending: dict[asyncio.Future, int] = {}
+        failed = 0
+
+        def launch():
+            for index, item in queue:
+                try:
+                    fut = asyncio.wrap_future(
+                        scheduler.submit(tenant, "batch", answer_prepared, item, q.provider)
+                    )
+                except TenantQuotaExceeded as e:
+                    # cola del tenant llena: se reporta en la línea de esa pregunta
+                    fut = asyncio.get_running_loop().create_future()
+                    fut.set_exception(e)
+                pending[fut] = index
+                if len(pending) >= settings.QUERY_BATCH_LLM_CONCURRENCY:
+                    return
+
+        try:
+            launch()
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for fut in done:
+                    index = pending.pop(fut)
+                    item = q.questions[index]
+                    line = {"index": index, "id": item.id, "query": item.query}
+                    try:
+                        result = fut.result()
+                        line.update({
+                            "doc_type": result["doc_type"],
+                            "answer": result["answer"],
+                            "sources": result["sources"],
+                            "compressed_context": result["compressed_context"],
+                            "prompt_tokens": result["prompt_tokens"],
+                            "elapsed_seconds": result["elapsed_seconds"],
+                        })
+                    except Exception as e:
+                        failed += 1
+                        logger.error(f"❌ Error en pregunta {index} del lote: {e}")
+                        line["error"] = str(e)
+                    yield _ndjson(line)
+                launch()
+
+            yield _ndjson({
+                "done": True,
+                "tenant": tenant,
+                "count": len(prepared),
+                "errors": failed,
+                "elapsed_seconds": round(time.time() - start, 2),
+            })
+        finally:
+            # cliente desconectado: lo que no empezó no se ejecuta
+            for fut in pending:
+                fut.cancel()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
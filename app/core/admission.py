@@ -0,0 +1,193 @@
+# app/core/admission.py
+
+"""
+Control de admisión y load shedding por endpoint.
+
+Antes de aceptar un request caro (query, ingesta con PyMuPDF + rerank)
+se pide un cupo a su pool. Cada pool tiene:
+
+- max_in_flight: requests admitidos a la vez (el resto espera).
+- max_queue: requests esperando; con la cola llena → rechazo inmediato.
+- max_wait: plazo para entrar. Si la espera estimada (tiempo medio de
+  servicio reciente × posición en cola / max_in_flight) ya lo supera, se
+  rechaza al llegar; si se cumple esperando, también.
+
+El rechazo es Overloaded → HTTP 503 + Retry-After (ver main.py). query e
+ingest son pools separados: una avalancha de ingestas no consume cupos
+de las queries interactivas. Es independiente del scheduler por tenant
+(reparto justo de hilos); esto acota cuánto trabajo entra al proceso.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+
+from .config import settings
+from .logger import get_logger
+from .metrics import ADMISSION_IN_FLIGHT, ADMISSION_QUEUE_DEPTH, ADMISSION_SHED, ADMISSION_WAIT
+
+logger = get_logger("admission")
+
+_EWMA_ALPHA = 0.2
+
+
+class Overloaded(Exception):
+    """Pool sin cupo dentro del plazo → HTTP 503 con Retry-After."""
+
+    def __init__(self, pool: str, reason: str, retry_after: float = 1.0):
+        super().__init__(f"Pool '{pool}' saturado: {reason}")
+        self.pool = pool
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    __slots__ = ("loop", "future", "granted")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.future: asyncio.Future = loop.create_future()
+        self.granted = False
+
+
+def _wake(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
+class AdmissionPool:
+    """
+    Semáforo con cola FIFO acotada y plazo. El estado se protege con un
+    lock de threading (no asyncio): release() puede llamarse desde
+    cualquier hilo / loop y el cupo pasa directo al primero de la cola.
+    """
+
+    def __init__(self, name: str, max_in_flight: int, max_queue: int, max_wait: float):
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.max_queue = max(0, max_queue)
+        self.max_wait = max_wait
+
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._waiters: deque[_Waiter] = deque()
+        self._service: float | None = None       # EWMA del tiempo con cupo (s)
+
+    # ========================================================
+    # API pública
+    # ========================================================
+    async def acquire(self):
+        if self.max_in_flight <= 0:
+            return
+        with self._lock:
+            if self._in_flight < self.max_in_flight and not self._waiters:
+                self._in_flight += 1
+                self._publish()
+                return
+            if len(self._waiters) >= self.max_queue:
+                raise self._shed("queue_full", self._estimate(len(self._waiters) + 1))
+            estimate = self._estimate(len(self._waiters) + 1)
+            if estimate > self.max_wait:
+                raise self._shed("deadline", estimate)
+            waiter = _Waiter(asyncio.get_running_loop())
+            self._waiters.append(waiter)
+            self._publish()
+
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(waiter.future, timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            with self._lock:
+                if not waiter.granted:
+                    self._waiters.remove(waiter)
+                    self._publish()
+                    raise self._shed("timeout", self._estimate(len(self._waiters) + 1))
+            # el cupo llegó justo con el timeout: se usa
+        except asyncio.CancelledError:
+            # cliente desconectado esperando: devolver el cupo si ya era suyo
+            with self._lock:
+                granted = waiter.granted
+                if not granted:
+                    self._waiters.remove(waiter)
+                    self._publish()
+            if granted:
+                self.release()
+            raise
+        finally:
+            ADMISSION_WAIT.observe(time.perf_counter() - start, pool=self.name)
+
+    def release(self, held: float | None = None):
+        """Devuelve el cupo; `held` (segundos con cupo) alimenta la estimación de espera."""
+        if self.max_in_flight <= 0:
+            return
+        with self._lock:
+            if held is not None:
+                self._service = held if self._service is None else \
+                    (1 - _EWMA_ALPHA) * self._service + _EWMA_ALPHA * held
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                waiter.granted = True
+                try:
+                    waiter.loop.call_soon_threadsafe(_wake, waiter.future)
+                except RuntimeError:
+                    continue                     # loop cerrado: siguiente
+                self._publish()
+                return                           # cupo traspasado, in_flight igual
+            self._in_flight -= 1
+            self._publish()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "in_flight": self._in_flight,
+                "queued": len(self._waiters),
+                "max_in_flight": self.max_in_flight,
+                "max_queue": self.max_queue,
+                "avg_service_seconds": round(self._service, 3) if self._service is not None else None,
+            }
+
+    # ========================================================
+    # Internos (con el lock tomado)
+    # ========================================================
+    def _estimate(self, position: int) -> float:
+        if not self._service:
+            return 0.0
+        return self._service * position / self.max_in_flight
+
+    def _shed(self, reason: str, estimate: float) -> Overloaded:
+        ADMISSION_SHED.inc(pool=self.name, reason=reason)
+        logger.warning("⛔ Pool '%s' saturado (%s): %d en curso, %d en cola",
+                       self.name, reason, self._in_flight, len(self._waiters))
+        return Overloaded(self.name, reason, retry_after=max(1.0, estimate))
+
+    def _publish(self):
+        ADMISSION_IN_FLIGHT.set(self._in_flight, pool=self.name)
+        ADMISSION_QUEUE_DEPTH.set(len(self._waiters), pool=self.name)
+
+
+# ============================================================
+# Pools del servicio
+# ============================================================
+pools = {
+    "query": AdmissionPool("query", settings.ADMISSION_QUERY_MAX_IN_FLIGHT,
+                           settings.ADMISSION_QUERY_MAX_QUEUE, settings.ADMISSION_QUERY_MAX_WAIT),
+    "ingest": AdmissionPool("ingest", settings.ADMISSION_INGEST_MAX_IN_FLIGHT,
+                            settings.ADMISSION_INGEST_MAX_QUEUE, settings.ADMISSION_INGEST_MAX_WAIT),
+}
+
+
+def pool_for(method: str, path: str) -> AdmissionPool | None:
+    """Pool que admite el request (None = sin control: health, metrics, listados...)."""
+    if not settings.ADMISSION_ENABLED:
+        return None
+    segment = path.strip("/").split("/", 1)[0]
+    if segment == "query":
+        return pools["query"]
+    if segment == "ingest" or (segment == "documents" and method in ("PUT", "DELETE")):
+        return pools["ingest"]
+    return None
+
+
+def stats() -> dict:
+    return {name: pool.stats() for name, pool in pools.items()}
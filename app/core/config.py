@@ -20,6 +20,23 @@ class Settings(BaseSettings):
     PINECONE_INDEX: str = Field("rag-index", env="PINECONE_INDEX")
     PINECONE_ENV: str = Field("us-east-1", env="PINECONE_ENV")
     PINECONE_CLOUD: str = Field("aws", env="PINECONE_CLOUD")
+    # Host alternativo del API (p.ej. stand-in local de benchmarks/standins.py)
+    PINECONE_HOST: str | None = Field(None, env="PINECONE_HOST")
+
+    # "pinecone" (por defecto) | "local" → índice NumPy en memoria
+    # (desarrollo, tests y benchmarks sin servicios externos)
+    VECTOR_BACKEND: str = Field("pinecone", env="VECTOR_BACKEND")
+
+    # "shared" (un índice + filtros por metadata) | "provider" (un índice
+    # por provider de embeddings) | "provider_doc_type" (+ namespace por
+    # doc_type). Migrar con scripts/migrate_vector_routing.py
+    VECTOR_ROUTING: str = Field("shared", env="VECTOR_ROUTING")
+
+    # Vector store local: "none" | "int8" | "binary" (búsqueda en dos fases).
+    # Factor de re-score: 2-4 basta con int8; binary necesita ~10.
+    LOCAL_STORE_QUANTIZATION: str = Field("none", env="LOCAL_STORE_QUANTIZATION")
+    LOCAL_STORE_RESCORE_FACTOR: int = Field(4, env="LOCAL_STORE_RESCORE_FACTOR")
+    LOCAL_STORE_KEEP_FLOAT: bool = Field(True, env="LOCAL_STORE_KEEP_FLOAT")
 
     # ============================
     # 🔹 EMBEDDINGS
@@ -39,6 +56,11 @@ class Settings(BaseSettings):
         env="OPENAI_EMB_MODEL"
     )
 
+    # Dimensión de salida (None = la del modelo). OpenAI la recibe como
+    # `dimensions`; para modelos locales/HF se aplica una PCA ajustada con
+    # scripts/fit_projection.py (o truncado si no hay PCA).
+    EMB_DIMENSIONS: int | None = Field(None, env="EMB_DIMENSIONS")
+
     # ============================
     # 🔹 LLM
     # ============================
@@ -53,6 +75,8 @@ class Settings(BaseSettings):
     # OpenAI LLM (solo si cambias provider)
     OPENAI_API_KEY: str | None = Field(None, env="OPENAI_API_KEY")
     OPENAI_MODEL: str = Field("gpt-4o-mini", env="OPENAI_MODEL")  # AHORA SÍ EXISTE
+    # Base URL alternativa (proxy compatible o stand-in local); None → api.openai.com
+    OPENAI_BASE_URL: str | None = Field(None, env="OPENAI_BASE_URL")
 
     # ============================
     # 🔹 RE-RANKER / SUMMARIZER
@@ -61,9 +85,26 @@ class Settings(BaseSettings):
         "cross-encoder/ms-marco-MiniLM-L-6-v2",
         env="CROSS_ENCODER_MODEL"
     )
+    # Pares (query, chunk) por forward pass del cross-encoder
+    RERANK_BATCH_SIZE: int = Field(64, env="RERANK_BATCH_SIZE")
     USE_LOCAL_SUMMARIZER: bool = Field(False, env="USE_LOCAL_SUMMARIZER")
     SUMMARIZER_MODEL: str = Field("google/pegasus-xsum", env="SUMMARIZER_MODEL")
 
+    # ============================
+    # 🔹 EXTRACCIÓN
+    # ============================
+    # Límites para extractores streaming (XLSX / DOCX)
+    EXTRACT_MAX_ROWS: int = Field(200_000, env="EXTRACT_MAX_ROWS")
+    EXTRACT_MAX_CHARS: int = Field(20_000_000, env="EXTRACT_MAX_CHARS")
+
+    # ============================
+    # 🔹 CHUNKING
+    # ============================
+    # "chars" (por defecto) | "tokens" → mide con el tokenizer de EMB_MODEL
+    CHUNK_UNIT: str = Field("chars", env="CHUNK_UNIT")
+    # Tamaño en tokens cuando CHUNK_UNIT=tokens (e5 trunca en 512)
+    CHUNK_MAX_TOKENS: int = Field(480, env="CHUNK_MAX_TOKENS")
+
     # ============================
     # 🔹 STORAGE PATHS
     # ============================
@@ -72,6 +113,181 @@ class Settings(BaseSettings):
         BASE_DIR / "data" / "uploads",
         env="UPLOAD_DIR"
     )
+    # document_id → chunk ids / hash / doc_type / provider (SQLite, una
+    # fila por documento; un manifest.json previo al lado se importa solo)
+    MANIFEST_PATH: Path = Field(
+        BASE_DIR / "data" / "manifest.sqlite3",
+        env="MANIFEST_PATH"
+    )
+
+    # Texto completo de los chunks (SQLite); el índice vectorial solo
+    # guarda los campos de filtro
+    CHUNK_STORE_PATH: Path = Field(
+        BASE_DIR / "data" / "chunks.sqlite3",
+        env="CHUNK_STORE_PATH"
+    )
+
+    # Proyecciones PCA de embeddings (una por índice / modelo / dimensión)
+    EMB_PROJECTION_DIR: Path = Field(
+        BASE_DIR / "data" / "projections",
+        env="EMB_PROJECTION_DIR"
+    )
+
+    # Snapshots binarios del índice (scripts/snapshot_index.py); con
+    # VECTOR_BACKEND=local y VECTOR_SNAPSHOT_ON_STARTUP se cargan al arrancar
+    VECTOR_SNAPSHOT_DIR: Path = Field(
+        BASE_DIR / "data" / "vector_dump",
+        env="VECTOR_SNAPSHOT_DIR"
+    )
+    VECTOR_SNAPSHOT_ON_STARTUP: bool = Field(False, env="VECTOR_SNAPSHOT_ON_STARTUP")
+
+    # Feedback append-only (JSONL, rota por tamaño)
+    FEEDBACK_LOG_PATH: Path = Field(Path("storages/feedback_log.jsonl"), env="FEEDBACK_LOG_PATH")
+    FEEDBACK_MAX_BYTES: int = Field(20 * 1024 * 1024, env="FEEDBACK_MAX_BYTES")
+    FEEDBACK_BATCH_SIZE: int = Field(256, env="FEEDBACK_BATCH_SIZE")
+    FEEDBACK_FLUSH_INTERVAL: float = Field(0.5, env="FEEDBACK_FLUSH_INTERVAL")
+
+    # ============================
+    # 🔹 CACHE DE RETRIEVAL
+    # ============================
+    # Opt-in: la invalidación al ingerir/borrar es solo del proceso que lo
+    # hizo; con varios workers los demás sirven resultados viejos hasta el TTL
+    RETRIEVAL_CACHE_SIZE: int = Field(512, env="RETRIEVAL_CACHE_SIZE")
+    RETRIEVAL_CACHE_TTL: float = Field(0.0, env="RETRIEVAL_CACHE_TTL")  # 0 = desactivado
+
+    # ============================
+    # 🔹 DIVERSIDAD (MMR)
+    # ============================
+    # λ de MMR sobre el pool antes del rerank (1 = solo relevancia,
+    # 0 = solo diversidad). Vacío = desactivado.
+    RETRIEVAL_MMR_LAMBDA: float | None = Field(None, env="RETRIEVAL_MMR_LAMBDA")
+
+    # ============================
+    # 🔹 PROFUNDIDAD ADAPTATIVA
+    # ============================
+    # Corta candidatos y rerank donde el score cae RETRIEVAL_SCORE_GAP
+    # por debajo del líder (ver app/rag/adaptive.py)
+    RETRIEVAL_ADAPTIVE: bool = Field(False, env="RETRIEVAL_ADAPTIVE")
+    RETRIEVAL_SCORE_GAP: float = Field(0.1, env="RETRIEVAL_SCORE_GAP")
+    RETRIEVAL_MIN_DEPTH: int = Field(5, env="RETRIEVAL_MIN_DEPTH")
+    RETRIEVAL_EXPLORE_RATE: float = Field(0.05, env="RETRIEVAL_EXPLORE_RATE")
+    RERANK_MIN_DEPTH: int = Field(5, env="RERANK_MIN_DEPTH")
+    RERANK_MAX_DEPTH: int = Field(30, env="RERANK_MAX_DEPTH")
+
+    # ============================
+    # 🔹 RETRIEVAL EN DOS ETAPAS (documento → chunks)
+    # ============================
+    # Al ingerir se escribe un vector por documento en "<namespace>__docs"
+    DOC_VECTORS_ENABLED: bool = Field(True, env="DOC_VECTORS_ENABLED")
+    # "summary" (embedding del resumen) | "mean" (media de los vectores de sus chunks)
+    DOC_VECTOR_SOURCE: str = Field("summary", env="DOC_VECTOR_SOURCE")
+    # Primero los RETRIEVAL_DOC_TOP_K documentos más cercanos, luego chunks
+    # solo de esos documentos; False = búsqueda plana sobre todos los chunks
+    RETRIEVAL_TWO_STAGE: bool = Field(False, env="RETRIEVAL_TWO_STAGE")
+    RETRIEVAL_DOC_TOP_K: int = Field(20, env="RETRIEVAL_DOC_TOP_K")
+
+    # ============================
+    # 🔹 TENANTS / SCHEDULER
+    # ============================
+    # Tenant por request (header); sin header → DEFAULT_TENANT, que usa
+    # los namespaces / manifest / chunk ids de siempre.
+    TENANT_HEADER: str = Field("X-Tenant-Id", env="TENANT_HEADER")
+    DEFAULT_TENANT: str = Field("default", env="DEFAULT_TENANT")
+    # Hilos que ejecutan /query e ingestas (fuera del event loop)
+    WORKER_THREADS: int = Field(8, env="WORKER_THREADS")
+    # Máximo de ingestas simultáneas en total (deja hilos para queries)
+    INGEST_MAX_WORKERS: int = Field(3, env="INGEST_MAX_WORKERS")
+    TENANT_MAX_CONCURRENT_QUERIES: int = Field(4, env="TENANT_MAX_CONCURRENT_QUERIES")
+    TENANT_MAX_CONCURRENT_INGESTS: int = Field(1, env="TENANT_MAX_CONCURRENT_INGESTS")
+    TENANT_MAX_QUEUE: int = Field(64, env="TENANT_MAX_QUEUE")                   # trabajos en cola
+    TENANT_INGEST_PER_MINUTE: float = Field(30.0, env="TENANT_INGEST_PER_MINUTE")  # 0 = sin cuota
+
+    # ============================
+    # 🔹 ADMISIÓN / LOAD SHEDDING
+    # ============================
+    # Requests simultáneos por pool (query: /query; ingest: /ingest y
+    # PUT/DELETE /documents) y cola acotada delante. Lo que no puede
+    # entrar antes de *_MAX_WAIT segundos se rechaza con 503 + Retry-After
+    # (al llegar si la espera estimada ya lo supera). 0 en MAX_IN_FLIGHT = sin límite.
+    ADMISSION_ENABLED: bool = Field(True, env="ADMISSION_ENABLED")
+    ADMISSION_QUERY_MAX_IN_FLIGHT: int = Field(32, env="ADMISSION_QUERY_MAX_IN_FLIGHT")
+    ADMISSION_QUERY_MAX_QUEUE: int = Field(64, env="ADMISSION_QUERY_MAX_QUEUE")
+    ADMISSION_QUERY_MAX_WAIT: float = Field(5.0, env="ADMISSION_QUERY_MAX_WAIT")
+    ADMISSION_INGEST_MAX_IN_FLIGHT: int = Field(4, env="ADMISSION_INGEST_MAX_IN_FLIGHT")
+    ADMISSION_INGEST_MAX_QUEUE: int = Field(16, env="ADMISSION_INGEST_MAX_QUEUE")
+    ADMISSION_INGEST_MAX_WAIT: float = Field(30.0, env="ADMISSION_INGEST_MAX_WAIT")
+
+    # ============================
+    # 🔹 CONTEXTO DEL PROMPT
+    # ============================
+    # Tokens de contexto (pasajes) por prompt, medidos con el tokenizer del LLM
+    CONTEXT_TOKEN_BUDGET: int = Field(600, env="CONTEXT_TOKEN_BUDGET")
+    # Jaccard estimado (MinHash) a partir del cual un pasaje es duplicado; 0 = sin dedup
+    CONTEXT_DEDUP_THRESHOLD: float = Field(0.8, env="CONTEXT_DEDUP_THRESHOLD")
+    # "auto" (tiktoken / tokenizer de HF_MODEL) | "approx" (~4 caracteres por token)
+    CONTEXT_TOKENIZER: str = Field("auto", env="CONTEXT_TOKENIZER")
+
+    # ============================
+    # 🔹 QUERY POR LOTES (/query/batch)
+    # ============================
+    QUERY_BATCH_MAX_QUESTIONS: int = Field(500, env="QUERY_BATCH_MAX_QUESTIONS")
+    # Llamadas al LLM simultáneas por tenant para los lotes
+    QUERY_BATCH_LLM_CONCURRENCY: int = Field(4, env="QUERY_BATCH_LLM_CONCURRENCY")
+
+    # ============================
+    # 🔹 RESILIENCIA DE PROVEEDORES
+    # ============================
+    # Plazo total por llamada (incluye hedge); también timeout HTTP de cada intento
+    LLM_TIMEOUT: float = Field(120.0, env="LLM_TIMEOUT")
+    EMB_TIMEOUT: float = Field(30.0, env="EMB_TIMEOUT")
+    # Lotes de embeddings de más de EMB_HEDGE_MAX_TEXTS textos (ingesta):
+    # sin hedge, breaker aparte y plazo EMB_TIMEOUT + EMB_TIMEOUT_PER_TEXT × textos
+    EMB_HEDGE_MAX_TEXTS: int = Field(8, env="EMB_HEDGE_MAX_TEXTS")
+    EMB_TIMEOUT_PER_TEXT: float = Field(1.0, env="EMB_TIMEOUT_PER_TEXT")
+    PROVIDER_TIMEOUT: float = Field(60.0, env="PROVIDER_TIMEOUT")
+    # Proveedor LLM alternativo para hedge / reroute ("openai" | "hf_inference");
+    # None → el hedge es un segundo request al mismo proveedor (otra réplica)
+    LLM_FALLBACK_PROVIDER: str | None = Field(None, env="LLM_FALLBACK_PROVIDER")
+    HEDGE_ENABLED: bool = Field(True, env="HEDGE_ENABLED")
+    # El hedge sale al superar el p95 del proveedor (mínimo HEDGE_MIN_DELAY);
+    # sin latencias suficientes se usa HEDGE_DEFAULT_DELAY
+    HEDGE_MIN_DELAY: float = Field(0.5, env="HEDGE_MIN_DELAY")
+    HEDGE_DEFAULT_DELAY: float = Field(10.0, env="HEDGE_DEFAULT_DELAY")
+    BREAKER_FAILURE_THRESHOLD: int = Field(5, env="BREAKER_FAILURE_THRESHOLD")
+    BREAKER_RESET_SECONDS: float = Field(30.0, env="BREAKER_RESET_SECONDS")
+
+    # ============================
+    # 🔹 TRACING
+    # ============================
+    # Header para devolver timings ("1") o también el árbol de spans ("spans")
+    TRACE_DEBUG_HEADER: str = Field("X-Debug-Timings", env="TRACE_DEBUG_HEADER")
+    # Archivo OTLP/JSON (una línea por trace) para un collector local; vacío = off
+    TRACE_EXPORT_PATH: Path | None = Field(None, env="TRACE_EXPORT_PATH")
+
+    # ============================
+    # 🔹 LOGGING
+    # ============================
+    LOG_LEVEL: str = Field("INFO", env="LOG_LEVEL")
+    # "json" (una línea por registro, con request_id) | "text"
+    LOG_FORMAT: str = Field("json", env="LOG_FORMAT")
+    # Handlers en un hilo aparte (QueueHandler/QueueListener); cola llena → se descarta
+    LOG_ASYNC: bool = Field(True, env="LOG_ASYNC")
+    LOG_QUEUE_SIZE: int = Field(10_000, env="LOG_QUEUE_SIZE")
+    # Por categoría (embeddings, llm, retrieval, pipeline, resilience, trace...):
+    # fracción muestreada "embeddings=0.1" y registros/s "llm=20"; WARNING+ siempre pasa
+    LOG_SAMPLING: str = Field("", env="LOG_SAMPLING")
+    LOG_RATE_LIMITS: str = Field("", env="LOG_RATE_LIMITS")
+    # Request id entrante (si no viene se usa el trace_id); se devuelve en la respuesta
+    REQUEST_ID_HEADER: str = Field("X-Request-Id", env="REQUEST_ID_HEADER")
+
+    # ============================
+    # 🔹 PROFILING (bajo demanda)
+    # ============================
+    PROFILING_ENABLED: bool = Field(False, env="PROFILING_ENABLED")
+    PROFILING_HEADER: str = Field("X-Profile", env="PROFILING_HEADER")   # "1"/"cprofile" | "sample"
+    PROFILING_SAMPLE_INTERVAL: float = Field(0.005, env="PROFILING_SAMPLE_INTERVAL")
+    PROFILING_MAX_SECONDS: float = Field(120.0, env="PROFILING_MAX_SECONDS")
+    ADMIN_TOKEN: str | None = Field(None, env="ADMIN_TOKEN")
 
     # ============================
     # 🔹 MISC
@@ -0,0 +1,221 @@
+# app/core/feedback_store.py
+
+import atexit
+import json
+import queue
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Iterator
+
+from .config import settings
+from .logger import logger
+
+
+class FeedbackStore:
+    """
+    Log de feedback append-only en JSONL.
+
+    - append() solo encola: un hilo escritor agrupa las entradas y las
+      escribe en un único write() por lote (group commit).
+    - El archivo rota por tamaño a feedback_log.<timestamp>-<n>.jsonl; los
+      rotados no se borran (sirven para evaluación).
+    - Las estadísticas por tenant y doc_type/provider se calculan una vez
+      al arrancar y luego se actualizan por entrada, sin re-leer el
+      archivo. Las entradas sin tenant son del tenant por defecto.
+    """
+
+    def __init__(self, path: Path, max_bytes: int, batch_size: int = 256,
+                 flush_interval: float = 0.5, legacy_path: Path | None = None):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.legacy_path = Path(legacy_path) if legacy_path else None
+
+        self._queue: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._counts = defaultdict(lambda: [0, 0])     # (tenant, doc_type, provider) → [total, correctas]
+        self._ready = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._closed = False
+
+    # ========================================================
+    # API pública
+    # ========================================================
+    def append(self, entry: dict):
+        self._ensure_started()
+        self._count(entry)
+        self._queue.put(entry)
+
+    def stats(self, tenant: str | None = None) -> dict:
+        """Precisión del tenant (por defecto, el tenant por defecto)."""
+        self._ensure_started()
+        self._ready.wait(timeout=30)
+
+        tenant = tenant or settings.DEFAULT_TENANT
+        with self._lock:
+            items = [(k[1:], list(v)) for k, v in self._counts.items() if k[0] == tenant]
+
+        def _acc(total, correct):
+            return round(correct / total, 4) if total else None
+
+        by_doc_type = defaultdict(lambda: [0, 0])
+        by_provider = defaultdict(lambda: [0, 0])
+        combos = []
+        total = correct = 0
+
+        for (doc_type, provider), (t, c) in items:
+            by_doc_type[doc_type][0] += t
+            by_doc_type[doc_type][1] += c
+            by_provider[provider][0] += t
+            by_provider[provider][1] += c
+            total += t
+            correct += c
+            combos.append({
+                "doc_type": doc_type, "provider": provider,
+                "total": t, "correct": c, "accuracy": _acc(t, c)
+            })
+
+        def _table(d):
+            return {k: {"total": t, "correct": c, "accuracy": _acc(t, c)} for k, (t, c) in d.items()}
+
+        return {
+            "total": total,
+            "correct": correct,
+            "accuracy": _acc(total, correct),
+            "por_doc_type": _table(by_doc_type),
+            "por_provider": _table(by_provider),
+            "por_doc_type_provider": combos
+        }
+
+    def iter_entries(self) -> Iterator[dict]:
+        """Recorre todas las entradas (rotados primero, en orden)."""
+        for file in self._files():
+            with open(file, encoding="utf-8") as fh:
+                for line in fh:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+
+    def flush(self, timeout: float = 5.0):
+        """Espera a que el escritor vacíe la cola."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def close(self):
+        if self._thread is None or self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout=10)
+
+    # ========================================================
+    # Internos
+    # ========================================================
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="feedback-writer", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def _count(self, entry: dict):
+        key = (
+            entry.get("tenant") or settings.DEFAULT_TENANT,
+            entry.get("doc_type") or "desconocido",
+            entry.get("provider") or "desconocido"
+        )
+        with self._lock:
+            self._counts[key][0] += 1
+            self._counts[key][1] += 1 if entry.get("correct") else 0
+
+    def _files(self) -> list[Path]:
+        rotated = sorted(self.path.parent.glob(f"{self.path.stem}.*{self.path.suffix}"))
+        return rotated + ([self.path] if self.path.exists() else [])
+
+    def _seed(self):
+        """Carga inicial: migra el JSON legado y cuenta lo ya escrito."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        if self.legacy_path and self.legacy_path.exists():
+            try:
+                legacy = json.loads(self.legacy_path.read_text(encoding="utf-8"))
+                with open(self.path, "a", encoding="utf-8") as fh:
+                    fh.write("".join(json.dumps(e, ensure_ascii=False) + "\n" for e in legacy))
+                self.legacy_path.rename(self.legacy_path.with_suffix(".json.migrated"))
+                logger.info(f"Feedback legado migrado: {len(legacy)} entradas")
+            except Exception as e:
+                logger.error(f"❌ No se pudo migrar feedback legado: {e}")
+
+        for entry in self.iter_entries():
+            self._count(entry)
+
+    def _rotate_if_needed(self, incoming: int):
+        if not self.path.exists() or self.path.stat().st_size + incoming <= self.max_bytes:
+            return
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        n = 0
+        target = self.path.with_name(f"{self.path.stem}.{stamp}-{n:03d}{self.path.suffix}")
+        while target.exists():
+            n += 1
+            target = self.path.with_name(f"{self.path.stem}.{stamp}-{n:03d}{self.path.suffix}")
+        self.path.rename(target)
+        logger.info(f"Feedback log rotado → {target.name}")
+
+    def _write(self, batch: list[dict]):
+        data = "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in batch)
+        self._rotate_if_needed(len(data.encode("utf-8")))
+        with open(self.path, "a", encoding="utf-8") as fh:
+            fh.write(data)
+
+    def _run(self):
+        try:
+            self._seed()
+        finally:
+            self._ready.set()
+
+        stop = False
+        while not stop:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            batch = [first]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            if None in batch:
+                stop = True
+            entries = [e for e in batch if e is not None]
+
+            try:
+                if entries:
+                    self._write(entries)
+            except Exception as e:
+                logger.error(f"❌ Error escribiendo feedback ({len(entries)} entradas): {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+
+feedback_store = FeedbackStore(
+    settings.FEEDBACK_LOG_PATH,
+    max_bytes=settings.FEEDBACK_MAX_BYTES,
+    batch_size=settings.FEEDBACK_BATCH_SIZE,
+    flush_interval=settings.FEEDBACK_FLUSH_INTERVAL,
+    legacy_path=Path("storages/feedback_log.json")
+)
@@ -1,52 +1,289 @@
 # app/core/logger.py
+
+"""
+Logging del servicio.
+
+- LOG_ASYNC: el request solo encola el LogRecord (QueueHandler) y un
+  hilo aparte (QueueListener) lo formatea y lo escribe en consola y en el
+  archivo rotativo. Con la cola llena el registro se descarta y se cuenta
+  en rag_log_dropped_total; nunca se bloquea el request.
+- LOG_FORMAT=json: una línea JSON por registro con request_id (header
+  REQUEST_ID_HEADER o, si no viene, el trace_id del request) y los
+  campos pasados en `extra=`.
+- Muestreo y rate limit por categoría (logger hijo "rag_service.<cat>",
+  ver get_logger): LOG_SAMPLING="embeddings=0.1", LOG_RATE_LIMITS="llm=20"
+  (registros por segundo). WARNING y superiores pasan siempre.
+- En el hot path se usa formateo perezoso (logger.debug("... %s", x)):
+  con el nivel desactivado no se formatea nada, y con LOG_ASYNC el
+  `msg % args` lo hace el listener.
+"""
+
+import atexit
+import json
 import logging
-from logging.handlers import RotatingFileHandler
-from pathlib import Path
+import queue
+import random
+import threading
+import time
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
 from .config import settings
+from .metrics import LOG_DROPPED
+from .tracing import current_trace
 
 LOG_DIR = settings.BASE_DIR / "logs"
 LOG_DIR.mkdir(parents=True, exist_ok=True)
 LOG_FILE = LOG_DIR / "rag_service.log"
 
+ROOT_LOGGER = "rag_service"
+TEXT_FORMAT = "%(asctime)s - %(levelname)s - %(name)s - [%(request_id)s] %(message)s"
+
+_request_id: ContextVar[str | None] = ContextVar("request_id", default=None)
+
+# Atributos propios de LogRecord: el resto son campos de `extra=`
+_RESERVED = set(logging.makeLogRecord({}).__dict__) | {"message", "asctime", "request_id", "category",
+                                                       "taskName", "_keep"}
+
+
+# ============================================================
+# Contexto del request
+# ============================================================
+def bind_request_id(value: str | None):
+    """Fija el request id del contexto actual; devuelve el token para reset_request_id."""
+    return _request_id.set(value)
+
+
+def reset_request_id(token):
+    _request_id.reset(token)
+
+
+def request_id() -> str | None:
+    rid = _request_id.get()
+    if rid:
+        return rid
+    trace = current_trace()
+    return trace.trace_id if trace else None
+
+
+def category_of(name: str) -> str:
+    if name == ROOT_LOGGER:
+        return "service"
+    if name.startswith(ROOT_LOGGER + "."):
+        return name[len(ROOT_LOGGER) + 1:].split(".", 1)[0]
+    return name
+
+
+def get_logger(category: str) -> logging.Logger:
+    """Logger hijo "rag_service.<category>": comparte handlers, muestreo y rate limit propios."""
+    return logging.getLogger(f"{ROOT_LOGGER}.{category}")
+
+
+# ============================================================
+# Filtros (corren en el hilo que loguea)
+# ============================================================
+class _ContextFilter(logging.Filter):
+    """request_id y categoría se capturan antes de cruzar al listener."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "request_id"):
+            record.request_id = request_id() or "-"
+        record.category = category_of(record.name)
+        return True
+
+
+class _TokenBucket:
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1.0:
+                return False
+            self.tokens -= 1.0
+            return True
+
+
+class _SamplingFilter(logging.Filter):
+    def __init__(self, sampling: dict[str, float], rate_limits: dict[str, float]):
+        super().__init__()
+        self.sampling = sampling
+        self.buckets = {cat: _TokenBucket(rate) for cat, rate in rate_limits.items() if rate > 0}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        # Sin cola el filtro está en cada handler: una sola decisión por registro
+        keep = getattr(record, "_keep", None)
+        if keep is None:
+            keep = record._keep = self._decide(record)
+        return keep
+
+    def _decide(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        category = record.category
+        rate = self.sampling.get(category)
+        if rate is not None and random.random() >= rate:
+            LOG_DROPPED.inc(category=category, reason="sampled")
+            return False
+        bucket = self.buckets.get(category)
+        if bucket is not None and not bucket.take():
+            LOG_DROPPED.inc(category=category, reason="rate_limited")
+            return False
+        return True
+
+
+def parse_rates(spec: str | None) -> dict[str, float]:
+    """"embeddings=0.1, llm=20" → {"embeddings": 0.1, "llm": 20.0}."""
+    out = {}
+    for item in (spec or "").split(","):
+        if not item.strip():
+            continue
+        category, sep, value = item.partition("=")
+        if not sep:
+            raise ValueError(f"Entrada de logging inválida (se espera categoria=valor): {item!r}")
+        out[category.strip()] = float(value)
+    return out
+
+
+# ============================================================
+# Formato
+# ============================================================
+class JsonFormatter(logging.Formatter):
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "category": getattr(record, "category", category_of(record.name)),
+            "request_id": getattr(record, "request_id", None),
+            "msg": record.getMessage(),
+            "thread": record.threadName,
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED:
+                payload[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload["exc"] = record.exc_text
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+def _formatter(fmt: str) -> logging.Formatter:
+    return JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT)
+
+
+# ============================================================
+# Envío asíncrono
+# ============================================================
+class _NonBlockingQueueHandler(QueueHandler):
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Misma memoria que el listener: no hace falta formatear aquí
+        # (QueueHandler lo hace para poder serializar el registro). Solo
+        # el traceback, que referencia frames vivos.
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_DROPPED.inc(category=getattr(record, "category", "service"), reason="queue_full")
+
+
+def build_filters(sampling: dict | None = None, rate_limits: dict | None = None) -> list[logging.Filter]:
+    """Contexto (request_id, categoría) + muestreo / rate limit si hay configurados."""
+    filters: list[logging.Filter] = [_ContextFilter()]
+    if sampling or rate_limits:
+        filters.append(_SamplingFilter(sampling or {}, rate_limits or {}))
+    return filters
+
+
+def build_handlers(log_file=LOG_FILE, fmt: str = "json", level: int = logging.INFO,
+                   use_async: bool = True, queue_size: int = 10_000, console: bool = True,
+                   sampling: dict | None = None, rate_limits: dict | None = None
+                   ) -> tuple[list[logging.Handler], QueueListener | None]:
+    """
+    Handlers a colgar del logger raíz del servicio (+ el listener a
+    arrancar/parar si use_async). Separado de _build_logger para que
+    benchmarks/bench_logging.py compare configuraciones.
+    """
+    sinks: list[logging.Handler] = []
+    if console:
+        sinks.append(logging.StreamHandler())
+    if log_file:
+        sinks.append(RotatingFileHandler(str(log_file), maxBytes=5 * 1024 * 1024, backupCount=5, encoding="utf-8"))
+    for h in sinks:
+        h.setLevel(level)
+        h.setFormatter(_formatter(fmt))
+
+    filters = build_filters(sampling, rate_limits)
+
+    if not use_async:
+        for h in sinks:
+            for f in filters:
+                h.addFilter(f)
+        return sinks, None
+
+    front = _NonBlockingQueueHandler(queue.Queue(maxsize=max(1, queue_size)))
+    front.setLevel(level)
+    for f in filters:
+        front.addFilter(f)
+    listener = QueueListener(front.queue, *sinks, respect_handler_level=True)
+    return [front], listener
+
+
+_listener: QueueListener | None = None
+
 
 def _build_logger() -> logging.Logger:
-    logger = logging.getLogger("rag_service")
+    global _listener
+    logger = logging.getLogger(ROOT_LOGGER)
     if logger.handlers:
         return logger  # ya inicializado
 
-    logger.setLevel(logging.DEBUG if settings.DEBUG else logging.INFO)
+    level = logging.getLevelName((settings.LOG_LEVEL or "INFO").upper())
+    logger.setLevel(level)
 
-    # Console handler
-    ch = logging.StreamHandler()
-    ch.setLevel(logging.DEBUG if settings.DEBUG else logging.INFO)
-    ch_formatter = logging.Formatter(
-        "%(asctime)s - %(levelname)s - %(name)s - %(message)s"
-    )
-    ch.setFormatter(ch_formatter)
-
-    # Rotating file handler
-    fh = RotatingFileHandler(
-        str(LOG_FILE),
-        maxBytes=5 * 1024 * 1024,
-        backupCount=5,
-        encoding="utf-8"
-    )
-    fh.setLevel(logging.DEBUG)
-    fh_formatter = logging.Formatter(
-        "%(asctime)s - %(levelname)s - %(name)s - %(message)s"
+    handlers, _listener = build_handlers(
+        fmt=(settings.LOG_FORMAT or "json").lower(),
+        level=level,
+        use_async=settings.LOG_ASYNC,
+        queue_size=settings.LOG_QUEUE_SIZE,
+        sampling=parse_rates(settings.LOG_SAMPLING),
+        rate_limits=parse_rates(settings.LOG_RATE_LIMITS),
     )
-    fh.setFormatter(fh_formatter)
-
-    logger.addHandler(ch)
-    logger.addHandler(fh)
+    for h in handlers:
+        logger.addHandler(h)
     logger.propagate = False
+    if _listener is not None:
+        _listener.start()
+        atexit.register(shutdown)
 
     # 🔹 LOG DE CONFIGURACIÓN DE PROVEEDORES (HF / OpenAI)
     logger.info("🔧 Logger inicializado")
-    logger.info(f"🧠 EMBEDDINGS Provider: {settings.EMB_PROVIDER} | Modelo: {settings.EMB_MODEL}")
-    logger.info(f"🤖 LLM Provider: {settings.LLM_PROVIDER} | Modelo HF: {settings.HF_MODEL}")
+    logger.info("🧠 EMBEDDINGS Provider: %s | Modelo: %s", settings.EMB_PROVIDER, settings.EMB_MODEL)
+    logger.info("🤖 LLM Provider: %s | Modelo HF: %s", settings.LLM_PROVIDER, settings.HF_MODEL)
 
     return logger
 
 
+def shutdown():
+    """Vacía la cola y detiene el listener (shutdown de la app / atexit)."""
+    global _listener
+    listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+
+
 logger = _build_logger()
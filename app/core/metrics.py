@@ -0,0 +1,359 @@
+# app/core/metrics.py
+
+"""
+Registro de métricas en formato Prometheus (text exposition 0.0.4).
+
+Implementación mínima y sin dependencias: cada métrica guarda sus series
+en un dict indexado por la tupla de labels, protegido por un lock. Una
+observación cuesta un lookup + bisect, así que se puede usar en el hot path.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from .tracing import span
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0
+)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(names, values, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._series: dict = {}
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def _header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._series.get(self._key(labels), 0.0)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = list(self._series.items())
+        return self._header() + [
+            f"{self.name}{_fmt_labels(self.labelnames, k)} {v}" for k, v in items
+        ]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        return self._series.get(self._key(labels), 0.0)
+
+    @contextmanager
+    def track_inprogress(self, **labels):
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = list(self._series.items())
+        return self._header() + [
+            f"{self.name}{_fmt_labels(self.labelnames, k)} {v}" for k, v in items
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS,
+                 registry=None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # [conteos por bucket (no acumulados) + overflow, suma, total]
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][idx] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        series = self._series.get(self._key(labels))
+        return series[2] if series else 0
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = [(k, list(s[0]), s[1], s[2]) for k, s in self._series.items()]
+
+        lines = self._header()
+        for key, counts, total, n in items:
+            acc = 0
+            for bound, c in zip(self.buckets, counts):
+                acc += c
+                le = _fmt_labels(self.labelnames, key, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{le} {acc}")
+            le = _fmt_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{le} {n}")
+            lines.append(f"{self.name}_sum{_fmt_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_fmt_labels(self.labelnames, key)} {n}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list[_Metric] = []
+
+    def register(self, metric: _Metric):
+        self._metrics.append(metric)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+# ============================================================
+# Labels que vienen del request (cardinalidad acotada)
+# ============================================================
+# provider / doc_type llegan del cliente: fuera de estos valores se
+# publican como "other" para no crear series nuevas por cada entrada.
+PROVIDER_LABELS = frozenset({"openai", "hf", "hf_inference", "sentence_transformers", "default"})
+DOC_TYPE_LABELS = frozenset({"contrato", "correo", "factura", "propuesta", "pqr", "acta",
+                             "documento", "desconocido", "lote"})
+
+
+def bounded(value: str | None, allowed: frozenset, default: str) -> str:
+    value = value or default
+    return value if value in allowed else "other"
+
+
+# ============================================================
+# Métricas del servicio
+# ============================================================
+STAGE_LATENCY = Histogram(
+    "rag_stage_duration_seconds",
+    "Duración de cada etapa de answer_question / ingest_file_to_pinecone.",
+    ["pipeline", "stage", "provider", "doc_type"]
+)
+REQUEST_LATENCY = Histogram(
+    "rag_http_request_duration_seconds",
+    "Duración de requests HTTP por endpoint.",
+    ["endpoint", "method", "status"]
+)
+IN_FLIGHT = Gauge(
+    "rag_http_requests_in_flight",
+    "Requests HTTP en curso por endpoint.",
+    ["endpoint"]
+)
+CACHE_REQUESTS = Counter(
+    "rag_cache_requests_total",
+    "Consultas a caches internas (result=hit|miss).",
+    ["cache", "result"]
+)
+PROVIDER_ERRORS = Counter(
+    "rag_provider_errors_total",
+    "Errores de proveedores externos (embeddings, LLM, reranker).",
+    ["kind", "provider"]
+)
+FALLBACKS = Counter(
+    "rag_fallbacks_total",
+    "Respuestas degradadas servidas por un fallback.",
+    ["kind", "provider"]
+)
+SCHEDULER_WAIT = Histogram(
+    "rag_scheduler_wait_seconds",
+    "Tiempo en cola del scheduler antes de ejecutar (kind=query|ingest).",
+    ["kind"]
+)
+SCHEDULER_QUEUED = Gauge(
+    "rag_scheduler_queued_jobs",
+    "Trabajos esperando en el scheduler.",
+    ["kind"]
+)
+SCHEDULER_REJECTED = Counter(
+    "rag_scheduler_rejected_total",
+    "Trabajos rechazados por cuota de tenant (reason=queue_full|rate; el tenant va al log).",
+    ["kind", "reason"]
+)
+ADMISSION_IN_FLIGHT = Gauge(
+    "rag_admission_in_flight",
+    "Requests admitidos en curso por pool (pool=query|ingest).",
+    ["pool"]
+)
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "rag_admission_queue_depth",
+    "Requests esperando admisión por pool (señal de autoscaling).",
+    ["pool"]
+)
+ADMISSION_WAIT = Histogram(
+    "rag_admission_wait_seconds",
+    "Espera hasta ser admitido (solo requests que llegaron a encolarse).",
+    ["pool"]
+)
+ADMISSION_SHED = Counter(
+    "rag_admission_shed_total",
+    "Requests rechazados con 503 (reason=queue_full|deadline|timeout).",
+    ["pool", "reason"]
+)
+RETRIEVAL_DEPTH = Histogram(
+    "rag_retrieval_depth",
+    "Candidatos por query (kind=requested|kept|rerank con profundidad adaptativa; documents en dos etapas).",
+    ["kind"],
+    buckets=(1, 2, 3, 5, 8, 10, 15, 20, 30, 50, 100, 200)
+)
+PROMPT_TOKENS = Histogram(
+    "rag_prompt_tokens",
+    "Tokens del prompt enviado al LLM (tokenizer del modelo destino).",
+    ["provider", "doc_type"],
+    buckets=(128, 256, 512, 1024, 1536, 2048, 3072, 4096, 8192, 16384)
+)
+
+PROVIDER_HEDGES = Counter(
+    "rag_provider_hedges_total",
+    "Requests de hedge lanzados al superar el p95 del proveedor (provider=destino).",
+    ["kind", "provider"]
+)
+PROVIDER_REROUTES = Counter(
+    "rag_provider_reroutes_total",
+    "Llamadas desviadas a otro candidato (reason=open|error).",
+    ["kind", "source", "target", "reason"]
+)
+BREAKER_TRIPS = Counter(
+    "rag_breaker_trips_total",
+    "Aperturas de circuit breaker por proveedor.",
+    ["kind", "provider"]
+)
+BREAKER_REJECTED = Counter(
+    "rag_breaker_rejected_total",
+    "Llamadas rechazadas sin intentar por circuito abierto.",
+    ["kind", "provider"]
+)
+BREAKER_STATE = Gauge(
+    "rag_breaker_state",
+    "Estado del circuit breaker (0=closed, 1=half_open, 2=open).",
+    ["kind", "provider"]
+)
+
+LOG_DROPPED = Counter(
+    "rag_log_dropped_total",
+    "Registros de log descartados (reason=sampled|rate_limited|queue_full).",
+    ["category", "reason"]
+)
+
+
+_current_timer: ContextVar["StageTimer | None"] = ContextVar("stage_timer", default=None)
+
+
+class StageTimer:
+    """
+    Cronometra las etapas de un pipeline. Mientras está activo
+    (`with StageTimer("query") as timer:`) cualquier `stage("x")` del
+    mismo contexto suma su duración en `timer.durations`. Se publican
+    juntas con observe(), cuando ya se conocen los labels finales
+    (p.ej. doc_type tras la detección).
+    """
+
+    def __init__(self, pipeline: str):
+        self.pipeline = pipeline
+        self.durations: dict[str, float] = {}
+        self._token = None
+
+    def __enter__(self):
+        self._token = _current_timer.set(self)
+        return self
+
+    def __exit__(self, *exc):
+        _current_timer.reset(self._token)
+        return False
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.durations[name] = self.durations.get(name, 0.0) + time.perf_counter() - start
+
+    def observe(self, provider: str | None, doc_type: str | None):
+        for stage_name, seconds in self.durations.items():
+            STAGE_LATENCY.observe(
+                seconds,
+                pipeline=self.pipeline,
+                stage=stage_name,
+                provider=bounded(provider, PROVIDER_LABELS, "default"),
+                doc_type=bounded(doc_type, DOC_TYPE_LABELS, "desconocido")
+            )
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Cronometra una etapa en el StageTimer activo y la registra como span
+    del trace en curso (ambos son no-op si no están activos).
+    """
+    timer = _current_timer.get()
+    with span(name):
+        if timer is None:
+            yield
+        else:
+            with timer.stage(name):
+                yield
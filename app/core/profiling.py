@@ -0,0 +1,228 @@
+# app/core/profiling.py
+
+"""
+Profiling bajo demanda (sin redeploy).
+
+- Por request: con PROFILING_ENABLED=true, el header X-Profile (o el query
+  param ?profile=) envuelve el handler en cProfile ("cprofile", pstats) o
+  en el sampler ("sample", collapsed stacks). El perfil viaja en un
+  contextvar: los trabajos que el request encola en el scheduler se
+  miden en su hilo worker (profiled_call) y se suman al mismo archivo.
+- Proceso completo: sample_process(segundos) muestrea todos los hilos
+  (tokenizers, torch, PyMuPDF...) y guarda collapsed stacks.
+
+Los resultados quedan en logs/profiles/. Los .collapsed se abren con
+speedscope o flamegraph.pl; los .pstats con `python -m pstats` o snakeviz.
+"""
+
+import cProfile
+import io
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from pathlib import Path
+
+from .config import settings
+from .logger import logger
+
+PROFILE_DIR = settings.BASE_DIR / "logs" / "profiles"
+
+# cProfile no admite dos perfiles activos en el mismo hilo
+_profile_lock = threading.Lock()
+
+# Perfil del request en curso (lo heredan los trabajos del scheduler)
+_current: ContextVar["RequestProfiler | None"] = ContextVar("request_profiler", default=None)
+
+
+def _profile_path(label: str, suffix: str) -> Path:
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    safe = "".join(c if c.isalnum() or c in "-_" else "_" for c in label)[:60]
+    return PROFILE_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}-{safe}{suffix}"
+
+
+# ============================================================
+# Sampler (collapsed stacks)
+# ============================================================
+class StackSampler:
+    """
+    Muestrea periódicamente las pilas de los hilos con sys._current_frames()
+    desde un hilo propio. thread_ids=None → todos los hilos del proceso.
+    """
+
+    def __init__(self, interval: float = 0.005, thread_ids: set[int] | None = None):
+        self.interval = interval
+        self.thread_ids = thread_ids
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for tid, frame in frames.items():
+                if tid == own or (self.thread_ids is not None and tid not in self.thread_ids):
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                if tid not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stack.append(names.get(tid, str(tid)))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common()) + "\n"
+
+    def top(self, n: int = 15) -> list[dict]:
+        """Frames hoja más frecuentes (self time aproximado)."""
+        leaves: Counter = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        total = sum(leaves.values()) or 1
+        return [
+            {"frame": frame, "samples": c, "pct": round(100 * c / total, 1)}
+            for frame, c in leaves.most_common(n)
+        ]
+
+    def save(self, label: str) -> Path:
+        path = _profile_path(label, ".collapsed")
+        path.write_text(self.collapsed(), encoding="utf-8")
+        return path
+
+
+# ============================================================
+# Perfil de un request
+# ============================================================
+class RequestProfiler:
+    """
+    Perfil de un bloque de código en el hilo actual y en los workers del
+    scheduler que ejecutan trabajos encolados desde él (run_in_thread).
+    mode="cprofile" → determinístico (.pstats + resumen .txt)
+    mode="sample"   → muestreo de esos hilos (.collapsed)
+    Si ya hay otro perfil en curso, `active` queda en False y no se mide.
+    """
+
+    def __init__(self, label: str, mode: str = "cprofile"):
+        self.label = label
+        self.mode = "sample" if mode == "sample" else "cprofile"
+        self.active = False
+        self.path: Path | None = None
+        self._profiler = None
+        self._workers: list[cProfile.Profile] = []      # perfiles de hilos worker
+        self._lock = threading.Lock()
+        self._token = None
+
+    def __enter__(self):
+        if not _profile_lock.acquire(blocking=False):
+            logger.warning("⚠ Profiling ya en curso; se ignora este request.")
+            return self
+
+        self.active = True
+        if self.mode == "sample":
+            self._profiler = StackSampler(
+                interval=settings.PROFILING_SAMPLE_INTERVAL,
+                thread_ids={threading.get_ident()}
+            ).start()
+        else:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, *exc):
+        if not self.active:
+            return False
+        _current.reset(self._token)
+        with self._lock:
+            self.active = False             # trabajos que empiecen después no se miden
+            workers = list(self._workers)
+        try:
+            if self.mode == "sample":
+                self._profiler.stop()
+                self.path = self._profiler.save(self.label)
+            else:
+                self._profiler.disable()
+                self.path = _profile_path(self.label, ".pstats")
+                out = io.StringIO()
+                stats = pstats.Stats(self._profiler, stream=out)
+                for worker in workers:
+                    stats.add(worker)
+                stats.dump_stats(str(self.path))
+                stats.sort_stats("cumulative").print_stats(40)
+                self.path.with_suffix(".txt").write_text(out.getvalue(), encoding="utf-8")
+
+            logger.info(f"🧪 Perfil guardado: {self.path}")
+        finally:
+            _profile_lock.release()
+        return False
+
+    def run_in_thread(self, fn, /, *args, **kwargs):
+        """Ejecuta fn en el hilo actual (worker) midiéndola dentro de este perfil."""
+        with self._lock:
+            active = self.active
+        if not active:
+            return fn(*args, **kwargs)
+
+        if self.mode == "sample":
+            tid = threading.get_ident()
+            self._profiler.thread_ids.add(tid)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._profiler.thread_ids.discard(tid)
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:                  # otro profiler activo en este hilo
+            return fn(*args, **kwargs)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profile.disable()
+            with self._lock:
+                if self.active:
+                    self._workers.append(profile)
+
+
+def profiled_call(fn, /, *args, **kwargs):
+    """Corre fn bajo el perfil del request que la encoló, si lo hay (scheduler)."""
+    profiler = _current.get()
+    if profiler is None:
+        return fn(*args, **kwargs)
+    return profiler.run_in_thread(fn, *args, **kwargs)
+
+
+def requested_mode(headers, query_params) -> str | None:
+    """Modo pedido por header/query param, solo si PROFILING_ENABLED."""
+    if not settings.PROFILING_ENABLED:
+        return None
+    value = headers.get(settings.PROFILING_HEADER) or query_params.get("profile")
+    if not value or value.lower() in ("0", "false", "no"):
+        return None
+    return "sample" if value.lower() == "sample" else "cprofile"
+
+
+def sample_process(seconds: float, interval: float | None = None) -> tuple[StackSampler, Path]:
+    """Muestrea todos los hilos del proceso durante `seconds` (bloqueante)."""
+    sampler = StackSampler(interval=interval or settings.PROFILING_SAMPLE_INTERVAL).start()
+    time.sleep(seconds)
+    sampler.stop()
+    return sampler, sampler.save(f"process-{int(seconds)}s")
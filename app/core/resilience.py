@@ -0,0 +1,287 @@
+# app/core/resilience.py
+
+"""
+Circuit breakers por proveedor y requests con hedging.
+
+- CircuitBreaker: por (kind, provider), p.ej. ("llm", "hf"). Tras
+  BREAKER_FAILURE_THRESHOLD fallos seguidos se abre y rechaza llamadas
+  al instante durante BREAKER_RESET_SECONDS; después deja pasar una
+  sola llamada de prueba (half-open) que lo cierra o lo vuelve a abrir.
+  Guarda las latencias recientes (p50 / p95) para el hedging y /health.
+- resilient_call(kind, candidates): corre el primer candidato con el
+  circuito cerrado; si tarda más que el p95 de su proveedor lanza el
+  siguiente (otro proveedor o una réplica del mismo) y devuelve la
+  primera respuesta buena. Un candidato con el circuito abierto se salta
+  (reroute); si no queda ninguno, ProviderUnavailable sin esperar.
+
+Todo hedge, apertura de circuito, rechazo y reroute se cuenta en
+/metrics.
+"""
+
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, TypeVar
+
+from .config import settings
+from .logger import get_logger
+from .metrics import (
+    BREAKER_REJECTED,
+    BREAKER_STATE,
+    BREAKER_TRIPS,
+    PROVIDER_HEDGES,
+    PROVIDER_REROUTES,
+)
+
+T = TypeVar("T")
+
+logger = get_logger("resilience")
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+_STATE_VALUE = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+# Latencias necesarias antes de usar el p95 propio para el hedge
+_MIN_SAMPLES = 20
+
+
+class ProviderUnavailable(RuntimeError):
+    """Ningún candidato disponible (circuitos abiertos) o todos fallaron."""
+
+
+class CircuitBreaker:
+
+    def __init__(self, kind: str, provider: str, failure_threshold: int = 5,
+                 reset_timeout: float = 30.0, window: int = 200):
+        self.kind = kind
+        self.provider = provider
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._calls = 0
+        self._errors = 0
+        self._set_gauge()
+
+    # --------------------------------------------------------
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def allow(self) -> bool:
+        """¿Se puede llamar ahora? En half-open solo pasa una llamada de prueba."""
+        with self._lock:
+            if self._state == OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = HALF_OPEN
+                self._probing = False
+                self._set_gauge()
+            if self._state == HALF_OPEN:
+                if self._probing:
+                    return False
+                self._probing = True
+            return True
+
+    def record_success(self, latency: float):
+        with self._lock:
+            self._calls += 1
+            self._latencies.append(latency)
+            self._failures = 0
+            if self._state != CLOSED:
+                logger.info("✅ Circuito %s/%s cerrado", self.kind, self.provider)
+                self._state = CLOSED
+                self._probing = False
+                self._set_gauge()
+
+    def record_failure(self):
+        with self._lock:
+            self._calls += 1
+            self._errors += 1
+            self._failures += 1
+            if self._state == HALF_OPEN or (self._state == CLOSED and self._failures >= self.failure_threshold):
+                self._trip()
+
+    def _trip(self):
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._probing = False
+        self._set_gauge()
+        BREAKER_TRIPS.inc(kind=self.kind, provider=self.provider)
+        logger.warning(
+            f"⚠️ Circuito {self.kind}/{self.provider} abierto "
+            f"({self._failures} fallos seguidos, reintento en {self.reset_timeout:.0f}s)"
+        )
+
+    def _set_gauge(self):
+        BREAKER_STATE.set(_STATE_VALUE[self._state], kind=self.kind, provider=self.provider)
+
+    # --------------------------------------------------------
+    def percentile(self, q: float) -> float | None:
+        with self._lock:
+            samples = sorted(self._latencies)
+        if len(samples) < _MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def hedge_delay(self) -> float:
+        p95 = self.percentile(0.95)
+        if p95 is None:
+            return settings.HEDGE_DEFAULT_DELAY
+        return max(settings.HEDGE_MIN_DELAY, p95)
+
+    def snapshot(self) -> dict:
+        p50, p95 = self.percentile(0.5), self.percentile(0.95)
+        with self._lock:
+            return {
+                "state": self._state,
+                "consecutive_failures": self._failures,
+                "calls": self._calls,
+                "errors": self._errors,
+                "p50_s": round(p50, 3) if p50 is not None else None,
+                "p95_s": round(p95, 3) if p95 is not None else None,
+            }
+
+
+# ============================================================
+# Registro de breakers
+# ============================================================
+_breakers: dict[tuple[str, str], CircuitBreaker] = {}
+_registry_lock = threading.Lock()
+
+
+def breaker(kind: str, provider: str) -> CircuitBreaker:
+    key = (kind, provider)
+    with _registry_lock:
+        b = _breakers.get(key)
+        if b is None:
+            b = _breakers[key] = CircuitBreaker(
+                kind, provider,
+                failure_threshold=settings.BREAKER_FAILURE_THRESHOLD,
+                reset_timeout=settings.BREAKER_RESET_SECONDS,
+            )
+        return b
+
+
+def health() -> dict:
+    """{"kind/provider": snapshot} para /health."""
+    with _registry_lock:
+        items = list(_breakers.items())
+    return {f"{kind}/{provider}": b.snapshot() for (kind, provider), b in items}
+
+
+def reset():
+    with _registry_lock:
+        _breakers.clear()
+
+
+# ============================================================
+# Llamada con hedging + reroute
+# ============================================================
+# Hilos para las llamadas bloqueantes (HTTP) a los proveedores
+_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="provider-call")
+
+
+class _Attempt:
+    __slots__ = ("provider", "breaker", "start", "abandoned")
+
+    def __init__(self, provider: str, b: CircuitBreaker):
+        self.provider = provider
+        self.breaker = b
+        self.start = time.perf_counter()
+        self.abandoned = False
+
+
+def _run(attempt: _Attempt, fn: Callable[[], T]) -> T:
+    """Ejecuta el intento y alimenta el breaker antes de resolver el future
+    (salvo si ya se contó como fallo por plazo vencido)."""
+    try:
+        result = fn()
+    except BaseException:
+        if not attempt.abandoned:
+            attempt.breaker.record_failure()
+        raise
+    if not attempt.abandoned:
+        attempt.breaker.record_success(time.perf_counter() - attempt.start)
+    return result
+
+
+def resilient_call(kind: str, candidates: list[tuple[str, Callable[[], T]]],
+                   timeout: float | None = None) -> T:
+    """
+    candidates: [(provider, fn)] en orden de preferencia; el mismo
+    provider puede repetirse (hedge contra otra réplica). Devuelve el
+    primer resultado exitoso o lanza ProviderUnavailable.
+    """
+    if not candidates:
+        raise ProviderUnavailable(f"{kind}: sin candidatos")
+
+    primary = candidates[0][0]
+    pending = deque(candidates)
+    running: dict[Future, _Attempt] = {}
+    deadline = time.monotonic() + (timeout or settings.PROVIDER_TIMEOUT)
+    errors: list[str] = []
+    hedged = False
+
+    def launch(reason: str) -> bool:
+        while pending:
+            provider, fn = pending.popleft()
+            b = breaker(kind, provider)
+            if not b.allow():
+                BREAKER_REJECTED.inc(kind=kind, provider=provider)
+                errors.append(f"{provider}: circuito abierto")
+                reason = "open"
+                continue
+            if reason in ("open", "error"):
+                PROVIDER_REROUTES.inc(kind=kind, source=primary, target=provider, reason=reason)
+                logger.warning("↪️ %s: reroute %s → %s (%s)", kind, primary, provider, reason)
+            attempt = _Attempt(provider, b)
+            future = _pool.submit(contextvars.copy_context().run, _run, attempt, fn)
+            running[future] = attempt
+            return True
+        return False
+
+    launch("primary")
+    while running:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+
+        can_hedge = settings.HEDGE_ENABLED and not hedged and pending
+        first = next(iter(running.values()))
+        budget = remaining
+        if can_hedge:
+            budget = min(remaining, max(0.0, first.start + first.breaker.hedge_delay() - time.perf_counter()))
+
+        done, _ = wait(list(running), timeout=budget, return_when=FIRST_COMPLETED)
+        if not done:
+            if can_hedge and time.monotonic() < deadline:
+                hedged = True
+                if launch("hedge"):
+                    target = running[list(running)[-1]].provider
+                    PROVIDER_HEDGES.inc(kind=kind, provider=target)
+                    logger.info("🔀 %s: hedge a %s tras %.2fs", kind, target, time.perf_counter() - first.start)
+            continue
+
+        for future in done:
+            attempt = running.pop(future)
+            if future.exception() is None:
+                return future.result()
+            errors.append(f"{attempt.provider}: {future.exception()}")
+
+        if not running:
+            launch("error")
+
+    # Plazo vencido: lo que sigue corriendo cuenta como fallo ya
+    for attempt in running.values():
+        attempt.abandoned = True
+        attempt.breaker.record_failure()
+        errors.append(f"{attempt.provider}: sin respuesta en el plazo")
+
+    raise ProviderUnavailable(f"{kind}: " + "; ".join(errors or ["sin candidatos disponibles"]))
@@ -0,0 +1,199 @@
+# app/core/scheduler.py
+
+"""
+Ejecución justa entre tenants del trabajo bloqueante (queries, ingestas).
+
+- Un pool fijo de hilos (WORKER_THREADS) saca trabajos de colas por
+  tenant en round-robin: un tenant con 500 ingestas en cola no retrasa
+  la query de otro más que un turno.
+- Límites de concurrencia por tenant y tipo de trabajo
+  (TENANT_MAX_CONCURRENT_*) y un tope global de ingestas
+  (INGEST_MAX_WORKERS) para que siempre queden hilos para queries.
+- Cola acotada por tenant (TENANT_MAX_QUEUE) y cuota de ingestas por
+  minuto (token bucket): al excederlas se lanza TenantQuotaExceeded.
+
+Los trabajos corren con el contexto (contextvars) del request que los
+encoló, así tracing, StageTimer y el profiling por request siguen
+funcionando.
+"""
+
+import asyncio
+import contextvars
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+
+from .config import settings
+from .logger import logger
+from .metrics import SCHEDULER_QUEUED, SCHEDULER_REJECTED, SCHEDULER_WAIT
+from .profiling import profiled_call
+from .tenancy import TenantQuotaExceeded
+
+
+class _Job:
+    __slots__ = ("tenant", "kind", "fn", "args", "kwargs", "ctx", "future", "enqueued")
+
+    def __init__(self, tenant, kind, fn, args, kwargs):
+        self.tenant = tenant
+        self.kind = kind
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.ctx = contextvars.copy_context()
+        self.future: Future = Future()
+        self.enqueued = time.perf_counter()
+
+
+class FairScheduler:
+    """
+    tenant_limits: {kind: máx. trabajos simultáneos por tenant}
+    global_limits: {kind: máx. trabajos simultáneos en total}
+    Un kind sin límite solo está acotado por el número de hilos.
+    """
+
+    def __init__(self, workers: int, tenant_limits: dict[str, int] | None = None,
+                 global_limits: dict[str, int] | None = None, max_queue: int = 64,
+                 name: str = "rag-worker"):
+        self.workers = max(1, workers)
+        self.tenant_limits = tenant_limits or {}
+        self.global_limits = global_limits or {}
+        self.max_queue = max_queue
+        self.name = name
+
+        self._cond = threading.Condition()
+        self._queues: dict[str, deque[_Job]] = {}
+        self._order: deque[str] = deque()           # tenants con trabajo pendiente
+        self._running: Counter = Counter()          # (tenant, kind) → en curso
+        self._running_kind: Counter = Counter()     # kind → en curso
+        self._threads: list[threading.Thread] = []
+
+    # ========================================================
+    # API pública
+    # ========================================================
+    def submit(self, tenant: str, kind: str, fn, /, *args, **kwargs) -> Future:
+        job = _Job(tenant, kind, fn, args, kwargs)
+        with self._cond:
+            self._ensure_started()
+            queue = self._queues.get(tenant)
+            if queue is None:
+                queue = self._queues[tenant] = deque()
+                self._order.append(tenant)
+            if len(queue) >= self.max_queue:
+                SCHEDULER_REJECTED.inc(kind=kind, reason="queue_full")
+                logger.warning(f"⚠️ Cola de {kind} llena para tenant '{tenant}' ({self.max_queue} trabajos)")
+                raise TenantQuotaExceeded(tenant, f"cola llena ({self.max_queue} trabajos)")
+            queue.append(job)
+            SCHEDULER_QUEUED.inc(kind=kind)
+            self._cond.notify()
+        return job.future
+
+    async def run(self, tenant: str, kind: str, fn, /, *args, **kwargs):
+        """Encola y espera el resultado sin bloquear el event loop."""
+        return await asyncio.wrap_future(self.submit(tenant, kind, fn, *args, **kwargs))
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "workers": self.workers,
+                "queued": {t: len(q) for t, q in self._queues.items()},
+                "running": {f"{t}/{k}": n for (t, k), n in self._running.items() if n},
+            }
+
+    # ========================================================
+    # Internos
+    # ========================================================
+    def _ensure_started(self):
+        if self._threads:
+            return
+        for i in range(self.workers):
+            t = threading.Thread(target=self._worker, name=f"{self.name}-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def _runnable(self, job: _Job) -> bool:
+        tenant_limit = self.tenant_limits.get(job.kind)
+        if tenant_limit and self._running[(job.tenant, job.kind)] >= tenant_limit:
+            return False
+        global_limit = self.global_limits.get(job.kind)
+        if global_limit and self._running_kind[job.kind] >= global_limit:
+            return False
+        return True
+
+    def _next_job(self) -> _Job | None:
+        """Round-robin por tenant; dentro del tenant, el primer trabajo que pueda correr."""
+        for _ in range(len(self._order)):
+            tenant = self._order[0]
+            self._order.rotate(-1)
+            queue = self._queues[tenant]
+            for i, job in enumerate(queue):
+                if self._runnable(job):
+                    del queue[i]
+                    if not queue:
+                        self._order.remove(tenant)
+                        del self._queues[tenant]
+                    return job
+        return None
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                job = self._next_job()
+                while job is None:
+                    self._cond.wait()
+                    job = self._next_job()
+                self._running[(job.tenant, job.kind)] += 1
+                self._running_kind[job.kind] += 1
+
+            SCHEDULER_QUEUED.dec(kind=job.kind)
+            SCHEDULER_WAIT.observe(time.perf_counter() - job.enqueued, kind=job.kind)
+            try:
+                if job.future.set_running_or_notify_cancel():
+                    try:
+                        job.future.set_result(job.ctx.run(profiled_call, job.fn, *job.args, **job.kwargs))
+                    except BaseException as e:
+                        job.future.set_exception(e)
+            finally:
+                with self._cond:
+                    self._running[(job.tenant, job.kind)] -= 1
+                    self._running_kind[job.kind] -= 1
+                    # un hueco puede desbloquear trabajos de cualquier tenant
+                    self._cond.notify_all()
+
+
+class RateLimiter:
+    """Token bucket por tenant: `per_minute` operaciones, ráfaga de hasta `burst`."""
+
+    def __init__(self, per_minute: float, burst: float | None = None):
+        self.rate = per_minute / 60.0
+        self.burst = burst or max(1.0, per_minute)
+        self._lock = threading.Lock()
+        self._buckets: dict[str, tuple[float, float]] = {}     # tenant → (tokens, ts)
+
+    def acquire(self, tenant: str, kind: str = "ingest"):
+        if self.rate <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            tokens, ts = self._buckets.get(tenant, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - ts) * self.rate)
+            if tokens < 1.0:
+                self._buckets[tenant] = (tokens, now)
+                retry_after = (1.0 - tokens) / self.rate
+                SCHEDULER_REJECTED.inc(kind=kind, reason="rate")
+                logger.warning(f"⚠️ Cuota de {kind} agotada para tenant '{tenant}'")
+                raise TenantQuotaExceeded(tenant, f"cuota de {kind} por minuto agotada", retry_after)
+            self._buckets[tenant] = (tokens - 1.0, now)
+
+
+scheduler = FairScheduler(
+    settings.WORKER_THREADS,
+    tenant_limits={
+        "query": settings.TENANT_MAX_CONCURRENT_QUERIES,
+        "ingest": settings.TENANT_MAX_CONCURRENT_INGESTS,
+        "batch": settings.QUERY_BATCH_LLM_CONCURRENCY,
+    },
+    global_limits={"ingest": min(settings.INGEST_MAX_WORKERS, max(1, settings.WORKER_THREADS - 1))},
+    max_queue=settings.TENANT_MAX_QUEUE,
+)
+ingest_quota = RateLimiter(settings.TENANT_INGEST_PER_MINUTE)
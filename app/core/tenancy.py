@@ -0,0 +1,55 @@
+# app/core/tenancy.py
+
+"""
+Identidad de tenant por request.
+
+El tenant llega en el header TENANT_HEADER (lo fija el gateway / backend
+del CRM, este servicio no lo autentica). Sin header se usa
+DEFAULT_TENANT, que conserva las claves de siempre: los datos previos a
+multi-tenant siguen siendo del tenant por defecto.
+"""
+
+import re
+
+from fastapi import HTTPException, Request
+
+from .config import settings
+
+# minúsculas, dígitos y guiones: válido como parte de namespace / ruta
+_TENANT_RE = re.compile(r"^[a-z0-9][a-z0-9-]{0,62}$")
+
+
+class TenantQuotaExceeded(Exception):
+    """Cuota o cola del tenant agotada → HTTP 429 con Retry-After."""
+
+    def __init__(self, tenant: str, reason: str, retry_after: float = 1.0):
+        super().__init__(f"Tenant '{tenant}': {reason}")
+        self.tenant = tenant
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def resolve_tenant(value: str | None) -> str:
+    if not value:
+        return settings.DEFAULT_TENANT
+    tenant = value.strip().lower()
+    if not _TENANT_RE.match(tenant):
+        raise ValueError(f"Tenant inválido: {value!r}")
+    return tenant
+
+
+def is_default(tenant: str | None) -> bool:
+    return not tenant or tenant == settings.DEFAULT_TENANT
+
+
+def scoped_key(tenant: str | None, key: str) -> str:
+    """Clave aislada por tenant (manifest, chunk store); sin cambios para el tenant por defecto."""
+    return key if is_default(tenant) else f"{tenant}:{key}"
+
+
+def get_tenant(request: Request) -> str:
+    """Dependencia FastAPI: tenant del header (400 si es inválido)."""
+    try:
+        return resolve_tenant(request.headers.get(settings.TENANT_HEADER))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
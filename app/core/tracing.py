@@ -0,0 +1,193 @@
+# app/core/tracing.py
+
+"""
+Tracing liviano por request, compatible con OpenTelemetry.
+
+- start_trace() abre un trace (lo hace el middleware HTTP) y span() crea
+  spans anidados vía contextvars. Fuera de un trace, span() es un no-op.
+- Al cerrar el trace cada span se emite como log estructurado (JSON) y,
+  si TRACE_EXPORT_PATH está configurado, el trace completo se agrega en
+  formato OTLP/JSON (una línea por trace), legible por el receiver
+  `otlpjsonfile` de un OpenTelemetry Collector local.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from .config import settings
+
+trace_logger = logging.getLogger("rag_service.trace")
+
+_current_trace: ContextVar["Trace | None"] = ContextVar("current_trace", default=None)
+_current_span: ContextVar["Span | None"] = ContextVar("current_span", default=None)
+
+_export_lock = threading.Lock()
+
+
+class Span:
+    __slots__ = ("name", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, parent_id: str | None, attributes: dict):
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes
+        self.error = None
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns or time.time_ns()
+        return round((end - self.start_ns) / 1e6, 3)
+
+
+class Trace:
+    def __init__(self, name: str, debug: str | None = None):
+        self.trace_id = os.urandom(16).hex()
+        self.debug = debug              # None | "timings" | "spans"
+        self.spans: list[Span] = []
+        self.root = Span(name, None, {})
+        self.spans.append(self.root)
+
+    # ----------------------------------------------------
+    def timings(self) -> dict:
+        """Milisegundos por nombre de span (sumados si se repiten)."""
+        out: dict[str, float] = {}
+        for s in self.spans:
+            if s is self.root or s.end_ns is None:
+                continue
+            out[s.name] = round(out.get(s.name, 0.0) + s.duration_ms, 3)
+        out["total_ms"] = self.root.duration_ms
+        return out
+
+    def tree(self) -> dict:
+        children: dict[str | None, list[Span]] = {}
+        for s in self.spans:
+            children.setdefault(s.parent_id, []).append(s)
+
+        def _node(s: Span) -> dict:
+            return {
+                "name": s.name,
+                "duration_ms": s.duration_ms,
+                "attributes": s.attributes,
+                "children": [_node(c) for c in children.get(s.span_id, [])]
+            }
+
+        return _node(self.root)
+
+    def debug_payload(self) -> dict:
+        payload = {"trace_id": self.trace_id, "timings": self.timings()}
+        if self.debug == "spans":
+            payload["spans"] = self.tree()
+        return payload
+
+    # ----------------------------------------------------
+    def to_otlp(self) -> dict:
+        def _attrs(d: dict) -> list:
+            return [{"key": k, "value": {"stringValue": str(v)}} for k, v in d.items()]
+
+        spans = []
+        for s in self.spans:
+            item = {
+                "traceId": self.trace_id,
+                "spanId": s.span_id,
+                "name": s.name,
+                "kind": 2 if s is self.root else 1,     # SERVER | INTERNAL
+                "startTimeUnixNano": str(s.start_ns),
+                "endTimeUnixNano": str(s.end_ns or time.time_ns()),
+                "attributes": _attrs(s.attributes),
+                "status": {"code": 2, "message": s.error} if s.error else {"code": 1}
+            }
+            if s.parent_id:
+                item["parentSpanId"] = s.parent_id
+            spans.append(item)
+
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": _attrs({"service.name": settings.APP_NAME})},
+                "scopeSpans": [{"scope": {"name": "rag_service"}, "spans": spans}]
+            }]
+        }
+
+
+# ============================================================
+# API
+# ============================================================
+def current_trace() -> "Trace | None":
+    return _current_trace.get()
+
+
+def debug_payload() -> dict:
+    """
+    {trace_id, timings[, spans]} si el request pidió debug con el header;
+    {} en cualquier otro caso. Pensado para `{**respuesta, **debug_payload()}`.
+    """
+    trace = _current_trace.get()
+    if trace is None or not trace.debug:
+        return {}
+    return trace.debug_payload()
+
+
+@contextmanager
+def start_trace(name: str, debug: str | None = None, **attributes):
+    trace = Trace(name, debug)
+    trace.root.attributes.update(attributes)
+    t_token = _current_trace.set(trace)
+    s_token = _current_span.set(trace.root)
+    try:
+        yield trace
+    except Exception as e:
+        trace.root.error = str(e)
+        raise
+    finally:
+        trace.root.end_ns = time.time_ns()
+        _current_span.reset(s_token)
+        _current_trace.reset(t_token)
+        _emit(trace)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+
+    parent = _current_span.get()
+    s = Span(name, parent.span_id if parent else None, attributes)
+    trace.spans.append(s)
+    token = _current_span.set(s)
+    try:
+        yield s
+    except Exception as e:
+        s.error = str(e)
+        raise
+    finally:
+        s.end_ns = time.time_ns()
+        _current_span.reset(token)
+
+
+def _emit(trace: Trace):
+    if trace_logger.isEnabledFor(logging.DEBUG):
+        for s in trace.spans:
+            trace_logger.debug(json.dumps({
+                "trace_id": trace.trace_id,
+                "span_id": s.span_id,
+                "parent_span_id": s.parent_id,
+                "name": s.name,
+                "duration_ms": s.duration_ms,
+                "attributes": s.attributes,
+                "error": s.error
+            }, ensure_ascii=False, default=str))
+
+    if settings.TRACE_EXPORT_PATH:
+        line = json.dumps(trace.to_otlp(), ensure_ascii=False, default=str)
+        with _export_lock:
+            with open(settings.TRACE_EXPORT_PATH, "a", encoding="utf-8") as fh:
+                fh.write(line + "\n")
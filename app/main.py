@@ -1,11 +1,23 @@
 # app/main.py
 
-from fastapi import FastAPI
+import time
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 
 from app.core.config import settings
+from app.core import admission
+from app.core import logger as logging_setup
 from app.core.logger import logger
-from app.api import ingest, query, analyze, feedback
+from app.core.feedback_store import feedback_store
+from app.core.metrics import IN_FLIGHT, REGISTRY, REQUEST_LATENCY
+from app.core.tracing import start_trace
+from app.core.profiling import RequestProfiler, requested_mode
+from app.core import resilience
+from app.core.tenancy import TenantQuotaExceeded
+from app.vectorstore import snapshot
+from app.api import ingest, query, analyze, feedback, documents, admin
 
 app = FastAPI(
     title="CRM RAG Service",
@@ -22,15 +34,148 @@ app.add_middleware(
     allow_credentials=True
 )
 
+# ------------ Admisión / load shedding → 503 ------------
+# Definido antes que track_requests: queda por dentro, así los 503
+# también cuentan en latencia / tracing y llevan request id.
+@app.middleware("http")
+async def admission_control(request: Request, call_next):
+    pool = admission.pool_for(request.method, request.url.path)
+    if pool is None:
+        return await call_next(request)
+
+    try:
+        await pool.acquire()
+    except admission.Overloaded as exc:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "error", "error": "overloaded", "pool": exc.pool, "msg": exc.reason},
+            headers={"Retry-After": str(max(1, round(exc.retry_after)))}
+        )
+
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    except BaseException:
+        pool.release(time.perf_counter() - start)
+        raise
+    # El cupo se libera al terminar de enviar el cuerpo (NDJSON de /query/batch)
+    response.body_iterator = _release_after(response.body_iterator, pool, start)
+    return response
+
+
+async def _release_after(body, pool, start: float):
+    try:
+        async for chunk in body:
+            yield chunk
+    finally:
+        pool.release(time.perf_counter() - start)
+
+# ------------ Métricas + tracing HTTP ------------
+def _debug_mode(value: str | None) -> str | None:
+    if not value:
+        return None
+    value = value.strip().lower()
+    if value in ("spans", "tree", "full"):
+        return "spans"
+    return "timings" if value not in ("0", "false", "no") else None
+
+
+def _endpoint_label(path: str) -> str:
+    """Primer segmento de la ruta si es de una ruta del servicio (/query,
+    /ingest...); cualquier otro (404s, escaneos) → "other"."""
+    endpoint = "/" + path.strip("/").split("/", 1)[0]
+    return endpoint if endpoint in KNOWN_ENDPOINTS else "other"
+
+
+@app.middleware("http")
+async def track_requests(request: Request, call_next):
+    # Label acotado: /query, /ingest... u "other"
+    endpoint = _endpoint_label(request.url.path)
+    start = time.perf_counter()
+    status = 500
+    debug = _debug_mode(request.headers.get(settings.TRACE_DEBUG_HEADER))
+
+    IN_FLIGHT.inc(endpoint=endpoint)
+    rid_token = logging_setup.bind_request_id(request.headers.get(settings.REQUEST_ID_HEADER))
+    try:
+        with start_trace(f"{request.method} {endpoint}", debug=debug,
+                         **{"http.method": request.method, "http.target": request.url.path}) as trace:
+            request_id = logging_setup.request_id()
+            response = await call_next(request)
+            status = response.status_code
+            trace.root.attributes["http.status_code"] = status
+        response.headers["X-Trace-Id"] = trace.trace_id
+        response.headers[settings.REQUEST_ID_HEADER] = request_id
+        return response
+    finally:
+        logging_setup.reset_request_id(rid_token)
+        IN_FLIGHT.dec(endpoint=endpoint)
+        REQUEST_LATENCY.observe(
+            time.perf_counter() - start,
+            endpoint=endpoint, method=request.method, status=status
+        )
+
+# ------------ Profiling por request (X-Profile / ?profile=) ------------
+@app.middleware("http")
+async def profile_requests(request: Request, call_next):
+    mode = requested_mode(request.headers, request.query_params)
+    if mode is None:
+        return await call_next(request)
+
+    label = f"{request.method}-{request.url.path}"
+    with RequestProfiler(label, mode) as profiler:
+        response = await call_next(request)
+
+    if profiler.path:
+        response.headers["X-Profile-File"] = profiler.path.name
+    return response
+
+# ------------ Cuotas por tenant → 429 ------------
+@app.exception_handler(TenantQuotaExceeded)
+async def tenant_quota_exceeded(request: Request, exc: TenantQuotaExceeded):
+    return JSONResponse(
+        status_code=429,
+        content={"status": "error", "error": "tenant_quota_exceeded", "tenant": exc.tenant, "msg": exc.reason},
+        headers={"Retry-After": str(max(1, round(exc.retry_after)))}
+    )
+
 # ------------ Rutas ------------
-app.include_router(ingest.router)
-app.include_router(query.router)
-app.include_router(analyze.router)
-app.include_router(feedback.router)
+ROUTERS = (ingest.router, query.router, analyze.router, feedback.router, documents.router, admin.router)
+for router in ROUTERS:
+    app.include_router(router)
+
+# Valores posibles del label "endpoint" de las métricas HTTP
+KNOWN_ENDPOINTS = {router.prefix for router in ROUTERS} | {"/health", "/metrics"}
+
+# ------------ Startup ------------
+@app.on_event("startup")
+def load_vector_snapshot():
+    # Índice local desde snapshot (mmap): arranca sin re-embeber
+    if not settings.VECTOR_SNAPSHOT_ON_STARTUP or (settings.VECTOR_BACKEND or "").lower() != "local":
+        return
+    if not (settings.VECTOR_SNAPSHOT_DIR / snapshot.HEADER).exists():
+        logger.warning(f"⚠️ Sin snapshot en {settings.VECTOR_SNAPSHOT_DIR}; índice local vacío")
+        return
+    snapshot.import_snapshot(settings.VECTOR_SNAPSHOT_DIR)
+
+# ------------ Shutdown ------------
+@app.on_event("shutdown")
+def flush_background_writers():
+    feedback_store.close()
+    logging_setup.shutdown()
 
 # ------------ Healthcheck ------------
 @app.get("/health")
 async def health():
-    return {"status": "ok", "service": "CRM RAG"}
+    # Estado de los circuit breakers de LLM / embeddings (p50/p95, fallos)
+    providers = resilience.health()
+    degraded = any(p["state"] != resilience.CLOSED for p in providers.values())
+    return {"status": "degraded" if degraded else "ok", "service": "CRM RAG", "providers": providers,
+            "admission": admission.stats()}
+
+# ------------ Prometheus ------------
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
 
 logger.info("🔥 CRM RAG Service iniciado correctamente.")
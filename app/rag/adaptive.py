@@ -0,0 +1,93 @@
+# app/rag/adaptive.py
+
+"""
+Profundidad adaptativa de retrieval y rerank (RETRIEVAL_ADAPTIVE).
+
+En vez de pedir siempre max(top_k * 4, 50) candidatos y re-rankear 30,
+se corta donde el score cae más de RETRIEVAL_SCORE_GAP por debajo del
+líder:
+
+- score_cutoff(): cuántos candidatos están dentro del gap (con piso).
+- DepthEstimator: aprende, por (tenant, provider, doc_type), hasta dónde
+  suele llegar ese corte (como mucho `max_keys` claves, LRU) y pide al
+  índice solo esa profundidad (cuantil alto + margen, entre piso y
+  techo). Con probabilidad
+  RETRIEVAL_EXPLORE_RATE pide el techo para que la estimación no se
+  quede corta; si el corte llega al fondo de lo pedido, retriever
+  repite la búsqueda con el techo.
+- rerank_depth(): cuántos hits pasan al cross-encoder.
+"""
+
+import random
+import threading
+from collections import OrderedDict, deque
+
+import numpy as np
+
+from app.core.config import settings
+
+# Observaciones mínimas antes de confiar en la estimación
+_MIN_OBSERVATIONS = 10
+
+
+def score_cutoff(scores: list[float], gap: float, floor: int = 1) -> int:
+    """scores en orden descendente → cuántos están a menos de `gap` del primero."""
+    if not scores:
+        return 0
+    threshold = scores[0] - gap
+    within = sum(1 for s in scores if s >= threshold)
+    return max(min(floor, len(scores)), within)
+
+
+def rerank_depth(hits: list[dict]) -> int:
+    """Hits (ordenados por score) que vale la pena pasar por el cross-encoder."""
+    scores = [h["score"] for h in hits]
+    depth = score_cutoff(scores, settings.RETRIEVAL_SCORE_GAP, settings.RERANK_MIN_DEPTH)
+    return min(depth, settings.RERANK_MAX_DEPTH, len(hits))
+
+
+class DepthEstimator:
+    """
+    Ventana de los últimos `window` cortes observados por clave; la
+    profundidad pedida es su cuantil `quantile` más `margin`. Guarda a lo
+    sumo `max_keys` claves: al pasarse se descarta la menos usada.
+    """
+
+    def __init__(self, window: int = 200, quantile: float = 0.9, margin: int = 2,
+                 explore: float = 0.05, seed: int | None = None, max_keys: int = 1024):
+        self.window = window
+        self.max_keys = max_keys
+        self.quantile = quantile
+        self.margin = margin
+        self.explore = explore
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._observed: OrderedDict[tuple, deque] = OrderedDict()
+
+    def depth(self, key: tuple, floor: int, ceiling: int) -> int:
+        if ceiling <= floor:
+            return ceiling
+        with self._lock:
+            observed = list(self._observed.get(key, ()))
+            explore = self._rng.random() < self.explore
+        if len(observed) < _MIN_OBSERVATIONS or explore:
+            return ceiling
+        estimate = int(np.ceil(np.quantile(observed, self.quantile))) + self.margin
+        return max(floor, min(ceiling, estimate))
+
+    def observe(self, key: tuple, cutoff: int):
+        with self._lock:
+            window = self._observed.get(key)
+            if window is None:
+                window = self._observed[key] = deque(maxlen=self.window)
+                if len(self._observed) > self.max_keys:
+                    self._observed.popitem(last=False)
+            self._observed.move_to_end(key)
+            window.append(cutoff)
+
+    def reset(self):
+        with self._lock:
+            self._observed.clear()
+
+
+depth_estimator = DepthEstimator(explore=settings.RETRIEVAL_EXPLORE_RATE)
@@ -0,0 +1,93 @@
+# app/rag/cache.py
+
+import threading
+import time
+from collections import OrderedDict
+
+from app.core.config import settings
+from app.core.metrics import CACHE_REQUESTS
+
+
+class RetrievalCache:
+    """
+    Cache LRU + TTL de resultados de retrieve(), particionada por tenant.
+    Cada entrada recuerda los chunk ids que contiene para poder
+    invalidar solo lo afectado cuando se borra un documento.
+    Al llenarse se desaloja de la partición más grande: un tenant con
+    mucho tráfico no vacía la cache de los demás.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, name: str = "retrieval"):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self._lock = threading.Lock()
+        self._parts: dict[str, OrderedDict] = {}
+        self._size = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl > 0
+
+    def get(self, key, tenant: str | None = None) -> list[dict] | None:
+        if not self.enabled:
+            return None
+        with self._lock:
+            part = self._parts.get(tenant or settings.DEFAULT_TENANT)
+            item = part.get(key) if part is not None else None
+            if item is not None and item[0] < time.monotonic():
+                del part[key]
+                self._size -= 1
+                item = None
+            if item is None:
+                CACHE_REQUESTS.inc(cache=self.name, result="miss")
+                return None
+            hits = item[1]
+            part.move_to_end(key)
+        CACHE_REQUESTS.inc(cache=self.name, result="hit")
+        # copias: rerank agrega campos a cada hit
+        return [dict(h) for h in hits]
+
+    def put(self, key, hits: list[dict], tenant: str | None = None):
+        if not self.enabled:
+            return
+        with self._lock:
+            part = self._parts.setdefault(tenant or settings.DEFAULT_TENANT, OrderedDict())
+            if key not in part:
+                self._size += 1
+            part[key] = (time.monotonic() + self.ttl, [dict(h) for h in hits])
+            part.move_to_end(key)
+            while self._size > self.max_entries:
+                victim = max(self._parts.values(), key=len)
+                victim.popitem(last=False)
+                self._size -= 1
+
+    def invalidate(self, chunk_ids=None, tenant: str | None = None):
+        """
+        chunk_ids=None → vacía todo (p.ej. tras una ingesta con chunks nuevos).
+        Con ids → descarta solo las entradas que referencian alguno.
+        tenant → solo esa partición (None = todas).
+        """
+        with self._lock:
+            parts = [self._parts.get(tenant)] if tenant is not None else list(self._parts.values())
+            ids = set(chunk_ids) if chunk_ids is not None else None
+            for part in parts:
+                if part is None:
+                    continue
+                if ids is None:
+                    self._size -= len(part)
+                    part.clear()
+                    continue
+                stale = [
+                    k for k, (_, hits) in part.items()
+                    if any(h.get("id") in ids for h in hits)
+                ]
+                for k in stale:
+                    del part[k]
+                self._size -= len(stale)
+
+
+retrieval_cache = RetrievalCache(
+    settings.RETRIEVAL_CACHE_SIZE,
+    settings.RETRIEVAL_CACHE_TTL
+)
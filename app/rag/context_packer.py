@@ -0,0 +1,248 @@
+# app/rag/context_packer.py
+
+"""
+Armado del contexto del prompt con presupuesto de tokens.
+
+1. Los chunks consecutivos (chunk_index) de un mismo document_id se unen
+   en un solo pasaje quitando el traslape del chunker (20%).
+2. Los pasajes casi duplicados (MinHash sobre shingles de palabras) se
+   descartan: el mismo párrafo citado en varios correos entra una vez.
+3. Se llena CONTEXT_TOKEN_BUDGET en orden de score (rerank si hubo,
+   retrieval si no), medido con el tokenizer del LLM destino; el último
+   pasaje que no cabe entero se recorta en un fin de oración.
+
+El resultado mantiene la forma de compress_context:
+[{"text", "source_info": [...], "score", "tokens"}].
+"""
+
+import re
+import zlib
+from functools import lru_cache
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.rag.retriever import hydrate
+from app.utils.chunker import token_counter
+
+# Traslape mínimo (caracteres) para considerar que dos chunks se pisan
+_MIN_OVERLAP = 20
+# Por debajo de esto no vale la pena recortar un pasaje para llenar el hueco
+_MIN_PARTIAL_TOKENS = 48
+
+# MinHash: 64 permutaciones (a·x + b) mod p sobre crc32 de shingles de 5 palabras
+_SHINGLE = 5
+_PERMUTATIONS = 64
+_PRIME = np.uint64((1 << 61) - 1)
+_rng = np.random.default_rng(20240611)
+_A = _rng.integers(1, 1 << 32, _PERMUTATIONS, dtype=np.uint64)
+_B = _rng.integers(0, 1 << 32, _PERMUTATIONS, dtype=np.uint64)
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+# ============================================================
+# Conteo de tokens del LLM destino
+# ============================================================
+def _approx_tokens(text: str) -> int:
+    # ~4 caracteres por token (inglés/español con BPE)
+    return (len(text) + 3) // 4 if text else 0
+
+
+@lru_cache(maxsize=8)
+def prompt_token_counter(provider: Optional[str] = None) -> Callable[[str], int]:
+    """
+    len(texto) en tokens del LLM que va a recibir el prompt: tiktoken para
+    OpenAI, el tokenizer de HF_MODEL para HuggingFace. Si no está
+    disponible (o CONTEXT_TOKENIZER=approx) se estima por caracteres.
+    """
+    provider = provider or settings.LLM_PROVIDER
+
+    if settings.CONTEXT_TOKENIZER != "approx":
+        try:
+            if provider == "openai":
+                import tiktoken
+                try:
+                    encoding = tiktoken.encoding_for_model(settings.OPENAI_MODEL)
+                except KeyError:
+                    encoding = tiktoken.get_encoding("o200k_base")
+
+                # Sin cache: los textos (pasajes, prompts) casi nunca se repiten
+                # y cachearlos retendría prompts completos en memoria
+                def count(text: str) -> int:
+                    return len(encoding.encode(text, disallowed_special=())) if text else 0
+
+                return count
+
+            if settings.HF_MODEL:
+                # mismo tokenizer que el chunker, sin su cache de fragmentos
+                return token_counter(settings.HF_MODEL).__wrapped__
+        except Exception as e:
+            logger.warning(f"⚠️ Tokenizer del LLM ({provider}) no disponible, se estiman tokens: {e}")
+
+    return _approx_tokens
+
+
+# ============================================================
+# 1. Unión de chunks adyacentes
+# ============================================================
+def _overlap(left: str, right: str) -> int:
+    """Largo del sufijo de `left` que es prefijo de `right` (traslape del chunker)."""
+    probe = right[:_MIN_OVERLAP]
+    if len(probe) < _MIN_OVERLAP:
+        return 0
+
+    # el primer match desde la izquierda es el traslape más largo
+    pos = left.find(probe, max(0, len(left) - len(right)))
+    while pos != -1:
+        if right.startswith(left[pos:]):
+            return len(left) - pos
+        pos = left.find(probe, pos + 1)
+    return 0
+
+
+def _source_info(h: dict) -> dict:
+    meta = h["metadata"]
+    return {
+        "id": h["id"],
+        "chunk_index": meta.get("chunk_index"),
+        "doc_type": meta.get("doc_type"),
+        "document_id": meta.get("document_id"),
+        "filename": meta.get("filename")
+    }
+
+
+def _score(h: dict) -> float:
+    return float(h.get("_rerank_score", h.get("score") or 0.0))
+
+
+def merge_adjacent(hits: List[dict]) -> List[dict]:
+    """
+    Pasajes [{"text", "hits", "score", "rank"}] ordenados por score: una
+    corrida de chunk_index consecutivos del mismo documento es un pasaje
+    con el mejor score de sus chunks.
+    """
+    by_doc: dict[str, list[tuple[int, dict]]] = {}
+    for rank, h in enumerate(hits):
+        doc = h["metadata"].get("document_id") or h["id"]
+        by_doc.setdefault(doc, []).append((rank, h))
+
+    passages = []
+    for items in by_doc.values():
+        items.sort(key=lambda it: (it[1]["metadata"].get("chunk_index") is None,
+                                   it[1]["metadata"].get("chunk_index") or 0))
+        current = None
+        prev_index = None
+        for rank, h in items:
+            index = h["metadata"].get("chunk_index")
+            adjacent = current is not None and index is not None and prev_index is not None
+            if adjacent and index == prev_index:
+                # mismo chunk dos veces (p.ej. fan-out de namespaces)
+                continue
+            if adjacent and index == prev_index + 1:
+                text = h["text"]
+                shared = _overlap(current["text"], text)
+                current["text"] += text[shared:] if shared else "\n" + text
+                current["hits"].append(h)
+                current["score"] = max(current["score"], _score(h))
+                current["rank"] = min(current["rank"], rank)
+            else:
+                current = {"text": h["text"], "hits": [h], "score": _score(h), "rank": rank}
+                passages.append(current)
+            prev_index = index
+
+    passages.sort(key=lambda p: (-p["score"], p["rank"]))
+    return passages
+
+
+# ============================================================
+# 2. Casi duplicados (MinHash)
+# ============================================================
+def minhash(text: str) -> np.ndarray:
+    words = _WORD.findall(text.lower())
+    shingles = {" ".join(words[i:i + _SHINGLE]) for i in range(max(1, len(words) - _SHINGLE + 1))}
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles),
+                         dtype=np.uint64, count=len(shingles))
+    return ((hashes[:, None] * _A + _B) % _PRIME).min(axis=0)
+
+
+def similarity(sig_a: np.ndarray, sig_b: np.ndarray) -> float:
+    """Jaccard estimado entre dos firmas MinHash."""
+    return float(np.count_nonzero(sig_a == sig_b)) / _PERMUTATIONS
+
+
+# ============================================================
+# 3. Presupuesto de tokens
+# ============================================================
+def _truncate(text: str, budget: int, count: Callable[[str], int]) -> str:
+    """Prefijo de `text` de a lo sumo `budget` tokens, cortado en un fin de oración si se puede."""
+    cut = int(len(text) * budget / max(count(text), 1))
+    while cut > 0 and count(text[:cut]) > budget:
+        cut = int(cut * 0.9)
+    piece = text[:cut]
+
+    last_dot = piece.rfind(".")
+    if last_dot > len(piece) // 2:
+        piece = piece[:last_dot + 1]
+    return piece.strip()
+
+
+def pack_context(
+    hits: List[dict],
+    budget: Optional[int] = None,
+    count_tokens: Optional[Callable[[str], int]] = None,
+    dedup_threshold: Optional[float] = None,
+    tenant: Optional[str] = None
+) -> List[dict]:
+    """
+    hits en orden de rerank → pasajes para el prompt (ver docstring del
+    módulo). budget / dedup_threshold por defecto de settings
+    (CONTEXT_TOKEN_BUDGET / CONTEXT_DEDUP_THRESHOLD, 0 = sin dedup).
+    """
+    if not hits:
+        return []
+
+    budget = budget or settings.CONTEXT_TOKEN_BUDGET
+    count = count_tokens or prompt_token_counter()
+    threshold = settings.CONTEXT_DEDUP_THRESHOLD if dedup_threshold is None else dedup_threshold
+
+    hydrate(hits, tenant)
+    passages = merge_adjacent(hits)
+
+    packed, signatures = [], []
+    used = duplicates = 0
+    for p in passages:
+        if budget - used < _MIN_PARTIAL_TOKENS:
+            break
+
+        if threshold > 0:
+            sig = minhash(p["text"])
+            if any(similarity(sig, other) >= threshold for other in signatures):
+                duplicates += 1
+                continue
+
+        text = p["text"].strip()
+        tokens = count(text)
+        if used + tokens > budget:
+            text = _truncate(text, budget - used, count)
+            tokens = count(text)
+            if not text or used + tokens > budget:
+                continue
+
+        if threshold > 0:
+            signatures.append(sig)
+        used += tokens
+        packed.append({
+            "text": text,
+            "source_info": [_source_info(h) for h in p["hits"]],
+            "score": round(p["score"], 4),
+            "tokens": tokens
+        })
+
+    logger.debug(
+        "Contexto: %d chunks → %d pasajes → %d en prompt (%d/%d tokens, %d duplicados)",
+        len(hits), len(passages), len(packed), used, budget, duplicates
+    )
+    return packed
@@ -1,8 +1,19 @@
 # app/rag/embeddings.py
 
+from typing import Literal, get_args
+
 import requests
 from app.core.config import settings
-from app.core.logger import logger
+from app.core.logger import get_logger
+from app.core.metrics import PROVIDER_ERRORS, PROVIDER_LABELS, bounded
+from app.core.resilience import resilient_call
+from app.rag.projection import projection_id, reduce_dimensions
+
+logger = get_logger("embeddings")
+
+# Proveedores de embeddings válidos (también validan los endpoints → 422)
+Provider = Literal["openai", "hf", "sentence_transformers"]
+PROVIDERS = get_args(Provider)
 
 # ============================
 # Local sentence-transformers
@@ -25,7 +36,7 @@ def _load_local_model():
             logger.error("sentence-transformers no está instalado.")
             return None
 
-        logger.info(f"🔹 Cargando modelo local ST: {settings.EMB_MODEL}")
+        logger.info("🔹 Cargando modelo local ST: %s", settings.EMB_MODEL)
         _local_model = SentenceTransformer(settings.EMB_MODEL)
 
     return _local_model
@@ -34,7 +45,7 @@ def _load_local_model():
 # ============================
 # HUGGINGFACE INFERENCE API
 # ============================
-def _hf_embed(texts: list[str]) -> list[list[float]]:
+def _hf_embed(texts: list[str], timeout: float) -> list[list[float]]:
     if settings.HF_INFERENCE_API_KEY is None or settings.HF_MODEL is None:
         raise RuntimeError("Faltan variables HF: HF_INFERENCE_API_KEY o HF_MODEL")
 
@@ -42,9 +53,9 @@ def _hf_embed(texts: list[str]) -> list[list[float]]:
 
     headers = {"Authorization": f"Bearer {settings.HF_INFERENCE_API_KEY}"}
 
-    logger.info(f"🔹 Usando HuggingFace Inference API para embeddings: {settings.HF_MODEL}")
+    logger.debug("🔹 HuggingFace Inference API para embeddings: %s (%d textos)", settings.HF_MODEL, len(texts))
 
-    response = requests.post(url, headers=headers, json={"inputs": texts})
+    response = requests.post(url, headers=headers, json={"inputs": texts}, timeout=timeout)
 
     if response.status_code != 200:
         raise RuntimeError(f"HuggingFace embedding error: {response.text}")
@@ -55,52 +66,117 @@ def _hf_embed(texts: list[str]) -> list[list[float]]:
 # ============================
 # OPENAI EMBEDDINGS
 # ============================
-def _openai_embed(texts: list[str]) -> list[list[float]]:
+def _openai_embed(texts: list[str], timeout: float) -> list[list[float]]:
     if settings.OPENAI_API_KEY is None:
         raise RuntimeError("OPENAI_API_KEY no configurada.")
 
-    import openai
-    openai.api_key = settings.OPENAI_API_KEY
+    # Cliente por llamada (como llm_router): el timeout depende del tamaño
+    # del lote y los globales del módulo openai se pisarían entre hilos
+    from openai import OpenAI
+    client = OpenAI(api_key=settings.OPENAI_API_KEY, base_url=settings.OPENAI_BASE_URL,
+                    timeout=timeout)
 
-    logger.info("🔹 Usando OpenAI embeddings (text-embedding-3-large)")
+    logger.debug("🔹 OpenAI embeddings (%s, %d textos)", settings.OPENAI_EMB_MODEL, len(texts))
 
-    response = openai.embeddings.create(
-        model="text-embedding-3-large",
-        input=texts
-    )
+    params = {"model": settings.OPENAI_EMB_MODEL, "input": texts}
+    if settings.EMB_DIMENSIONS:
+        # text-embedding-3-*: el API devuelve el vector ya reducido y normalizado
+        params["dimensions"] = settings.EMB_DIMENSIONS
+
+    response = client.embeddings.create(**params)
 
     return [item.embedding for item in response.data]
 
 
+def _remote_embed(provider: str, fn, texts: list[str]):
+    """
+    Embeddings remotos con circuit breaker.
+
+    - Lotes chicos (queries, hasta EMB_HEDGE_MAX_TEXTS textos): breaker
+      "embedding", plazo EMB_TIMEOUT y hedge contra otra réplica del
+      mismo proveedor (cambiar de proveedor cambiaría el espacio
+      vectorial del índice).
+    - Lotes grandes (ingesta): breaker propio "embedding_batch", así sus
+      latencias no bajan el p95 del hedge de las queries ni sus fallos
+      abren el circuito de las queries. Sin hedge (duplicaría un request
+      de cientos de chunks) y con plazo proporcional al lote.
+    """
+    if len(texts) <= settings.EMB_HEDGE_MAX_TEXTS:
+        timeout = settings.EMB_TIMEOUT
+        call = lambda: fn(texts, timeout)
+        return resilient_call("embedding", [(provider, call), (provider, call)], timeout=timeout)
+
+    timeout = settings.EMB_TIMEOUT + settings.EMB_TIMEOUT_PER_TEXT * len(texts)
+    return resilient_call("embedding_batch", [(provider, lambda: fn(texts, timeout))], timeout=timeout)
+
+
 # ============================
 # INTERFAZ PRINCIPAL
 # ============================
-def embed_texts(texts: list[str], provider: str | None = None) -> list[list[float]]:
+def _projection_model(provider: str) -> str | None:
+    """Modelo cuya proyección local se aplica (None: OpenAI reduce en el API)."""
+    if provider == "sentence_transformers":
+        return settings.EMB_MODEL
+    if provider == "hf":
+        return settings.HF_MODEL or "hf"
+    return None
+
+
+def embedding_space(provider: str | None = None) -> str:
     """
-    Devuelve lista de embeddings.
+    Identidad del espacio de los vectores: provider, dimensión y, si se
+    reduce localmente, qué reducción ("pca:<hash>" / "truncate"). Forma
+    parte del ID de los chunks: al cambiar cualquiera se re-embebe.
+    """
+    space = provider or ""
+    if settings.EMB_DIMENSIONS:
+        space = f"{space}@{settings.EMB_DIMENSIONS}"
+        model = _projection_model(provider or settings.EMB_PROVIDER)
+        if model is not None:
+            space = f"{space}/{projection_id(model, settings.EMB_DIMENSIONS)}"
+    return space
+
+
+def embed_texts(texts: list[str], provider: str | None = None, reduce: bool = True):
+    """
+    Devuelve los embeddings: matriz float32 (N, dim) para el modelo local
+    (sin pasar por listas de floats de Python, ~4x más memoria) o lista de
+    listas para las APIs remotas. Ambos se indexan igual: vectors[i].
     provider puede ser:
         - "sentence_transformers"
         - "hf"
         - "openai"
         - None → usa EMB_PROVIDER del .env
+    Con EMB_DIMENSIONS se reducen a esa dimensión; reduce=False devuelve
+    la dimensión completa del modelo (para ajustar la PCA).
     """
 
     provider = provider or settings.EMB_PROVIDER
-
-    logger.info(f"🔸 Embeddings Provider Seleccionado: {provider}")
-
-    if provider == "sentence_transformers":
-        model = _load_local_model()
-        if model is None:
-            raise RuntimeError("Modelo local no disponible.")
-        vectors = model.encode(texts, convert_to_numpy=True, show_progress_bar=False)
-        return vectors.tolist()
-
-    elif provider == "hf":
-        return _hf_embed(texts)
-
-    elif provider == "openai":
-        return _openai_embed(texts)
-
-    else:
+    if provider not in PROVIDERS:
         raise ValueError(f"Proveedor de embeddings desconocido: {provider}")
+
+    logger.debug("🔸 Embeddings provider: %s", provider)
+
+    try:
+        if provider == "sentence_transformers":
+            model = _load_local_model()
+            if model is None:
+                raise RuntimeError("Modelo local no disponible.")
+            vectors = model.encode(texts, convert_to_numpy=True, show_progress_bar=False)
+            vectors = vectors.astype("float32", copy=False)
+            if reduce:
+                vectors = reduce_dimensions(vectors, _projection_model(provider), settings.EMB_DIMENSIONS)
+            return vectors
+
+        elif provider == "hf":
+            vectors = _remote_embed("hf", _hf_embed, texts)
+            if reduce and settings.EMB_DIMENSIONS:
+                vectors = reduce_dimensions(vectors, _projection_model(provider), settings.EMB_DIMENSIONS)
+            return vectors
+
+        else:
+            return _remote_embed("openai", _openai_embed, texts)
+
+    except Exception:
+        PROVIDER_ERRORS.inc(kind="embedding", provider=bounded(provider, PROVIDER_LABELS, "default"))
+        raise
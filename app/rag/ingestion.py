@@ -1,20 +1,40 @@
 # app/rag/ingestion.py
 import os
-import uuid
 import time
 from typing import Tuple
 
 from app.core.config import settings
 from app.core.logger import logger
+from app.core.metrics import StageTimer, stage
 
 from app.utils.text_extract import extract_text
-from app.utils.chunker import chunk_text
+from app.utils.chunker import chunk_text, token_counter
 from app.utils.pdf_utils import analyze_pdf_images
 
-from app.rag.embeddings import embed_texts
+from app.rag.cache import retrieval_cache
+from app.rag.embeddings import embed_texts, embedding_space
 from app.rag.llm_router import generate_summary   # NUEVO
 
-from app.vectorstore.pinecone_client import create_index, upsert_vectors
+from app.vectorstore.helpers import (
+    build_metadata,
+    chunk_id_prefix,
+    content_hash,
+    generate_chunk_id,
+    generate_doc_id,
+)
+from app.vectorstore import doc_vectors
+from app.vectorstore.chunk_store import chunk_store
+from app.vectorstore.manifest import manifest
+from app.vectorstore.routing import write_route
+from app.vectorstore.backend import (
+    create_index,
+    delete_vectors,
+    fetch_metadata,
+    fetch_vectors,
+    list_vector_ids,
+    update_metadata,
+    upsert_vectors,
+)
 
 # ------------------------------
 # Patrones de detección de tipo
@@ -46,6 +66,8 @@ def ingest_file_to_pinecone(
     source_name: str = "upload",
     chunk_size: int = 500,
     provider: str = None,          # <--- NUEVO
+    document_id: str | None = None,
+    tenant: str | None = None,
 ) -> dict:
 
     """
@@ -53,9 +75,33 @@ def ingest_file_to_pinecone(
       - 'hf'      → Embeddings HF + LLM HF
       - 'openai'  → Embeddings OpenAI + LLM OpenAI
       - 'local'   → SentenceTransformers + LLM según settings (HF u OpenAI)
+
+    Ingesta incremental: document_id (externo) o la ruta de origen dan una
+    identidad estable al documento y los chunks usan IDs por contenido.
+    Al re-ingerir solo se embeben/suben los chunks nuevos o modificados y
+    se borran los que desaparecieron.
+
+    tenant aísla namespace, manifest, chunk store y cache (None → DEFAULT_TENANT).
     """
 
-    logger.info(f"Iniciando ingesta [{provider}] : {file_path}")
+    tenant = tenant or settings.DEFAULT_TENANT
+    with StageTimer("ingest") as timer:
+        payload = _ingest_file(file_path, source_name, chunk_size, provider, document_id, tenant)
+
+    timer.observe(provider=provider, doc_type=payload.get("doc_type"))
+    return payload
+
+
+def _ingest_file(
+    file_path: str,
+    source_name: str,
+    chunk_size: int,
+    provider: str | None,
+    document_id: str | None,
+    tenant: str
+) -> dict:
+
+    logger.info(f"Iniciando ingesta [{provider}] ({tenant}): {file_path}")
     start_t = time.time()
 
     if not os.path.exists(file_path):
@@ -64,14 +110,15 @@ def ingest_file_to_pinecone(
     # ------------------------------
     # 1) EXTRAER TEXTO
     # ------------------------------
-    text = extract_text(file_path)
+    with stage("extract"):
+        text = extract_text(file_path)
     if not text.strip():
         return {"status": "error", "error": "no_text_extracted"}
 
     filename = os.path.basename(file_path)
     filesize = os.path.getsize(file_path)
     doc_type = detect_document_type(text)
-    document_id = str(uuid.uuid4())
+    document_id = generate_doc_id(document_id, content=text, source_name=source_name)
 
     # ------------------------------
     # 2) ANALIZAR IMÁGENES (PDF)
@@ -80,58 +127,190 @@ def ingest_file_to_pinecone(
     images_meta = []
     if filename.lower().endswith(".pdf"):
         try:
-            num_images, images_meta = analyze_pdf_images(file_path)
+            with stage("images"):
+                num_images, images_meta = analyze_pdf_images(file_path)
         except Exception as e:
             logger.warning(f"Error analizando imágenes PDF: {e}")
 
     # ------------------------------
     # 3) CHUNKING
     # ------------------------------
-    chunks = chunk_text(
-        text,
-        chunk_size=chunk_size,
-        chunk_overlap=int(chunk_size * 0.20)
-    )
+    length_function = None
+    if settings.CHUNK_UNIT == "tokens":
+        chunk_size = settings.CHUNK_MAX_TOKENS
+        length_function = token_counter()
+
+    with stage("chunk"):
+        chunks = chunk_text(
+            text,
+            chunk_size=chunk_size,
+            chunk_overlap=int(chunk_size * 0.20),
+            length_function=length_function
+        )
 
     # ------------------------------
-    # 4) EMBEDDINGS (dependiendo del provider)
+    # 4) DIFF CONTRA LO YA INDEXADO
     # ------------------------------
-    vectors = embed_texts(
-        chunks,
-        provider=provider   # <--- NUEVO
+    # El espacio de embeddings (provider + dimensión + PCA/truncado) forma
+    # parte del ID: cambiar EMB_DIMENSIONS o ajustar una PCA obliga a
+    # re-embeber en vez de reutilizar chunks de otro espacio.
+    space = embedding_space(provider)
+
+    chunk_ids = []
+    seen = {}
+    for chunk in chunks:
+        base_id = generate_chunk_id(document_id, chunk, salt=space)
+        occurrence = seen.get(base_id, 0)
+        seen[base_id] = occurrence + 1
+        chunk_ids.append(generate_chunk_id(document_id, chunk, salt=space, occurrence=occurrence))
+
+    # Índice / namespace destino (VECTOR_ROUTING). Si el documento cambió
+    # de ruta (otro doc_type con namespaces por doc_type) sus vectores se
+    # mueven sin re-embeber.
+    route = write_route(provider, doc_type, tenant)
+
+    # El manifest dice qué había; si el documento no está registrado
+    # (índice poblado antes del manifest) se lista por prefijo.
+    previous = manifest.get(document_id, tenant)
+    if previous:
+        existing_ids = set(previous.get("chunk_ids", []))
+        old_route = write_route(previous.get("provider"), previous.get("doc_type"), tenant)
+    else:
+        with stage("diff"):
+            existing_ids = set(list_vector_ids(route.index, chunk_id_prefix(document_id),
+                                               namespace=route.namespace))
+        old_route = route
+    moved = old_route != route
+
+    new_positions = [i for i, cid in enumerate(chunk_ids) if cid not in existing_ids]
+    kept_positions = [i for i, cid in enumerate(chunk_ids) if cid in existing_ids]
+    stale_ids = sorted(existing_ids - set(chunk_ids))
+
+    logger.info(
+        f"Diff [{document_id}]: nuevos={len(new_positions)} "
+        f"sin_cambios={len(kept_positions)} eliminados={len(stale_ids)}"
     )
 
+    def _metadata(i: int) -> dict:
+        return build_metadata(
+            document_id,
+            chunk_index=i,
+            doc_type=doc_type,
+            source_name=source_name,
+            extra_meta={"filename": filename, "provider": provider}
+        )
+
     # ------------------------------
-    # 5) UPSERT EN PINECONE
+    # 5) EMBEDDINGS SOLO DE CHUNKS NUEVOS (dependiendo del provider)
     # ------------------------------
-    upserts = []
-    for i, vec in enumerate(vectors):
-        chunk_id = str(uuid.uuid4())
-        metadata = {
-            "source": source_name,
-            "chunk_index": i,
-            "document_id": document_id,
-            "text_excerpt": chunks[i][:600],
-            "doc_type": doc_type,
-            "filename": filename,
-            "provider": provider     # <--- IMPORTANTE PARA SABER CÓMO RESPONDIO
-        }
-        upserts.append((chunk_id, vec, metadata))
+    vectors = []
+    if new_positions:
+        with stage("embed"):
+            vectors = embed_texts(
+                [chunks[i] for i in new_positions],
+                provider=provider   # <--- NUEVO
+            )
+
+    # ------------------------------
+    # 6) UPSERT / DELETE EN PINECONE
+    # ------------------------------
+    # El texto completo va al chunk store antes que los vectores, así una
+    # query nunca ve un id sin texto. Se reescriben también los chunks sin
+    # cambios (índices poblados cuando el texto viajaba en la metadata).
+    with stage("chunk_store"):
+        chunk_store.put_many([(chunk_ids[i], document_id, chunks[i]) for i in range(len(chunks))], tenant)
+
+    with stage("upsert"):
+        if len(vectors):
+            upserts = [
+                (chunk_ids[i], vec, _metadata(i))
+                for i, vec in zip(new_positions, vectors)
+            ]
+            create_index(route.index, dim=len(vectors[0]))
+            upsert_vectors(route.index, upserts, namespace=route.namespace)
+
+        # Chunks sin cambios en otra ruta: se copian los vectores existentes
+        if kept_positions and moved:
+            old_vectors = fetch_vectors(old_route.index, [chunk_ids[i] for i in kept_positions],
+                                        namespace=old_route.namespace)
+            copies = [
+                (chunk_ids[i], old_vectors[chunk_ids[i]]["values"], _metadata(i))
+                for i in kept_positions if chunk_ids[i] in old_vectors
+            ]
+            if copies:
+                create_index(route.index, dim=len(copies[0][1]))
+                upsert_vectors(route.index, copies, namespace=route.namespace)
+            logger.info(f"Ruta cambiada [{document_id}]: {old_route[:2]} → {route[:2]} ({len(copies)} vectores)")
+            stale_ids = sorted(existing_ids)
+
+        # Chunks sin cambios que se movieron de posición: solo metadata
+        elif kept_positions:
+            if previous:
+                old_index = {cid: i for i, cid in enumerate(previous.get("chunk_ids", []))}
+                old_meta = {
+                    cid: {"chunk_index": old_index.get(cid), "doc_type": previous.get("doc_type")}
+                    for cid in existing_ids
+                }
+            else:
+                old_meta = fetch_metadata(route.index, [chunk_ids[i] for i in kept_positions],
+                                          namespace=route.namespace)
+
+            for i in kept_positions:
+                meta = old_meta.get(chunk_ids[i], {})
+                if meta.get("chunk_index") != i or meta.get("doc_type") != doc_type:
+                    update_metadata(route.index, chunk_ids[i], _metadata(i), namespace=route.namespace)
 
-    create_index(settings.PINECONE_INDEX, dim=len(vectors[0]))
-    upsert_vectors(settings.PINECONE_INDEX, upserts)
+        delete_vectors(old_route.index, stale_ids, namespace=old_route.namespace)
+    current_ids = set(chunk_ids)
+    chunk_store.delete_many([cid for cid in stale_ids if cid not in current_ids], tenant)
+
+    if new_positions or stale_ids:
+        retrieval_cache.invalidate(tenant=tenant)
 
     # ------------------------------
-    # 6) RESUMEN (LLM DINÁMICO)
+    # 7) RESUMEN (LLM DINÁMICO)
     # ------------------------------
-    try:
-        resumen = generate_summary(text, provider=provider)
-    except Exception as e:
-        logger.warning(f"Fallo resumen LLM: {e}")
-        resumen = text[:1200]   # fallback
+    text_hash = content_hash(text, salt=provider or "")
+    if previous and previous.get("content_hash") == text_hash and previous.get("summary"):
+        resumen = previous["summary"]   # documento idéntico: no se vuelve a llamar al LLM
+    else:
+        try:
+            with stage("summary"):
+                resumen = generate_summary(text, provider=provider)
+        except Exception as e:
+            logger.warning(f"Fallo resumen LLM: {e}")
+            resumen = text[:1200]   # fallback
+
+    # ------------------------------
+    # 7b) VECTOR POR DOCUMENTO (retrieval en dos etapas)
+    # ------------------------------
+    has_doc_vector = bool(previous and previous.get("doc_vector"))
+    if settings.DOC_VECTORS_ENABLED and (new_positions or stale_ids or moved or not has_doc_vector):
+        with stage("doc_vector"):
+            has_doc_vector = _write_doc_vector(
+                document_id, resumen, provider, vectors,
+                [chunk_ids[i] for i in kept_positions], route, old_route, _metadata(0)
+            )
+
+    vector_dim = len(vectors[0]) if len(vectors) else (previous or {}).get("vector_dim")
+    manifest.put(document_id, {
+        "filename": filename,
+        "source": source_name,
+        "doc_type": doc_type,
+        "provider": provider,
+        "content_hash": text_hash,
+        "chunk_ids": chunk_ids,
+        "chunks": len(chunk_ids),
+        "vector_dim": vector_dim,
+            "embedding_space": space,
+        "size_bytes": filesize,
+        "text_chars": len(text),
+        "summary": resumen,
+        "doc_vector": has_doc_vector
+    }, tenant)
 
     # ------------------------------
-    # 7) RESPUESTA
+    # 8) RESPUESTA
     # ------------------------------
     payload = {
         "status": "ok",
@@ -148,11 +327,17 @@ def ingest_file_to_pinecone(
             "filename": filename,
             "doc_type": doc_type,
             "chunks": len(chunks),
-            "vector_dim": len(vectors[0]),
+            "vector_dim": vector_dim,
+            "embedding_space": space,
             "source": source_name,
             "provider": provider,
             "numero_imagenes": num_images
         },
+        "cambios": {
+            "nuevos": len(new_positions),
+            "sin_cambios": len(kept_positions),
+            "eliminados": len(stale_ids)
+        },
         "elapsed_seconds": round(time.time() - start_t, 2)
     }
 
@@ -162,3 +347,63 @@ def ingest_file_to_pinecone(
     )
 
     return payload
+
+
+def _write_doc_vector(document_id: str, summary: str, provider: str | None, vectors,
+                      kept_ids: list[str], route, old_route, metadata: dict) -> bool:
+    """
+    Escribe el vector del documento (resumen embebido o media de sus
+    chunks). Un fallo aquí no tumba la ingesta: el documento queda solo
+    para la búsqueda plana.
+    """
+    try:
+        if settings.DOC_VECTOR_SOURCE == "mean":
+            rows = list(vectors)
+            if kept_ids:
+                kept = fetch_vectors(route.index, kept_ids, namespace=route.namespace)
+                rows += [v["values"] for v in kept.values()]
+            vector = doc_vectors.mean_vector(rows)
+        else:
+            vector = doc_vectors.normalize(embed_texts([summary], provider=provider)[0])
+        if vector is None:
+            return False
+
+        if old_route != route:
+            doc_vectors.delete(document_id, old_route)
+        doc_vectors.write(document_id, vector, metadata, route)
+        return True
+    except Exception as e:
+        logger.warning(f"No se pudo escribir el vector del documento {document_id}: {e}")
+        return False
+
+
+# ================================================================
+# 🗑️ BORRADO DE DOCUMENTOS
+# ================================================================
+def delete_document(document_id: str, tenant: str | None = None) -> dict | None:
+    """
+    Borra todos los vectores de un documento (en lotes), invalida las
+    entradas de cache que los referencian y lo quita del manifest.
+    Devuelve None si el documento no se conoce.
+    """
+    tenant = tenant or settings.DEFAULT_TENANT
+    entry = manifest.get(document_id, tenant)
+    if entry:
+        chunk_ids = entry.get("chunk_ids", [])
+        route = write_route(entry.get("provider"), entry.get("doc_type"), tenant)
+    else:
+        # sin manifest solo se puede buscar en la ruta por defecto
+        route = write_route(None, None, tenant)
+        chunk_ids = list_vector_ids(route.index, chunk_id_prefix(document_id), namespace=route.namespace)
+        if not chunk_ids:
+            return None
+
+    delete_vectors(route.index, chunk_ids, namespace=route.namespace)
+    doc_vectors.delete(document_id, route)
+    chunk_store.delete_many(chunk_ids, tenant)
+    retrieval_cache.invalidate(chunk_ids, tenant=tenant)
+    manifest.remove(document_id, tenant)
+
+    logger.info(f"Documento eliminado: {document_id} [{tenant}] ({len(chunk_ids)} chunks)")
+
+    return {"document_id": document_id, "deleted_chunks": len(chunk_ids)}
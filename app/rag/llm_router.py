@@ -1,8 +1,12 @@
 # app/rag/llm_router.py
 
 import requests
-from app.core.logger import logger
+from app.core.logger import get_logger
 from app.core.config import settings
+from app.core.metrics import FALLBACKS, PROVIDER_ERRORS, PROVIDER_LABELS, bounded
+from app.core.resilience import resilient_call
+
+logger = get_logger("llm")
 
 # ======================================================
 # 🔥 GENERADOR DE RESPUESTAS (Router HF / OpenAI)
@@ -30,9 +34,9 @@ def _call_hf_chat(prompt: str) -> str:
         }
     }
 
-    logger.info(f"🧠 Llamando HF Chat: {settings.HF_MODEL}")
+    logger.debug("🧠 Llamando HF Chat: %s", settings.HF_MODEL)
 
-    r = requests.post(url, headers=headers, json=payload, timeout=120)
+    r = requests.post(url, headers=headers, json=payload, timeout=settings.LLM_TIMEOUT)
     if r.status_code != 200:
         raise RuntimeError(f"HF Error: {r.text}")
 
@@ -51,9 +55,10 @@ def _call_openai_chat(prompt: str) -> str:
         raise RuntimeError("OPENAI_API_KEY no definido.")
 
     from openai import OpenAI
-    client = OpenAI(api_key=settings.OPENAI_API_KEY)
+    client = OpenAI(api_key=settings.OPENAI_API_KEY, base_url=settings.OPENAI_BASE_URL,
+                    timeout=settings.LLM_TIMEOUT)
 
-    logger.info(f"🧠 Llamando OpenAI Chat ({settings.OPENAI_MODEL})")
+    logger.debug("🧠 Llamando OpenAI Chat (%s)", settings.OPENAI_MODEL)
 
     response = client.chat.completions.create(
         model=settings.OPENAI_MODEL,
@@ -69,6 +74,30 @@ def _call_openai_chat(prompt: str) -> str:
     return response.choices[0].message.content
 
 
+def _provider_name(provider: str) -> str:
+    return "openai" if provider == "openai" else "hf_inference"
+
+
+def _call_chat(provider: str, prompt: str) -> str:
+    if provider == "openai":
+        return _call_openai_chat(prompt)
+    return _call_hf_chat(prompt)
+
+
+def _chat(prompt: str, provider: str) -> str:
+    """
+    Llamada al LLM con circuit breaker + hedge: el segundo candidato es
+    LLM_FALLBACK_PROVIDER o, sin él, otro request al mismo proveedor.
+    """
+    primary = _provider_name(provider)
+    alternate = _provider_name(settings.LLM_FALLBACK_PROVIDER or primary)
+    return resilient_call(
+        "llm",
+        [(name, lambda name=name: _call_chat(name, prompt)) for name in (primary, alternate)],
+        timeout=settings.LLM_TIMEOUT,
+    )
+
+
 # ======================================================
 # 🔥 RESUMENES
 # ======================================================
@@ -78,7 +107,7 @@ def generate_summary(text: str, provider: str = None) -> str:
     Resume un documento usando el proveedor seleccionado.
     """
     provider = provider or settings.LLM_PROVIDER
-    logger.info(f"📘 Generando resumen con provider='{provider}'")
+    logger.info("📘 Generando resumen con provider='%s'", provider)
 
     prompt = (
         "Resume el siguiente documento de forma clara, en máximo 10 líneas. "
@@ -87,12 +116,12 @@ def generate_summary(text: str, provider: str = None) -> str:
     )
 
     try:
-        if provider == "openai":
-            return _call_openai_chat(prompt)
-        else:
-            return _call_hf_chat(prompt)
+        return _chat(prompt, provider)
     except Exception as e:
-        logger.error(f"Resumen falló: {e}")
+        logger.error("Resumen falló: %s", e)
+        label = bounded(provider, PROVIDER_LABELS, "default")
+        PROVIDER_ERRORS.inc(kind="llm", provider=label)
+        FALLBACKS.inc(kind="summary", provider=label)
         return text[:1200]  # fallback
 
 
@@ -105,13 +134,13 @@ def generate_answer(prompt: str, provider: str = None) -> str:
     Genera una respuesta del LLM usando OpenAI o HuggingFace.
     """
     provider = provider or settings.LLM_PROVIDER
-    logger.info(f"🤖 Generando respuesta LLM con provider='{provider}'")
+    logger.debug("🤖 Generando respuesta LLM con provider='%s'", provider)
 
     try:
-        if provider == "openai":
-            return _call_openai_chat(prompt)
-        else:
-            return _call_hf_chat(prompt)
+        return _chat(prompt, provider)
     except Exception as e:
-        logger.error(f"Error LLM: {e}")
+        logger.error("Error LLM: %s", e)
+        label = bounded(provider, PROVIDER_LABELS, "default")
+        PROVIDER_ERRORS.inc(kind="llm", provider=label)
+        FALLBACKS.inc(kind="answer", provider=label)
         return "⚠️ Error al llamar al modelo LLM.\n" + prompt
@@ -0,0 +1,54 @@
+# app/rag/mmr.py
+
+"""
+Maximal Marginal Relevance sobre los vectores candidatos del índice.
+
+Elige k candidatos uno a uno maximizando
+    λ · sim(q, d) − (1 − λ) · max_{s ∈ elegidos} sim(d, s)
+así un contrato largo no llena el pool con 40 chunks casi iguales de la
+misma cláusula. Todo es NumPy: la similitud contra el último elegido se
+calcula con un solo producto matriz-vector por paso (k · n · dim flops),
+sin armar la matriz n × n.
+"""
+
+from typing import Sequence
+
+import numpy as np
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def mmr(query_vec, candidates: Sequence, k: int, lambda_: float = 0.7) -> list[int]:
+    """
+    Índices (posiciones en `candidates`) de los k elegidos, en orden de
+    selección. λ=1 es el orden por relevancia; λ=0 solo diversidad.
+    """
+    n = len(candidates)
+    if n == 0 or k <= 0:
+        return []
+
+    docs = _normalize(np.asarray(candidates, dtype=np.float32))
+    query = _normalize(np.asarray(query_vec, dtype=np.float32).reshape(-1))
+    relevance = lambda_ * (docs @ query)
+
+    k = min(k, n)
+    max_sim = np.full(n, -np.inf, dtype=np.float32)
+    chosen = np.zeros(n, dtype=bool)
+    selected = []
+
+    # el primero es el más relevante
+    best = int(np.argmax(relevance))
+    for _ in range(k):
+        selected.append(best)
+        chosen[best] = True
+        if len(selected) == k:
+            break
+        np.maximum(max_sim, docs @ docs[best], out=max_sim)
+        scores = relevance - (1.0 - lambda_) * max_sim
+        scores[chosen] = -np.inf
+        best = int(np.argmax(scores))
+
+    return selected
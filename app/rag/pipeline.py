@@ -2,10 +2,25 @@
 
 import time
 from typing import List, Optional
-from app.core.logger import logger
-from app.rag.retriever import retrieve, rerank
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.core.metrics import (
+    DOC_TYPE_LABELS,
+    PROMPT_TOKENS,
+    PROVIDER_LABELS,
+    RETRIEVAL_DEPTH,
+    StageTimer,
+    bounded,
+    stage,
+)
+from app.core.tracing import span
+from app.rag.adaptive import rerank_depth
+from app.rag.context_packer import pack_context, prompt_token_counter
+from app.rag.retriever import hydrate, retrieve, retrieve_many, rerank, rerank_many
 from app.rag.llm_router import generate_answer
 
+logger = get_logger("pipeline")
+
 
 # ======================================================
 # 1. Templates de prompts por tipo de documento
@@ -59,13 +74,15 @@ def build_prompt(question: str, compressed_context: List[dict], doc_type: str, d
 
 
 # ======================================================
-# 3. Compresión del contexto (no modificar)
+# 3. Compresión del contexto por grupos (versión anterior; el pipeline
+#    usa context_packer.pack_context)
 # ======================================================
-def compress_context(hits: List[dict], max_chunks: int = 5, group_size: int = 5):
+def compress_context(hits: List[dict], max_chunks: int = 5, group_size: int = 5,
+                     tenant: Optional[str] = None):
     if not hits:
         return []
 
-    raw_texts = [h["metadata"].get("text_excerpt", "") for h in hits]
+    raw_texts = [h["text"] for h in hydrate(hits, tenant)]
     source_infos = [
         {
             "id": h["id"],
@@ -104,7 +121,7 @@ def generate_answer_with_llm(prompt: str, provider: str):
     try:
         return generate_answer(prompt, provider=provider)
     except Exception as e:
-        logger.error(f"Error en generate_answer_with_llm: {e}")
+        logger.error("Error en generate_answer_with_llm: %s", e)
         return f"⚠️ Error al generar respuesta con el modelo: {e}"
 
 
@@ -115,71 +132,204 @@ def answer_question(
     question: str,
     top_k: int = 20,
     doc_type: Optional[str] = None,
-    provider: str = "openai"
+    provider: str = "openai",
+    tenant: Optional[str] = None
 ):
 
     start = time.time()
 
-    # -------------------------------------------
-    # Auto-detección simple
-    # -------------------------------------------
-    if not doc_type:
-        qlow = question.lower()
-        if any(w in qlow for w in ["cláusula", "contrato"]):
-            doc_type = "contrato"
-        elif "factura" in qlow:
-            doc_type = "factura"
-        elif "correo" in qlow or "email" in qlow:
-            doc_type = "correo"
-        else:
-            doc_type = None
+    with StageTimer("query") as timer:
+        result = _answer_question(question, top_k, doc_type, provider, tenant)
+
+    timer.observe(provider=provider, doc_type=result["doc_type"])
+    result["elapsed_seconds"] = round(time.time() - start, 2)
+
+    return result
+
+
+def _answer_question(
+    question: str,
+    top_k: int,
+    doc_type: Optional[str],
+    provider: str,
+    tenant: Optional[str]
+):
+    doc_type = doc_type or detect_doc_type(question)
 
     # -------------------------------------------
     # Retrieve + fallback si el tipo falla
+    # (retrieve cronometra "embed" y "search")
     # -------------------------------------------
-    hits = retrieve(question, top_k=top_k, doc_type=doc_type, provider=provider)
+    with span("retrieve", doc_type=doc_type, top_k=top_k):
+        hits = retrieve(question, top_k=top_k, doc_type=doc_type, provider=provider, tenant=tenant)
 
     if not hits and doc_type:
-        hits = retrieve(question, top_k=top_k, doc_type=None, provider=provider)
+        with span("retrieve", doc_type=None, top_k=top_k, fallback=True):
+            hits = retrieve(question, top_k=top_k, doc_type=None, provider=provider, tenant=tenant)
         doc_type = "documento"
 
     # -------------------------------------------
     # Rerank
     # -------------------------------------------
-    reranked = rerank(question, hits, top_k=min(len(hits), 30), provider=provider)
+    depth = _rerank_depth(hits)
+    with stage("rerank"):
+        reranked = rerank(question, hits[:depth], top_k=depth, provider=provider, tenant=tenant)
 
-    # -------------------------------------------
-    # Compresión del contexto
-    # -------------------------------------------
-    compressed = compress_context(reranked, max_chunks=5, group_size=5)
+    prepared = _prepare(question, hits, reranked, doc_type, provider, tenant)
+    return _complete(prepared, provider)
 
-    # -------------------------------------------
-    # Filenames únicos usados
-    # -------------------------------------------
-    documents_used = list({h["metadata"].get("filename", "desconocido") for h in reranked})
 
-    # -------------------------------------------
-    # Construcción del prompt final
-    # -------------------------------------------
-    prompt = build_prompt(
-        question,
-        compressed,
-        doc_type or "documento",
-        documents_used
-    )
+# ======================================================
+# 6. Pasos compartidos con el camino por lotes
+# ======================================================
+def _rerank_depth(hits: List[dict]) -> int:
+    """Cuántos hits pasan por el cross-encoder (adaptativo con RETRIEVAL_ADAPTIVE)."""
+    if not settings.RETRIEVAL_ADAPTIVE:
+        return min(len(hits), 30)
+    depth = rerank_depth(hits)
+    RETRIEVAL_DEPTH.observe(depth, kind="rerank")
+    return depth
+
+
+def detect_doc_type(question: str) -> Optional[str]:
+    """Auto-detección simple por palabras clave."""
+    qlow = question.lower()
+    if any(w in qlow for w in ["cláusula", "contrato"]):
+        return "contrato"
+    if "factura" in qlow:
+        return "factura"
+    if "correo" in qlow or "email" in qlow:
+        return "correo"
+    return None
+
+
+def _sources(hits: List[dict], tenant: Optional[str]) -> List[dict]:
+    """
+    Metadata de cada hit + text_excerpt / preview / length (contrato de
+    `sources` para el backend .NET). Desde el chunk store esos campos ya
+    no están en el índice: se rearman del texto hidratado.
+    """
+    hydrate(hits, tenant)
+    return [
+        # los vectores previos al chunk store traen los suyos en la metadata
+        {"text_excerpt": h["text"][:600], "length": len(h["text"]), "preview": h["text"][:180],
+         **h["metadata"]}
+        for h in hits
+    ]
 
-    # -------------------------------------------
-    # LLM
-    # -------------------------------------------
-    answer = generate_answer_with_llm(prompt, provider=provider)
 
-    elapsed = round(time.time() - start, 2)
+def _prepare(question: str, hits: List[dict], reranked: List[dict],
+             doc_type: Optional[str], provider: str, tenant: Optional[str]) -> dict:
+    """Contexto con presupuesto de tokens + prompt final (todo menos el LLM)."""
+    count_tokens = prompt_token_counter(provider)
+
+    with stage("compress"):
+        compressed = pack_context(reranked, count_tokens=count_tokens, tenant=tenant)
+
+    # Filenames únicos de los pasajes que entraron al prompt
+    documents_used = list({
+        src.get("filename") or "desconocido"
+        for passage in compressed for src in passage["source_info"]
+    })
+
+    with stage("prompt"):
+        prompt = build_prompt(
+            question,
+            compressed,
+            doc_type or "documento",
+            documents_used
+        )
+        prompt_tokens = count_tokens(prompt)
+
+    PROMPT_TOKENS.observe(prompt_tokens, provider=bounded(provider, PROVIDER_LABELS, "default"),
+                          doc_type=bounded(doc_type, DOC_TYPE_LABELS, "documento"))
 
     return {
-        "answer": answer,
-        "sources": [h["metadata"] for h in hits],
+        "question": question,
+        "prompt": prompt,
+        "prompt_tokens": prompt_tokens,
+        "context_tokens": sum(p["tokens"] for p in compressed),
+        "sources": _sources(hits, tenant),
         "documents_used": documents_used,
         "compressed_context": compressed,
-        "doc_type": doc_type or "documento",
-        "elapsed_seconds": elapsed
+        "doc_type": doc_type or "documento"
+    }
+
+
+def _complete(prepared: dict, provider: str) -> dict:
+    with stage("llm"):
+        answer = generate_answer_with_llm(prepared["prompt"], provider=provider)
+
+    return {
+        "answer": answer,
+        "sources": prepared["sources"],
+        "documents_used": prepared["documents_used"],
+        "compressed_context": prepared["compressed_context"],
+        "prompt_tokens": prepared["prompt_tokens"],
+        "context_tokens": prepared["context_tokens"],
+        "doc_type": prepared["doc_type"]
     }
+
+
+# ======================================================
+# 7. Lotes de preguntas (/query/batch)
+# ======================================================
+def prepare_batch(
+    questions: List[str],
+    top_k: int = 20,
+    doc_types: Optional[List[Optional[str]]] = None,
+    provider: str = "openai",
+    tenant: Optional[str] = None
+) -> List[dict]:
+    """
+    Todo answer_question salvo el LLM, para N preguntas a la vez: un solo
+    embed, búsquedas en paralelo y un solo predict del cross-encoder para
+    todos los pares. Cada elemento se completa después con
+    answer_prepared() (las llamadas al LLM son independientes).
+    """
+    with StageTimer("query_batch") as timer:
+        doc_types = [dt or detect_doc_type(q) for q, dt in zip(questions, doc_types or [None] * len(questions))]
+
+        with span("retrieve", questions=len(questions), top_k=top_k):
+            hits = retrieve_many(questions, top_k=top_k, doc_types=doc_types,
+                                 provider=provider, tenant=tenant)
+
+        # Fallback sin doc_type para las que no encontraron nada
+        retry = [i for i, h in enumerate(hits) if not h and doc_types[i]]
+        if retry:
+            with span("retrieve", questions=len(retry), top_k=top_k, fallback=True):
+                found = retrieve_many([questions[i] for i in retry], top_k=top_k,
+                                      provider=provider, tenant=tenant)
+            for i, h in zip(retry, found):
+                hits[i] = h
+                doc_types[i] = "documento"
+
+        depths = [_rerank_depth(h) for h in hits]
+        with stage("rerank"):
+            reranked = rerank_many(
+                [(q, h[:d], d) for q, h, d in zip(questions, hits, depths)],
+                provider=provider, tenant=tenant
+            )
+
+        # una sola lectura al chunk store para todos los contextos
+        hydrate([h for r in reranked for h in r], tenant)
+        prepared = [
+            _prepare(q, h, r, dt, provider, tenant)
+            for q, h, r, dt in zip(questions, hits, reranked, doc_types)
+        ]
+
+    timer.observe(provider=provider, doc_type="lote")
+    return prepared
+
+
+def answer_prepared(prepared: dict, provider: str = "openai") -> dict:
+    """Llamada al LLM de un elemento de prepare_batch()."""
+    start = time.time()
+
+    with StageTimer("query_batch") as timer:
+        result = _complete(prepared, provider)
+
+    timer.observe(provider=provider, doc_type=result["doc_type"])
+    result["elapsed_seconds"] = round(time.time() - start, 2)
+
+    return result
@@ -0,0 +1,142 @@
+# app/rag/projection.py
+
+"""
+Reducción de dimensión de embeddings para modelos locales / HF.
+
+- PCAProjection: componentes principales ajustados sobre una muestra de
+  embeddings del corpus (sin centrar por defecto: conserva mejor el
+  producto interno / coseno que usa el índice), guardados en .npz junto al índice
+  (EMB_PROJECTION_DIR/<índice>__<modelo>__<dim>.npz).
+- Si no hay proyección ajustada se trunca y re-normaliza (Matryoshka);
+  solo es buena aproximación con modelos entrenados para eso.
+- Qué reducción se usó (hash de la PCA o "truncate") entra en el ID de
+  los chunks (embeddings.embedding_space); el archivo se revalida por
+  mtime, así que una PCA nueva la toman también los workers en marcha.
+
+OpenAI no pasa por aquí: el API recibe `dimensions` directamente.
+"""
+
+import hashlib
+import re
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.logger import logger
+
+
+class PCAProjection:
+    def __init__(self, mean: np.ndarray, components: np.ndarray, model: str = "",
+                 explained_variance: float | None = None, fingerprint: str = ""):
+        self.mean = mean.astype(np.float32)
+        self.components = components.astype(np.float32)     # (dim, full_dim)
+        self.model = model
+        self.explained_variance = explained_variance
+        self.fingerprint = fingerprint                       # hash del .npz (identidad del espacio)
+
+    @property
+    def dim(self) -> int:
+        return self.components.shape[0]
+
+    @property
+    def source_dim(self) -> int:
+        return self.components.shape[1]
+
+    @classmethod
+    def fit(cls, vectors: np.ndarray, dim: int, model: str = "", center: bool = False) -> "PCAProjection":
+        x = np.asarray(vectors, dtype=np.float32)
+        if dim > min(x.shape):
+            raise ValueError(f"PCA a {dim} dims necesita al menos {dim} muestras (hay {x.shape[0]})")
+        mean = x.mean(axis=0) if center else np.zeros(x.shape[1], dtype=np.float32)
+        _, s, vt = np.linalg.svd(x - mean, full_matrices=False)
+        var = s ** 2
+        explained = float(var[:dim].sum() / var.sum()) if var.sum() else 1.0
+        return cls(mean, vt[:dim], model=model, explained_variance=explained)
+
+    def transform(self, vectors) -> np.ndarray:
+        out = (np.asarray(vectors, dtype=np.float32) - self.mean) @ self.components.T
+        return _normalize(out)
+
+    def save(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(path, mean=self.mean, components=self.components, model=self.model,
+                 explained_variance=np.float32(self.explained_variance or 0.0))
+
+    @classmethod
+    def load(cls, path: Path) -> "PCAProjection":
+        raw = Path(path).read_bytes()
+        data = np.load(path)
+        return cls(data["mean"], data["components"], model=str(data["model"]),
+                   explained_variance=float(data["explained_variance"]),
+                   fingerprint=hashlib.sha1(raw).hexdigest()[:12])
+
+
+def _normalize(x: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return x / norms
+
+
+def projection_path(model: str, dim: int, index_name: str | None = None) -> Path:
+    slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model)
+    return settings.EMB_PROJECTION_DIR / f"{index_name or settings.PINECONE_INDEX}__{slug}__{dim}.npz"
+
+
+# path → (mtime_ns | None, proyección | None). Se revalida con stat() en
+# cada uso: si scripts/fit_projection.py escribe (o borra) el archivo, los
+# workers en marcha lo recogen sin reiniciar.
+_cache: dict[Path, tuple[int | None, PCAProjection | None]] = {}
+_lock = threading.Lock()
+
+
+def get_projection(model: str, dim: int) -> PCAProjection | None:
+    path = projection_path(model, dim)
+    try:
+        mtime = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        mtime = None
+
+    with _lock:
+        cached = _cache.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        if mtime is not None:
+            proj = PCAProjection.load(path)
+            logger.info(f"🔹 Proyección PCA cargada: {path.name} ({proj.fingerprint})")
+        else:
+            proj = None
+            logger.warning(
+                f"⚠️ Sin proyección PCA para {model} → {dim} dims; se trunca (Matryoshka). "
+                f"Ajustarla con scripts/fit_projection.py"
+            )
+        _cache[path] = (mtime, proj)
+        return proj
+
+
+def projection_id(model: str, dim: int) -> str:
+    """Identidad de la reducción vigente: "pca:<hash>" o "truncate" (va en el ID de los chunks)."""
+    proj = get_projection(model, dim)
+    return f"pca:{proj.fingerprint}" if proj is not None else "truncate"
+
+
+def reduce_dimensions(vectors, model: str, dim: int | None) -> np.ndarray:
+    """Lleva los embeddings a `dim` (PCA si existe, si no truncado + normalizado)."""
+    x = np.asarray(vectors, dtype=np.float32)
+    if not dim or x.ndim != 2 or x.shape[1] <= dim:
+        return x
+
+    proj = get_projection(model, dim)
+    if proj is not None:
+        if proj.source_dim != x.shape[1]:
+            raise ValueError(
+                f"La proyección {model} espera {proj.source_dim} dims y llegaron {x.shape[1]}"
+            )
+        return proj.transform(x)
+    return _normalize(x[:, :dim])
+
+
+def invalidate_cache():
+    with _lock:
+        _cache.clear()
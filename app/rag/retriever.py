@@ -1,13 +1,27 @@
 # app/rag/retriever.py
 
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional
-from app.core.logger import logger
+from app.core.logger import get_logger
 from app.core.config import settings
+from app.core.metrics import (
+    DOC_TYPE_LABELS, FALLBACKS, PROVIDER_ERRORS, PROVIDER_LABELS, RETRIEVAL_DEPTH, bounded, stage,
+)
 
+from app.rag.adaptive import depth_estimator, score_cutoff
+from app.rag.cache import retrieval_cache
 from app.rag.embeddings import embed_texts
-from app.vectorstore.pinecone_client import query_index
+from app.rag.mmr import mmr
+from app.vectorstore.backend import query_index
+from app.vectorstore.chunk_store import chunk_store
+from app.vectorstore.routing import Route, doc_route, query_routes
 
-from sentence_transformers import CrossEncoder
+logger = get_logger("retrieval")
+
+try:
+    from sentence_transformers import CrossEncoder
+except Exception:
+    CrossEncoder = None
 
 # -------------------------------------------
 # Cross Encoders por provider (carga perezosa)
@@ -27,65 +41,231 @@ def get_cross_encoder(provider: str = "hf"):
     model_name = settings.CROSS_ENCODER_MODEL
 
     try:
+        if CrossEncoder is None:
+            raise RuntimeError("sentence-transformers no está instalado")
         ce = CrossEncoder(model_name)
         _cross_encoders[provider] = ce
-        logger.info(f"Cargado cross-encoder {model_name} para provider={provider}")
+        logger.info("Cargado cross-encoder %s para provider=%s", model_name, provider)
     except Exception as e:
-        logger.warning(f"No se pudo cargar cross-encoder para {provider}: {e}")
+        logger.warning("No se pudo cargar cross-encoder para %s: %s", provider, e)
         _cross_encoders[provider] = None
 
     return _cross_encoders[provider]
 
 
+# Consultas en paralelo a varios namespaces (VECTOR_ROUTING=provider_doc_type)
+_fanout_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="retrieve-fanout")
+
+
+def _search(route: Route, qvec, pool_k: int, include_values: bool = False):
+    return query_index(
+        index_name=route.index,
+        vector=qvec,
+        top_k=pool_k,
+        include_metadata=True,
+        filter=route.filter,
+        namespace=route.namespace,
+        include_values=include_values
+    )
+
+
+def _matches(res) -> list:
+    return (
+        res.get("matches", [])
+        if isinstance(res, dict)
+        else res.matches if hasattr(res, "matches")
+        else []
+    )
+
+
 # =====================================================
-# 1. RETRIEVE — soporta provider + filtrado por metadata
+# 1. RETRIEVE — provider / doc_type por ruteo o filtro de metadata
 # =====================================================
 
 def retrieve(
     query: str,
     top_k: int = 20,
     doc_type: Optional[str] = None,
-    provider: Optional[str] = None
+    provider: Optional[str] = None,
+    pool_k: Optional[int] = None,
+    tenant: Optional[str] = None,
+    mmr_lambda: Optional[float] = None,
+    two_stage: Optional[bool] = None
 ) -> List[dict]:
     """
     Recupera chunks desde Pinecone con:
     - provider (HF/OpenAI/local)
     - doc_type (email/contrato/etc)
+      (índice / namespace / filtro según VECTOR_ROUTING, ver routing.py)
+    - pool_k: candidatos pedidos al índice (None → max(top_k * 4, 50))
+    - tenant: namespace y partición de cache propios (None → DEFAULT_TENANT)
+    - mmr_lambda: diversifica el pool con MMR antes de cortar a top_k
+      (None → RETRIEVAL_MMR_LAMBDA; fuera de [0, 1) → orden por score)
+    Con RETRIEVAL_ADAPTIVE la profundidad pedida al índice se estima por
+    la distribución de scores y se devuelven a lo sumo top_k hits dentro
+    de RETRIEVAL_SCORE_GAP del líder (ver adaptive.py).
+    - two_stage: primero los documentos más cercanos (vectores por
+      documento) y después solo sus chunks (None → RETRIEVAL_TWO_STAGE)
+    Con RETRIEVAL_CACHE_TTL > 0 los resultados se cachean y se invalidan
+    al ingerir/borrar (solo en este proceso).
     """
+    return retrieve_many([query], top_k, [doc_type], provider, pool_k, tenant, mmr_lambda, two_stage)[0]
 
-    # ----- Generar embedding con el proveedor correcto -----
-    qvec = embed_texts([query], provider=provider)[0]
-
-    # ----- Filtrado en Pinecone -----
-    filter_obj = {}
-
-    if provider:
-        filter_obj["provider"] = {"$eq": provider}
 
-    if doc_type:
-        filter_obj["doc_type"] = {"$eq": doc_type}
-
-    if not filter_obj:
-        filter_obj = None
+def retrieve_many(
+    queries: List[str],
+    top_k: int = 20,
+    doc_types: Optional[List[Optional[str]]] = None,
+    provider: Optional[str] = None,
+    pool_k: Optional[int] = None,
+    tenant: Optional[str] = None,
+    mmr_lambda: Optional[float] = None,
+    two_stage: Optional[bool] = None
+) -> List[List[dict]]:
+    """
+    retrieve() para varias queries: las que no están en cache se embeben
+    en una sola llamada al proveedor y sus búsquedas (una por query y
+    ruta) van en paralelo. Devuelve los hits en el orden de `queries`.
+    """
 
     # Buscar en un pool grande y luego seleccionar top_k
-    pool_k = max(top_k * 4, 50)
-
-    res = query_index(
-        index_name=settings.PINECONE_INDEX,
-        vector=qvec,
-        top_k=pool_k,
-        include_metadata=True,
-        filter=filter_obj
-    )
-
-    matches = (
-        res.get("matches", [])
-        if isinstance(res, dict)
-        else res.matches if hasattr(res, "matches")
-        else []
-    )
-
+    pool_k = pool_k or max(top_k * 4, 50)
+
+    tenant = tenant or settings.DEFAULT_TENANT
+    doc_types = doc_types or [None] * len(queries)
+
+    if mmr_lambda is None:
+        mmr_lambda = settings.RETRIEVAL_MMR_LAMBDA
+    diversify = mmr_lambda is not None and 0.0 <= mmr_lambda < 1.0
+    if not diversify:
+        mmr_lambda = None
+
+    if two_stage is None:
+        two_stage = settings.RETRIEVAL_TWO_STAGE
+
+    keys = [(q, top_k, dt, provider, pool_k, mmr_lambda, settings.RETRIEVAL_ADAPTIVE, two_stage)
+            for q, dt in zip(queries, doc_types)]
+
+    results: List[Optional[List[dict]]] = [retrieval_cache.get(key, tenant) for key in keys]
+    pending = [i for i, cached in enumerate(results) if cached is None]
+    if not pending:
+        return results
+
+    # ----- Un solo forward pass de embeddings (sin repetir textos) -----
+    texts = list(dict.fromkeys(queries[i] for i in pending))
+    with stage("embed"):
+        vectors = embed_texts(texts, provider=provider)
+    qvecs = {text: vectors[j] for j, text in enumerate(texts)}
+
+    # ----- Profundidad: fija (pool_k) o adaptativa por distribución de scores -----
+    adaptive = settings.RETRIEVAL_ADAPTIVE
+    ceiling = pool_k if diversify or not adaptive else top_k
+    # doc_type libre del cliente → None: no abre una clave nueva por valor
+    depth_keys = {
+        i: (tenant, provider, doc_types[i] if doc_types[i] in DOC_TYPE_LABELS else None) for i in pending
+    }
+    depths = {
+        i: depth_estimator.depth(depth_keys[i], settings.RETRIEVAL_MIN_DEPTH, ceiling) if adaptive else ceiling
+        for i in pending
+    }
+
+    # ----- Ruteo: índice / namespace + filtro residual -----
+    routes = {i: query_routes(provider, doc_types[i], tenant) for i in pending}
+    if two_stage:
+        with stage("doc_search"):
+            routes = _narrow_to_documents(pending, routes, queries, qvecs, provider)
+    with stage("search"):
+        matches = _search_many(pending, routes, queries, qvecs, depths, diversify)
+
+    hits = {i: _to_hits(matches[i], ceiling, with_values=diversify) for i in pending}
+
+    if adaptive:
+        cutoffs = {i: score_cutoff([h["score"] for h in hits[i]], settings.RETRIEVAL_SCORE_GAP,
+                                   settings.RETRIEVAL_MIN_DEPTH) for i in pending}
+
+        # El corte llegó al fondo de lo pedido: la estimación fue corta
+        short = [i for i in pending if depths[i] < ceiling and cutoffs[i] >= depths[i]]
+        if short:
+            retry = {i: ceiling for i in short}
+            with stage("search"):
+                matches.update(_search_many(short, routes, queries, qvecs, retry, diversify))
+            for i in short:
+                depths[i] = ceiling
+                hits[i] = _to_hits(matches[i], ceiling, with_values=diversify)
+                cutoffs[i] = score_cutoff([h["score"] for h in hits[i]], settings.RETRIEVAL_SCORE_GAP,
+                                          settings.RETRIEVAL_MIN_DEPTH)
+
+        for i in pending:
+            if hits[i]:                      # sin resultados no hay corte que aprender
+                depth_estimator.observe(depth_keys[i], cutoffs[i])
+            RETRIEVAL_DEPTH.observe(depths[i], kind="requested")
+            RETRIEVAL_DEPTH.observe(cutoffs[i], kind="kept")
+            hits[i] = hits[i][:cutoffs[i]]
+
+    for i in pending:
+        if diversify:
+            with stage("mmr"):
+                results[i] = _diversify(hits[i], qvecs[queries[i]], top_k, mmr_lambda)
+        else:
+            results[i] = hits[i][:top_k]
+        retrieval_cache.put(keys[i], results[i], tenant)
+
+    return results
+
+
+def _search_many(pending: List[int], routes: dict, queries: List[str], qvecs: dict,
+                 depths: dict, include_values: bool) -> dict:
+    """Una búsqueda por (query, ruta), en paralelo si hay más de una."""
+    jobs = [(i, route) for i in pending for route in routes[i]]
+
+    def run(job):
+        i, route = job
+        return _search(route, qvecs[queries[i]], depths[i], include_values)
+
+    if len(jobs) == 1:
+        responses = [run(jobs[0])]
+    else:
+        responses = list(_fanout_pool.map(run, jobs))
+
+    matches: dict[int, list] = {i: [] for i in pending}
+    for (i, _), res in zip(jobs, responses):
+        matches[i].extend(_matches(res))
+    return matches
+
+
+def _narrow_to_documents(pending: List[int], routes: dict, queries: List[str], qvecs: dict,
+                         provider: Optional[str]) -> dict:
+    """
+    Etapa 1 del retrieval en dos etapas: por (query, ruta) busca los
+    RETRIEVAL_DOC_TOP_K documentos más cercanos en su namespace de
+    vectores por documento y restringe la ruta a ellos (document_id $in).
+    Una ruta sin vectores por documento se queda con la búsqueda plana.
+    """
+    jobs = [(i, route) for i in pending for route in routes[i]]
+
+    def run(job):
+        i, route = job
+        return _matches(_search(doc_route(route), qvecs[queries[i]], settings.RETRIEVAL_DOC_TOP_K))
+
+    if len(jobs) == 1:
+        responses = [run(jobs[0])]
+    else:
+        responses = list(_fanout_pool.map(run, jobs))
+
+    narrowed: dict[int, list] = {i: [] for i in pending}
+    for (i, route), matches in zip(jobs, responses):
+        doc_ids = [m.get("id") if isinstance(m, dict) else getattr(m, "id", None) for m in matches]
+        doc_ids = [d for d in doc_ids if d]
+        RETRIEVAL_DEPTH.observe(len(doc_ids), kind="documents")
+        if not doc_ids:
+            FALLBACKS.inc(kind="two_stage", provider=bounded(provider or settings.EMB_PROVIDER, PROVIDER_LABELS, "default"))
+            narrowed[i].append(route)
+            continue
+        narrowed[i].append(route._replace(filter={**(route.filter or {}), "document_id": {"$in": doc_ids}}))
+    return narrowed
+
+
+def _to_hits(matches: list, top_k: int, with_values: bool = False) -> List[dict]:
     hits = []
     for m in matches:
         meta = (
@@ -94,50 +274,106 @@ def retrieve(
             else getattr(m, "metadata", {}) or {}
         )
 
-        hits.append({
+        hit = {
             "id": m.get("id") if isinstance(m, dict) else getattr(m, "id", None),
             "score": m.get("score") if isinstance(m, dict) else getattr(m, "score", 0.0),
             "metadata": meta
-        })
+        }
+        if with_values:
+            hit["values"] = m.get("values") if isinstance(m, dict) else getattr(m, "values", None)
+        hits.append(hit)
 
     # Ordenar por score bruto
-    hits_sorted = sorted(hits, key=lambda x: x["score"], reverse=True)
+    return sorted(hits, key=lambda x: x["score"], reverse=True)[:top_k]
+
 
-    return hits_sorted[:top_k]
+def _diversify(hits: List[dict], qvec, top_k: int, mmr_lambda: float) -> List[dict]:
+    """MMR sobre los vectores del pool; los valores no se guardan en los hits."""
+    values = [h.pop("values", None) for h in hits]
+    if any(v is None or len(v) == 0 for v in values):
+        logger.debug("El backend no devolvió vectores — se omite MMR.")
+        return hits[:top_k]
+    return [hits[j] for j in mmr(qvec, values, top_k, mmr_lambda)]
 
 
 # =====================================================
-# 2. RERANK — CrossEncoder dinámico por provider
+# 2. HIDRATAR TEXTO — una lectura por lote al chunk store
+# =====================================================
+
+def hydrate(hits: List[dict], tenant: Optional[str] = None) -> List[dict]:
+    """
+    Agrega h["text"] (chunk completo) a los hits que no lo tengan.
+    Los vectores indexados antes del chunk store caen al text_excerpt
+    que traían en la metadata.
+    """
+    missing = [h for h in hits if "text" not in h]
+    if not missing:
+        return hits
+
+    texts = chunk_store.get_many([h["id"] for h in missing], tenant)
+    for h in missing:
+        text = texts.get(h["id"])
+        if text is None:
+            text = h["metadata"].get("text_excerpt", "")
+        h["text"] = text
+
+    return hits
+
+
+# =====================================================
+# 3. RERANK — CrossEncoder dinámico por provider
 # =====================================================
 
 def rerank(
     query: str,
     hits: List[dict],
     top_k: int = 10,
-    provider: Optional[str] = None
+    provider: Optional[str] = None,
+    tenant: Optional[str] = None
 ) -> List[dict]:
+    return rerank_many([(query, hits, top_k)], provider, tenant)[0]
 
-    if not hits:
-        return []
+
+def rerank_many(
+    items: List[tuple],
+    provider: Optional[str] = None,
+    tenant: Optional[str] = None
+) -> List[List[dict]]:
+    """
+    items: [(query, hits, top_k)]. Hidrata el texto de todos los hits en
+    una lectura y puntúa todos los pares (query, chunk) con un solo
+    predict (en lotes de RERANK_BATCH_SIZE).
+    """
+    if not any(hits for _, hits, _ in items):
+        return [[] for _ in items]
 
     ce = get_cross_encoder(provider or "hf")
 
     if not ce:
         logger.debug("No cross-encoder disponible — devolviendo top-k directo.")
-        return hits[:top_k]
+        FALLBACKS.inc(kind="rerank", provider=bounded(provider, PROVIDER_LABELS, "hf"))
+        return [hits[:top_k] for _, hits, top_k in items]
 
-    # Preparar pares (query, chunk)
-    pairs = [(query, h["metadata"].get("text_excerpt", "")) for h in hits]
+    # Preparar pares (query, chunk completo)
+    hydrate([h for _, hits, _ in items for h in hits], tenant)
+    pairs = [(query, h["text"]) for query, hits, _ in items for h in hits]
 
     try:
-        scores = ce.predict(pairs)
+        scores = ce.predict(pairs, batch_size=settings.RERANK_BATCH_SIZE)
     except Exception as e:
-        logger.warning(f"Cross-encoder falló: {e}")
-        return hits[:top_k]
-
-    for i, h in enumerate(hits):
-        h["_rerank_score"] = float(scores[i]) if i < len(scores) else 0.0
-
-    hits_reranked = sorted(hits, key=lambda x: x.get("_rerank_score", 0.0), reverse=True)
-
-    return hits_reranked[:top_k]
+        logger.warning("Cross-encoder falló: %s", e)
+        PROVIDER_ERRORS.inc(kind="rerank", provider=bounded(provider, PROVIDER_LABELS, "hf"))
+        FALLBACKS.inc(kind="rerank", provider=bounded(provider, PROVIDER_LABELS, "hf"))
+        return [hits[:top_k] for _, hits, top_k in items]
+
+    out, offset = [], 0
+    for _, hits, top_k in items:
+        for i, h in enumerate(hits):
+            j = offset + i
+            h["_rerank_score"] = float(scores[j]) if j < len(scores) else 0.0
+        offset += len(hits)
+
+        hits_reranked = sorted(hits, key=lambda x: x.get("_rerank_score", 0.0), reverse=True)
+        out.append(hits_reranked[:top_k])
+
+    return out
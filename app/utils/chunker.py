@@ -1,38 +1,218 @@
 # app/utils/chunker.py
 
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+from collections import deque
+from functools import lru_cache
+from typing import Callable
 
-def chunk_text(
+# Misma jerarquía que usábamos con RecursiveCharacterTextSplitter
+SEPARATORS = [
+    "\n\n",     # separa por párrafos
+    "\n",       # luego por líneas
+    ". ",       # luego por oraciones
+    " ",        # luego por palabras
+    ""          # y finalmente por caracteres
+]
+
+
+# ============================================================
+# Conteo de tokens (tokenizer del modelo de embeddings)
+# ============================================================
+@lru_cache(maxsize=4)
+def token_counter(model_name: str | None = None) -> Callable[[str], int]:
+    """
+    Devuelve una función len(texto) en tokens usando el tokenizer del
+    modelo de embeddings (EMB_MODEL por defecto). Los conteos se cachean
+    porque el splitter mide muchas veces los mismos fragmentos.
+    """
+    from transformers import AutoTokenizer
+    from app.core.config import settings
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name or settings.EMB_MODEL)
+
+    @lru_cache(maxsize=65536)
+    def count(text: str) -> int:
+        if not text:
+            return 0
+        return len(tokenizer.encode(text, add_special_tokens=False))
+
+    return count
+
+
+# ============================================================
+# Splitter recursivo nativo (sobre offsets, sin copiar strings)
+# ============================================================
+class _RecursiveSplitter:
+    """
+    Reimplementación de RecursiveCharacterTextSplitter (keep_separator=True,
+    strip_whitespace=True) que trabaja con spans (start, end) sobre el
+    texto original. Cada chunk es un substring contiguo del texto, así que
+    sus offsets salen gratis.
+    """
+
+    def __init__(self, text: str, chunk_size: int, chunk_overlap: int,
+                 length_function: Callable[[str], int] | None, separators: list[str]):
+        self.text = text
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.length_function = length_function
+        self.separators = separators
+
+    def length(self, span: tuple[int, int]) -> int:
+        if self.length_function is None:
+            return span[1] - span[0]
+        return self.length_function(self.text[span[0]:span[1]])
+
+    def split(self) -> list[tuple[int, int]]:
+        return self._split((0, len(self.text)), self.separators)
+
+    # --------------------------------------------------------
+    def _pieces(self, span: tuple[int, int], sep: str) -> list[tuple[int, int]]:
+        """
+        Divide el span por `sep` dejando el separador al inicio de la
+        siguiente pieza (equivale a keep_separator=True).
+        """
+        start, end = span
+        if sep == "":
+            return [(i, i + 1) for i in range(start, end)]
+
+        pieces = []
+        pos = start
+        i = self.text.find(sep, start, end)
+        while i != -1:
+            if i > pos:
+                pieces.append((pos, i))
+            pos = i
+            i = self.text.find(sep, i + len(sep), end)
+        if end > pos:
+            pieces.append((pos, end))
+        return pieces
+
+    def _split(self, span: tuple[int, int], separators: list[str]) -> list[tuple[int, int]]:
+        separator = separators[-1]
+        new_separators = []
+        for i, sep in enumerate(separators):
+            if sep == "":
+                separator = sep
+                break
+            if self.text.find(sep, span[0], span[1]) != -1:
+                separator = sep
+                new_separators = separators[i + 1:]
+                break
+
+        final_chunks = []
+        good = []
+        for piece in self._pieces(span, separator):
+            if self.length(piece) < self.chunk_size:
+                good.append(piece)
+                continue
+
+            if good:
+                final_chunks.extend(self._merge(good))
+                good = []
+
+            if not new_separators:
+                final_chunks.append(piece)
+            else:
+                final_chunks.extend(self._split(piece, new_separators))
+
+        if good:
+            final_chunks.extend(self._merge(good))
+
+        return final_chunks
+
+    def _merge(self, pieces: list[tuple[int, int]]) -> list[tuple[int, int]]:
+        """
+        Agrupa piezas contiguas hasta chunk_size y conserva como traslape
+        las últimas piezas que sumen <= chunk_overlap. Usa deque para que
+        descartar por la izquierda sea O(1).
+        """
+        docs = []
+        current = deque()
+        lengths = deque()
+        total = 0
+
+        for piece in pieces:
+            n = self.length(piece)
+
+            if total + n > self.chunk_size and current:
+                docs.append((current[0][0], current[-1][1]))
+                while total > self.chunk_overlap or (total + n > self.chunk_size and total > 0):
+                    total -= lengths.popleft()
+                    current.popleft()
+
+            current.append(piece)
+            lengths.append(n)
+            total += n
+
+        if current:
+            docs.append((current[0][0], current[-1][1]))
+
+        return docs
+
+
+def _strip_span(text: str, start: int, end: int) -> tuple[int, int]:
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+# ============================================================
+# INTERFAZ PRINCIPAL
+# ============================================================
+def chunk_text_with_offsets(
     text: str,
     chunk_size: int = 800,
-    chunk_overlap: int = 150
-):
+    chunk_overlap: int = 150,
+    length_function: Callable[[str], int] | None = None,
+    separators: list[str] | None = None
+) -> list[dict]:
     """
-    Chunker basado en RecursiveCharacterTextSplitter.
-    Mucho más robusto para textos reales (PDFs, contratos, emails, facturas).
+    Igual que chunk_text pero devuelve [{"text", "start", "end"}, ...]
+    con los offsets de cada chunk en el texto original.
 
-    - chunk_size: tamaño máximo de cada chunk (caracteres)
-    - chunk_overlap: cantidad de traslape entre chunks
+    - length_function: None → caracteres; token_counter() → tokens del
+      modelo de embeddings (la suma por piezas es una aproximación del
+      conteo del chunk completo).
     """
 
     if not text:
         return []
 
-    splitter = RecursiveCharacterTextSplitter(
+    splitter = _RecursiveSplitter(
+        text,
         chunk_size=chunk_size,
         chunk_overlap=chunk_overlap,
-        separators=[
-            "\n\n",     # separa por párrafos
-            "\n",       # luego por líneas
-            ". ",       # luego por oraciones
-            " ",        # luego por palabras
-            ""          # y finalmente por caracteres
-        ]
+        length_function=length_function,
+        separators=separators or SEPARATORS
     )
 
-    chunks = splitter.split_text(text)
-
-    # Limpieza suave
-    chunks = [c.strip() for c in chunks if c.strip()]
+    chunks = []
+    for start, end in splitter.split():
+        start, end = _strip_span(text, start, end)
+        if start < end:
+            chunks.append({"text": text[start:end], "start": start, "end": end})
 
     return chunks
+
+
+def chunk_text(
+    text: str,
+    chunk_size: int = 800,
+    chunk_overlap: int = 150,
+    length_function: Callable[[str], int] | None = None
+):
+    """
+    Chunker recursivo párrafo → línea → oración → palabra → carácter.
+    Mucho más robusto para textos reales (PDFs, contratos, emails, facturas).
+
+    - chunk_size: tamaño máximo de cada chunk (caracteres o tokens)
+    - chunk_overlap: cantidad de traslape entre chunks
+    - length_function: None (caracteres) o token_counter()
+    """
+
+    return [
+        c["text"]
+        for c in chunk_text_with_offsets(text, chunk_size, chunk_overlap, length_function)
+    ]
@@ -1,13 +1,16 @@
 # app/utils/text_extract.py
 import re
 from pathlib import Path
+from typing import Iterator
 import mimetypes
+import zipfile
+from xml.etree.ElementTree import iterparse
 import pymupdf as fitz          # PDF
-import docx
 import email
 from email import policy
 import extract_msg              # Outlook .msg
 import openpyxl                 # Excel
+from app.core.config import settings
 from app.core.logger import logger
 
 
@@ -116,12 +119,89 @@ def extract_text_pdf(path: Path) -> str:
 
 
 # ============================================================================
-# DOCX
+# DOCX — lectura directa de word/document.xml (incluye tablas)
 # ============================================================================
+_W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+def iter_text_docx(path: Path, max_chars: int | None = None) -> Iterator[str]:
+    """
+    Recorre word/document.xml con iterparse sin construir el modelo de
+    python-docx. Emite un párrafo por línea y cada fila de tabla como
+    "celda | celda | ...". Se detiene al superar max_chars.
+    """
+    max_chars = max_chars or settings.EXTRACT_MAX_CHARS
+    emitted = 0
+
+    para_stack: list[list[str]] = []     # párrafos abiertos (puede haber anidados)
+    cell_stack: list[list[str]] = []     # celdas abiertas (tablas anidadas)
+    row_stack: list[list[str]] = []      # filas abiertas
+    depth = 0
+    body = None
+
+    with zipfile.ZipFile(path) as zf, zf.open("word/document.xml") as fh:
+        for event, elem in iterparse(fh, events=("start", "end")):
+            tag = elem.tag
+
+            if event == "start":
+                depth += 1
+                if tag == _W_NS + "body":
+                    body = elem
+                elif tag == _W_NS + "p":
+                    para_stack.append([])
+                elif tag == _W_NS + "tr":
+                    row_stack.append([])
+                elif tag == _W_NS + "tc":
+                    cell_stack.append([])
+                continue
+
+            depth -= 1
+            line = None
+
+            if tag == _W_NS + "t":
+                if para_stack and elem.text:
+                    para_stack[-1].append(elem.text)
+            elif tag == _W_NS + "tab":
+                if para_stack:
+                    para_stack[-1].append("\t")
+            elif tag in (_W_NS + "br", _W_NS + "cr"):
+                if para_stack:
+                    para_stack[-1].append("\n")
+            elif tag == _W_NS + "p":
+                text = "".join(para_stack.pop()).strip()
+                if text:
+                    if cell_stack:
+                        cell_stack[-1].append(text)
+                    else:
+                        line = text
+            elif tag == _W_NS + "tc":
+                cell = " ".join(cell_stack.pop())
+                if row_stack:
+                    row_stack[-1].append(cell)
+            elif tag == _W_NS + "tr":
+                cells = [c for c in row_stack.pop() if c]
+                if cells:
+                    row_text = " | ".join(cells)
+                    if cell_stack:
+                        # tabla anidada → se aplana dentro de la celda padre
+                        cell_stack[-1].append(row_text)
+                    else:
+                        line = row_text
+
+            # Liberar los hijos ya procesados del body (memoria acotada)
+            if depth == 2 and body is not None:
+                body.clear()
+
+            if line is not None:
+                emitted += len(line) + 1
+                if emitted > max_chars:
+                    logger.warning(f"⚠ DOCX truncado en {max_chars} caracteres: {path}")
+                    return
+                yield line
+
+
 def extract_text_docx(path: Path) -> str:
-    doc = docx.Document(path)
-    paragraphs = [p.text for p in doc.paragraphs if p.text.strip()]
-    return clean_text("\n".join(paragraphs))
+    return clean_text("\n".join(iter_text_docx(path)))
 
 
 # ============================================================================
@@ -132,22 +212,48 @@ def extract_text_txt(path: Path) -> str:
 
 
 # ============================================================================
-# EXCEL (.xlsx)
+# EXCEL (.xlsx) — modo read-only (streaming por filas)
 # ============================================================================
-def extract_text_excel(path: Path) -> str:
-    wb = openpyxl.load_workbook(path, data_only=True)
-    content = []
+def iter_text_excel(
+    path: Path,
+    max_rows: int | None = None,
+    max_chars: int | None = None
+) -> Iterator[str]:
+    """
+    Lee el libro en modo read_only: openpyxl parsea cada hoja de forma
+    incremental y no materializa las celdas en memoria.
+    Se detiene al alcanzar max_rows (total del libro) o max_chars.
+    """
+    max_rows = max_rows or settings.EXTRACT_MAX_ROWS
+    max_chars = max_chars or settings.EXTRACT_MAX_CHARS
+    rows = 0
+    emitted = 0
 
-    for sheet in wb.sheetnames:
-        ws = wb[sheet]
-        content.append(f"\n--- HOJA: {sheet} ---\n")
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        for ws in wb.worksheets:
+            yield f"\n--- HOJA: {ws.title} ---\n"
+
+            for row in ws.iter_rows(values_only=True):
+                values = [str(cell).strip() for cell in row if cell is not None]
+                if not values:
+                    continue
+
+                line = " | ".join(values)
+                rows += 1
+                emitted += len(line) + 1
+                if rows > max_rows or emitted > max_chars:
+                    logger.warning(
+                        f"⚠ Excel truncado (max_rows={max_rows}, max_chars={max_chars}): {path}"
+                    )
+                    return
+                yield line
+    finally:
+        wb.close()
 
-        for row in ws.iter_rows(values_only=True):
-            values = [str(cell).strip() for cell in row if cell is not None]
-            if values:
-                content.append(" | ".join(values))
 
-    return clean_text("\n".join(content))
+def extract_text_excel(path: Path) -> str:
+    return clean_text("\n".join(iter_text_excel(path)))
 
 
 # ============================================================================
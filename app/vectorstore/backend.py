@@ -0,0 +1,63 @@
+# app/vectorstore/backend.py
+
+"""
+Punto único de acceso al vector store. Despacha a pinecone_client o a
+local_store según settings.VECTOR_BACKEND, resolviendo en cada llamada
+para que tests y benchmarks puedan cambiar de backend en caliente.
+"""
+
+from importlib import import_module
+
+from app.core.config import settings
+
+_BACKENDS = {
+    "pinecone": "app.vectorstore.pinecone_client",
+    "local": "app.vectorstore.local_store",
+}
+
+
+def _backend():
+    name = (settings.VECTOR_BACKEND or "pinecone").lower()
+    if name not in _BACKENDS:
+        raise ValueError(f"VECTOR_BACKEND desconocido: {name}")
+    return import_module(_BACKENDS[name])
+
+
+def create_index(index_name: str, dim: int, metric: str = "cosine"):
+    return _backend().create_index(index_name, dim, metric)
+
+
+def upsert_vectors(index_name: str, vectors: list, batch_size: int = 100, namespace: str | None = None):
+    return _backend().upsert_vectors(index_name, vectors, batch_size=batch_size, namespace=namespace)
+
+
+def list_vector_ids(index_name: str, prefix: str, namespace: str | None = None) -> list[str]:
+    return _backend().list_vector_ids(index_name, prefix, namespace=namespace)
+
+
+def list_namespaces(index_name: str) -> list[str]:
+    return _backend().list_namespaces(index_name)
+
+
+def fetch_vectors(index_name: str, ids: list, batch_size: int = 1000, namespace: str | None = None) -> dict:
+    return _backend().fetch_vectors(index_name, ids, batch_size=batch_size, namespace=namespace)
+
+
+def fetch_metadata(index_name: str, ids: list, batch_size: int = 1000, namespace: str | None = None) -> dict:
+    return _backend().fetch_metadata(index_name, ids, batch_size=batch_size, namespace=namespace)
+
+
+def update_metadata(index_name: str, vector_id: str, metadata: dict, namespace: str | None = None):
+    return _backend().update_metadata(index_name, vector_id, metadata, namespace=namespace)
+
+
+def delete_vectors(index_name: str, ids: list, batch_size: int = 1000, namespace: str | None = None):
+    return _backend().delete_vectors(index_name, ids, batch_size=batch_size, namespace=namespace)
+
+
+def query_index(index_name: str, vector: list, top_k: int = 10,
+                include_metadata: bool = True, filter: dict = None, namespace: str | None = None,
+                include_values: bool = False):
+    return _backend().query_index(index_name, vector, top_k=top_k,
+                                  include_metadata=include_metadata, filter=filter, namespace=namespace,
+                                  include_values=include_values)
@@ -0,0 +1,97 @@
+# app/vectorstore/chunk_store.py
+
+import sqlite3
+import threading
+from pathlib import Path
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.core.tenancy import is_default, scoped_key
+
+# SQLite limita las variables por sentencia (999 en builds antiguos)
+_MAX_VARS = 900
+
+
+class ChunkStore:
+    """
+    Texto completo de los chunks en SQLite, por chunk id.
+
+    El índice vectorial solo guarda los campos de filtro; el reranker y el
+    prompt hidratan el texto desde aquí con una lectura por lote
+    (get_many). La conexión se abre al primer uso y es compartida entre
+    hilos (WAL + lock propio). Con tenant, las claves se guardan como
+    "<tenant>:<chunk_id>" (el tenant por defecto usa el chunk id tal cual).
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    # --------------------------------------------------------
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS chunks ("
+                " id TEXT PRIMARY KEY,"
+                " document_id TEXT NOT NULL,"
+                " text TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS chunks_document ON chunks(document_id)")
+            self._conn = conn
+            logger.info(f"🗄️ Chunk store abierto: {self.path}")
+        return self._conn
+
+    # --------------------------------------------------------
+    def put_many(self, rows: list[tuple[str, str, str]], tenant: str | None = None):
+        """rows: [(chunk_id, document_id, text)]; reemplaza si ya existe."""
+        if not rows:
+            return
+        if not is_default(tenant):
+            rows = [(scoped_key(tenant, cid), doc, text) for cid, doc, text in rows]
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO chunks (id, document_id, text) VALUES (?, ?, ?)", rows)
+
+    def get_many(self, ids: list[str], tenant: str | None = None) -> dict[str, str]:
+        """chunk_id → texto de los ids que existan (una consulta por cada 900 ids)."""
+        keys = {scoped_key(tenant, i): i for i in ids if i}
+        out = {}
+        if not keys:
+            return out
+        wanted = list(keys)
+        with self._lock:
+            conn = self._connection()
+            for i in range(0, len(wanted), _MAX_VARS):
+                batch = wanted[i:i + _MAX_VARS]
+                marks = ",".join("?" * len(batch))
+                for key, text in conn.execute(f"SELECT id, text FROM chunks WHERE id IN ({marks})", batch):
+                    out[keys[key]] = text
+        return out
+
+    def delete_many(self, ids: list[str], tenant: str | None = None):
+        if not ids:
+            return
+        ids = [scoped_key(tenant, i) for i in ids]
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.executemany("DELETE FROM chunks WHERE id = ?", [(i,) for i in ids])
+
+    def count(self) -> int:
+        with self._lock:
+            return self._connection().execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+chunk_store = ChunkStore(settings.CHUNK_STORE_PATH)
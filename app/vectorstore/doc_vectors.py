@@ -0,0 +1,48 @@
+# app/vectorstore/doc_vectors.py
+
+"""
+Vectores por documento para el retrieval en dos etapas.
+
+Cada documento deja un vector (id = document_id) en el namespace hermano
+de su ruta de chunks (routing.doc_route): el embedding de su resumen
+(DOC_VECTOR_SOURCE="summary") o la media normalizada de los vectores de
+sus chunks ("mean"). retriever busca primero ahí los documentos más
+cercanos y después solo los chunks de esos documentos.
+
+scripts/backfill_doc_vectors.py los genera para documentos ingeridos
+antes de que existieran.
+"""
+
+import numpy as np
+
+from app.vectorstore.backend import create_index, delete_vectors, upsert_vectors
+from app.vectorstore.routing import Route, doc_route
+
+# Campos de la metadata del documento que se copian al vector (filtros de la ruta)
+DOC_FIELDS = ("document_id", "doc_type", "source", "filename", "provider")
+
+
+def mean_vector(rows) -> np.ndarray | None:
+    """Media normalizada (coseno) de los vectores de los chunks."""
+    if rows is None or len(rows) == 0:
+        return None
+    return normalize(np.mean(np.asarray(rows, dtype=np.float32), axis=0))
+
+
+def normalize(vector) -> np.ndarray | None:
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else None
+
+
+def write(document_id: str, vector, metadata: dict, route: Route):
+    meta = {k: v for k, v in metadata.items() if k in DOC_FIELDS and v is not None}
+    meta["document_id"] = document_id
+    target = doc_route(route)
+    create_index(target.index, dim=len(vector))
+    upsert_vectors(target.index, [(document_id, vector, meta)], namespace=target.namespace)
+
+
+def delete(document_id: str, route: Route):
+    target = doc_route(route)
+    delete_vectors(target.index, [document_id], namespace=target.namespace)
@@ -1,10 +1,15 @@
 # app/vectorstore/helpers.py
 
+import hashlib
 import uuid
 
+# Separador entre document_id y hash del chunk. Permite listar todos los
+# chunks de un documento por prefijo (index.list(prefix="<doc_id>#")).
+CHUNK_ID_SEP = "#"
+
+
 def build_metadata(
     doc_id: str,
-    text: str,
     chunk_index: int,
     doc_type: str,
     source_name: str,
@@ -12,17 +17,16 @@ def build_metadata(
 ):
     """
     Construye metadatos consistentes para Pinecone.
-    Compatible con el RAG Pipeline completo.
+    Solo campos de filtro / trazabilidad: el texto del chunk vive en el
+    chunk store local (app.vectorstore.chunk_store) y no viaja en cada
+    respuesta del índice.
     """
 
     base = {
         "document_id": doc_id,        # usado en queries y UI
         "chunk_index": chunk_index,   # usado para trazabilidad
         "doc_type": doc_type,         # email, contract, invoice...
-        "source_name": source_name,   # upload, crm, api...
-        "text_excerpt": text[:512],   # usado por reranker
-        "length": len(text),
-        "preview": text[:180],        # útil para debugging en dashboard
+        "source": source_name,        # upload, crm, api...
     }
 
     if extra_meta:
@@ -31,15 +35,46 @@ def build_metadata(
     return base
 
 
-def generate_chunk_id(doc_id: str, chunk_index: int):
+def content_hash(text: str, salt: str = "") -> str:
+    """
+    Hash corto y estable del contenido de un chunk.
+    `salt` permite separar espacios de embeddings (ej. el provider).
+    """
+    return hashlib.sha1(f"{salt}\x00{text}".encode("utf-8")).hexdigest()[:16]
+
+
+def generate_chunk_id(doc_id: str, text: str, salt: str = "", occurrence: int = 0):
     """
-    ID único para cada chunk.
+    ID determinístico por contenido: "<doc_id>#<hash>".
+    El mismo texto en el mismo documento conserva su ID entre ingestas,
+    así solo se re-embeben los chunks nuevos o modificados.
+    `occurrence` distingue chunks idénticos repetidos dentro del documento.
     """
-    return f"{doc_id}_chunk_{chunk_index}"
+    chunk_id = f"{doc_id}{CHUNK_ID_SEP}{content_hash(text, salt)}"
+    if occurrence:
+        chunk_id += f"-{occurrence}"
+    return chunk_id
+
+
+def chunk_id_prefix(doc_id: str) -> str:
+    return f"{doc_id}{CHUNK_ID_SEP}"
 
 
-def generate_doc_id():
+def generate_doc_id(external_id: str | None = None, content: str | None = None,
+                    source_name: str = ""):
     """
-    ID único por documento.
+    ID por documento:
+      - external_id (del CRM / caller) si viene: es el único que permite
+        reemplazar un documento con otro contenido (diff incremental)
+      - si no, uuid5 del contenido: re-subir el mismo archivo no duplica,
+        y dos archivos distintos con el mismo nombre no se pisan
+      - si tampoco hay contenido, uuid4 aleatorio
     """
+    if external_id:
+        return external_id
+
+    if content is not None:
+        key = f"{source_name}:{hashlib.sha1(content.encode('utf-8')).hexdigest()}"
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, key))
+
     return str(uuid.uuid4())
@@ -0,0 +1,482 @@
+# app/vectorstore/local_store.py
+
+"""
+Vector store local en memoria (NumPy) con la misma interfaz que
+pinecone_client. Se activa con VECTOR_BACKEND=local y sirve para
+desarrollo, tests y benchmarks sin servicios externos.
+
+Las respuestas imitan el formato dict de Pinecone:
+    {"matches": [{"id", "score", "metadata"[, "values"]}]}
+
+Cuantización opcional (LOCAL_STORE_QUANTIZATION):
+- "int8": un byte por dimensión + escala float32 por vector (~4x menos).
+- "binary": un bit por dimensión (signo, ~32x menos), score por Hamming.
+La búsqueda es en dos fases: escaneo aproximado sobre los códigos y
+re-score exacto en float32 de los top_k * LOCAL_STORE_RESCORE_FACTOR
+candidatos. Con LOCAL_STORE_KEEP_FLOAT=false no se guardan los float32
+(máximo ahorro) y el score final es el aproximado.
+"""
+
+import threading
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.logger import logger
+
+QUANTIZATIONS = ("none", "int8", "binary")
+_SCAN_BLOCK = 4096     # filas por bloque en el escaneo aproximado
+
+
+def _popcount(a: np.ndarray) -> np.ndarray:
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(a)
+    return _POPCOUNT_TABLE[a]
+
+
+_POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+class LocalIndex:
+    """
+    Matriz float32 y/o códigos cuantizados (filas reutilizables) + metadata
+    por fila. Con metric="cosine" los vectores se guardan normalizados y el
+    score es un producto punto. Los filtros $eq/$in usan un índice invertido
+    (campo, valor) → filas para no recorrer la metadata en cada query.
+    """
+
+    def __init__(self, dim: int, metric: str = "cosine", quantization: str = "none",
+                 rescore_factor: int = 4, keep_float: bool = True):
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"Cuantización desconocida: {quantization}")
+        if quantization != "none" and metric == "euclidean":
+            raise ValueError("La cuantización solo soporta métricas de producto punto/coseno")
+
+        self.dim = dim
+        self.metric = metric
+        self.quantization = quantization
+        self.rescore_factor = max(1, rescore_factor)
+        self.keep_float = keep_float or quantization == "none"
+
+        self.vectors = np.zeros((0, dim if self.keep_float else 0), dtype=np.float32)
+        if quantization == "int8":
+            self.codes = np.zeros((0, dim), dtype=np.int8)
+            self.scales = np.zeros(0, dtype=np.float32)
+        elif quantization == "binary":
+            self.codes = np.zeros((0, (dim + 7) // 8), dtype=np.uint8)
+        self.alive = np.zeros(0, dtype=bool)
+        self.ids: list[str | None] = []
+        self.metadata: list[dict | None] = []
+        self.rows: dict[str, int] = {}
+        self.free: list[int] = []
+        self.postings: dict[tuple, set[int]] = {}
+        self.lock = threading.RLock()
+
+    # --------------------------------------------------------
+    def __len__(self):
+        return len(self.rows)
+
+    def _prepare(self, values) -> np.ndarray:
+        vec = np.asarray(values, dtype=np.float32).reshape(-1)
+        if vec.shape[0] != self.dim:
+            raise ValueError(f"Dimensión {vec.shape[0]} no coincide con el índice ({self.dim})")
+        if self.metric == "cosine":
+            norm = np.linalg.norm(vec)
+            if norm > 0:
+                vec = vec / norm
+        return vec
+
+    def _grow(self, needed: int):
+        cap = self.alive.shape[0]
+        if needed <= cap:
+            return
+        new_cap = max(needed, cap * 2, 1024)
+
+        def _resize(arr: np.ndarray) -> np.ndarray:
+            out = np.zeros((new_cap,) + arr.shape[1:], dtype=arr.dtype)
+            out[:cap] = arr
+            return out
+
+        self.vectors = _resize(self.vectors)
+        self.alive = _resize(self.alive)
+        if self.quantization != "none":
+            self.codes = _resize(self.codes)
+        if self.quantization == "int8":
+            self.scales = _resize(self.scales)
+
+    def _store(self, row: int, vec: np.ndarray):
+        if self.keep_float:
+            self.vectors[row] = vec
+        if self.quantization == "int8":
+            peak = float(np.abs(vec).max())
+            scale = peak / 127 if peak > 0 else 1.0
+            self.codes[row] = np.round(vec / scale).astype(np.int8)
+            self.scales[row] = scale
+        elif self.quantization == "binary":
+            self.codes[row] = np.packbits(vec > 0)
+
+    def _values(self, row: int) -> np.ndarray:
+        """float32 si se guardan; si no, la reconstrucción desde los códigos."""
+        if self.keep_float:
+            return self.vectors[row]
+        if self.quantization == "int8":
+            return self.codes[row].astype(np.float32) * self.scales[row]
+        bits = np.unpackbits(self.codes[row])[:self.dim].astype(np.float32)
+        return (bits * 2 - 1) / np.sqrt(self.dim)
+
+    def memory_bytes(self) -> dict:
+        """Bytes por componente según la capacidad reservada actual."""
+        out = {"float": int(self.vectors.nbytes)}
+        if self.quantization != "none":
+            out["codes"] = int(self.codes.nbytes)
+        if self.quantization == "int8":
+            out["codes"] += int(self.scales.nbytes)
+        out["total"] = sum(out.values())
+        out["bytes_per_vector"] = round(out["total"] / max(self.alive.shape[0], 1), 2)
+        return out
+
+    def _index_meta(self, row: int, meta: dict, add: bool):
+        for k, v in (meta or {}).items():
+            if isinstance(v, (list, dict)):
+                continue
+            key = (k, v)
+            if add:
+                self.postings.setdefault(key, set()).add(row)
+            else:
+                rows = self.postings.get(key)
+                if rows is not None:
+                    rows.discard(row)
+
+    # --------------------------------------------------------
+    def upsert(self, items: list):
+        with self.lock:
+            for item in items:
+                if isinstance(item, dict):
+                    vid, values, meta = item["id"], item["values"], item.get("metadata") or {}
+                else:
+                    vid, values, meta = item[0], item[1], (item[2] if len(item) > 2 else {}) or {}
+
+                vec = self._prepare(values)
+                row = self.rows.get(vid)
+                if row is None:
+                    if self.free:
+                        row = self.free.pop()
+                    else:
+                        row = len(self.ids)
+                        self._grow(row + 1)
+                        self.ids.append(None)
+                        self.metadata.append(None)
+                    self.rows[vid] = row
+                else:
+                    self._index_meta(row, self.metadata[row], add=False)
+
+                self._store(row, vec)
+                self.alive[row] = True
+                self.ids[row] = vid
+                self.metadata[row] = dict(meta)
+                self._index_meta(row, self.metadata[row], add=True)
+
+    def load(self, vectors: np.ndarray, ids: list[str], metadata: list[dict]):
+        """
+        Carga masiva en un índice vacío sin cuantización. `vectors` se usa
+        tal cual, sin copiarlo (p.ej. un memmap copy-on-write de un
+        snapshot ya normalizado); las filas nuevas que no quepan hacen
+        crecer la matriz en RAM.
+        """
+        with self.lock:
+            if self.rows or self.quantization != "none":
+                raise ValueError("load() requiere un índice vacío y sin cuantización")
+            if vectors.shape != (len(ids), self.dim) or len(metadata) != len(ids):
+                raise ValueError(f"Snapshot inconsistente: {vectors.shape} para {len(ids)} ids (dim={self.dim})")
+
+            self.vectors = vectors
+            self.alive = np.ones(len(ids), dtype=bool)
+            self.ids = list(ids)
+            self.metadata = [dict(m or {}) for m in metadata]
+            self.rows = {vid: row for row, vid in enumerate(self.ids)}
+            self.free = []
+            self.postings = {}
+            for row, meta in enumerate(self.metadata):
+                self._index_meta(row, meta, add=True)
+
+    def delete(self, ids: list):
+        with self.lock:
+            for vid in ids:
+                row = self.rows.pop(vid, None)
+                if row is None:
+                    continue
+                self._index_meta(row, self.metadata[row], add=False)
+                self.alive[row] = False
+                self.ids[row] = None
+                self.metadata[row] = None
+                self.free.append(row)
+
+    def update(self, vid: str, set_metadata: dict):
+        with self.lock:
+            row = self.rows.get(vid)
+            if row is None:
+                return
+            self._index_meta(row, self.metadata[row], add=False)
+            self.metadata[row].update(set_metadata or {})
+            self._index_meta(row, self.metadata[row], add=True)
+
+    def fetch(self, ids: list) -> dict:
+        with self.lock:
+            return {
+                vid: {
+                    "id": vid,
+                    "values": self._values(self.rows[vid]).tolist(),
+                    "metadata": dict(self.metadata[self.rows[vid]])
+                }
+                for vid in ids if vid in self.rows
+            }
+
+    def list(self, prefix: str = "", batch_size: int = 100):
+        with self.lock:
+            ids = sorted(v for v in self.rows if v.startswith(prefix))
+        for i in range(0, len(ids), batch_size):
+            yield ids[i:i + batch_size]
+
+    # --------------------------------------------------------
+    def _filter_mask(self, flt: dict | None) -> np.ndarray:
+        n = len(self.ids)
+        mask = self.alive[:n].copy()
+        if not flt:
+            return mask
+
+        for field, cond in flt.items():
+            if not isinstance(cond, dict):
+                cond = {"$eq": cond}
+            for op, value in cond.items():
+                if op in ("$eq", "$in"):
+                    values = [value] if op == "$eq" else list(value)
+                    rows = set()
+                    for v in values:
+                        rows |= self.postings.get((field, v), set())
+                    sel = np.zeros(n, dtype=bool)
+                    if rows:
+                        sel[list(rows)] = True
+                    mask &= sel
+                else:
+                    # $ne / $nin / rangos: recorrido directo (poco frecuentes)
+                    sel = np.array([
+                        m is not None and _match(m.get(field), op, value)
+                        for m in self.metadata
+                    ], dtype=bool)
+                    mask &= sel
+        return mask
+
+    def query(self, vector, top_k: int = 10, include_metadata: bool = True,
+              include_values: bool = False, filter: dict | None = None) -> dict:
+        q = self._prepare(vector)
+        with self.lock:
+            n = len(self.ids)
+            if n == 0:
+                return {"matches": []}
+
+            mask = self._filter_mask(filter)
+            candidates = np.flatnonzero(mask)
+            if candidates.size == 0:
+                return {"matches": []}
+
+            # Con filtros poco selectivos se puntúa sobre vistas contiguas
+            # y se enmascara; el fancy indexing copiaría la matriz entera.
+            dense = candidates.size > n // 4
+            if dense:
+                candidates = np.arange(n)
+
+            if self.quantization == "none":
+                scores = self._exact_scores(candidates, q, dense)
+            else:
+                # fase 1: escaneo aproximado sobre los códigos
+                scores = self._approx_scores(candidates, q, dense)
+            if dense:
+                scores[~mask] = -np.inf
+
+            # fase 2: re-score exacto de los mejores candidatos
+            if self.quantization != "none" and self.keep_float:
+                n_rescore = min(top_k * self.rescore_factor, int(mask.sum()))
+                candidates = candidates[_top(scores, n_rescore)]
+                scores = self._exact_scores(candidates, q, dense=False)
+            elif dense:
+                k = min(top_k, int(mask.sum()))
+                candidates = candidates[_top(scores, k)]
+                scores = scores[candidates]
+
+            top = _top(scores, min(top_k, candidates.size))
+
+            matches = []
+            for j in top:
+                row = int(candidates[j])
+                m = {"id": self.ids[row], "score": float(scores[j])}
+                if include_metadata:
+                    m["metadata"] = dict(self.metadata[row])
+                if include_values:
+                    # ndarray float32: MMR en el mismo proceso sin pasar por listas
+                    m["values"] = np.array(self._values(row), dtype=np.float32)
+                matches.append(m)
+
+        return {"matches": matches}
+
+    def _exact_scores(self, candidates: np.ndarray, q: np.ndarray, dense: bool) -> np.ndarray:
+        vectors = self.vectors[:candidates.size] if dense else self.vectors[candidates]
+        if self.metric == "euclidean":
+            return -np.linalg.norm(vectors - q, axis=1)
+        return vectors @ q
+
+    def _approx_scores(self, candidates: np.ndarray, q: np.ndarray, dense: bool) -> np.ndarray:
+        """Scores aproximados por bloques (acota la memoria temporal)."""
+        out = np.empty(candidates.size, dtype=np.float32)
+        if self.quantization == "binary":
+            qbits = np.packbits(q > 0)
+        for start in range(0, candidates.size, _SCAN_BLOCK):
+            end = min(start + _SCAN_BLOCK, candidates.size)
+            rows = slice(start, end) if dense else candidates[start:end]
+            if self.quantization == "int8":
+                out[start:end] = (self.codes[rows].astype(np.float32) @ q) * self.scales[rows]
+            else:
+                hamming = _popcount(self.codes[rows] ^ qbits).sum(axis=1, dtype=np.int32)
+                out[start:end] = 1.0 - 2.0 * hamming / self.dim
+        return out
+
+
+def _top(scores: np.ndarray, k: int) -> np.ndarray:
+    """Índices de los k mayores scores, ordenados de mayor a menor."""
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    if k < scores.size:
+        part = np.argpartition(-scores, k - 1)[:k]
+    else:
+        part = np.arange(scores.size)
+    return part[np.argsort(-scores[part], kind="stable")]
+
+
+def _match(actual, op: str, value) -> bool:
+    if op == "$ne":
+        return actual != value
+    if op == "$nin":
+        return actual not in value
+    if actual is None:
+        return False
+    if op == "$gt":
+        return actual > value
+    if op == "$gte":
+        return actual >= value
+    if op == "$lt":
+        return actual < value
+    if op == "$lte":
+        return actual <= value
+    return False
+
+
+# ============================================================
+# Interfaz compatible con pinecone_client
+# ============================================================
+class _NamespacedIndex:
+    """Un índice local = dimensión fija + un LocalIndex por namespace ("" por defecto)."""
+
+    def __init__(self, dim: int, metric: str):
+        self.dim = dim
+        self.metric = metric
+        self.namespaces: dict[str, LocalIndex] = {}
+
+    def namespace(self, namespace: str | None, create: bool = False) -> LocalIndex | None:
+        key = namespace or ""
+        index = self.namespaces.get(key)
+        if index is None and create:
+            with _lock:
+                index = self.namespaces.get(key)
+                if index is None:
+                    index = self.namespaces[key] = LocalIndex(
+                        self.dim, self.metric,
+                        quantization=settings.LOCAL_STORE_QUANTIZATION,
+                        rescore_factor=settings.LOCAL_STORE_RESCORE_FACTOR,
+                        keep_float=settings.LOCAL_STORE_KEEP_FLOAT
+                    )
+        return index
+
+
+_indexes: dict[str, _NamespacedIndex] = {}
+_lock = threading.Lock()
+
+
+def create_index(index_name: str, dim: int, metric: str = "cosine"):
+    with _lock:
+        existing = _indexes.get(index_name)
+        if existing is not None and existing.dim != dim:
+            raise ValueError(
+                f"El índice local '{index_name}' tiene dimensión {existing.dim} y los embeddings {dim}"
+            )
+        if existing is None:
+            logger.info(
+                f"⚙️ Creando índice local '{index_name}' (dim={dim}, "
+                f"cuantización={settings.LOCAL_STORE_QUANTIZATION})"
+            )
+            _indexes[index_name] = _NamespacedIndex(dim, metric)
+
+
+def get_index(index_name: str, namespace: str | None = None) -> LocalIndex:
+    index = _indexes.get(index_name)
+    if index is None:
+        raise KeyError(f"Índice local inexistente: {index_name}")
+    return index.namespace(namespace, create=True)
+
+
+def _find(index_name: str, namespace: str | None) -> LocalIndex | None:
+    index = _indexes.get(index_name)
+    return index.namespace(namespace) if index is not None else None
+
+
+def load_namespace(index_name: str, namespace: str | None, vectors: np.ndarray,
+                   ids: list[str], metadata: list[dict]):
+    """Carga masiva (LocalIndex.load) de un namespace vacío; ver snapshot.py."""
+    get_index(index_name, namespace).load(vectors, ids, metadata)
+    logger.info(f"✅ Carga local: {len(ids)} vectores en {index_name}/{namespace or '(default)'}")
+
+
+def upsert_vectors(index_name: str, vectors: list, batch_size: int = 100, namespace: str | None = None):
+    get_index(index_name, namespace).upsert(vectors)
+    logger.info(f"✅ Upsert local: {len(vectors)} vectores.")
+
+
+def list_vector_ids(index_name: str, prefix: str, namespace: str | None = None) -> list[str]:
+    index = _find(index_name, namespace)
+    if index is None:
+        return []
+    return [vid for batch in index.list(prefix=prefix) for vid in batch]
+
+
+def list_namespaces(index_name: str) -> list[str]:
+    index = _indexes.get(index_name)
+    return [ns for ns, ix in index.namespaces.items() if len(ix)] if index is not None else []
+
+
+def fetch_vectors(index_name: str, ids: list, batch_size: int = 1000, namespace: str | None = None) -> dict:
+    index = _find(index_name, namespace)
+    if index is None:
+        return {}
+    return {vid: {"values": v["values"], "metadata": v["metadata"]} for vid, v in index.fetch(ids).items()}
+
+
+def fetch_metadata(index_name: str, ids: list, batch_size: int = 1000, namespace: str | None = None) -> dict:
+    return {vid: v["metadata"] for vid, v in fetch_vectors(index_name, ids, namespace=namespace).items()}
+
+
+def update_metadata(index_name: str, vector_id: str, metadata: dict, namespace: str | None = None):
+    get_index(index_name, namespace).update(vector_id, metadata)
+
+
+def delete_vectors(index_name: str, ids: list, batch_size: int = 1000, namespace: str | None = None):
+    index = _find(index_name, namespace)
+    if ids and index is not None:
+        index.delete(ids)
+
+
+def query_index(index_name: str, vector: list, top_k: int = 10,
+                include_metadata: bool = True, filter: dict = None, namespace: str | None = None,
+                include_values: bool = False):
+    index = _find(index_name, namespace)
+    if index is None:
+        return {"matches": []}
+    return index.query(vector, top_k=top_k, include_metadata=include_metadata,
+                       include_values=include_values, filter=filter)
@@ -0,0 +1,135 @@
+# app/vectorstore/manifest.py
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.core.tenancy import is_default, scoped_key
+
+# Campos pesados: columnas aparte, list() no los lee
+_HEAVY = ("chunk_ids", "summary")
+
+
+class DocumentManifest:
+    """
+    Registro local document_id → {chunk_ids, hash, doc_type, provider, tamaños}.
+    Es la fuente de verdad para borrar/reemplazar documentos sin tener
+    que listar el índice. Se guarda en SQLite (WAL, como el chunk store):
+    cada put/remove escribe solo la fila del documento, no el corpus
+    entero, y los demás procesos ven el cambio al instante.
+    Las entradas de otros tenants usan la clave "<tenant>:<document_id>".
+    Si junto a la base existe un manifest.json de versiones previas, se
+    importa la primera vez.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    # --------------------------------------------------------
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                " key TEXT PRIMARY KEY,"
+                " tenant TEXT NOT NULL,"
+                " entry TEXT NOT NULL,"
+                " chunk_ids TEXT,"
+                " summary TEXT)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS documents_tenant ON documents(tenant)")
+            self._conn = conn
+            self._import_legacy_json()
+        return self._conn
+
+    def _import_legacy_json(self):
+        legacy = self.path.with_suffix(".json")
+        if not legacy.exists() or self._conn.execute("SELECT 1 FROM documents LIMIT 1").fetchone():
+            return
+        try:
+            docs = json.loads(legacy.read_text(encoding="utf-8"))
+        except Exception as e:
+            logger.error(f"❌ Manifest JSON corrupto, no se importa: {e}")
+            return
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?, ?)",
+                [self._row(key, entry) for key, entry in docs.items()]
+            )
+        logger.info(f"🗂️ Manifest importado desde {legacy.name}: {len(docs)} documentos")
+
+    @staticmethod
+    def _row(key: str, entry: dict) -> tuple:
+        light = {k: v for k, v in entry.items() if k not in _HEAVY}
+        return (
+            key,
+            entry.get("tenant") or settings.DEFAULT_TENANT,
+            json.dumps(light, ensure_ascii=False),
+            json.dumps(entry["chunk_ids"]) if "chunk_ids" in entry else None,
+            entry.get("summary"),
+        )
+
+    # --------------------------------------------------------
+    def get(self, document_id: str, tenant: str | None = None) -> dict | None:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT entry, chunk_ids, summary FROM documents WHERE key = ?",
+                (scoped_key(tenant, document_id),)
+            ).fetchone()
+        if row is None:
+            return None
+        entry = json.loads(row[0])
+        if row[1] is not None:
+            entry["chunk_ids"] = json.loads(row[1])
+        if row[2] is not None:
+            entry["summary"] = row[2]
+        return entry
+
+    def put(self, document_id: str, entry: dict, tenant: str | None = None):
+        entry = {
+            **entry,
+            "document_id": document_id,
+            "tenant": tenant or settings.DEFAULT_TENANT,
+            "updated_at": time.strftime("%Y-%m-%d %H:%M:%S")
+        }
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?, ?)",
+                             self._row(scoped_key(tenant, document_id), entry))
+
+    def remove(self, document_id: str, tenant: str | None = None) -> dict | None:
+        entry = self.get(document_id, tenant)
+        if entry is not None:
+            with self._lock:
+                conn = self._connection()
+                with conn:
+                    conn.execute("DELETE FROM documents WHERE key = ?", (scoped_key(tenant, document_id),))
+        return entry
+
+    def list(self, tenant: str | None = None) -> list[dict]:
+        """Entradas del tenant sin chunk_ids ni resumen (para listados)."""
+        tenant = settings.DEFAULT_TENANT if is_default(tenant) else tenant
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT entry FROM documents WHERE tenant = ? ORDER BY rowid", (tenant,)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+manifest = DocumentManifest(settings.MANIFEST_PATH)
@@ -2,6 +2,7 @@ import os
 import time
 from dotenv import load_dotenv
 from pinecone import Pinecone, ServerlessSpec
+from app.core.config import settings
 from app.core.logger import logger
 
 load_dotenv()
@@ -11,27 +12,48 @@ INDEX_NAME = os.getenv("PINECONE_INDEX", "crm-rag-index")
 ENV_REGION = os.getenv("PINECONE_ENV", "us-east-1")
 
 # ============================================================
-# Validación inicial
+# Cliente (perezoso: importar el módulo no exige credenciales)
 # ============================================================
-if not API_KEY:
-    raise RuntimeError("❌ PINECONE_API_KEY no está configurado en .env")
+_pc = None
+_indexes = {}
+_dims = {}          # índices ya verificados → dimensión
 
-pc = Pinecone(api_key=API_KEY)
+
+def _client() -> Pinecone:
+    global _pc
+    if _pc is None:
+        if not API_KEY:
+            raise RuntimeError("❌ PINECONE_API_KEY no está configurado en .env")
+        host = settings.PINECONE_HOST       # stand-in local / proxy
+        _pc = Pinecone(api_key=API_KEY, host=host) if host else Pinecone(api_key=API_KEY)
+    return _pc
+
+def _as_list(vec) -> list:
+    return vec.tolist() if hasattr(vec, "tolist") else vec
+
+def _ns(namespace: str | None) -> dict:
+    # None / "" → namespace por defecto (no se envía el parámetro)
+    return {"namespace": namespace} if namespace else {}
 
 # ============================================================
 # Crear índice
 # ============================================================
 def create_index(index_name: str, dim: int, metric: str = "cosine"):
     """
-    Crea un índice serverless en Pinecone si no existe.
+    Crea un índice serverless en Pinecone si no existe y verifica que la
+    dimensión coincida. El resultado se recuerda para no consultar el
+    control plane en cada ingesta.
     """
+    if _dims.get(index_name) == dim:
+        return
+
     try:
-        existing = pc.list_indexes().names()
+        existing = _client().list_indexes().names()
 
         if index_name not in existing:
             logger.info(f"⚙️ Creando índice '{index_name}' en región {ENV_REGION}...")
 
-            pc.create_index(
+            _client().create_index(
                 name=index_name,
                 dimension=dim,
                 metric=metric,
@@ -41,8 +63,16 @@ def create_index(index_name: str, dim: int, metric: str = "cosine"):
             time.sleep(3)  # margen de creación
             logger.info("✅ Índice creado correctamente.")
         else:
+            existing_dim = getattr(_client().describe_index(index_name), "dimension", None)
+            if existing_dim and existing_dim != dim:
+                raise ValueError(
+                    f"El índice '{index_name}' tiene dimensión {existing_dim} y los embeddings {dim}; "
+                    f"usa otro PINECONE_INDEX o revisa EMB_DIMENSIONS"
+                )
             logger.info(f"ℹ️ El índice '{index_name}' ya existe.")
 
+        _dims[index_name] = dim
+
     except Exception as e:
         logger.error(f"❌ Error creando índice: {e}")
         raise
@@ -55,7 +85,9 @@ def get_index(index_name: str):
     Devuelve una instancia de índice lista para usar.
     """
     try:
-        return pc.Index(index_name)
+        if index_name not in _indexes:
+            _indexes[index_name] = _client().Index(index_name)
+        return _indexes[index_name]
     except Exception as e:
         logger.error(f"❌ No se pudo obtener el índice '{index_name}': {e}")
         raise
@@ -63,9 +95,10 @@ def get_index(index_name: str):
 # ============================================================
 # Insertar vectores
 # ============================================================
-def upsert_vectors(index_name: str, vectors: list):
+def upsert_vectors(index_name: str, vectors: list, batch_size: int = 100, namespace: str | None = None):
     """
-    Inserta vectores en el índice.
+    Inserta vectores en el índice (en lotes para no exceder el tamaño
+    máximo de request de Pinecone).
     Formato esperado:
     [
         (id, embedding, metadata),
@@ -74,18 +107,117 @@ def upsert_vectors(index_name: str, vectors: list):
     """
     try:
         index = get_index(index_name)
-        index.upsert(vectors=vectors)
+        for i in range(0, len(vectors), batch_size):
+            # los embeddings pueden llegar como arrays NumPy: se serializan por lote
+            batch = [(vid, _as_list(vec), meta) for vid, vec, meta in vectors[i:i + batch_size]]
+            index.upsert(vectors=batch, **_ns(namespace))
         logger.info(f"✅ Upsert completado: {len(vectors)} vectores insertados.")
 
     except Exception as e:
         logger.error(f"❌ Error durante upsert en Pinecone: {e}")
         raise
 
+# ============================================================
+# Listar / leer / borrar vectores por ID
+# ============================================================
+def list_vector_ids(index_name: str, prefix: str, namespace: str | None = None) -> list[str]:
+    """
+    Lista los IDs que empiezan por `prefix` (índices serverless).
+    Si el índice no existe o falla, devuelve [] (se re-sube todo).
+    """
+    try:
+        if index_name not in _client().list_indexes().names():
+            return []
+
+        index = get_index(index_name)
+        ids = []
+        for batch in index.list(prefix=prefix, **_ns(namespace)):
+            # según la versión del SDK llegan strings u objetos con .id
+            ids.extend(getattr(v, "id", v) for v in batch)
+        return ids
+
+    except Exception as e:
+        logger.warning(f"⚠️ No se pudieron listar IDs con prefijo '{prefix}': {e}")
+        return []
+
+
+def list_namespaces(index_name: str) -> list[str]:
+    """
+    Namespaces con vectores (describe_index_stats). [] si el índice no existe.
+    """
+    try:
+        if index_name not in _client().list_indexes().names():
+            return []
+        stats = get_index(index_name).describe_index_stats()
+        namespaces = stats.get("namespaces", {}) if isinstance(stats, dict) else stats.namespaces
+        return list(namespaces or {})
+
+    except Exception as e:
+        logger.warning(f"⚠️ No se pudieron listar namespaces de '{index_name}': {e}")
+        return []
+
+
+def fetch_vectors(index_name: str, ids: list, batch_size: int = 1000, namespace: str | None = None) -> dict:
+    """
+    Devuelve {id: {"values", "metadata"}} para los IDs pedidos (en lotes).
+    """
+    out = {}
+    if not ids:
+        return out
+
+    index = get_index(index_name)
+    for i in range(0, len(ids), batch_size):
+        res = index.fetch(ids=ids[i:i + batch_size], **_ns(namespace))
+        vectors = res.get("vectors", {}) if isinstance(res, dict) else res.vectors
+        for vid, v in vectors.items():
+            if isinstance(v, dict):
+                values, meta = v.get("values"), v.get("metadata")
+            else:
+                values, meta = getattr(v, "values", None), getattr(v, "metadata", None)
+            out[vid] = {"values": list(values or []), "metadata": meta or {}}
+    return out
+
+
+def fetch_metadata(index_name: str, ids: list, batch_size: int = 1000, namespace: str | None = None) -> dict:
+    """
+    Devuelve {id: metadata} para los IDs pedidos (en lotes).
+    """
+    return {
+        vid: v["metadata"]
+        for vid, v in fetch_vectors(index_name, ids, batch_size=batch_size, namespace=namespace).items()
+    }
+
+
+def update_metadata(index_name: str, vector_id: str, metadata: dict, namespace: str | None = None):
+    """
+    Actualiza campos de metadata sin re-subir el embedding.
+    """
+    get_index(index_name).update(id=vector_id, set_metadata=metadata, **_ns(namespace))
+
+
+def delete_vectors(index_name: str, ids: list, batch_size: int = 1000, namespace: str | None = None):
+    """
+    Borra vectores por ID en lotes (Pinecone acepta hasta 1000 por llamada).
+    """
+    if not ids:
+        return
+
+    try:
+        index = get_index(index_name)
+        for i in range(0, len(ids), batch_size):
+            index.delete(ids=ids[i:i + batch_size], **_ns(namespace))
+        logger.info(f"🗑️ Delete completado: {len(ids)} vectores eliminados.")
+
+    except Exception as e:
+        logger.error(f"❌ Error borrando vectores en Pinecone: {e}")
+        raise
+
 # ============================================================
 # Consultar vectores
 # ============================================================
 def query_index(index_name: str, vector: list, top_k: int = 10,
-                include_metadata: bool = True, filter: dict = None):
+                include_metadata: bool = True, filter: dict = None, namespace: str | None = None,
+                include_values: bool = False):
     """
     Realiza una consulta en Pinecone usando un embedding.
     """
@@ -93,13 +225,15 @@ def query_index(index_name: str, vector: list, top_k: int = 10,
         index = get_index(index_name)
 
         params = {
-            "vector": vector,
+            "vector": _as_list(vector),
             "top_k": top_k,
-            "include_metadata": include_metadata
+            "include_metadata": include_metadata,
+            "include_values": include_values
         }
 
         if filter:
             params["filter"] = filter
+        params.update(_ns(namespace))
 
         return index.query(**params)
 
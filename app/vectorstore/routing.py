@@ -0,0 +1,167 @@
+# app/vectorstore/routing.py
+
+"""
+Ruteo de índices / namespaces según VECTOR_ROUTING:
+
+- "shared"            → un solo índice (PINECONE_INDEX); provider y
+                        doc_type se filtran por metadata (comportamiento
+                        original).
+- "provider"          → un índice por provider de embeddings
+                        (<PINECONE_INDEX>-<provider>): dimensiones
+                        distintas pueden convivir; doc_type por metadata.
+- "provider_doc_type" → además, un namespace por doc_type: la query con
+                        doc_type no filtra y la query sin doc_type se
+                        reparte entre los namespaces y se mezcla.
+
+Los tenants distintos del por defecto agregan su id al namespace
+("<tenant>" o "<tenant>__<doc_type>") en cualquier modo, así sus vectores
+nunca se mezclan con los de otros aunque compartan índice.
+
+Cada ruta de chunks tiene un namespace hermano "<namespace>__docs" con un
+vector por documento (resumen o media de sus chunks) para el retrieval en
+dos etapas (doc_route); nunca entra en el fan-out de chunks.
+
+scripts/migrate_vector_routing.py mueve vectores existentes entre modos.
+"""
+
+import re
+import threading
+import time
+from typing import NamedTuple
+
+from app.core.config import settings
+from app.core.tenancy import is_default
+from app.vectorstore.backend import list_namespaces
+
+ROUTING_MODES = ("shared", "provider", "provider_doc_type")
+
+# Pinecone: minúsculas, dígitos y guiones, máx. 45 caracteres
+_MAX_INDEX_NAME = 45
+
+# Namespaces conocidos por índice (para el fan-out sin doc_type)
+_NAMESPACES_TTL = 60.0
+_namespaces: dict[str, tuple[float, set[str]]] = {}
+_lock = threading.Lock()
+
+
+class Route(NamedTuple):
+    index: str
+    namespace: str | None
+    filter: dict | None
+
+
+def _mode() -> str:
+    mode = (settings.VECTOR_ROUTING or "shared").lower()
+    if mode not in ROUTING_MODES:
+        raise ValueError(f"VECTOR_ROUTING desconocido: {mode}")
+    return mode
+
+
+def _slug(value: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", value.lower()).strip("-")
+
+
+def index_for(provider: str | None) -> str:
+    if _mode() == "shared":
+        return settings.PINECONE_INDEX
+    name = f"{settings.PINECONE_INDEX}-{_slug(provider or settings.EMB_PROVIDER)}"
+    return name[:_MAX_INDEX_NAME].rstrip("-")
+
+
+# Separador tenant / doc_type en el namespace (los tenants no llevan "_")
+_NS_SEP = "__"
+
+
+def namespace_for(doc_type: str | None, tenant: str | None = None) -> str | None:
+    parts = [] if is_default(tenant) else [tenant]
+    if _mode() == "provider_doc_type":
+        parts.append(doc_type or "documento")
+    return _NS_SEP.join(parts) or None
+
+
+# Sufijo del namespace de vectores por documento
+_DOCS = "docs"
+
+
+def _tenant_namespaces(namespaces: set[str], tenant: str | None) -> set[str]:
+    namespaces = {ns for ns in namespaces if not is_doc_namespace(ns)}
+    if is_default(tenant):
+        return {ns for ns in namespaces if _NS_SEP not in ns}
+    return {ns for ns in namespaces if ns.startswith(f"{tenant}{_NS_SEP}")}
+
+
+def is_doc_namespace(namespace: str | None) -> bool:
+    return bool(namespace) and namespace.endswith(f"{_NS_SEP}{_DOCS}")
+
+
+def doc_route(route: Route) -> Route:
+    """Ruta de los vectores por documento de una ruta de chunks (mismo índice y filtro)."""
+    return Route(route.index, f"{route.namespace or ''}{_NS_SEP}{_DOCS}", route.filter)
+
+
+def tenant_of(namespace: str | None, mode: str) -> str:
+    """Tenant dueño de un namespace escrito con VECTOR_ROUTING=mode (para migraciones)."""
+    if not namespace:
+        return settings.DEFAULT_TENANT
+    if mode == "provider_doc_type":
+        return namespace.split(_NS_SEP, 1)[0] if _NS_SEP in namespace else settings.DEFAULT_TENANT
+    return namespace
+
+
+def write_route(provider: str | None, doc_type: str | None, tenant: str | None = None) -> Route:
+    """Dónde se escriben (y borran) los chunks de un documento."""
+    route = Route(index_for(provider), namespace_for(doc_type, tenant), None)
+    if route.namespace:
+        _remember(route.index, route.namespace)
+    return route
+
+
+def query_routes(provider: str | None, doc_type: str | None, tenant: str | None = None) -> list[Route]:
+    """Una o más rutas a consultar; el filtro residual va en cada ruta."""
+    mode = _mode()
+
+    if mode == "shared":
+        filter_obj = {}
+        if provider:
+            filter_obj["provider"] = {"$eq": provider}
+        if doc_type:
+            filter_obj["doc_type"] = {"$eq": doc_type}
+        return [Route(settings.PINECONE_INDEX, namespace_for(None, tenant), filter_obj or None)]
+
+    index = index_for(provider)
+    if mode == "provider":
+        return [Route(index, namespace_for(None, tenant),
+                      {"doc_type": {"$eq": doc_type}} if doc_type else None)]
+
+    if doc_type:
+        return [Route(index, namespace_for(doc_type, tenant), None)]
+    namespaces = _tenant_namespaces(known_namespaces(index), tenant)
+    return [Route(index, ns, None) for ns in sorted(namespaces)]
+
+
+def known_namespaces(index: str) -> set[str]:
+    """Namespaces del índice (cacheados _NAMESPACES_TTL segundos)."""
+    now = time.monotonic()
+    with _lock:
+        cached = _namespaces.get(index)
+        if cached and now - cached[0] < _NAMESPACES_TTL:
+            return set(cached[1])
+
+    found = set(list_namespaces(index))
+    with _lock:
+        # conserva los escritos desde este proceso aunque el stats aún no los vea
+        previous = _namespaces.get(index, (0.0, set()))[1]
+        _namespaces[index] = (now, found | previous)
+        return set(_namespaces[index][1])
+
+
+def _remember(index: str, namespace: str):
+    with _lock:
+        ts, names = _namespaces.get(index, (0.0, set()))
+        names.add(namespace)
+        _namespaces[index] = (ts, names)
+
+
+def reset_cache():
+    with _lock:
+        _namespaces.clear()
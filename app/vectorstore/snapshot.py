@@ -0,0 +1,223 @@
+# app/vectorstore/snapshot.py
+
+"""
+Snapshots binarios del índice vectorial: exportar / importar vectores y
+metadata sin re-embeber nada.
+
+Formato (un directorio, por defecto VECTOR_SNAPSHOT_DIR):
+    snapshot.json        cabecera: índice, dim, métrica, dtype y, por
+                         namespace, filas + archivos
+    ns-000.vectors.npy   matriz (filas, dim) float32 | float16; normalizada
+                         si la métrica es coseno
+    ns-000.meta.jsonl    tabla de metadata: una línea {"id", "metadata"}
+                         por fila, en el mismo orden que la matriz
+
+Export: lista los ids de cada namespace y trae vectores + metadata por
+lotes (fetch_vectors), escribiéndolos directo al .npy abierto como
+memmap y al .jsonl; la memoria queda acotada por el lote. La cabecera se
+escribe al final: un export a medias no se puede importar.
+
+Import:
+- VECTOR_BACKEND=local: el .npy float32 se mapea en memoria (mmap
+  copy-on-write, el archivo nunca se modifica) como matriz del
+  LocalIndex; solo se lee la metadata. float16, namespaces ya poblados o
+  LOCAL_STORE_QUANTIZATION≠none → upsert por bloques.
+- Pinecone: upsert por bloques en paralelo, leyendo matriz y metadata
+  en streaming.
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.vectorstore import local_store
+from app.vectorstore.backend import (
+    create_index,
+    fetch_vectors,
+    list_namespaces,
+    list_vector_ids,
+    upsert_vectors,
+)
+
+SNAPSHOT_VERSION = 1
+HEADER = "snapshot.json"
+DTYPES = ("float32", "float16")
+
+
+# ============================================================
+# Export
+# ============================================================
+def export_snapshot(index_name: str, out_dir: Path, dtype: str = "float32",
+                    batch_size: int = 1000, metric: str = "cosine") -> dict:
+    if dtype not in DTYPES:
+        raise ValueError(f"dtype de snapshot no soportado: {dtype}")
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+
+    header = {
+        "version": SNAPSHOT_VERSION,
+        "index": index_name,
+        "metric": metric,
+        "dtype": dtype,
+        "dim": None,
+        "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "namespaces": [],
+    }
+    for n, namespace in enumerate(sorted(list_namespaces(index_name) or [""])):
+        entry = _export_namespace(index_name, namespace or None, out_dir, f"ns-{n:03d}",
+                                  dtype, batch_size, metric)
+        if entry:
+            header["namespaces"].append(entry)
+            header["dim"] = header["dim"] or entry["dim"]
+
+    tmp = out_dir / f"{HEADER}.tmp"
+    tmp.write_text(json.dumps(header, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, out_dir / HEADER)
+
+    total = sum(e["rows"] for e in header["namespaces"])
+    logger.info(f"📦 Snapshot de '{index_name}': {total} vectores en {out_dir} "
+                f"({time.perf_counter() - start:.1f}s)")
+    return header
+
+
+def _export_namespace(index_name: str, namespace: str | None, out_dir: Path, stem: str,
+                      dtype: str, batch_size: int, metric: str) -> dict | None:
+    ids = list_vector_ids(index_name, "", namespace=namespace)
+    if not ids:
+        return None
+
+    vectors_path = out_dir / f"{stem}.vectors.npy"
+    meta_path = out_dir / f"{stem}.meta.jsonl"
+    matrix, rows = None, 0
+
+    with open(meta_path, "w", encoding="utf-8") as meta_file:
+        for i in range(0, len(ids), batch_size):
+            fetched = fetch_vectors(index_name, ids[i:i + batch_size], namespace=namespace)
+            if not fetched:
+                continue   # borrados entre el listado y el fetch
+
+            batch = np.asarray([v["values"] for v in fetched.values()], dtype=np.float32)
+            if metric == "cosine":
+                norms = np.linalg.norm(batch, axis=1, keepdims=True)
+                batch = batch / np.where(norms > 0, norms, 1.0)
+
+            if matrix is None:
+                matrix = np.lib.format.open_memmap(vectors_path, mode="w+", dtype=dtype,
+                                                   shape=(len(ids), batch.shape[1]))
+            matrix[rows:rows + len(batch)] = batch
+            for vid, v in fetched.items():
+                meta_file.write(json.dumps({"id": vid, "metadata": v["metadata"]}, ensure_ascii=False) + "\n")
+            rows += len(batch)
+
+    if matrix is None:
+        meta_path.unlink(missing_ok=True)
+        return None
+    dim = int(matrix.shape[1])
+    matrix.flush()
+    del matrix
+
+    logger.info(f"📦 {index_name}/{namespace or '(default)'}: {rows} vectores → {vectors_path.name}")
+    # "rows" puede ser menor que las filas del .npy si hubo borrados durante el export
+    return {"namespace": namespace or "", "rows": rows, "dim": dim,
+            "vectors": vectors_path.name, "metadata": meta_path.name}
+
+
+# ============================================================
+# Import
+# ============================================================
+def read_header(snapshot_dir: Path) -> dict:
+    path = Path(snapshot_dir) / HEADER
+    header = json.loads(path.read_text(encoding="utf-8"))
+    if header.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"Versión de snapshot no soportada: {header.get('version')}")
+    return header
+
+
+def import_snapshot(snapshot_dir: Path, index_name: str | None = None, mmap: bool = True,
+                    batch_size: int = 1000, workers: int = 4) -> dict:
+    """
+    Carga un snapshot en el backend activo. Devuelve {namespace: filas}.
+    index_name None → el índice de la cabecera.
+    """
+    snapshot_dir = Path(snapshot_dir)
+    header = read_header(snapshot_dir)
+    index_name = index_name or header["index"]
+    start = time.perf_counter()
+
+    loaded = {}
+    if not header["namespaces"]:
+        return loaded
+    create_index(index_name, dim=header["dim"], metric=header.get("metric", "cosine"))
+
+    for entry in header["namespaces"]:
+        namespace = entry["namespace"] or None
+        vectors = np.load(snapshot_dir / entry["vectors"], mmap_mode="c")[:entry["rows"]]
+
+        if mmap and _can_map(index_name, namespace, vectors):
+            ids, metadata = [], []
+            for vid, meta in _read_metadata(snapshot_dir / entry["metadata"]):
+                ids.append(vid)
+                metadata.append(meta)
+            local_store.load_namespace(index_name, namespace, vectors, ids, metadata)
+        else:
+            _bulk_upsert(index_name, namespace, vectors, snapshot_dir / entry["metadata"],
+                         batch_size, workers)
+        loaded[entry["namespace"]] = entry["rows"]
+
+    logger.info(f"📦 Snapshot importado en '{index_name}': {sum(loaded.values())} vectores "
+                f"({time.perf_counter() - start:.1f}s)")
+    return loaded
+
+
+def _can_map(index_name: str, namespace: str | None, vectors: np.ndarray) -> bool:
+    if (settings.VECTOR_BACKEND or "").lower() != "local":
+        return False
+    if vectors.dtype != np.float32 or settings.LOCAL_STORE_QUANTIZATION != "none":
+        return False
+    return len(local_store.get_index(index_name, namespace)) == 0
+
+
+def _read_metadata(path: Path):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            row = json.loads(line)
+            yield row["id"], row.get("metadata") or {}
+
+
+def _bulk_upsert(index_name: str, namespace: str | None, vectors: np.ndarray, meta_path: Path,
+                 batch_size: int, workers: int):
+    """Bloques de batch_size filas; como mucho 2 * workers bloques en memoria."""
+
+    def upsert(block: tuple[int, list]):
+        start, rows = block
+        values = np.asarray(vectors[start:start + len(rows)], dtype=np.float32)
+        upsert_vectors(index_name, [(vid, values[j], meta) for j, (vid, meta) in enumerate(rows)],
+                       namespace=namespace)
+
+    def blocks():
+        rows, start = [], 0
+        for row in _read_metadata(meta_path):
+            rows.append(row)
+            if len(rows) == batch_size:
+                yield start, rows
+                start += len(rows)
+                rows = []
+        if rows:
+            yield start, rows
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="snapshot-upsert") as pool:
+        pending = []
+        for block in blocks():
+            pending.append(pool.submit(upsert, block))
+            if len(pending) >= 2 * workers:
+                pending.pop(0).result()
+        for future in pending:
+            future.result()
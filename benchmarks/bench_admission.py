@@ -0,0 +1,97 @@
+# benchmarks/bench_admission.py
+
+"""
+Latencia bajo picos con y sin control de admisión (app/core/admission).
+
+Modelo: un pool de hilos fijo (como el scheduler) con trabajo de
+--service-ms por request; llegan requests a --overload × la capacidad
+durante --seconds. Sin admisión todo entra y la cola crece: la latencia
+de todos se dispara. Con admisión los aceptados mantienen latencia
+acotada (≤ max_wait + servicio) y el exceso se rechaza con 503 rápido.
+
+Uso:
+    python benchmarks/bench_admission.py --workers 8 --service-ms 20 --overload 2
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from app.core.admission import AdmissionPool, Overloaded
+
+
+async def _load(args, pool: AdmissionPool | None) -> dict:
+    executor = ThreadPoolExecutor(args.workers)
+    loop = asyncio.get_running_loop()
+    service = args.service_ms / 1000
+    capacity = args.workers / service
+    interval = 1 / (capacity * args.overload)
+    latencies, shed, shed_latencies = [], 0, []
+
+    async def one():
+        nonlocal shed
+        t0 = time.perf_counter()
+        if pool is not None:
+            try:
+                await pool.acquire()
+            except Overloaded:
+                shed += 1
+                shed_latencies.append(time.perf_counter() - t0)
+                return
+        start = time.perf_counter()
+        try:
+            await loop.run_in_executor(executor, time.sleep, service)
+        finally:
+            if pool is not None:
+                pool.release(time.perf_counter() - start)
+        latencies.append(time.perf_counter() - t0)
+
+    tasks = []
+    end = time.perf_counter() + args.seconds
+    while time.perf_counter() < end:
+        tasks.append(asyncio.create_task(one()))
+        await asyncio.sleep(interval)
+    await asyncio.gather(*tasks)
+    executor.shutdown()
+
+    ms = np.array(latencies) * 1000
+    return {
+        "requests": len(tasks),
+        "accepted": len(latencies),
+        "shed": shed,
+        "p50_ms": round(float(np.percentile(ms, 50)), 1),
+        "p99_ms": round(float(np.percentile(ms, 99)), 1),
+        "shed_p99_ms": round(float(np.percentile(np.array(shed_latencies) * 1000, 99)), 2) if shed_latencies else None,
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark de control de admisión")
+    ap.add_argument("--workers", type=int, default=8)
+    ap.add_argument("--service-ms", type=float, default=20)
+    ap.add_argument("--overload", type=float, default=2.0, help="tasa de llegada / capacidad")
+    ap.add_argument("--seconds", type=float, default=5)
+    ap.add_argument("--max-queue", type=int, default=64)
+    ap.add_argument("--max-wait", type=float, default=0.25)
+    args = ap.parse_args(argv)
+
+    out = {
+        "unbounded": asyncio.run(_load(args, None)),
+        "admission": asyncio.run(_load(args, AdmissionPool("bench", args.workers, args.max_queue, args.max_wait))),
+    }
+    for name, row in out.items():
+        print(f"{name:<10} aceptados={row['accepted']}/{row['requests']}  p50={row['p50_ms']} ms  "
+              f"p99={row['p99_ms']} ms  rechazados={row['shed']} (p99 {row['shed_p99_ms']} ms)")
+    return out
+
+
+if __name__ == "__main__":
+    print(json.dumps(main(), indent=2))
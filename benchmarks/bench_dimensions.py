@@ -0,0 +1,159 @@
+# benchmarks/bench_dimensions.py
+
+"""
+Recall vs dimensión de embeddings (EMB_DIMENSIONS) sobre el corpus
+sintético, con el vector store local.
+
+Para cada dimensión compara PCA (ajustada sobre los chunks, como
+scripts/fit_projection.py) y truncado Matryoshka contra el top-k en
+dimensión completa: recall@k de los vecinos, % de preguntas cuyo
+documento esperado aparece en el top-k, latencia p50/p95 y bytes por
+vector.
+
+El embedder falso (hashing) no tiene orden Matryoshka, así que ahí el
+truncado sale mal por construcción; con --real-embeddings se usa el
+modelo local (EMB_MODEL) en dimensión completa. El recorte de OpenAI
+(`dimensions`) no se puede medir offline.
+
+Uso:
+    python benchmarks/bench_dimensions.py --dims 256,512,768 --full-dim 1024
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.rag.projection import PCAProjection
+from app.utils.chunker import chunk_text
+from app.utils.text_extract import extract_text
+from app.vectorstore.local_store import LocalIndex
+from benchmarks.corpus import build_corpus, build_questions
+from benchmarks.fakes import FakeEmbedder
+
+
+def load_chunks(docs: list[dict]) -> tuple[list[str], list[str]]:
+    texts, files = [], []
+    for doc in docs:
+        for chunk in chunk_text(extract_text(doc["path"]), chunk_size=500, chunk_overlap=100):
+            texts.append(chunk)
+            files.append(Path(doc["path"]).name)
+    return texts, files
+
+
+def build_index(vectors: np.ndarray, files: list[str]) -> LocalIndex:
+    index = LocalIndex(dim=vectors.shape[1])
+    index.upsert([(f"c{i}", vectors[i], {"filename": files[i]}) for i in range(len(vectors))])
+    return index
+
+
+def run_queries(index: LocalIndex, queries: np.ndarray, top_k: int):
+    results, samples = [], []
+    for q in queries:
+        t0 = time.perf_counter()
+        res = index.query(q, top_k=top_k, include_metadata=True)
+        samples.append(time.perf_counter() - t0)
+        results.append(res["matches"])
+    return results, samples
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Recall vs dimensión de embeddings")
+    ap.add_argument("--dims", default="256,512,768")
+    ap.add_argument("--full-dim", type=int, default=1024, help="dimensión del embedder falso")
+    ap.add_argument("--real-embeddings", action="store_true")
+    ap.add_argument("--docs-per-format", type=int, default=20)
+    ap.add_argument("--paragraphs", type=int, default=12)
+    ap.add_argument("--questions", type=int, default=200)
+    ap.add_argument("--top-k", type=int, default=10)
+    ap.add_argument("--output", type=Path)
+    args = ap.parse_args(argv)
+
+    if args.real_embeddings:
+        from app.rag.embeddings import embed_texts
+
+        def embed(texts):
+            return np.concatenate([
+                np.asarray(embed_texts(texts[i:i + 64], provider="sentence_transformers", reduce=False),
+                           dtype=np.float32)
+                for i in range(0, len(texts), 64)
+            ])
+    else:
+        embed = FakeEmbedder(dim=args.full_dim).encode
+
+    with tempfile.TemporaryDirectory(prefix="rag-bench-dims-") as tmp:
+        docs = build_corpus(Path(tmp), args.docs_per_format, args.paragraphs)
+        texts, files = load_chunks(docs)
+    questions = build_questions(docs, args.questions)
+
+    chunk_vecs = embed(texts)
+    query_vecs = embed([q["question"] for q in questions])
+    full_dim = chunk_vecs.shape[1]
+    print(f"▶ {len(texts)} chunks × {full_dim} dims, {len(questions)} preguntas, top_k={args.top_k}")
+
+    full_index = build_index(chunk_vecs, files)
+    truth, full_lat = run_queries(full_index, query_vecs, args.top_k)
+    truth_ids = [{m["id"] for m in ms} for ms in truth]
+
+    configs = [("full", full_dim, None)]
+    for dim in sorted(int(d) for d in args.dims.split(",")):
+        if dim >= full_dim:
+            continue
+        configs.append(("pca", dim, PCAProjection.fit(chunk_vecs, dim)))
+        configs.append(("truncate", dim, None))
+
+    rows = []
+    for method, dim, proj in configs:
+        if method == "full":
+            index, found, lat = full_index, truth, full_lat
+        else:
+            if proj is not None:
+                cv, qv = proj.transform(chunk_vecs), proj.transform(query_vecs)
+            else:
+                cv, qv = chunk_vecs[:, :dim], query_vecs[:, :dim]
+                cv = cv / np.maximum(np.linalg.norm(cv, axis=1, keepdims=True), 1e-12)
+                qv = qv / np.maximum(np.linalg.norm(qv, axis=1, keepdims=True), 1e-12)
+            index = build_index(cv, files)
+            found, lat = run_queries(index, qv, args.top_k)
+
+        recall = np.mean([len({m["id"] for m in f} & t) / max(len(t), 1) for f, t in zip(found, truth_ids)])
+        hits = np.mean([any(m["metadata"]["filename"] == q["filename"] for m in f)
+                        for f, q in zip(found, questions)])
+        arr = np.asarray(lat) * 1000
+        rows.append({
+            "method": method,
+            "dim": dim,
+            "explained_variance": round(proj.explained_variance, 4) if proj is not None else None,
+            f"recall@{args.top_k}": round(float(recall), 4),
+            "doc_hit_rate": round(float(hits), 4),
+            "p50_ms": round(float(np.percentile(arr, 50)), 3),
+            "p95_ms": round(float(np.percentile(arr, 95)), 3),
+            "bytes_per_vector": index.memory_bytes()["bytes_per_vector"],
+        })
+
+    head = f"{'método':<10}{'dim':>6}{'var.':>8}{'recall':>9}{'doc hit':>9}{'p50 ms':>9}{'p95 ms':>9}{'B/vec':>8}"
+    print(head)
+    print("-" * len(head))
+    for r in rows:
+        var = f"{r['explained_variance']:.2f}" if r["explained_variance"] is not None else "-"
+        print(f"{r['method']:<10}{r['dim']:>6}{var:>8}{r[f'recall@{args.top_k}']:>9}{r['doc_hit_rate']:>9}"
+              f"{r['p50_ms']:>9}{r['p95_ms']:>9}{r['bytes_per_vector']:>8}")
+    print(f"\nrecall = solapamiento con el top-{args.top_k} en dimensión completa; "
+          f"doc hit = el documento esperado aparece en el top-{args.top_k}")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps({"args": vars(args) | {"output": str(args.output)},
+                                           "embedder": "real" if args.real_embeddings else f"fake-hash-{args.full_dim}",
+                                           "rows": rows}, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
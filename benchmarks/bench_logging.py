@@ -0,0 +1,133 @@
+# benchmarks/bench_logging.py
+
+"""
+Costo del logging para el hilo que loguea, con los handlers del servicio
+(app/core/logger.build_handlers) escribiendo a un archivo temporal.
+
+- sync_text / sync_json: formateo + escritura en el hilo del request
+  (como antes de LOG_ASYNC).
+- async_json: QueueHandler → QueueListener; el request solo encola.
+- disabled_fstring vs disabled_lazy: DEBUG desactivado, f-string (se
+  formatea igual) vs "%s" perezoso.
+
+Varios hilos simulan requests concurrentes; se reporta llamadas/s y
+p50/p99 por llamada vistos por quien loguea, y cuánto tarda el listener
+en vaciar la cola.
+
+Uso:
+    python benchmarks/bench_logging.py --threads 8 --calls 20000
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import logging
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.core.logger import build_handlers
+
+
+def _run_threads(threads: int, calls: int, fn) -> tuple[float, np.ndarray]:
+    samples = [np.empty(calls) for _ in range(threads)]
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(k: int):
+        out = samples[k]
+        barrier.wait()
+        for i in range(calls):
+            t0 = time.perf_counter()
+            fn(k, i)
+            out[i] = time.perf_counter() - t0
+
+    pool = [threading.Thread(target=worker, args=(k,)) for k in range(threads)]
+    for t in pool:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in pool:
+        t.join()
+    return time.perf_counter() - start, np.concatenate(samples)
+
+
+def bench_handlers(name: str, workdir: Path, threads: int, calls: int, **kwargs) -> dict:
+    handlers, listener = build_handlers(log_file=workdir / f"{name}.log", console=False,
+                                        queue_size=threads * calls + 1, **kwargs)
+    lg = logging.getLogger(f"bench.{name}")
+    lg.handlers = handlers
+    lg.setLevel(logging.INFO)
+    lg.propagate = False
+    if listener is not None:
+        listener.start()
+
+    payload = {"provider": "hf", "doc_type": "contrato"}
+    elapsed, samples = _run_threads(
+        threads, calls,
+        lambda k, i: lg.info("🔸 Embeddings provider: %s (%d textos) %s", "hf", i, payload)
+    )
+
+    drain = 0.0
+    if listener is not None:
+        t0 = time.perf_counter()
+        listener.stop()
+        drain = time.perf_counter() - t0
+    for h in handlers + list(listener.handlers if listener else []):
+        h.close()
+
+    return _summary(elapsed, samples, threads * calls, drain_s=round(drain, 3))
+
+
+def bench_disabled(threads: int, calls: int) -> dict:
+    lg = logging.getLogger("bench.disabled")
+    lg.handlers = [logging.NullHandler()]
+    lg.setLevel(logging.INFO)
+    lg.propagate = False
+    hits = [{"id": f"doc#{i}", "score": 0.5} for i in range(20)]
+
+    out = {}
+    elapsed, samples = _run_threads(threads, calls, lambda k, i: lg.debug(f"Hits: {hits} ({i})"))
+    out["disabled_fstring"] = _summary(elapsed, samples, threads * calls)
+    elapsed, samples = _run_threads(threads, calls, lambda k, i: lg.debug("Hits: %s (%d)", hits, i))
+    out["disabled_lazy"] = _summary(elapsed, samples, threads * calls)
+    return out
+
+
+def _summary(elapsed: float, samples: np.ndarray, total: int, **extra) -> dict:
+    us = samples * 1e6
+    return {
+        "calls_per_s": int(total / elapsed),
+        "p50_us": round(float(np.percentile(us, 50)), 2),
+        "p99_us": round(float(np.percentile(us, 99)), 2),
+        **extra,
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark de logging")
+    ap.add_argument("--threads", type=int, default=8)
+    ap.add_argument("--calls", type=int, default=20000, help="llamadas por hilo")
+    args = ap.parse_args(argv)
+
+    out = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        out["sync_text"] = bench_handlers("sync_text", tmp, args.threads, args.calls, fmt="text", use_async=False)
+        out["sync_json"] = bench_handlers("sync_json", tmp, args.threads, args.calls, fmt="json", use_async=False)
+        out["async_json"] = bench_handlers("async_json", tmp, args.threads, args.calls, fmt="json", use_async=True)
+    out.update(bench_disabled(args.threads, args.calls))
+
+    for name, row in out.items():
+        extra = f"  vaciado={row['drain_s']}s" if row.get("drain_s") else ""
+        print(f"{name:<18} {row['calls_per_s']:>10} llamadas/s  p50={row['p50_us']:.2f} µs  p99={row['p99_us']:.2f} µs{extra}")
+    return out
+
+
+if __name__ == "__main__":
+    print(json.dumps(main(), indent=2))
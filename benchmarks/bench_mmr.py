@@ -0,0 +1,75 @@
+# benchmarks/bench_mmr.py
+
+"""
+Latencia de MMR (app/rag/mmr.py) según tamaño del pool y dimensión.
+
+El pool simula el caso que motiva MMR: la mayoría de los candidatos son
+variaciones de unos pocos chunks (misma cláusula) y el resto está
+disperso. Reporta p50/p95 y cuántos "grupos" distintos quedan en el
+top_k con y sin MMR.
+
+Uso:
+    python benchmarks/bench_mmr.py --pool 50,200,500 --dim 768 --top-k 15
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from app.rag.mmr import mmr
+
+
+def clustered_pool(n: int, dim: int, seed: int, dup_share: float = 0.8, groups: int = 3):
+    rng = np.random.default_rng(seed)
+    query = rng.normal(size=dim).astype(np.float32)
+    centers = query + 0.6 * rng.normal(size=(groups, dim)).astype(np.float32)
+    n_dup = int(n * dup_share)
+    labels = np.concatenate([rng.integers(0, groups, n_dup), np.arange(groups, groups + n - n_dup)])
+    pool = np.empty((n, dim), dtype=np.float32)
+    pool[:n_dup] = centers[labels[:n_dup]] + 0.05 * rng.normal(size=(n_dup, dim))
+    pool[n_dup:] = query + 1.0 * rng.normal(size=(n - n_dup, dim))
+    pool /= np.linalg.norm(pool, axis=1, keepdims=True)
+    return query / np.linalg.norm(query), pool, labels
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark de MMR")
+    ap.add_argument("--pool", default="50,200,500")
+    ap.add_argument("--dim", type=int, default=768)
+    ap.add_argument("--top-k", type=int, default=15)
+    ap.add_argument("--lambda", dest="lambda_", type=float, default=0.7)
+    ap.add_argument("--repeat", type=int, default=200)
+    args = ap.parse_args(argv)
+
+    out = {}
+    for n in [int(x) for x in args.pool.split(",")]:
+        query, pool, labels = clustered_pool(n, args.dim, seed=n)
+        mmr(query, pool, args.top_k, args.lambda_)      # calentamiento
+
+        samples = []
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            picked = mmr(query, pool, args.top_k, args.lambda_)
+            samples.append(time.perf_counter() - t0)
+
+        plain = np.argsort(-(pool @ query))[:args.top_k]
+        arr = np.asarray(samples) * 1000
+        out[n] = {
+            "p50_ms": round(float(np.percentile(arr, 50)), 3),
+            "p95_ms": round(float(np.percentile(arr, 95)), 3),
+            "groups_plain": int(len(set(labels[plain]))),
+            "groups_mmr": int(len(set(labels[picked]))),
+        }
+        print(f"pool={n:<5} dim={args.dim}  p50={out[n]['p50_ms']:.3f} ms  p95={out[n]['p95_ms']:.3f} ms  "
+              f"grupos top{args.top_k}: {out[n]['groups_plain']} → {out[n]['groups_mmr']}")
+    return out
+
+
+if __name__ == "__main__":
+    print(json.dumps(main(), indent=2))
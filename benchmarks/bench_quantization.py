@@ -0,0 +1,124 @@
+# benchmarks/bench_quantization.py
+
+"""
+Memoria, latencia y recall del vector store local con y sin cuantización.
+
+Genera N vectores agrupados (centroides + ruido, como embeddings reales
+de documentos parecidos), calcula el top-k exacto en float32 y compara
+int8 / binary con distintos factores de re-score.
+
+Uso:
+    python benchmarks/bench_quantization.py --n 200000 --dim 768
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.vectorstore.local_store import LocalIndex
+
+
+def clustered_vectors(n: int, dim: int, clusters: int, noise: float, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centroids = rng.normal(size=(clusters, dim)).astype(np.float32)
+    assign = rng.integers(0, clusters, size=n)
+    data = centroids[assign] + noise * rng.normal(size=(n, dim)).astype(np.float32)
+    return data / np.linalg.norm(data, axis=1, keepdims=True)
+
+
+def build(data: np.ndarray, **kwargs) -> LocalIndex:
+    index = LocalIndex(dim=data.shape[1], **kwargs)
+    batch = 10_000
+    for i in range(0, len(data), batch):
+        index.upsert([(f"v{j}", data[j], {}) for j in range(i, min(i + batch, len(data)))])
+    return index
+
+
+def run_queries(index: LocalIndex, queries: np.ndarray, top_k: int) -> tuple[list[list[str]], list[float]]:
+    results, samples = [], []
+    for q in queries:
+        t0 = time.perf_counter()
+        res = index.query(q, top_k=top_k, include_metadata=False)
+        samples.append(time.perf_counter() - t0)
+        results.append([m["id"] for m in res["matches"]])
+    return results, samples
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark de cuantización del vector store local")
+    ap.add_argument("--n", type=int, default=100_000)
+    ap.add_argument("--dim", type=int, default=768)
+    ap.add_argument("--clusters", type=int, default=500)
+    ap.add_argument("--noise", type=float, default=0.6)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--top-k", type=int, default=10)
+    ap.add_argument("--factors", default="1,2,4,10", help="factores de re-score a probar")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--output", type=Path)
+    args = ap.parse_args(argv)
+
+    data = clustered_vectors(args.n, args.dim, args.clusters, args.noise, args.seed)
+    rng = np.random.default_rng(args.seed + 1)
+    queries = data[rng.integers(0, args.n, size=args.queries)]
+    queries = queries + 0.3 * rng.normal(size=queries.shape).astype(np.float32) / np.sqrt(args.dim)
+
+    print(f"▶ {args.n} vectores × {args.dim} dims, {args.queries} queries, top_k={args.top_k}")
+    exact_index = build(data)
+    truth, exact_lat = run_queries(exact_index, queries, args.top_k)
+
+    configs = [("none", 1, True)]
+    for quant in ("int8", "binary"):
+        for factor in [int(f) for f in args.factors.split(",")]:
+            configs.append((quant, factor, True))
+        configs.append((quant, 1, False))      # sin float32: solo códigos
+
+    rows = []
+    for quant, factor, keep_float in configs:
+        if quant == "none":
+            index, lat, found = exact_index, exact_lat, truth
+        else:
+            index = build(data, quantization=quant, rescore_factor=factor, keep_float=keep_float)
+            found, lat = run_queries(index, queries, args.top_k)
+
+        recall = np.mean([len(set(f) & set(t)) / len(t) for f, t in zip(found, truth)])
+        mem = index.memory_bytes()
+        per_vector = {k: v / index.alive.shape[0] for k, v in mem.items() if k in ("float", "codes")}
+        resident = sum(per_vector.values())
+        arr = np.asarray(lat) * 1000
+        rows.append({
+            "quantization": quant,
+            "rescore_factor": factor if keep_float and quant != "none" else None,
+            "keep_float": keep_float,
+            f"recall@{args.top_k}": round(float(recall), 4),
+            "p50_ms": round(float(np.percentile(arr, 50)), 3),
+            "p95_ms": round(float(np.percentile(arr, 95)), 3),
+            "bytes_per_vector": round(resident, 1),
+            "mb_per_million": round(resident * 1e6 / 2**20, 1),
+            "mb_codes_per_million": round(per_vector.get("codes", 0) * 1e6 / 2**20, 1),
+        })
+
+    head = f"{'modo':<10}{'rescore':>8}{'float32':>9}{'recall':>9}{'p50 ms':>9}{'p95 ms':>9}" \
+           f"{'B/vec':>9}{'MB/1M':>9}{'códigos':>9}"
+    print(head)
+    print("-" * len(head))
+    for r in rows:
+        print(f"{r['quantization']:<10}{str(r['rescore_factor'] or '-'):>8}{str(r['keep_float']):>9}"
+              f"{r[f'recall@{args.top_k}']:>9}{r['p50_ms']:>9}{r['p95_ms']:>9}"
+              f"{r['bytes_per_vector']:>9}{r['mb_per_million']:>9}{r['mb_codes_per_million']:>9}")
+    print("\nMB/1M = memoria residente por millón de chunks (códigos + float32 si se conserva)")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps({"args": vars(args) | {"output": str(args.output)},
+                                           "rows": rows}, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# benchmarks/bench_two_stage.py
+
+"""
+Retrieval plano vs en dos etapas (documento → chunks) según tamaño del
+corpus, sobre el vector store local y retriever.retrieve().
+
+Corpus sintético: documentos agrupados por tema (varios documentos
+parecidos entre sí) y chunks = centro del documento + ruido. El vector
+del documento es la media de sus chunks (DOC_VECTOR_SOURCE=mean). Cada
+query es un chunk al azar con ruido; se reporta p50/p95, el recall@k de
+dos etapas contra la búsqueda plana exacta y cuántas veces aparece el
+documento de origen en el top_k.
+
+Uso:
+    python benchmarks/bench_two_stage.py --docs 1000,5000,20000 --chunks-per-doc 10 --dim 128
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from app.core.config import settings
+from app.rag import retriever
+from app.vectorstore import doc_vectors, local_store
+from app.vectorstore.routing import Route, doc_route
+from benchmarks.fakes import FakeLLM
+from benchmarks.run import PROVIDER, offline_environment, percentiles, timed
+
+
+def _normalize(m: np.ndarray) -> np.ndarray:
+    return m / np.linalg.norm(m, axis=1, keepdims=True)
+
+
+def build_corpus(docs: int, chunks_per_doc: int, dim: int, seed: int):
+    rng = np.random.default_rng(seed)
+    topics = rng.normal(size=(max(docs // 20, 1), dim)).astype(np.float32)
+    centers = topics[rng.integers(0, len(topics), docs)] + 0.7 * rng.normal(size=(docs, dim)).astype(np.float32)
+    chunks = np.repeat(centers, chunks_per_doc, axis=0)
+    chunks += 0.8 * rng.normal(size=chunks.shape).astype(np.float32)
+    return _normalize(chunks)
+
+
+def load(chunks: np.ndarray, docs: int, chunks_per_doc: int):
+    dim = chunks.shape[1]
+    local_store.create_index("bench-index", dim=dim)
+    batch = 10_000
+    for i in range(0, len(chunks), batch):
+        local_store.upsert_vectors("bench-index", [
+            (f"d{j // chunks_per_doc}#{j % chunks_per_doc}", chunks[j],
+             {"document_id": f"d{j // chunks_per_doc}", "provider": PROVIDER})
+            for j in range(i, min(i + batch, len(chunks)))
+        ])
+    route = Route("bench-index", None, None)
+    for d in range(0, docs, batch):
+        upserts = []
+        for doc in range(d, min(d + batch, docs)):
+            rows = chunks[doc * chunks_per_doc:(doc + 1) * chunks_per_doc]
+            upserts.append((f"d{doc}", doc_vectors.mean_vector(rows), {"document_id": f"d{doc}", "provider": PROVIDER}))
+        local_store.upsert_vectors("bench-index", upserts, namespace=doc_route(route).namespace)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark de retrieval en dos etapas")
+    ap.add_argument("--docs", default="1000,5000,20000")
+    ap.add_argument("--chunks-per-doc", type=int, default=10)
+    ap.add_argument("--dim", type=int, default=128)
+    ap.add_argument("--top-k", type=int, default=10)
+    ap.add_argument("--doc-top-k", type=int, default=settings.RETRIEVAL_DOC_TOP_K)
+    ap.add_argument("--queries", type=int, default=200)
+    args = ap.parse_args(argv)
+
+    settings.RETRIEVAL_DOC_TOP_K = args.doc_top_k
+    out = {}
+    for docs in [int(x) for x in args.docs.split(",")]:
+        chunks = build_corpus(docs, args.chunks_per_doc, args.dim, seed=docs)
+        rng = np.random.default_rng(docs + 1)
+        sources = rng.integers(0, len(chunks), args.queries)
+        qvecs = {f"q{i}": v for i, v in enumerate(_normalize(chunks[sources] + 0.3 * rng.normal(size=(args.queries, args.dim))))}
+        embed = lambda texts, provider=None: [qvecs[t] for t in texts]
+
+        with tempfile.TemporaryDirectory() as tmp, offline_environment(Path(tmp), embed, FakeLLM()):
+            load(chunks, docs, args.chunks_per_doc)
+            row = {"chunks": len(chunks)}
+            results = {}
+            for mode, two_stage in (("flat", False), ("two_stage", True)):
+                retriever.retrieve("q0", top_k=args.top_k, provider=PROVIDER, two_stage=two_stage)   # calentamiento
+                samples, ids = [], []
+                for q in qvecs:
+                    elapsed, hits = timed(retriever.retrieve, q, top_k=args.top_k, provider=PROVIDER, two_stage=two_stage)
+                    samples.append(elapsed)
+                    ids.append([h["id"] for h in hits])
+                results[mode] = ids
+                stats = percentiles(samples)
+                source_hit = np.mean([
+                    any(h.split("#")[0] == f"d{src // args.chunks_per_doc}" for h in found)
+                    for src, found in zip(sources, ids)
+                ])
+                row[mode] = {"p50_ms": stats["p50_ms"], "p95_ms": stats["p95_ms"],
+                             "source_doc_hit": round(float(source_hit), 3)}
+
+            row["two_stage"]["recall_vs_flat"] = round(float(np.mean([
+                len(set(a) & set(b)) / max(len(a), 1) for a, b in zip(results["flat"], results["two_stage"])
+            ])), 3)
+        out[docs] = row
+        print(f"docs={docs:<7} chunks={len(chunks):<8} "
+              f"plano p50={row['flat']['p50_ms']:.2f} ms p95={row['flat']['p95_ms']:.2f} ms  |  "
+              f"dos etapas p50={row['two_stage']['p50_ms']:.2f} ms p95={row['two_stage']['p95_ms']:.2f} ms  "
+              f"recall@{args.top_k}={row['two_stage']['recall_vs_flat']:.3f}  "
+              f"doc origen {row['flat']['source_doc_hit']:.2f} → {row['two_stage']['source_doc_hit']:.2f}")
+    return out
+
+
+if __name__ == "__main__":
+    print(json.dumps(main(), indent=2))
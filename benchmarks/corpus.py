@@ -0,0 +1,216 @@
+# benchmarks/corpus.py
+
+"""
+Corpus sintético de CRM en español (contratos, facturas, correos, notas)
+en los formatos que soporta la ingesta: pdf, docx, xlsx, txt y eml.
+
+Cada documento lleva hechos propios (cliente, ciudad, monto, fecha), así
+que las preguntas generadas tienen un documento esperado conocido.
+"""
+
+import random
+import zipfile
+from email.message import EmailMessage
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+import pymupdf as fitz
+import openpyxl
+
+FORMATS = ("pdf", "docx", "xlsx", "txt", "eml")
+
+CLIENTES = [
+    "Andina Logística", "Café del Sur", "Constructora Horizonte", "Textiles Medellín",
+    "Agro Caribe", "Clínica Santa Ana", "Transportes Pacífico", "Editorial Aurora",
+    "Ferretería El Roble", "Inversiones Nogal", "Lácteos La Pradera", "Seguros Cóndor",
+]
+CIUDADES = ["Bogotá", "Medellín", "Cali", "Barranquilla", "Bucaramanga", "Pereira", "Cartagena"]
+SERVICIOS = [
+    "soporte técnico del CRM", "licencias anuales", "migración de datos",
+    "capacitación de usuarios", "integración con facturación electrónica",
+    "campañas de correo", "desarrollo de reportes",
+]
+
+RELLENO = [
+    "Las partes acuerdan revisar los indicadores de servicio cada trimestre.",
+    "El cliente designará un responsable para la coordinación del proyecto.",
+    "Los pagos se realizarán mediante transferencia bancaria a la cuenta registrada.",
+    "Cualquier modificación deberá constar por escrito y ser aprobada por ambas partes.",
+    "El proveedor entregará informes mensuales de avance y de tickets resueltos.",
+    "La información compartida se considera confidencial durante la vigencia del acuerdo.",
+    "Se programarán reuniones de seguimiento con el área comercial del cliente.",
+]
+
+
+def _facts(rng: random.Random, i: int) -> dict:
+    return {
+        "cliente": f"{rng.choice(CLIENTES)} {i:03d}",
+        "ciudad": rng.choice(CIUDADES),
+        "servicio": rng.choice(SERVICIOS),
+        "monto": rng.randrange(1_000, 90_000) * 1000,
+        "meses": rng.choice([6, 12, 18, 24, 36]),
+        "fecha": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+    }
+
+
+def _paragraphs(rng: random.Random, facts: dict, kind: str, n: int) -> list[str]:
+    head = {
+        "contrato": (
+            f"CONTRATO DE PRESTACIÓN DE SERVICIOS entre Acme CRM S.A.S. (contratista) y "
+            f"{facts['cliente']} (contratante), con domicilio en {facts['ciudad']}."
+        ),
+        "factura": (
+            f"FACTURA ELECTRÓNICA emitida a {facts['cliente']} ({facts['ciudad']}) el "
+            f"{facts['fecha']} por {facts['servicio']}."
+        ),
+        "correo": (
+            f"Estimado equipo de {facts['cliente']}, les escribimos sobre {facts['servicio']} "
+            f"en la sede de {facts['ciudad']}."
+        ),
+        "nota": (
+            f"Nota de reunión con {facts['cliente']} en {facts['ciudad']} el {facts['fecha']}."
+        ),
+    }[kind]
+
+    paras = [
+        head,
+        f"Cláusula de valor: el valor total es de ${facts['monto']:,} COP por {facts['servicio']}.",
+        f"Vigencia: el acuerdo tiene una duración de {facts['meses']} meses desde el {facts['fecha']}.",
+    ]
+    for _ in range(n):
+        paras.append(" ".join(rng.sample(RELLENO, k=3)))
+    return paras
+
+
+# ============================================================
+# Escritores por formato
+# ============================================================
+def _write_pdf(path: Path, paras: list[str]):
+    doc = fitz.open()
+    page = doc.new_page()
+    y = 60
+    for p in paras:
+        # ~95 caracteres por línea en A4 con helv 10pt
+        lines = [p[i:i + 95] for i in range(0, len(p), 95)]
+        for line in lines:
+            if y > 800:
+                page = doc.new_page()
+                y = 60
+            page.insert_text((50, y), line, fontsize=10)
+            y += 14
+        y += 8
+    doc.save(str(path))
+    doc.close()
+
+
+_DOCX_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+_DOCX_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/></Relationships>'
+)
+
+
+def _write_docx(path: Path, paras: list[str]):
+    body = "".join(f"<w:p><w:r><w:t>{escape(p)}</w:t></w:r></w:p>" for p in paras)
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f"<w:body>{body}</w:body></w:document>"
+    )
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", _DOCX_TYPES)
+        zf.writestr("_rels/.rels", _DOCX_RELS)
+        zf.writestr("word/document.xml", document)
+
+
+def _write_xlsx(path: Path, facts: dict, rng: random.Random, rows: int):
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Factura")
+    ws.append(["cliente", "ciudad", "fecha", "concepto", "valor"])
+    ws.append([facts["cliente"], facts["ciudad"], facts["fecha"], facts["servicio"], facts["monto"]])
+    for i in range(rows):
+        ws.append([facts["cliente"], facts["ciudad"], facts["fecha"],
+                   f"ítem {i} de {rng.choice(SERVICIOS)}", rng.randrange(100, 9_000) * 1000])
+    wb.save(path)
+
+
+def _write_eml(path: Path, facts: dict, paras: list[str]):
+    msg = EmailMessage()
+    msg["Subject"] = f"Seguimiento {facts['servicio']} - {facts['cliente']}"
+    msg["From"] = "comercial@acmecrm.co"
+    msg["To"] = "contacto@cliente.co"
+    msg.set_content("\n\n".join(paras + ["Atentamente,", "Equipo comercial Acme CRM"]))
+    path.write_bytes(bytes(msg))
+
+
+# ============================================================
+# API
+# ============================================================
+def build_corpus(out_dir: Path, docs_per_format: int = 10, paragraphs: int = 12,
+                 seed: int = 7) -> list[dict]:
+    """
+    Escribe docs_per_format documentos por formato en out_dir.
+    Devuelve [{"path", "format", "kind", "facts"}].
+    """
+    rng = random.Random(seed)
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    kinds = {"pdf": "contrato", "docx": "contrato", "xlsx": "factura", "txt": "nota", "eml": "correo"}
+    docs = []
+    i = 0
+    for fmt in FORMATS:
+        for _ in range(docs_per_format):
+            facts = _facts(rng, i)
+            kind = kinds[fmt]
+            path = out_dir / f"{kind}_{i:04d}.{fmt}"
+            paras = _paragraphs(rng, facts, kind, paragraphs)
+
+            if fmt == "pdf":
+                _write_pdf(path, paras)
+            elif fmt == "docx":
+                _write_docx(path, paras)
+            elif fmt == "xlsx":
+                _write_xlsx(path, facts, rng, rows=paragraphs * 4)
+            elif fmt == "txt":
+                path.write_text("\n\n".join(paras), encoding="utf-8")
+            else:
+                _write_eml(path, facts, paras)
+
+            docs.append({"path": str(path), "format": fmt, "kind": kind, "facts": facts})
+            i += 1
+    return docs
+
+
+QUESTION_TEMPLATES = [
+    "¿Cuál es el valor del contrato con {cliente}?",
+    "¿Qué servicio se factura a {cliente} en {ciudad}?",
+    "¿Cuántos meses dura el acuerdo con {cliente}?",
+    "Resume el correo enviado a {cliente}",
+    "¿Qué se acordó con {cliente} sobre {servicio}?",
+]
+
+
+def build_questions(docs: list[dict], n: int = 50, seed: int = 11) -> list[dict]:
+    """[{"question", "filename"}] con el archivo que contiene la respuesta."""
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n):
+        doc = rng.choice(docs)
+        template = rng.choice(QUESTION_TEMPLATES)
+        out.append({
+            "question": template.format(**doc["facts"]),
+            "filename": Path(doc["path"]).name,
+        })
+    return out
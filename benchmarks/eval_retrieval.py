@@ -0,0 +1,409 @@
+# benchmarks/eval_retrieval.py
+
+"""
+Evaluación de calidad vs. latencia del retrieval.
+
+Reproduce un set de preguntas etiquetadas a través de retrieve → rerank →
+pack_context para cada combinación de parámetros y reporta recall@k,
+MRR y nDCG@k junto a la latencia por etapa. Al final imprime una tabla
+con la frontera de Pareto (calidad vs. p95) y recomienda la config más
+rápida que mantiene la calidad dentro de --tolerance de la mejor.
+
+Etiquetas (relevancia a nivel document_id):
+- --labels archivo.jsonl: {"question", "relevant": [document_id...], "doc_type", "provider"}
+- --feedback: se generan desde el log de feedback (entradas correct=true).
+  Si la entrada trae document_ids se usan tal cual; si no, se etiquetan
+  como "silver" los documentos cuyos chunks cubren la respuesta aceptada.
+- --offline: corpus sintético + proveedores falsos (benchmarks/run.py).
+
+Uso:
+    python benchmarks/eval_retrieval.py --offline
+    python benchmarks/eval_retrieval.py --feedback --save-labels data/eval_labels.jsonl
+    python benchmarks/eval_retrieval.py --labels data/eval_labels.jsonl \\
+        --grid top_k=10,15,20 pool_k=50,100 rerank=true,false budget=600,1000 adaptive=true,false
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import itertools
+import json
+import math
+import re
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.core.metrics import StageTimer, stage
+from app.rag import context_packer, retriever
+from app.rag.adaptive import depth_estimator, rerank_depth
+from app.rag.cache import RetrievalCache
+
+DEFAULT_GRID = {
+    "top_k": [10, 15, 20],
+    "pool_k": [50, 100],
+    "rerank": [True, False],
+    "budget": [600, 1000],
+    "adaptive": [False, True],
+}
+RERANK_CAP = 30         # rerank(top_k=min(len(hits), 30)) en el pipeline
+
+_WORD = re.compile(r"\w{4,}", re.UNICODE)
+
+
+# ============================================================
+# Métricas (ranking de document_id deduplicado)
+# ============================================================
+def ranked_documents(hits: list[dict]) -> list[str]:
+    """document_id en orden de primera aparición."""
+    seen, out = set(), []
+    for h in hits:
+        doc = (h.get("metadata") or {}).get("document_id") or h.get("id")
+        if doc not in seen:
+            seen.add(doc)
+            out.append(doc)
+    return out
+
+
+def recall_at_k(ranked: list[str], relevant: set[str], k: int) -> float:
+    if not relevant:
+        return 0.0
+    return len(set(ranked[:k]) & relevant) / len(relevant)
+
+
+def reciprocal_rank(ranked: list[str], relevant: set[str]) -> float:
+    for i, doc in enumerate(ranked, start=1):
+        if doc in relevant:
+            return 1.0 / i
+    return 0.0
+
+
+def ndcg_at_k(ranked: list[str], relevant: set[str], k: int) -> float:
+    dcg = sum(1.0 / math.log2(i + 2) for i, doc in enumerate(ranked[:k]) if doc in relevant)
+    ideal = sum(1.0 / math.log2(i + 2) for i in range(min(len(relevant), k)))
+    return dcg / ideal if ideal else 0.0
+
+
+def context_hits(hits: list[dict], budget: int) -> list[dict]:
+    """
+    Hits que llegan al prompt tras pack_context con `budget` tokens (un
+    pasaje recortado cuenta con todos sus chunks).
+    """
+    packed = context_packer.pack_context(hits, budget=budget)
+    kept = {src["id"] for passage in packed for src in passage["source_info"]}
+    return [h for h in hits if h["id"] in kept]
+
+
+def pareto_front(rows: list[dict], quality: str, latency: str) -> list[dict]:
+    """Marca row["pareto"]: ninguna otra config es igual o mejor en ambos ejes y mejor en uno."""
+    for r in rows:
+        r["pareto"] = not any(
+            o is not r
+            and o[quality] >= r[quality] and o[latency] <= r[latency]
+            and (o[quality] > r[quality] or o[latency] < r[latency])
+            for o in rows
+        )
+    return rows
+
+
+# ============================================================
+# Etiquetas
+# ============================================================
+def load_labels(path: Path) -> list[dict]:
+    labels = []
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            if line.strip():
+                labels.append(json.loads(line))
+    return labels
+
+
+def save_labels(labels: list[dict], path: Path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as fh:
+        for label in labels:
+            fh.write(json.dumps(label, ensure_ascii=False) + "\n")
+
+
+def _content_tokens(text: str) -> set[str]:
+    # la sección "Fuentes" de la respuesta no aporta evidencia
+    text = re.split(r"\n\s*\**fuentes", text, flags=re.IGNORECASE)[0]
+    return set(_WORD.findall(text.lower()))
+
+
+def bootstrap_from_feedback(entries, depth: int = 100, min_overlap: float = 0.5) -> list[dict]:
+    """
+    Etiquetas desde feedback correct=true. Sin document_ids, busca con un
+    pool profundo y marca como relevantes los documentos cuyos chunks
+    contienen al menos `min_overlap` de los términos de la respuesta.
+    """
+    labels, seen = [], set()
+    for e in entries:
+        if not e.get("correct") or not e.get("question"):
+            continue
+        key = (e["question"].strip().lower(), e.get("doc_type"), e.get("provider"))
+        if key in seen:
+            continue
+        seen.add(key)
+
+        if e.get("document_ids"):
+            labels.append({"question": e["question"], "relevant": list(e["document_ids"]),
+                           "doc_type": e.get("doc_type"), "provider": e.get("provider"),
+                           "label_source": "feedback"})
+            continue
+
+        answer_terms = _content_tokens(e.get("answer", ""))
+        if len(answer_terms) < 3:
+            continue
+
+        hits = retriever.retrieve(e["question"], top_k=depth, doc_type=e.get("doc_type"),
+                                  provider=e.get("provider"), pool_k=depth)
+        coverage: dict[str, set] = {}
+        for h in retriever.hydrate(hits):
+            doc = h["metadata"].get("document_id")
+            terms = _content_tokens(h["text"]) & answer_terms
+            coverage.setdefault(doc, set()).update(terms)
+
+        # peso IDF dentro del pool: los términos que aparecen en todos los
+        # documentos (plantillas, boilerplate) casi no cuentan como evidencia
+        n_docs = len(coverage) or 1
+        df = {t: sum(1 for terms in coverage.values() if t in terms) for t in answer_terms}
+        weight = {t: math.log(1 + n_docs / (df[t] or 1)) for t in answer_terms}
+        total = sum(weight.values())
+
+        relevant = [d for d, terms in coverage.items()
+                    if d and sum(weight[t] for t in terms) / total >= min_overlap]
+        if relevant:
+            labels.append({"question": e["question"], "relevant": relevant,
+                           "doc_type": e.get("doc_type"), "provider": e.get("provider"),
+                           "label_source": "silver"})
+    return labels
+
+
+# ============================================================
+# Evaluación
+# ============================================================
+def evaluate_config(labels: list[dict], config: dict, ks: list[int],
+                    default_provider: str | None = None) -> dict:
+    per_query = {f"recall@{k}": [] for k in ks}
+    per_query.update({f"ndcg@{k}": [] for k in ks})
+    per_query["mrr"] = []
+    per_query["recall@ctx"] = []
+    per_query["hits"] = []
+    per_query["reranked"] = []
+    stage_samples: dict[str, list[float]] = {}
+    totals = []
+
+    # profundidad adaptativa: cada config aprende desde cero
+    settings.RETRIEVAL_ADAPTIVE = config["adaptive"]
+    depth_estimator.reset()
+
+    for label in labels:
+        relevant = set(label["relevant"])
+        t0 = time.perf_counter()
+        with StageTimer("eval") as timer:
+            hits = retriever.retrieve(
+                label["question"],
+                top_k=config["top_k"],
+                doc_type=label.get("doc_type"),
+                provider=label.get("provider") or default_provider,
+                pool_k=config["pool_k"],
+            )
+            per_query["hits"].append(len(hits))
+            if config["rerank"]:
+                depth = rerank_depth(hits) if config["adaptive"] else min(len(hits), RERANK_CAP)
+                per_query["reranked"].append(depth)
+                with stage("rerank"):
+                    hits = retriever.rerank(label["question"], hits[:depth], top_k=depth,
+                                            provider=label.get("provider") or default_provider)
+            with stage("compress"):
+                ctx = context_hits(hits, config["budget"])
+        totals.append(time.perf_counter() - t0)
+        for name, seconds in timer.durations.items():
+            stage_samples.setdefault(name, []).append(seconds)
+
+        ranked = ranked_documents(hits)
+        for k in ks:
+            per_query[f"recall@{k}"].append(recall_at_k(ranked, relevant, k))
+            per_query[f"ndcg@{k}"].append(ndcg_at_k(ranked, relevant, k))
+        per_query["mrr"].append(reciprocal_rank(ranked, relevant))
+        ctx_docs = ranked_documents(ctx)
+        per_query["recall@ctx"].append(recall_at_k(ctx_docs, relevant, len(ctx_docs)))
+
+    row = {"config": dict(config)}
+    row.update({name: round(statistics.fmean(v), 4) for name, v in per_query.items() if v})
+    arr = np.asarray(totals) * 1000
+    row["p50_ms"] = round(float(np.percentile(arr, 50)), 3)
+    row["p95_ms"] = round(float(np.percentile(arr, 95)), 3)
+    row["stages_p50_ms"] = {
+        name: round(float(np.percentile(np.asarray(v) * 1000, 50)), 3)
+        for name, v in stage_samples.items()
+    }
+    return row
+
+
+def sweep(labels: list[dict], grid: dict, ks: list[int], default_provider: str | None = None) -> list[dict]:
+    names = list(grid)
+    rows = []
+    # sin cache: cada config mide el camino completo
+    saved = retriever.retrieval_cache
+    saved_adaptive = settings.RETRIEVAL_ADAPTIVE
+    retriever.retrieval_cache = RetrievalCache(0, 0, name="eval")
+    try:
+        # calentamiento (modelos, caches de numpy/tokenizer) fuera de la medición
+        first = {n: grid[n][0] for n in names}
+        evaluate_config(labels[:5], first, ks, default_provider)
+
+        for values in itertools.product(*(grid[n] for n in names)):
+            config = dict(zip(names, values))
+            logger.debug(f"Evaluando {config}")
+            rows.append(evaluate_config(labels, config, ks, default_provider))
+    finally:
+        retriever.retrieval_cache = saved
+        settings.RETRIEVAL_ADAPTIVE = saved_adaptive
+    return rows
+
+
+def recommend(rows: list[dict], quality: str, latency: str, tolerance: float) -> dict | None:
+    if not rows:
+        return None
+    best = max(r[quality] for r in rows)
+    ok = [r for r in rows if r[quality] >= best * (1 - tolerance)]
+    return min(ok, key=lambda r: r[latency])
+
+
+def print_table(rows: list[dict], ks: list[int], quality: str, latency: str):
+    cols = [f"recall@{k}" for k in ks] + ["mrr", f"ndcg@{max(ks)}", "recall@ctx", "hits", "reranked",
+                                          "p50_ms", "p95_ms"]
+    head = f"{'':2}{'config':<70}" + "".join(f"{c:>12}" for c in cols)
+    print(head)
+    print("-" * len(head))
+    for r in sorted(rows, key=lambda r: r[latency]):
+        cfg = " ".join(f"{k}={v}" for k, v in r["config"].items())
+        mark = "★ " if r.get("pareto") else "  "
+        print(f"{mark}{cfg:<70}" + "".join(f"{r.get(c, 0):>12}" for c in cols))
+    print(f"\n★ = frontera de Pareto ({quality} vs {latency})")
+
+
+# ============================================================
+# MAIN
+# ============================================================
+def _parse_grid(items: list[str] | None) -> dict:
+    if not items:
+        return dict(DEFAULT_GRID)
+    grid = {}
+    for item in items:
+        name, _, values = item.partition("=")
+        parsed = []
+        for v in values.split(","):
+            v = v.strip().lower()
+            parsed.append(v == "true" if v in ("true", "false") else int(v))
+        grid[name] = parsed
+    missing = set(DEFAULT_GRID) - set(grid)
+    for name in missing:
+        grid[name] = [DEFAULT_GRID[name][0]]
+    return grid
+
+
+def _offline_labels(workdir: Path, docs_per_format: int, queries: int) -> list[dict]:
+    from app.rag import ingestion
+    from benchmarks.corpus import build_corpus, build_questions
+    from benchmarks.run import PROVIDER
+
+    docs = build_corpus(workdir / "corpus", docs_per_format=docs_per_format)
+    by_filename = {}
+    for d in docs:
+        res = ingestion.ingest_file_to_pinecone(d["path"], source_name="eval", provider=PROVIDER)
+        by_filename[Path(d["path"]).name] = res["document_id"]
+    return [
+        {"question": q["question"], "relevant": [by_filename[q["filename"]]],
+         "doc_type": None, "provider": PROVIDER, "label_source": "synthetic"}
+        for q in build_questions(docs, n=queries)
+    ]
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Calidad vs. latencia del retrieval")
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument("--labels", type=Path, help="JSONL con preguntas etiquetadas")
+    src.add_argument("--feedback", action="store_true", help="etiquetas desde el log de feedback")
+    src.add_argument("--offline", action="store_true", help="corpus sintético y proveedores falsos")
+    ap.add_argument("--grid", nargs="*", help="p.ej. top_k=10,20 pool_k=50,100 rerank=true,false")
+    ap.add_argument("--ks", default="1,3,5,10")
+    ap.add_argument("--quality", default="ndcg@10", help="métrica de calidad para Pareto")
+    ap.add_argument("--latency", default="p95_ms", choices=["p50_ms", "p95_ms"])
+    ap.add_argument("--tolerance", type=float, default=0.02,
+                    help="pérdida relativa de calidad aceptable para la recomendación")
+    ap.add_argument("--provider", help="provider por defecto para etiquetas sin provider")
+    ap.add_argument("--min-overlap", type=float, default=0.5, help="umbral de etiquetas silver")
+    ap.add_argument("--docs", type=int, default=8, help="(--offline) documentos por formato")
+    ap.add_argument("--queries", type=int, default=60, help="(--offline) preguntas")
+    ap.add_argument("--rerank-ms-per-pair", type=float, default=0.0,
+                    help="(--offline) latencia simulada del cross-encoder por par")
+    ap.add_argument("--save-labels", type=Path, help="guardar las etiquetas usadas (JSONL)")
+    ap.add_argument("--output", type=Path, help="guardar resultados JSON")
+    args = ap.parse_args(argv)
+
+    ks = [int(k) for k in args.ks.split(",")]
+    grid = _parse_grid(args.grid)
+    logger.setLevel("WARNING")
+
+    def _run(labels: list[dict]) -> list[dict]:
+        print(f"▶ {len(labels)} preguntas × {math.prod(len(v) for v in grid.values())} configs")
+        return sweep(labels, grid, ks, args.provider)
+
+    if args.offline:
+        from benchmarks.fakes import FakeCrossEncoder, FakeEmbedder, FakeLLM
+        from benchmarks.run import offline_environment
+
+        workdir = Path(tempfile.mkdtemp(prefix="rag-eval-"))
+        cross_encoder = FakeCrossEncoder(latency_per_pair=args.rerank_ms_per_pair / 1000)
+        with offline_environment(workdir, FakeEmbedder(), FakeLLM(), cross_encoder=cross_encoder):
+            labels = _offline_labels(workdir, args.docs, args.queries)
+            rows = _run(labels)
+    else:
+        if args.labels:
+            labels = load_labels(args.labels)
+        else:
+            from app.core.feedback_store import feedback_store
+            labels = bootstrap_from_feedback(feedback_store.iter_entries(),
+                                             min_overlap=args.min_overlap)
+        if not labels:
+            print("❌ No hay preguntas etiquetadas.")
+            return 1
+        rows = _run(labels)
+
+    if args.save_labels:
+        save_labels(labels, args.save_labels)
+
+    if args.quality not in rows[0]:
+        ap.error(f"--quality {args.quality} no está entre las métricas calculadas")
+    pareto_front(rows, args.quality, args.latency)
+    print_table(rows, ks, args.quality, args.latency)
+
+    best = recommend(rows, args.quality, args.latency, args.tolerance)
+    print(f"\n✅ Recomendado (más rápido con {args.quality} ≥ {1 - args.tolerance:.0%} del mejor): "
+          f"{best['config']}  {args.quality}={best[args.quality]}  {args.latency}={best[args.latency]}")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps({
+            "grid": grid, "ks": ks, "quality": args.quality, "latency": args.latency,
+            "labels": len(labels),
+            "label_sources": {s: sum(1 for l in labels if l.get("label_source") == s)
+                              for s in {l.get("label_source") for l in labels}},
+            "recommended": best, "rows": rows,
+        }, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"📄 Resultados: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+# benchmarks/fakes.py
+
+"""
+Proveedores falsos y deterministas para correr el pipeline sin red:
+embeddings por hashing, LLM que arma una respuesta a partir del prompt y
+un cross-encoder por solapamiento de tokens. No miden calidad: sirven
+para que las latencias reflejen el código del servicio y no el proveedor.
+"""
+
+import re
+import time
+import zlib
+
+import numpy as np
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def _tokens(text: str) -> list[str]:
+    return _WORD.findall(text.lower())
+
+
+class FakeEmbedder:
+    """
+    Bag-of-words con feature hashing (crc32, estable entre procesos) +
+    bigramas, normalizado L2. Textos con vocabulario común quedan cerca,
+    así que el retrieval sobre el corpus sintético tiene sentido.
+    """
+
+    def __init__(self, dim: int = 384, latency: float = 0.0):
+        self.dim = dim
+        self.latency = latency
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            toks = _tokens(text)
+            feats = toks + [f"{a}_{b}" for a, b in zip(toks, toks[1:])]
+            for f in feats:
+                h = zlib.crc32(f.encode("utf-8"))
+                out[row, h % self.dim] += 1.0 if (h >> 31) & 1 else -1.0
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return out / norms
+
+    def __call__(self, texts: list[str], provider: str | None = None) -> list[list[float]]:
+        """Misma firma que app.rag.embeddings.embed_texts."""
+        if self.latency:
+            time.sleep(self.latency)
+        return self.encode(texts).tolist()
+
+
+class FakeLLM:
+    """Devuelve las primeras oraciones del contexto; `latency` simula el proveedor."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+
+    def answer(self, prompt: str, provider: str | None = None) -> str:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        context = prompt.split("=== CONTEXTO ===", 1)[-1].split("=== PREGUNTA ===", 1)[0]
+        return context.strip()[:400] + "\n\nFuentes: benchmark"
+
+    def summary(self, text: str, provider: str | None = None) -> str:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return text[:300]
+
+
+class FakeCrossEncoder:
+    """
+    predict(pares) → fracción de tokens de la query presentes en el pasaje.
+    latency_per_pair simula el costo por par de un cross-encoder real.
+    """
+
+    def __init__(self, latency_per_pair: float = 0.0):
+        self.latency_per_pair = latency_per_pair
+
+    def predict(self, pairs: list[tuple[str, str]], batch_size: int = 32) -> list[float]:
+        if self.latency_per_pair:
+            time.sleep(self.latency_per_pair * len(pairs))
+        scores = []
+        for query, passage in pairs:
+            q = set(_tokens(query))
+            p = set(_tokens(passage))
+            scores.append(len(q & p) / (len(q) or 1))
+        return scores
@@ -0,0 +1,208 @@
+# benchmarks/loadgen.py
+
+"""
+Generador de carga de lazo abierto para /query y /ingest.
+
+Los requests se programan a una tasa objetivo (uniforme o Poisson) sin
+esperar a que terminen los anteriores, y la latencia se mide desde el
+instante programado: si el servicio se satura, la cola se ve en las
+colas de latencia (sin coordinated omission). --max-in-flight acota los
+requests abiertos; los que no caben se cuentan como descartados.
+
+Pensado para correr contra la app apuntada a benchmarks/standins.py:
+    python benchmarks/standins.py --latency lognormal:40,0.5 &
+    export ...   # variables que imprime standins.py
+    uvicorn app.main:app --port 8000 &
+    python benchmarks/loadgen.py --rps 20 --duration 60 --mix query=0.9,ingest=0.1
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+from benchmarks.corpus import build_corpus, build_questions
+
+
+def parse_mix(spec: str) -> dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    unknown = set(mix) - {"query", "ingest"}
+    if unknown:
+        raise ValueError(f"Endpoints desconocidos en --mix: {unknown}")
+    return mix
+
+
+class LoadGenerator:
+    def __init__(self, base_url: str, rps: float, duration: float, mix: dict[str, float],
+                 questions: list[str], files: list[Path], provider: str,
+                 arrival: str = "poisson", max_in_flight: int = 256, timeout: float = 60.0,
+                 seed: int = 3):
+        self.base_url = base_url.rstrip("/")
+        self.rps = rps
+        self.duration = duration
+        self.mix = mix
+        self.questions = questions
+        self.files = files
+        self.provider = provider
+        self.arrival = arrival
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+        self.rng = random.Random(seed)
+
+        self.latencies: dict[str, list[float]] = {name: [] for name in mix}
+        self.service_times: dict[str, list[float]] = {name: [] for name in mix}
+        self.statuses: dict[str, Counter] = {name: Counter() for name in mix}
+        self.dropped: Counter = Counter()
+        self.in_flight = 0
+
+    # --------------------------------------------------------
+    def _pick(self) -> str:
+        names, weights = zip(*self.mix.items())
+        return self.rng.choices(names, weights=weights)[0]
+
+    async def _query(self, client: httpx.AsyncClient) -> httpx.Response:
+        return await client.post(
+            f"{self.base_url}/query/",
+            json={"query": self.rng.choice(self.questions), "provider": self.provider},
+        )
+
+    async def _ingest(self, client: httpx.AsyncClient) -> httpx.Response:
+        path = self.rng.choice(self.files)
+        with open(path, "rb") as fh:
+            return await client.post(
+                f"{self.base_url}/ingest/",
+                files={"file": (path.name, fh.read())},
+                data={"provider": self.provider, "source_name": "loadgen"},
+            )
+
+    async def _fire(self, client: httpx.AsyncClient, name: str, scheduled: float):
+        self.in_flight += 1
+        started = time.perf_counter()
+        try:
+            resp = await (self._query(client) if name == "query" else self._ingest(client))
+            status = str(resp.status_code)
+        except httpx.TimeoutException:
+            status = "timeout"
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        finally:
+            self.in_flight -= 1
+        done = time.perf_counter()
+        self.statuses[name][status] += 1
+        self.latencies[name].append(done - scheduled)
+        self.service_times[name].append(done - started)
+
+    async def run(self) -> dict:
+        limits = httpx.Limits(max_connections=self.max_in_flight,
+                              max_keepalive_connections=self.max_in_flight)
+        async with httpx.AsyncClient(timeout=self.timeout, limits=limits) as client:
+            tasks = []
+            start = time.perf_counter()
+            next_at = start
+            while next_at - start < self.duration:
+                now = time.perf_counter()
+                if next_at > now:
+                    await asyncio.sleep(next_at - now)
+
+                name = self._pick()
+                if self.in_flight >= self.max_in_flight:
+                    self.dropped[name] += 1
+                else:
+                    tasks.append(asyncio.create_task(self._fire(client, name, next_at)))
+
+                gap = self.rng.expovariate(self.rps) if self.arrival == "poisson" else 1 / self.rps
+                next_at += gap
+
+            sent_until = time.perf_counter()
+            if tasks:
+                await asyncio.gather(*tasks)
+            elapsed = time.perf_counter() - start
+
+        return self.report(sent_until - start, elapsed)
+
+    # --------------------------------------------------------
+    def report(self, send_window: float, elapsed: float) -> dict:
+        endpoints = {}
+        for name in self.mix:
+            lat = self.latencies[name]
+            ok = sum(c for s, c in self.statuses[name].items() if s.startswith("2"))
+            entry = {
+                "sent": len(lat),
+                "ok": ok,
+                "errors": len(lat) - ok,
+                "dropped": self.dropped[name],
+                "status": dict(self.statuses[name]),
+                "throughput_rps": round(ok / elapsed, 2) if elapsed else 0.0,
+            }
+            if lat:
+                arr = np.asarray(lat) * 1000
+                svc = np.asarray(self.service_times[name]) * 1000
+                entry["latency_ms"] = {
+                    "p50": round(float(np.percentile(arr, 50)), 1),
+                    "p95": round(float(np.percentile(arr, 95)), 1),
+                    "p99": round(float(np.percentile(arr, 99)), 1),
+                    "max": round(float(arr.max()), 1),
+                }
+                entry["service_time_ms_p50"] = round(float(np.percentile(svc, 50)), 1)
+            endpoints[name] = entry
+
+        return {
+            "target_rps": self.rps,
+            "arrival": self.arrival,
+            "send_window_s": round(send_window, 2),
+            "elapsed_s": round(elapsed, 2),
+            "offered_rps": round(sum(len(v) for v in self.latencies.values()) / send_window, 2)
+            if send_window else 0.0,
+            "endpoints": endpoints,
+        }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Generador de carga para /query y /ingest")
+    ap.add_argument("--url", default="http://127.0.0.1:8000")
+    ap.add_argument("--rps", type=float, default=10.0, help="tasa objetivo total")
+    ap.add_argument("--duration", type=float, default=30.0, help="segundos enviando requests")
+    ap.add_argument("--mix", default="query=0.9,ingest=0.1")
+    ap.add_argument("--arrival", choices=["poisson", "uniform"], default="poisson")
+    ap.add_argument("--max-in-flight", type=int, default=256)
+    ap.add_argument("--timeout", type=float, default=60.0)
+    ap.add_argument("--provider", default="openai")
+    ap.add_argument("--docs", type=int, default=4, help="documentos por formato del corpus de ingesta")
+    ap.add_argument("--output", type=Path, help="guardar el reporte JSON")
+    args = ap.parse_args(argv)
+
+    corpus_dir = Path(tempfile.mkdtemp(prefix="rag-loadgen-"))
+    docs = build_corpus(corpus_dir, docs_per_format=args.docs)
+    questions = [q["question"] for q in build_questions(docs, n=200)]
+
+    gen = LoadGenerator(
+        args.url, args.rps, args.duration, parse_mix(args.mix), questions,
+        [Path(d["path"]) for d in docs], args.provider,
+        arrival=args.arrival, max_in_flight=args.max_in_flight, timeout=args.timeout,
+    )
+    print(f"▶ {args.rps} rps durante {args.duration}s contra {args.url} ({args.mix})")
+    report = asyncio.run(gen.run())
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    print(text)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(text, encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+# benchmarks/run.py
+
+"""
+Benchmark offline del servicio: extracción por formato, chunking,
+throughput de embeddings, ingesta, retrieve+rerank y answer_question
+(p50/p95/p99) sobre un corpus sintético, sin Pinecone ni LLMs remotos.
+
+Usa VECTOR_BACKEND=local, embeddings por hashing, LLM y cross-encoder
+falsos (benchmarks/fakes.py). Los resultados se escriben en JSON; con
+--baseline se comparan contra una corrida anterior y se marcan las
+regresiones que superan --threshold (exit code 1).
+
+Uso:
+    python benchmarks/run.py --docs 10 --queries 50
+    python benchmarks/run.py --save-baseline benchmarks/baseline.json
+    python benchmarks/run.py --baseline benchmarks/baseline.json --threshold 0.15
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import platform
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.rag import ingestion, pipeline, retriever
+from app.rag.cache import RetrievalCache
+from app.utils.chunker import chunk_text
+from app.utils.text_extract import extract_text
+from app.vectorstore import local_store
+from app.vectorstore.chunk_store import ChunkStore
+from app.vectorstore.manifest import DocumentManifest
+
+from benchmarks.corpus import FORMATS, build_corpus, build_questions
+from benchmarks.fakes import FakeCrossEncoder, FakeEmbedder, FakeLLM
+
+PROVIDER = "sentence_transformers"
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+# ============================================================
+# Entorno offline
+# ============================================================
+@contextmanager
+def offline_environment(workdir: Path, embedder, llm: FakeLLM, use_real_embeddings: bool = False,
+                        cross_encoder: FakeCrossEncoder | None = None):
+    """
+    Parchea los nombres de módulo que usa el pipeline (no toca el código
+    del servicio) y los restaura al salir.
+    """
+    chunks = ChunkStore(workdir / "chunks.sqlite3")
+    patches = [
+        (settings, "VECTOR_BACKEND", "local"),
+        (settings, "PINECONE_INDEX", "bench-index"),
+        (ingestion, "generate_summary", llm.summary),
+        (ingestion, "manifest", DocumentManifest(workdir / "manifest.sqlite3")),
+        (ingestion, "chunk_store", chunks),
+        (retriever, "chunk_store", chunks),
+        (pipeline, "generate_answer", llm.answer),
+        (retriever, "_cross_encoders", {PROVIDER: cross_encoder or FakeCrossEncoder()}),
+        # sin cache: se mide el camino completo en cada query
+        (retriever, "retrieval_cache", RetrievalCache(0, 0, name="bench")),
+        (ingestion, "retrieval_cache", RetrievalCache(0, 0, name="bench")),
+    ]
+    if not use_real_embeddings:
+        patches += [(ingestion, "embed_texts", embedder), (retriever, "embed_texts", embedder)]
+
+    saved = [(obj, name, getattr(obj, name)) for obj, name, _ in patches]
+    for obj, name, value in patches:
+        setattr(obj, name, value)
+    local_store._indexes.pop("bench-index", None)
+    try:
+        yield
+    finally:
+        for obj, name, value in saved:
+            setattr(obj, name, value)
+        chunks.close()
+        local_store._indexes.pop("bench-index", None)
+
+
+# ============================================================
+# Utilidades de medición
+# ============================================================
+def percentiles(samples: list[float]) -> dict:
+    arr = np.asarray(samples, dtype=float) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(arr, 50)), 3),
+        "p95_ms": round(float(np.percentile(arr, 95)), 3),
+        "p99_ms": round(float(np.percentile(arr, 99)), 3),
+        "mean_ms": round(float(arr.mean()), 3),
+        "n": len(samples),
+    }
+
+
+def timed(fn, *args, **kwargs) -> tuple[float, object]:
+    t0 = time.perf_counter()
+    out = fn(*args, **kwargs)
+    return time.perf_counter() - t0, out
+
+
+# ============================================================
+# Benchmarks
+# ============================================================
+def bench_extract(docs: list[dict], repeat: int) -> dict:
+    out = {}
+    for fmt in FORMATS:
+        paths = [d["path"] for d in docs if d["format"] == fmt]
+        samples, chars, size = [], 0, 0
+        for _ in range(repeat):
+            for p in paths:
+                dt, text = timed(extract_text, p)
+                samples.append(dt)
+                chars += len(text)
+                size += os.path.getsize(p)
+        total = sum(samples) or 1e-9
+        out[fmt] = {**percentiles(samples), "mb_per_s": round(size / total / 1e6, 3),
+                    "chars_per_s": round(chars / total)}
+    return out
+
+
+def bench_chunk(texts: list[str], chunk_size: int, repeat: int) -> dict:
+    samples, chunks, chars = [], 0, 0
+    for _ in range(repeat):
+        for text in texts:
+            dt, parts = timed(chunk_text, text, chunk_size=chunk_size,
+                              chunk_overlap=int(chunk_size * 0.20))
+            samples.append(dt)
+            chunks += len(parts)
+            chars += len(text)
+    total = sum(samples) or 1e-9
+    return {**percentiles(samples), "chunks_per_s": round(chunks / total),
+            "chars_per_s": round(chars / total)}
+
+
+def bench_embed(embed, texts: list[str], batch_sizes: list[int]) -> dict:
+    out = {}
+    for bs in batch_sizes:
+        t0 = time.perf_counter()
+        for i in range(0, len(texts), bs):
+            embed(texts[i:i + bs], provider=PROVIDER)
+        elapsed = time.perf_counter() - t0 or 1e-9
+        out[f"batch_{bs}"] = {"texts_per_s": round(len(texts) / elapsed, 1)}
+    return out
+
+
+def bench_ingest(docs: list[dict]) -> dict:
+    def _run() -> tuple[float, int]:
+        chunks = 0
+        t0 = time.perf_counter()
+        for d in docs:
+            res = ingestion.ingest_file_to_pinecone(d["path"], source_name="bench", provider=PROVIDER)
+            chunks += res.get("archivo_metadata_json", {}).get("chunks", 0)
+        return time.perf_counter() - t0 or 1e-9, chunks
+
+    cold, chunks = _run()
+    # segunda pasada: nada cambió → camino incremental (sin embed/upsert)
+    warm, _ = _run()
+    return {
+        "docs": len(docs),
+        "chunks": chunks,
+        "cold_docs_per_s": round(len(docs) / cold, 2),
+        "cold_chunks_per_s": round(chunks / cold, 1),
+        "reingest_docs_per_s": round(len(docs) / warm, 2),
+    }
+
+
+def bench_retrieve(questions: list[dict], top_k: int) -> dict:
+    samples, found = [], 0
+    for q in questions:
+        t0 = time.perf_counter()
+        hits = retriever.retrieve(q["question"], top_k=top_k, provider=PROVIDER)
+        hits = retriever.rerank(q["question"], hits, top_k=min(len(hits), 10), provider=PROVIDER)
+        samples.append(time.perf_counter() - t0)
+        found += any(h["metadata"].get("filename") == q["filename"] for h in hits)
+    return {**percentiles(samples), "hit_rate_at_10": round(found / len(questions), 3)}
+
+
+def bench_answer(questions: list[dict], top_k: int) -> dict:
+    samples = []
+    for q in questions:
+        dt, _ = timed(pipeline.answer_question, q["question"], top_k=top_k, provider=PROVIDER)
+        samples.append(dt)
+    return percentiles(samples)
+
+
+# ============================================================
+# Comparación contra baseline
+# ============================================================
+# Métricas comparables y su dirección (True = mayor es mejor)
+def flatten(results: dict) -> dict[str, tuple[float, bool]]:
+    flat = {}
+
+    def _walk(prefix: str, node):
+        if isinstance(node, dict):
+            for k, v in node.items():
+                _walk(f"{prefix}.{k}" if prefix else k, v)
+        elif isinstance(node, (int, float)) and not isinstance(node, bool):
+            leaf = prefix.rsplit(".", 1)[-1]
+            if leaf.endswith("_ms"):
+                flat[prefix] = (float(node), False)
+            elif leaf.endswith("_per_s"):
+                flat[prefix] = (float(node), True)
+
+    _walk("", results.get("benchmarks", {}))
+    return flat
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[dict]:
+    cur, base = flatten(current), flatten(baseline)
+    report = []
+    for name, (old, higher_is_better) in base.items():
+        if name not in cur or old == 0:
+            continue
+        new = cur[name][0]
+        change = (new - old) / old
+        worse = -change if higher_is_better else change
+        report.append({
+            "metric": name,
+            "baseline": old,
+            "current": new,
+            "change_pct": round(100 * change, 1),
+            "regression": worse > threshold,
+        })
+    return report
+
+
+# ============================================================
+# MAIN
+# ============================================================
+def run(args) -> dict:
+    workdir = Path(tempfile.mkdtemp(prefix="rag-bench-"))
+    docs = build_corpus(workdir / "corpus", docs_per_format=args.docs, paragraphs=args.paragraphs)
+    questions = build_questions(docs, n=args.queries)
+
+    embedder = FakeEmbedder(dim=args.dim)
+    llm = FakeLLM(latency=args.llm_latency / 1000)
+
+    texts = [extract_text(d["path"]) for d in docs]
+    passages = [p for t in texts for p in chunk_text(t, chunk_size=500, chunk_overlap=100)]
+
+    results = {"benchmarks": {}}
+    b = results["benchmarks"]
+
+    print("▶ extracción por formato...")
+    b["extract"] = bench_extract(docs, args.repeat)
+    print("▶ chunking...")
+    b["chunk"] = bench_chunk(texts, chunk_size=500, repeat=args.repeat)
+
+    with offline_environment(workdir, embedder, llm, use_real_embeddings=args.real_embeddings):
+        print("▶ embeddings...")
+        embed = retriever.embed_texts
+        b["embed"] = bench_embed(embed, passages, [1, 16, 64])
+        print("▶ ingesta...")
+        b["ingest"] = bench_ingest(docs)
+        print("▶ retrieve + rerank...")
+        b["retrieve_rerank"] = bench_retrieve(questions, args.top_k)
+        print("▶ answer_question...")
+        b["answer_question"] = bench_answer(questions, args.top_k)
+
+    results["meta"] = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "docs_per_format": args.docs,
+        "paragraphs": args.paragraphs,
+        "queries": args.queries,
+        "repeat": args.repeat,
+        "embedder": "real" if args.real_embeddings else f"fake-hash-{args.dim}",
+        "llm_latency_ms": args.llm_latency,
+    }
+    return results
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark offline del RAG service")
+    ap.add_argument("--docs", type=int, default=10, help="documentos por formato")
+    ap.add_argument("--paragraphs", type=int, default=12, help="párrafos de relleno por documento")
+    ap.add_argument("--queries", type=int, default=50)
+    ap.add_argument("--repeat", type=int, default=3, help="repeticiones de extracción/chunking")
+    ap.add_argument("--top-k", type=int, default=20)
+    ap.add_argument("--dim", type=int, default=384, help="dimensión del embedder falso")
+    ap.add_argument("--llm-latency", type=float, default=0.0, help="latencia simulada del LLM (ms)")
+    ap.add_argument("--real-embeddings", action="store_true",
+                    help="usar embed_texts real (EMB_MODEL local) en vez del embedder falso")
+    ap.add_argument("--output", type=Path, help="JSON de salida (por defecto benchmarks/results/)")
+    ap.add_argument("--baseline", type=Path, help="JSON de una corrida anterior para comparar")
+    ap.add_argument("--threshold", type=float, default=0.20,
+                    help="empeoramiento relativo que cuenta como regresión (0.20 = 20%%)")
+    ap.add_argument("--save-baseline", type=Path, help="guardar también esta corrida como baseline")
+    ap.add_argument("--log-level", default="WARNING",
+                    help="nivel del logger del servicio durante la corrida (INFO distorsiona tiempos)")
+    args = ap.parse_args(argv)
+
+    logger.setLevel(args.log_level.upper())
+    results = run(args)
+
+    exit_code = 0
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        report = compare(results, baseline, args.threshold)
+        results["comparison"] = {"baseline": str(args.baseline), "threshold": args.threshold,
+                                 "metrics": report}
+        regressions = [r for r in report if r["regression"]]
+        for r in report:
+            flag = "❌" if r["regression"] else "  "
+            print(f"{flag} {r['metric']:<45} {r['baseline']:>12} → {r['current']:>12} "
+                  f"({r['change_pct']:+.1f}%)")
+        if regressions:
+            print(f"\n❌ {len(regressions)} regresiones sobre el umbral de {args.threshold:.0%}")
+            exit_code = 1
+        else:
+            print("\n✅ Sin regresiones")
+
+    output = args.output or RESULTS_DIR / f"bench-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"📄 Resultados: {output}")
+
+    if args.save_baseline:
+        args.save_baseline.parent.mkdir(parents=True, exist_ok=True)
+        clean = {k: v for k, v in results.items() if k != "comparison"}
+        args.save_baseline.write_text(json.dumps(clean, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"📌 Baseline guardado: {args.save_baseline}")
+
+    print(json.dumps({k: v for k, v in results["benchmarks"].items()}, indent=2, ensure_ascii=False))
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,535 @@
+# benchmarks/standins.py
+
+"""
+Servidores locales que imitan las APIs externas del servicio para
+pruebas de carga y tests sin credenciales ni costos:
+
+- Pinecone: control plane (/indexes) + data plane (upsert, query, fetch,
+  update, delete, list, describe_index_stats) sobre LocalIndex, con
+  namespaces.
+- OpenAI: /v1/chat/completions y /v1/embeddings (float o base64).
+- HF Inference: POST con {"inputs": str} → generated_text,
+  {"inputs": [str, ...]} → embeddings.
+
+Cada servicio tiene un modelo de latencia y tasas de error configurables.
+Solo usa la stdlib (http.server), así que también se puede levantar en
+un hilo desde pytest. El módulo no importa `app` al cargarse: así se
+pueden exportar las URLs antes de que se instancie `settings`.
+
+Uso:
+    python benchmarks/standins.py --latency lognormal:40,0.5 --error-rate 0.01
+    # imprime las variables a exportar antes de levantar la app:
+    #   PINECONE_HOST=... OPENAI_BASE_URL=... HF_API_URL=...
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import base64
+import json
+import random
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+from benchmarks.fakes import FakeEmbedder
+
+
+# ============================================================
+# Latencia y fallas
+# ============================================================
+class LatencyModel:
+    """
+    Distribución de latencia en milisegundos a partir de un spec:
+        "0" | "fixed:20" | "uniform:10,50" | "exp:30" | "lognormal:40,0.5"
+    (lognormal: mediana en ms y sigma).
+    """
+
+    def __init__(self, spec: str = "0", seed: int | None = None):
+        self.spec = spec
+        self.rng = random.Random(seed)
+        kind, _, params = spec.partition(":")
+        if not params:
+            kind, params = "fixed", kind
+        self.kind = kind
+        self.params = [float(p) for p in params.split(",") if p]
+
+    def sample(self) -> float:
+        """Segundos a dormir."""
+        p = self.params
+        if self.kind == "fixed":
+            ms = p[0] if p else 0.0
+        elif self.kind == "uniform":
+            ms = self.rng.uniform(p[0], p[1])
+        elif self.kind == "exp":
+            ms = self.rng.expovariate(1 / p[0]) if p[0] > 0 else 0.0
+        elif self.kind == "lognormal":
+            ms = p[0] * self.rng.lognormvariate(0.0, p[1] if len(p) > 1 else 0.5)
+        else:
+            raise ValueError(f"Distribución de latencia desconocida: {self.spec}")
+        return max(ms, 0.0) / 1000
+
+
+class Faults:
+    """error_rate → 500, throttle_rate → 429 con Retry-After."""
+
+    def __init__(self, latency: str = "0", error_rate: float = 0.0, throttle_rate: float = 0.0,
+                 seed: int | None = None):
+        self.latency = LatencyModel(latency, seed)
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.injected = 0
+
+    def roll(self) -> int | None:
+        with self.lock:
+            self.requests += 1
+            delay = self.latency.sample()
+            r = self.rng.random()
+        time.sleep(delay)
+        if r < self.error_rate:
+            status = 500
+        elif r < self.error_rate + self.throttle_rate:
+            status = 429
+        else:
+            return None
+        with self.lock:
+            self.injected += 1
+        return status
+
+
+# ============================================================
+# Base HTTP
+# ============================================================
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"       # keep-alive, como los SDKs reales
+    service = None                      # se asigna al crear el server
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _body(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _send(self, status: int, payload=None, headers: dict | None = None):
+        data = json.dumps(payload if payload is not None else {}).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _dispatch(self, method: str):
+        url = urlparse(self.path)
+        try:
+            body = self._body() if method in ("POST", "PATCH", "PUT") else {}
+        except ValueError:
+            return self._send(400, {"error": "invalid json"})
+
+        status = self.service.faults.roll()
+        if status == 429:
+            return self._send(429, {"error": {"message": "rate limited (stand-in)"}},
+                              {"Retry-After": "1"})
+        if status:
+            return self._send(status, {"error": {"message": "injected failure (stand-in)"}})
+
+        try:
+            status, payload = self.service.handle(method, url.path, parse_qs(url.query), body)
+        except KeyError as e:
+            status, payload = 404, {"error": {"message": f"not found: {e}"}}
+        except ValueError as e:
+            status, payload = 400, {"error": {"message": str(e)}}
+        self._send(status, payload)
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PATCH(self):
+        self._dispatch("PATCH")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+
+class _Service:
+    def __init__(self, faults: Faults | None = None):
+        self.faults = faults or Faults()
+        self.base_url = ""
+
+    def handle(self, method: str, path: str, query: dict, body: dict) -> tuple[int, dict]:
+        raise NotImplementedError
+
+
+# ============================================================
+# Pinecone
+# ============================================================
+class PineconeStandIn(_Service):
+    """
+    Un solo puerto para control y data plane. El host de cada índice es
+    {base_url}/index/{name}, así las operaciones de datos saben a qué
+    índice van.
+    """
+
+    def __init__(self, faults: Faults | None = None):
+        super().__init__(faults)
+        self.specs: dict[str, dict] = {}
+        self.data: dict[tuple[str, str], LocalIndex] = {}
+        self.lock = threading.Lock()
+
+    def _describe(self, name: str) -> dict:
+        spec = self.specs[name]
+        return {
+            "name": name,
+            "dimension": spec["dimension"],
+            "metric": spec["metric"],
+            "host": f"{self.base_url}/index/{name}",
+            "spec": spec.get("spec") or {"serverless": {"cloud": "aws", "region": "us-east-1"}},
+            "schema": {"fields": {"_values": {"type": "dense_vector", "dimension": spec["dimension"],
+                                              "metric": spec["metric"]}}},
+            "status": {"ready": True, "state": "Ready"},
+            "deployment": spec.get("deployment")
+            or {"deployment_type": "managed", "cloud": "aws", "region": "us-east-1"},
+            "deletion_protection": "disabled",
+            "vector_type": "dense",
+        }
+
+    def _ns(self, name: str, namespace: str | None, create: bool = False):
+        from app.vectorstore.local_store import LocalIndex
+
+        spec = self.specs[name]
+        key = (name, namespace or "")
+        with self.lock:
+            if key not in self.data and create:
+                self.data[key] = LocalIndex(spec["dimension"], spec["metric"])
+            return self.data.get(key)
+
+    def handle(self, method, path, query, body):
+        parts = [p for p in path.split("/") if p]
+
+        # ---------------- control plane ----------------
+        if parts[:1] == ["indexes"]:
+            if len(parts) == 1 and method == "GET":
+                return 200, {"indexes": [self._describe(n) for n in self.specs]}
+            if len(parts) == 1 and method == "POST":
+                name = body["name"]
+                if name in self.specs:
+                    return 409, {"error": {"code": "ALREADY_EXISTS", "message": name}}
+                self.specs[name] = _index_spec(body)
+                return 201, self._describe(name)
+            if len(parts) == 2 and method == "GET":
+                return 200, self._describe(parts[1])
+            if len(parts) == 2 and method == "DELETE":
+                self.specs.pop(parts[1])
+                with self.lock:
+                    for key in [k for k in self.data if k[0] == parts[1]]:
+                        del self.data[key]
+                return 202, {}
+
+        # ---------------- data plane ----------------
+        if parts[:1] != ["index"] or len(parts) < 3:
+            raise KeyError(path)
+        name, op = parts[1], "/".join(parts[2:])
+        namespace = body.get("namespace") or (query.get("namespace") or [""])[0]
+
+        if op == "vectors/upsert":
+            index = self._ns(name, namespace, create=True)
+            index.upsert(body.get("vectors", []))
+            return 200, {"upsertedCount": len(body.get("vectors", []))}
+
+        if op == "query":
+            index = self._ns(name, namespace)
+            if index is None:
+                return 200, {"matches": [], "namespace": namespace}
+            res = index.query(
+                body["vector"],
+                top_k=int(body.get("topK", 10)),
+                include_metadata=bool(body.get("includeMetadata")),
+                include_values=bool(body.get("includeValues")),
+                filter=body.get("filter"),
+            )
+            for m in res["matches"]:
+                if "values" in m:
+                    m["values"] = m["values"].tolist()
+            return 200, {**res, "namespace": namespace}
+
+        if op == "vectors/fetch":
+            index = self._ns(name, namespace)
+            ids = query.get("ids", [])
+            return 200, {"vectors": index.fetch(ids) if index else {}, "namespace": namespace}
+
+        if op == "vectors/update":
+            index = self._ns(name, namespace)
+            if index is not None:
+                if body.get("values"):
+                    current = index.fetch([body["id"]]).get(body["id"])
+                    if current:
+                        index.upsert([(body["id"], body["values"], current["metadata"])])
+                index.update(body["id"], body.get("setMetadata") or {})
+            return 200, {}
+
+        if op == "vectors/delete":
+            index = self._ns(name, namespace)
+            if index is not None:
+                if body.get("deleteAll"):
+                    with self.lock:
+                        self.data.pop((name, namespace or ""), None)
+                else:
+                    index.delete(body.get("ids", []))
+            return 200, {}
+
+        if op == "vectors/list":
+            index = self._ns(name, namespace)
+            prefix = (query.get("prefix") or [""])[0]
+            limit = int((query.get("limit") or ["100"])[0])
+            offset = int((query.get("paginationToken") or ["0"])[0])
+            ids = [v for batch in index.list(prefix=prefix, batch_size=10**9) for v in batch] if index else []
+            page = ids[offset:offset + limit]
+            payload = {"vectors": [{"id": v} for v in page], "namespace": namespace}
+            if offset + limit < len(ids):
+                payload["pagination"] = {"next": str(offset + limit)}
+            return 200, payload
+
+        if op == "describe_index_stats":
+            spec = self.specs[name]
+            with self.lock:
+                namespaces = {ns: {"vectorCount": len(ix)} for (n, ns), ix in self.data.items() if n == name}
+            return 200, {
+                "dimension": spec["dimension"],
+                "indexFullness": 0.0,
+                "totalVectorCount": sum(v["vectorCount"] for v in namespaces.values()),
+                "namespaces": namespaces,
+            }
+
+        raise KeyError(path)
+
+
+def _index_spec(body: dict) -> dict:
+    """Acepta el formato clásico (dimension/metric) y el de schema de SDKs nuevos."""
+    if "dimension" in body:
+        return {"dimension": int(body["dimension"]), "metric": body.get("metric", "cosine"),
+                "spec": body.get("spec"), "deployment": body.get("deployment")}
+    for field in (body.get("schema") or {}).get("fields", {}).values():
+        if field.get("type") == "dense_vector":
+            return {"dimension": int(field["dimension"]), "metric": field.get("metric", "cosine"),
+                    "spec": body.get("spec"), "deployment": body.get("deployment")}
+    raise ValueError("falta dimension")
+
+
+# ============================================================
+# OpenAI
+# ============================================================
+class OpenAIStandIn(_Service):
+    """
+    Chat: responde con el inicio del contexto del prompt. Embeddings:
+    FakeEmbedder con la dimensión pedida (`dimensions`) o `default_dim`.
+    """
+
+    def __init__(self, faults: Faults | None = None, default_dim: int = 3072):
+        super().__init__(faults)
+        self.default_dim = default_dim
+        self._embedders: dict[int, FakeEmbedder] = {}
+
+    def _embedder(self, dim: int) -> FakeEmbedder:
+        if dim not in self._embedders:
+            self._embedders[dim] = FakeEmbedder(dim=dim)
+        return self._embedders[dim]
+
+    def handle(self, method, path, query, body):
+        path = path[3:] if path.startswith("/v1/") else path
+
+        if path == "/chat/completions" and method == "POST":
+            prompt = (body.get("messages") or [{}])[-1].get("content", "")
+            text = _fake_completion(prompt)
+            return 200, {
+                "id": f"chatcmpl-standin-{int(time.time() * 1000)}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "stand-in"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": text},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(text) // 4,
+                          "total_tokens": (len(prompt) + len(text)) // 4},
+            }
+
+        if path == "/embeddings" and method == "POST":
+            inputs = body.get("input") or []
+            if isinstance(inputs, str):
+                inputs = [inputs]
+            dim = int(body.get("dimensions") or self.default_dim)
+            vectors = self._embedder(dim).encode(inputs)
+            as_b64 = body.get("encoding_format") == "base64"
+            data = [
+                {
+                    "object": "embedding",
+                    "index": i,
+                    "embedding": (
+                        base64.b64encode(v.astype("<f4").tobytes()).decode("ascii")
+                        if as_b64 else v.tolist()
+                    ),
+                }
+                for i, v in enumerate(vectors)
+            ]
+            tokens = sum(len(t) // 4 for t in inputs)
+            return 200, {"object": "list", "data": data, "model": body.get("model", "stand-in"),
+                         "usage": {"prompt_tokens": tokens, "total_tokens": tokens}}
+
+        if path == "/models" and method == "GET":
+            return 200, {"object": "list", "data": [{"id": "stand-in", "object": "model"}]}
+
+        raise KeyError(path)
+
+
+# ============================================================
+# HF Inference
+# ============================================================
+class HFStandIn(_Service):
+    """
+    Cualquier ruta: inputs str → [{"generated_text"}] (chat);
+    inputs lista → lista de embeddings (feature-extraction).
+    """
+
+    def __init__(self, faults: Faults | None = None, dim: int = 768):
+        super().__init__(faults)
+        self.embedder = FakeEmbedder(dim=dim)
+
+    def handle(self, method, path, query, body):
+        if method != "POST":
+            raise KeyError(path)
+        inputs = body.get("inputs")
+        if isinstance(inputs, list):
+            return 200, self.embedder.encode(inputs).tolist()
+        if isinstance(inputs, str):
+            return 200, [{"generated_text": _fake_completion(inputs)}]
+        raise ValueError("inputs debe ser str o lista de str")
+
+
+def _fake_completion(prompt: str) -> str:
+    context = prompt.split("=== CONTEXTO ===", 1)[-1].split("=== PREGUNTA ===", 1)[0]
+    return (context.strip()[:400] or "Sin contexto.") + "\n\nFuentes: stand-in"
+
+
+# ============================================================
+# Arranque
+# ============================================================
+class StandInServer:
+    def __init__(self, service: _Service, host: str = "127.0.0.1", port: int = 0):
+        handler = type(f"{type(service).__name__}Handler", (_Handler,), {"service": service})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.service = service
+        self.url = f"http://{host}:{self.httpd.server_address[1]}"
+        service.base_url = self.url
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name=f"standin-{port}",
+                                        daemon=True)
+
+    def start(self) -> "StandInServer":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def start_standins(host: str = "127.0.0.1", ports: dict | None = None, faults: dict | None = None,
+                   openai_dim: int = 3072, hf_dim: int = 768) -> dict[str, StandInServer]:
+    """Levanta los tres servicios en hilos. ports/faults por nombre de servicio."""
+    ports, faults = ports or {}, faults or {}
+    services = {
+        "pinecone": PineconeStandIn(faults.get("pinecone")),
+        "openai": OpenAIStandIn(faults.get("openai"), default_dim=openai_dim),
+        "hf": HFStandIn(faults.get("hf"), dim=hf_dim),
+    }
+    return {
+        name: StandInServer(svc, host, ports.get(name, 0)).start()
+        for name, svc in services.items()
+    }
+
+
+def standin_env(servers: dict[str, StandInServer]) -> dict[str, str]:
+    """Variables de entorno que apuntan la app a los stand-ins."""
+    return {
+        "PINECONE_API_KEY": "standin",
+        "PINECONE_HOST": servers["pinecone"].url,
+        "OPENAI_API_KEY": "standin",
+        "OPENAI_BASE_URL": f"{servers['openai'].url}/v1",
+        "HF_INFERENCE_API_KEY": "standin",
+        "HF_MODEL": "standin/model",
+        "HF_API_URL": servers["hf"].url,
+    }
+
+
+@contextmanager
+def running_standins(**kwargs):
+    servers = start_standins(**kwargs)
+    try:
+        yield servers
+    finally:
+        for s in servers.values():
+            s.stop()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Stand-ins locales de Pinecone / OpenAI / HF")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--pinecone-port", type=int, default=8101)
+    ap.add_argument("--openai-port", type=int, default=8102)
+    ap.add_argument("--hf-port", type=int, default=8103)
+    ap.add_argument("--latency", default="0", help="spec por defecto, p.ej. lognormal:40,0.5")
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--throttle-rate", type=float, default=0.0)
+    for name in ("pinecone", "openai", "hf"):
+        ap.add_argument(f"--{name}-latency", help=f"latencia de {name} (sobrescribe --latency)")
+        ap.add_argument(f"--{name}-error-rate", type=float)
+    ap.add_argument("--openai-dim", type=int, default=3072)
+    ap.add_argument("--hf-dim", type=int, default=768)
+    ap.add_argument("--seed", type=int)
+    args = ap.parse_args(argv)
+
+    faults = {}
+    for name in ("pinecone", "openai", "hf"):
+        latency = getattr(args, f"{name}_latency") or args.latency
+        error_rate = getattr(args, f"{name}_error_rate")
+        faults[name] = Faults(latency, args.error_rate if error_rate is None else error_rate,
+                              args.throttle_rate, seed=args.seed)
+
+    servers = start_standins(
+        host=args.host,
+        ports={"pinecone": args.pinecone_port, "openai": args.openai_port, "hf": args.hf_port},
+        faults=faults, openai_dim=args.openai_dim, hf_dim=args.hf_dim,
+    )
+    for name, s in servers.items():
+        print(f"✅ {name:<8} {s.url}  latency={faults[name].latency.spec} "
+              f"errors={faults[name].error_rate}")
+    print("\nExporta antes de levantar la app:")
+    for k, v in standin_env(servers).items():
+        print(f"export {k}={v}")
+
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        for s in servers.values():
+            s.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# scripts/backfill_doc_vectors.py
+"""
+Genera los vectores por documento (retrieval en dos etapas) de los
+documentos ingeridos antes de que existieran, a partir del manifest:
+embedding del resumen guardado o media de los vectores de sus chunks
+según DOC_VECTOR_SOURCE. No re-extrae ni re-chunkea nada.
+
+Uso:
+    python scripts/backfill_doc_vectors.py --tenant default --dry-run
+    python scripts/backfill_doc_vectors.py --source mean --force
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import argparse
+from collections import defaultdict
+
+from app.core.config import settings
+from app.rag.embeddings import embed_texts
+from app.vectorstore import doc_vectors
+from app.vectorstore.backend import fetch_vectors
+from app.vectorstore.manifest import manifest
+from app.vectorstore.routing import write_route
+
+
+def _vectors(entries: list[dict], source: str, tenant: str, batch_size: int) -> dict:
+    """document_id → vector del documento."""
+    out = {}
+    if source == "mean":
+        for entry in entries:
+            route = write_route(entry.get("provider"), entry.get("doc_type"), tenant)
+            stored = fetch_vectors(route.index, entry.get("chunk_ids", []), namespace=route.namespace)
+            out[entry["document_id"]] = doc_vectors.mean_vector([v["values"] for v in stored.values()])
+        return out
+
+    # resúmenes: una llamada de embeddings por lote y provider
+    by_provider = defaultdict(list)
+    for entry in entries:
+        if entry.get("summary"):
+            by_provider[entry.get("provider")].append(entry)
+    for provider, group in by_provider.items():
+        for i in range(0, len(group), batch_size):
+            batch = group[i:i + batch_size]
+            vectors = embed_texts([e["summary"] for e in batch], provider=provider)
+            for entry, vec in zip(batch, vectors):
+                out[entry["document_id"]] = doc_vectors.normalize(vec)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill de vectores por documento")
+    parser.add_argument("--tenant", default=settings.DEFAULT_TENANT)
+    parser.add_argument("--source", choices=("summary", "mean"), default=settings.DOC_VECTOR_SOURCE)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--force", action="store_true", help="regenera también los que ya tienen vector")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    entries = [manifest.get(e["document_id"], args.tenant) for e in manifest.list(args.tenant)]
+    todo = [e for e in entries if e and (args.force or not e.get("doc_vector"))]
+    print(f"▶ {args.tenant}: {len(todo)} de {len(entries)} documentos sin vector ({args.source})")
+    if args.dry_run or not todo:
+        return
+
+    written = skipped = 0
+    for i in range(0, len(todo), args.batch_size):
+        batch = todo[i:i + args.batch_size]
+        vectors = _vectors(batch, args.source, args.tenant, args.batch_size)
+        for entry in batch:
+            vector = vectors.get(entry["document_id"])
+            if vector is None:
+                skipped += 1
+                continue
+            route = write_route(entry.get("provider"), entry.get("doc_type"), args.tenant)
+            doc_vectors.write(entry["document_id"], vector, entry, route)
+            manifest.put(entry["document_id"], {**entry, "doc_vector": True}, args.tenant)
+            written += 1
+
+    print(f"✅ Vectores escritos: {written}  sin resumen / sin chunks: {skipped}")
+
+
+if __name__ == "__main__":
+    main()
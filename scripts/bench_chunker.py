@@ -0,0 +1,75 @@
+# scripts/bench_chunker.py
+"""
+Benchmark del chunker nativo vs LangChain RecursiveCharacterTextSplitter.
+Mide tiempo de import, tiempo de chunking y verifica que la salida coincida.
+
+Uso:
+    python scripts/bench_chunker.py --chars 2000000
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import argparse
+import random
+import subprocess
+import time
+
+
+def import_time(module: str) -> float:
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                         cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return float(out.stdout.strip() or "nan")
+
+
+def build_text(n_chars: int) -> str:
+    rnd = random.Random(0)
+    words = ["contrato", "cláusula", "honorarios", "factura", "valor", "propuesta", "acuerdos"]
+    seps = [" "] * 12 + [". "] * 2 + ["\n", ".\n\n"]
+    out, size = [], 0
+    while size < n_chars:
+        w = rnd.choice(words) + rnd.choice(seps)
+        out.append(w)
+        size += len(w)
+    return "".join(out)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chars", type=int, default=2_000_000)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    args = parser.parse_args()
+
+    from app.utils.chunker import SEPARATORS, chunk_text
+
+    text = build_text(args.chars)
+    overlap = int(args.chunk_size * 0.20)
+
+    print(f"⏱ import app.utils.chunker: {import_time('app.utils.chunker'):.3f}s")
+
+    t0 = time.perf_counter()
+    native = chunk_text(text, chunk_size=args.chunk_size, chunk_overlap=overlap)
+    print(f"⚡ nativo:    {time.perf_counter() - t0:.3f}s ({len(native)} chunks)")
+
+    try:
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+    except ImportError:
+        print("langchain-text-splitters no instalado: se omite la comparación.")
+        return
+
+    print(f"⏱ import langchain_text_splitters: {import_time('langchain_text_splitters'):.3f}s")
+
+    t0 = time.perf_counter()
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=args.chunk_size, chunk_overlap=overlap, separators=SEPARATORS
+    )
+    lc = [c.strip() for c in splitter.split_text(text) if c.strip()]
+    print(f"🦜 langchain: {time.perf_counter() - t0:.3f}s ({len(lc)} chunks)")
+
+    print("✅ salida idéntica" if lc == native else "❌ la salida difiere")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# scripts/bench_extract.py
+"""
+Benchmark de extracción XLSX: carga completa (load_workbook) vs streaming
+read-only (iter_text_excel). Genera un libro sintético de N filas.
+
+Uso:
+    python scripts/bench_extract.py --rows 100000
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import argparse
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import openpyxl
+
+from app.utils.text_extract import iter_text_excel
+
+
+def build_workbook(path: Path, rows: int):
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Clientes")
+    ws.append(["id", "cliente", "ciudad", "valor", "estado"])
+    for i in range(rows):
+        ws.append([i, f"Cliente {i}", "Bogotá", i * 1.5, "activo" if i % 3 else "inactivo"])
+    wb.save(path)
+
+
+def full_load(path: Path) -> int:
+    """Implementación anterior: modelo completo de celdas en memoria."""
+    wb = openpyxl.load_workbook(path, data_only=True)
+    content = []
+    for sheet in wb.sheetnames:
+        ws = wb[sheet]
+        content.append(f"\n--- HOJA: {sheet} ---\n")
+        for row in ws.iter_rows(values_only=True):
+            values = [str(cell).strip() for cell in row if cell is not None]
+            if values:
+                content.append(" | ".join(values))
+    return len("\n".join(content))
+
+
+def streaming(path: Path) -> int:
+    return len("\n".join(iter_text_excel(path, max_rows=10**9, max_chars=10**12)))
+
+
+def measure(fn, path: Path) -> dict:
+    t0 = time.perf_counter()
+    size = fn(path)
+    elapsed = time.perf_counter() - t0
+
+    tracemalloc.start()
+    fn(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"seconds": round(elapsed, 3), "peak_mb": round(peak / 1e6, 1), "chars": size}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.xlsx"
+        build_workbook(path, args.rows)
+        print(f"📊 Libro de {args.rows} filas ({path.stat().st_size / 1e6:.1f} MB)")
+
+        for name, fn in [("load_workbook", full_load), ("read_only", streaming)]:
+            r = measure(fn, path)
+            print(f"{name:>14}: {r['seconds']:>7.3f}s  pico={r['peak_mb']:>7.1f} MB  chars={r['chars']}")
+
+
+if __name__ == "__main__":
+    main()
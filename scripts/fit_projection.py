@@ -0,0 +1,80 @@
+# scripts/fit_projection.py
+"""
+Ajusta la proyección PCA de embeddings (EMB_DIMENSIONS) para el modelo
+local o HF y la guarda junto al índice (EMB_PROJECTION_DIR).
+
+La muestra sale de documentos reales: se extraen, se chunkean igual que
+en la ingesta y se embeben en dimensión completa. Hacen falta al menos
+tantos chunks como dimensiones de salida (mejor 5-10x).
+
+Uso:
+    python scripts/fit_projection.py data/uploads --dim 256 --max-chunks 20000
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import argparse
+import random
+from pathlib import Path
+
+import numpy as np
+
+from app.core.config import settings
+from app.rag.embeddings import embed_texts
+from app.rag.projection import PCAProjection, projection_path, invalidate_cache
+from app.utils.chunker import chunk_text
+from app.utils.text_extract import extract_text
+
+SUPPORTED = {".pdf", ".docx", ".txt", ".xlsx", ".eml", ".msg"}
+
+
+def sample_chunks(paths: list[Path], max_chunks: int, chunk_size: int, seed: int) -> list[str]:
+    chunks = []
+    for path in paths:
+        text = extract_text(str(path))
+        chunks.extend(chunk_text(text, chunk_size=chunk_size, chunk_overlap=int(chunk_size * 0.20)))
+    random.Random(seed).shuffle(chunks)
+    return chunks[:max_chunks]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Ajusta la PCA de embeddings para EMB_DIMENSIONS")
+    ap.add_argument("inputs", nargs="+", type=Path, help="archivos o carpetas de documentos")
+    ap.add_argument("--dim", type=int, default=settings.EMB_DIMENSIONS)
+    ap.add_argument("--provider", default="sentence_transformers", choices=["sentence_transformers", "hf"])
+    ap.add_argument("--max-chunks", type=int, default=20_000)
+    ap.add_argument("--chunk-size", type=int, default=500)
+    ap.add_argument("--batch-size", type=int, default=64)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    if not args.dim:
+        ap.error("Indica --dim o configura EMB_DIMENSIONS")
+
+    paths = []
+    for p in args.inputs:
+        paths.extend(sorted(f for f in p.rglob("*") if f.suffix.lower() in SUPPORTED) if p.is_dir() else [p])
+
+    chunks = sample_chunks(paths, args.max_chunks, args.chunk_size, args.seed)
+    print(f"▶ {len(paths)} documentos → {len(chunks)} chunks de muestra")
+
+    vectors = np.concatenate([
+        np.asarray(embed_texts(chunks[i:i + args.batch_size], provider=args.provider, reduce=False),
+                   dtype=np.float32)
+        for i in range(0, len(chunks), args.batch_size)
+    ])
+
+    model = settings.EMB_MODEL if args.provider == "sentence_transformers" else (settings.HF_MODEL or "hf")
+    proj = PCAProjection.fit(vectors, args.dim, model=model)
+    path = projection_path(model, args.dim)
+    proj.save(path)
+    invalidate_cache()          # este proceso; los workers lo ven por mtime
+
+    print(f"✅ PCA {proj.source_dim} → {proj.dim} dims "
+          f"(varianza explicada {proj.explained_variance:.1%}) guardada en {path}")
+
+
+if __name__ == "__main__":
+    main()
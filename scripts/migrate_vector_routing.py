@@ -0,0 +1,111 @@
+# scripts/migrate_vector_routing.py
+"""
+Mueve los vectores de un índice existente a las rutas de VECTOR_ROUTING
+(índice por provider y, si aplica, namespace por doc_type).
+
+Lee todos los namespaces del índice origen, trae vectores + metadata por
+lotes y los re-sube en la ruta que corresponde a su metadata
+(provider / doc_type) y a su tenant (deducido del namespace origen según
+--from). No re-embebe nada. Por defecto solo copia:
+--delete-source borra del origen cada lote ya copiado.
+
+Uso:
+    python scripts/migrate_vector_routing.py --to provider_doc_type --dry-run
+    python scripts/migrate_vector_routing.py --to provider_doc_type --delete-source --slim-metadata
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import argparse
+from collections import Counter
+
+from app.core.config import settings
+from app.vectorstore import routing
+from app.vectorstore.backend import (
+    create_index,
+    delete_vectors,
+    fetch_vectors,
+    list_namespaces,
+    list_vector_ids,
+    upsert_vectors,
+)
+from app.vectorstore.chunk_store import chunk_store
+
+# Campos de texto que ya viven en el chunk store
+TEXT_FIELDS = ("text_excerpt", "preview", "length")
+
+
+def migrate_namespace(source: str, namespace: str | None, args) -> Counter:
+    ids = list_vector_ids(source, "", namespace=namespace)
+    print(f"▶ {source}/{namespace or '(default)'}: {len(ids)} vectores")
+
+    tenant = routing.tenant_of(namespace, args.source_mode)
+    moved = Counter()
+    for i in range(0, len(ids), args.batch_size):
+        batch_ids = ids[i:i + args.batch_size]
+        vectors = fetch_vectors(source, batch_ids, namespace=namespace)
+        stored = chunk_store.get_many(batch_ids, tenant) if args.slim_metadata else {}
+
+        groups: dict[routing.Route, list] = {}
+        for vid, v in vectors.items():
+            meta = dict(v["metadata"])
+            if vid in stored:
+                for field in TEXT_FIELDS:
+                    meta.pop(field, None)
+            route = routing.write_route(meta.get("provider"), meta.get("doc_type"), tenant)
+            if route.index == source and (route.namespace or "") == (namespace or "") and vid not in stored:
+                continue     # ya está en su ruta y no cambia la metadata
+            groups.setdefault(route, []).append((vid, v["values"], meta))
+
+        for route, items in groups.items():
+            moved[f"{route.index}/{route.namespace or '(default)'}"] += len(items)
+            if args.dry_run:
+                continue
+            create_index(route.index, dim=len(items[0][1]))
+            upsert_vectors(route.index, items, namespace=route.namespace)
+
+            in_place = route.index == source and (route.namespace or "") == (namespace or "")
+            if args.delete_source and not in_place:
+                delete_vectors(source, [vid for vid, _, _ in items], namespace=namespace)
+
+        print(f"  {min(i + args.batch_size, len(ids))}/{len(ids)}")
+    return moved
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migra vectores a las rutas de VECTOR_ROUTING")
+    parser.add_argument("--source", default=settings.PINECONE_INDEX, help="índice origen")
+    parser.add_argument("--from", dest="source_mode", default="shared", choices=routing.ROUTING_MODES,
+                        help="modo con el que se escribió el origen (para deducir el tenant)")
+    parser.add_argument("--to", default=settings.VECTOR_ROUTING, choices=routing.ROUTING_MODES)
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--delete-source", action="store_true", help="borra del origen lo ya copiado")
+    parser.add_argument("--slim-metadata", action="store_true",
+                        help="quita text_excerpt/preview si el chunk store ya tiene el texto")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    settings.VECTOR_ROUTING = args.to
+    routing.reset_cache()
+
+    namespaces = list_namespaces(args.source) or [""]
+    total = Counter()
+    for namespace in namespaces:
+        if routing.is_doc_namespace(namespace):
+            # vectores por documento: se regeneran con scripts/backfill_doc_vectors.py
+            print(f"⏭ {args.source}/{namespace}: vectores por documento, se omite")
+            continue
+        total.update(migrate_namespace(args.source, namespace or None, args))
+
+    print("\n" + ("Plan (dry-run):" if args.dry_run else "✅ Migrado:"))
+    for target, count in sorted(total.items()):
+        print(f"  {target:<60}{count:>10}")
+    if not total:
+        print("  nada que mover")
+    print(f"\nConfigura VECTOR_ROUTING={args.to} para que ingesta y queries usen las nuevas rutas.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# scripts/snapshot_index.py
+"""
+Exporta / importa snapshots binarios del índice vectorial (ver
+app/vectorstore/snapshot.py) para levantar un entorno sin re-embeber.
+
+Uso:
+    python scripts/snapshot_index.py export --index rag-index --out data/vector_dump --dtype float16
+    python scripts/snapshot_index.py import --dir data/vector_dump --workers 8     # Pinecone
+
+Con VECTOR_BACKEND=local el servicio carga el snapshot al arrancar
+(VECTOR_SNAPSHOT_ON_STARTUP=true); "import" local solo sirve para medir.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+from app.core.config import settings
+from app.vectorstore import snapshot
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Snapshots del índice vectorial")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    exp = sub.add_parser("export", help="índice → snapshot")
+    exp.add_argument("--index", default=settings.PINECONE_INDEX)
+    exp.add_argument("--out", type=Path, default=settings.VECTOR_SNAPSHOT_DIR)
+    exp.add_argument("--dtype", choices=snapshot.DTYPES, default="float32",
+                     help="float16 = mitad de disco; el import local lo pasa a float32 (sin mmap)")
+    exp.add_argument("--metric", default="cosine")
+    exp.add_argument("--batch-size", type=int, default=1000)
+
+    imp = sub.add_parser("import", help="snapshot → backend activo (VECTOR_BACKEND)")
+    imp.add_argument("--dir", type=Path, default=settings.VECTOR_SNAPSHOT_DIR)
+    imp.add_argument("--index", default=None, help="por defecto, el índice del snapshot")
+    imp.add_argument("--no-mmap", action="store_true", help="backend local: upsert en vez de mmap")
+    imp.add_argument("--batch-size", type=int, default=1000)
+    imp.add_argument("--workers", type=int, default=4)
+
+    args = parser.parse_args()
+    t0 = time.perf_counter()
+
+    if args.command == "export":
+        header = snapshot.export_snapshot(args.index, args.out, dtype=args.dtype,
+                                          batch_size=args.batch_size, metric=args.metric)
+        summary = {e["namespace"] or "(default)": e["rows"] for e in header["namespaces"]}
+    else:
+        loaded = snapshot.import_snapshot(args.dir, index_name=args.index, mmap=not args.no_mmap,
+                                          batch_size=args.batch_size, workers=args.workers)
+        summary = {ns or "(default)": rows for ns, rows in loaded.items()}
+
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+    print(f"✅ {args.command} en {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+# tests/conftest.py
+
+"""
+Levanta los stand-ins locales (Pinecone / OpenAI / HF) y apunta la app a
+ellos antes de que los tests importen `app`, para que la suite corra sin
+credenciales ni llamadas a servicios pagos.
+"""
+
+import os
+
+from benchmarks.standins import start_standins, standin_env
+
+_servers = start_standins()
+os.environ.update(standin_env(_servers))
+
+
+def pytest_unconfigure(config):
+    for server in _servers.values():
+        server.stop()
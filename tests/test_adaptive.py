@@ -0,0 +1,91 @@
+# tests/test_adaptive.py
+
+import numpy as np
+
+from app.core.config import settings
+from app.rag import retriever
+from app.rag.adaptive import DepthEstimator, depth_estimator, score_cutoff
+from app.vectorstore import local_store
+from benchmarks.fakes import FakeLLM
+from benchmarks.run import PROVIDER, offline_environment
+
+
+def test_score_cutoff_uses_gap_and_floor():
+    scores = [0.9, 0.88, 0.85, 0.7, 0.6]
+    assert score_cutoff(scores, gap=0.1) == 3
+    assert score_cutoff(scores, gap=0.1, floor=4) == 4
+    assert score_cutoff(scores[:2], gap=0.0, floor=5) == 2
+    assert score_cutoff([], gap=0.1) == 0
+
+
+def test_depth_estimator_learns_and_explores():
+    est = DepthEstimator(explore=0.0, margin=2)
+    key = ("t", "p", None)
+    assert est.depth(key, floor=5, ceiling=50) == 50          # sin datos: techo
+    for _ in range(20):
+        est.observe(key, 8)
+    assert est.depth(key, floor=5, ceiling=50) == 10
+    assert est.depth(key, floor=5, ceiling=9) == 9
+
+    always = DepthEstimator(explore=1.0)
+    for _ in range(20):
+        always.observe(key, 8)
+    assert always.depth(key, floor=5, ceiling=50) == 50
+
+
+def test_depth_estimator_keeps_at_most_max_keys():
+    est = DepthEstimator(explore=0.0, max_keys=2)
+    est.observe(("t", "p", "a"), 3)
+    est.observe(("t", "p", "b"), 3)
+    est.observe(("t", "p", "a"), 3)                            # "a" pasa a ser la más reciente
+    est.observe(("t", "p", "c"), 3)
+    assert list(est._observed) == [("t", "p", "a"), ("t", "p", "c")]
+
+
+def test_adaptive_retrieve_cuts_at_gap_and_requeries_when_short(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "RETRIEVAL_ADAPTIVE", True)
+    monkeypatch.setattr(settings, "RETRIEVAL_SCORE_GAP", 0.05)
+    monkeypatch.setattr(settings, "RETRIEVAL_MIN_DEPTH", 2)
+    monkeypatch.setattr(depth_estimator, "explore", 0.0)
+    depth_estimator.reset()
+
+    query = np.zeros(8, dtype=np.float32)
+    query[0] = 1.0
+    rng = np.random.default_rng(0)
+    # 6 casi idénticos a la query y 20 lejanos
+    close = [query + 0.01 * rng.normal(size=8) for _ in range(6)]
+    far = [rng.normal(size=8) for _ in range(20)]
+    vectors = [v / np.linalg.norm(v) for v in close + far]
+
+    calls = []
+    original = retriever._search
+
+    def counting(route, qvec, pool_k, include_values=False):
+        calls.append(pool_k)
+        return original(route, qvec, pool_k, include_values)
+
+    monkeypatch.setattr(retriever, "_search", counting)
+    with offline_environment(tmp_path, lambda texts, provider=None: [query for _ in texts], FakeLLM()):
+        local_store.create_index("bench-index", dim=8)
+        local_store.upsert_vectors("bench-index", [
+            (f"v{i}", v, {"provider": PROVIDER}) for i, v in enumerate(vectors)
+        ])
+
+        hits = retriever.retrieve("q", top_k=15, provider=PROVIDER)
+        assert {h["id"] for h in hits} == {f"v{i}" for i in range(6)}
+        assert calls == [15]                         # sin historia: pide el techo
+
+        # historia corta (cortes de 2): pide 4, el corte llega al fondo → repite con el techo
+        for _ in range(20):
+            depth_estimator.observe((settings.DEFAULT_TENANT, PROVIDER, None), 2)
+        calls.clear()
+        hits = retriever.retrieve("q2", top_k=15, provider=PROVIDER)
+        assert calls == [4, 15]
+        assert len(hits) == 6
+
+        # doc_type desconocido y sin resultados: no abre claves nuevas
+        keys = set(depth_estimator._observed)
+        assert retriever.retrieve("q3", top_k=15, doc_type="tipo-inventado", provider=PROVIDER) == []
+        assert set(depth_estimator._observed) == keys
+        assert all(key[2] is None for key in keys)
+    depth_estimator.reset()
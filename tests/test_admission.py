@@ -0,0 +1,87 @@
+# tests/test_admission.py
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import admission
+from app.core.admission import AdmissionPool, Overloaded
+from app.core.metrics import ADMISSION_SHED
+from app.main import app
+
+
+def test_queue_then_handoff_then_queue_full():
+    async def scenario():
+        pool = AdmissionPool("t-fifo", max_in_flight=1, max_queue=1, max_wait=5)
+        await pool.acquire()
+        waiting = asyncio.create_task(pool.acquire())
+        await asyncio.sleep(0.01)
+        assert pool.stats()["queued"] == 1
+
+        with pytest.raises(Overloaded) as exc:
+            await pool.acquire()
+        assert exc.value.reason == "queue_full"
+
+        pool.release(0.1)
+        await asyncio.wait_for(waiting, 1)
+        assert pool.stats() == {"in_flight": 1, "queued": 0, "max_in_flight": 1,
+                                "max_queue": 1, "avg_service_seconds": 0.1}
+        pool.release(0.1)
+        assert pool.stats()["in_flight"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_deadline_rejects_on_arrival_and_timeout_while_waiting():
+    async def scenario():
+        pool = AdmissionPool("t-deadline", max_in_flight=1, max_queue=10, max_wait=0.05)
+        await pool.acquire()
+
+        with pytest.raises(Overloaded) as exc:       # sin historial: espera y vence
+            await pool.acquire()
+        assert exc.value.reason == "timeout"
+        assert pool.stats()["queued"] == 0
+
+        pool._service = 8.0                          # 8 s por request → no llega a 0.05 s
+        with pytest.raises(Overloaded) as exc:
+            await pool.acquire()
+        assert exc.value.reason == "deadline"
+        assert exc.value.retry_after == pytest.approx(8.0)
+
+    before = ADMISSION_SHED.value(pool="t-deadline", reason="deadline")
+    asyncio.run(scenario())
+    assert ADMISSION_SHED.value(pool="t-deadline", reason="deadline") == before + 1
+
+
+def test_pool_routing():
+    assert admission.pool_for("POST", "/query/batch").name == "query"
+    assert admission.pool_for("POST", "/ingest/").name == "ingest"
+    assert admission.pool_for("PUT", "/documents/abc").name == "ingest"
+    assert admission.pool_for("GET", "/documents/") is None
+    assert admission.pool_for("GET", "/health") is None
+
+
+def test_saturated_query_pool_returns_503(monkeypatch):
+    pool = AdmissionPool("query", max_in_flight=1, max_queue=0, max_wait=1)
+    monkeypatch.setitem(admission.pools, "query", pool)
+    asyncio.run(pool.acquire())                      # ocupa el único cupo
+
+    client = TestClient(app)
+    resp = client.post("/query/", json={"query": "hola"})
+    assert resp.status_code == 503
+    assert resp.json()["error"] == "overloaded"
+    assert resp.headers["Retry-After"] == "1"
+    assert client.get("/health").json()["admission"]["query"]["in_flight"] == 1
+    pool.release()
+
+
+def test_slot_is_released_after_response(monkeypatch):
+    pool = AdmissionPool("query", max_in_flight=1, max_queue=0, max_wait=1)
+    monkeypatch.setitem(admission.pools, "query", pool)
+
+    client = TestClient(app)
+    for _ in range(3):
+        assert client.post("/query/batch", json={"questions": []}).status_code == 400
+    assert pool.stats()["in_flight"] == 0
+    assert pool.stats()["avg_service_seconds"] is not None
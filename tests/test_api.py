@@ -1,5 +1,6 @@
 # tests/test_api.py
 
+import json
 import os
 import pytest
 from fastapi.testclient import TestClient
@@ -37,4 +38,38 @@ def test_query():
         json={"query": "¿De qué trata el documento?"}
     )
     assert resp.status_code == 200
-    assert "response" in resp.json()
+    assert "answer" in resp.json()
+
+
+def test_unknown_provider_is_rejected_with_422():
+    resp = client.post("/query", json={"query": "hola", "provider": "junk0"})
+    assert resp.status_code == 422
+    resp = client.post("/ingest/", files={"file": ("a.txt", b"hola", "text/plain")},
+                       data={"provider": "junk0"})
+    assert resp.status_code == 422
+
+
+def test_query_batch_streams_ndjson():
+    questions = [
+        {"id": "cuenta-1", "query": "¿De qué trata el documento?"},
+        {"id": "cuenta-2", "query": "¿Cuál es el total de la factura?"},
+        {"id": "cuenta-3", "query": "¿De qué trata el documento?"},
+    ]
+    resp = client.post("/query/batch", json={"questions": questions})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+
+    lines = [json.loads(line) for line in resp.text.splitlines() if line]
+    assert lines[-1]["done"] is True
+    assert lines[-1]["count"] == 3
+
+    answers = lines[:-1]
+    assert sorted(a["index"] for a in answers) == [0, 1, 2]
+    for a in answers:
+        assert a["id"] == questions[a["index"]]["id"]
+        assert "answer" in a
+
+
+def test_query_batch_rejects_empty():
+    resp = client.post("/query/batch", json={"questions": []})
+    assert resp.status_code == 400
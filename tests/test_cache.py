@@ -0,0 +1,50 @@
+# tests/test_cache.py
+
+from app.rag.cache import RetrievalCache
+
+
+def test_invalidate_only_entries_with_deleted_chunks():
+    cache = RetrievalCache(max_entries=10, ttl_seconds=60)
+    cache.put("q1", [{"id": "docA#1"}, {"id": "docB#1"}])
+    cache.put("q2", [{"id": "docB#2"}])
+
+    cache.invalidate(["docA#1"])
+
+    assert cache.get("q1") is None
+    assert cache.get("q2") == [{"id": "docB#2"}]
+
+
+def test_returns_copies_and_evicts_lru():
+    cache = RetrievalCache(max_entries=2, ttl_seconds=60)
+    cache.put("a", [{"id": "1"}])
+    cache.put("b", [{"id": "2"}])
+
+    hits = cache.get("a")
+    hits[0]["_rerank_score"] = 1.0
+    assert cache.get("a") == [{"id": "1"}]
+
+    cache.put("c", [{"id": "3"}])      # "b" es el menos usado
+    assert cache.get("b") is None
+
+
+def test_disabled_with_zero_ttl():
+    cache = RetrievalCache(max_entries=10, ttl_seconds=0)
+    cache.put("a", [{"id": "1"}])
+    assert cache.get("a") is None
+
+
+def test_tenant_partitions_are_isolated():
+    cache = RetrievalCache(max_entries=3, ttl_seconds=60)
+    cache.put("q", [{"id": "1"}], tenant="a")
+    assert cache.get("q", tenant="b") is None
+
+    # el tenant "b" llena la cache: se desaloja de su propia partición
+    cache.put("q", [{"id": "2"}], tenant="b")
+    cache.put("q2", [{"id": "3"}], tenant="b")
+    cache.put("q3", [{"id": "4"}], tenant="b")
+    assert cache.get("q", tenant="a") == [{"id": "1"}]
+    assert cache.get("q", tenant="b") is None
+
+    cache.invalidate(tenant="b")
+    assert cache.get("q2", tenant="b") is None
+    assert cache.get("q", tenant="a") == [{"id": "1"}]
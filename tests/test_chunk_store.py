@@ -0,0 +1,35 @@
+# tests/test_chunk_store.py
+
+from app.rag import retriever
+from app.vectorstore.chunk_store import ChunkStore
+
+
+def test_put_get_delete_in_batches(tmp_path):
+    store = ChunkStore(tmp_path / "chunks.sqlite3")
+    rows = [(f"doc#{i}", "doc", f"texto completo {i} " * 50) for i in range(2000)]
+    store.put_many(rows)
+
+    texts = store.get_many([f"doc#{i}" for i in range(0, 2000, 2)] + ["no-existe"])
+    assert len(texts) == 1000
+    assert texts["doc#10"] == rows[10][2]
+
+    store.put_many([("doc#10", "doc", "nuevo")])
+    store.delete_many([f"doc#{i}" for i in range(1000)])
+    assert store.count() == 1000
+    assert store.get_many(["doc#10", "doc#1500"]) == {"doc#1500": rows[1500][2]}
+    store.close()
+
+
+def test_hydrate_reads_store_and_falls_back_to_excerpt(tmp_path, monkeypatch):
+    store = ChunkStore(tmp_path / "chunks.sqlite3")
+    store.put_many([("a#1", "a", "chunk completo de a")])
+    monkeypatch.setattr(retriever, "chunk_store", store)
+
+    hits = [
+        {"id": "a#1", "score": 0.9, "metadata": {"document_id": "a"}},
+        {"id": "viejo#1", "score": 0.8, "metadata": {"text_excerpt": "excerpt legado"}},
+        {"id": "b#1", "score": 0.7, "metadata": {}, "text": "ya hidratado"},
+    ]
+    retriever.hydrate(hits)
+    assert [h["text"] for h in hits] == ["chunk completo de a", "excerpt legado", "ya hidratado"]
+    store.close()
@@ -0,0 +1,70 @@
+# tests/test_chunker.py
+
+import random
+
+import pytest
+
+from app.utils.chunker import SEPARATORS, chunk_text, chunk_text_with_offsets
+
+WORDS = (
+    "contrato cláusula contratante contratista honorarios factura subtotal iva "
+    "valor total propuesta alcance entregables reunión acuerdos asistentes"
+).split()
+
+
+def _sample_text(seed: int, n_words: int = 3000) -> str:
+    rnd = random.Random(seed)
+    parts = []
+    for _ in range(n_words):
+        parts.append(rnd.choice(WORDS))
+        r = rnd.random()
+        if r < 0.03:
+            parts.append(".\n\n")
+        elif r < 0.07:
+            parts.append("\n")
+        elif r < 0.15:
+            parts.append(". ")
+        elif r < 0.16:
+            parts.append("  ")
+        else:
+            parts.append(" ")
+    # una "palabra" larga sin separadores fuerza el corte por caracteres
+    parts.append("x" * 1200)
+    return "".join(parts)
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("size,overlap", [(500, 100), (800, 150), (120, 0)])
+def test_parity_with_langchain(seed, size, overlap):
+    splitters = pytest.importorskip("langchain_text_splitters")
+    text = _sample_text(seed)
+
+    lc = splitters.RecursiveCharacterTextSplitter(
+        chunk_size=size, chunk_overlap=overlap, separators=SEPARATORS
+    )
+    expected = [c.strip() for c in lc.split_text(text) if c.strip()]
+
+    assert chunk_text(text, chunk_size=size, chunk_overlap=overlap) == expected
+
+
+def test_offsets_point_into_original_text():
+    text = _sample_text(42)
+    chunks = chunk_text_with_offsets(text, chunk_size=300, chunk_overlap=60)
+
+    assert chunks
+    for c in chunks:
+        assert text[c["start"]:c["end"]] == c["text"]
+        assert len(c["text"]) <= 300
+
+
+def test_custom_length_function():
+    text = "uno dos tres cuatro cinco seis siete ocho nueve diez"
+    words = lambda s: len(s.split())
+
+    chunks = chunk_text(text, chunk_size=4, chunk_overlap=0, length_function=words)
+    assert all(words(c) <= 4 for c in chunks)
+    assert " ".join(chunks) == text
+
+
+def test_empty_text():
+    assert chunk_text("") == []
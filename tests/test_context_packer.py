@@ -0,0 +1,77 @@
+# tests/test_context_packer.py
+
+from app.rag.context_packer import merge_adjacent, minhash, pack_context, similarity
+from app.utils.chunker import chunk_text_with_offsets
+
+
+def _hit(doc, index, text, score):
+    return {
+        "id": f"{doc}#{index}",
+        "score": score,
+        "text": text,
+        "metadata": {"document_id": doc, "chunk_index": index, "filename": f"{doc}.txt"},
+    }
+
+
+TEXT = " ".join(f"Cláusula {i}: el proveedor entrega el reporte {i}." for i in range(60))
+
+
+def _chunks(size=300):
+    return [c["text"] for c in chunk_text_with_offsets(TEXT, chunk_size=size, chunk_overlap=int(size * 0.2))]
+
+
+def test_adjacent_chunks_are_merged_without_overlap():
+    chunks = _chunks()
+    hits = [_hit("a", 2, chunks[2], 0.5), _hit("a", 1, chunks[1], 0.9), _hit("a", 3, chunks[3], 0.4)]
+
+    passages = merge_adjacent(hits)
+    assert len(passages) == 1
+    merged = passages[0]["text"]
+    assert merged in TEXT                       # sin texto repetido del traslape
+    assert merged.startswith(chunks[1]) and merged.endswith(chunks[3])
+    assert passages[0]["score"] == 0.9
+    assert [h["metadata"]["chunk_index"] for h in passages[0]["hits"]] == [1, 2, 3]
+
+
+def test_non_adjacent_chunks_stay_separate_and_follow_score():
+    chunks = _chunks()
+    hits = [_hit("a", 1, chunks[1], 0.2), _hit("a", 5, chunks[5], 0.8), _hit("b", 0, "otro texto", 0.5)]
+    passages = merge_adjacent(hits)
+    assert [p["score"] for p in passages] == [0.8, 0.5, 0.2]
+
+
+def test_minhash_detects_near_duplicates():
+    a = minhash(TEXT)
+    b = minhash(TEXT.replace("reporte 7.", "informe 7."))
+    c = minhash("Factura 991 por servicios de consultoría con vencimiento a treinta días.")
+    assert similarity(a, b) > 0.8
+    assert similarity(a, c) < 0.2
+
+
+def test_pack_respects_budget_and_drops_duplicates():
+    chunks = _chunks()
+    count = lambda text: len(text.split())      # 1 token por palabra
+    hits = [
+        _hit("a", 0, chunks[0], 0.9),
+        _hit("copia", 0, chunks[0], 0.8),        # mismo texto en otro documento
+        _hit("a", 6, chunks[6], 0.7),
+        _hit("a", 9, chunks[9], 0.6),
+    ]
+
+    packed = pack_context(hits, budget=120, count_tokens=count, dedup_threshold=0.8)
+    ids = [src["id"] for p in packed for src in p["source_info"]]
+    assert ids == ["a#0", "a#6"]                # la copia se descarta, a#9 ya no cabe
+    assert sum(p["tokens"] for p in packed) <= 120
+    assert all(p["tokens"] == count(p["text"]) for p in packed)
+
+    # sin dedup, la copia entra en su lugar por score
+    packed = pack_context(hits, budget=1000, count_tokens=count, dedup_threshold=0)
+    assert [p["source_info"][0]["id"] for p in packed] == ["a#0", "copia#0", "a#6", "a#9"]
+
+
+def test_last_passage_is_truncated_at_sentence_end():
+    count = lambda text: len(text.split())
+    packed = pack_context([_hit("a", 0, TEXT, 1.0)], budget=100, count_tokens=count)
+    assert len(packed) == 1
+    assert 50 < packed[0]["tokens"] <= 100
+    assert packed[0]["text"].endswith(".") and TEXT.startswith(packed[0]["text"])
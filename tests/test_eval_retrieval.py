@@ -0,0 +1,50 @@
+# tests/test_eval_retrieval.py
+
+import pytest
+
+from benchmarks.eval_retrieval import (
+    bootstrap_from_feedback,
+    ndcg_at_k,
+    pareto_front,
+    ranked_documents,
+    recall_at_k,
+    reciprocal_rank,
+)
+
+
+def test_ranking_metrics_on_deduplicated_documents():
+    hits = [{"id": f"{d}#{i}", "metadata": {"document_id": d}}
+            for i, d in enumerate(["a", "a", "b", "c", "b"])]
+    ranked = ranked_documents(hits)
+    assert ranked == ["a", "b", "c"]
+
+    relevant = {"b", "z"}
+    assert recall_at_k(ranked, relevant, 1) == 0.0
+    assert recall_at_k(ranked, relevant, 3) == 0.5
+    assert reciprocal_rank(ranked, relevant) == 0.5
+    assert ndcg_at_k(["b", "z"], relevant, 2) == pytest.approx(1.0)
+    assert 0 < ndcg_at_k(ranked, relevant, 3) < 1
+
+
+def test_pareto_front_keeps_non_dominated_configs():
+    rows = [
+        {"q": 0.9, "lat": 10.0},
+        {"q": 0.8, "lat": 5.0},
+        {"q": 0.8, "lat": 12.0},    # dominada por ambas
+        {"q": 0.95, "lat": 30.0},
+    ]
+    pareto_front(rows, "q", "lat")
+    assert [r["pareto"] for r in rows] == [True, True, False, True]
+
+
+def test_bootstrap_uses_document_ids_and_skips_incorrect():
+    entries = [
+        {"question": "¿valor del contrato?", "answer": "x", "correct": True, "document_ids": ["d1"]},
+        {"question": "¿valor del contrato?", "answer": "x", "correct": True, "document_ids": ["d1"]},
+        {"question": "otra", "answer": "y", "correct": False, "document_ids": ["d2"]},
+    ]
+    labels = bootstrap_from_feedback(entries)
+    assert labels == [{
+        "question": "¿valor del contrato?", "relevant": ["d1"], "doc_type": None,
+        "provider": None, "label_source": "feedback"
+    }]
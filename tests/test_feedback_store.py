@@ -0,0 +1,110 @@
+# tests/test_feedback_store.py
+
+import asyncio
+import json
+import threading
+import time
+
+from app.core.feedback_store import FeedbackStore
+
+
+def _entry(i, doc_type="contrato", provider="openai"):
+    return {"question": f"q{i}", "answer": "a", "correct": i % 2 == 0,
+            "doc_type": doc_type, "provider": provider}
+
+
+def test_concurrent_appends_are_not_lost(tmp_path):
+    store = FeedbackStore(tmp_path / "fb.jsonl", max_bytes=10**9, flush_interval=0.01)
+
+    def worker(offset):
+        for i in range(200):
+            store.append(_entry(offset + i))
+
+    threads = [threading.Thread(target=worker, args=(k * 1000,)) for k in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    store.close()
+
+    lines = (tmp_path / "fb.jsonl").read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 1000
+    assert store.stats()["total"] == 1000
+
+
+def test_rotation_and_stats_survive_restart(tmp_path):
+    path = tmp_path / "fb.jsonl"
+    store = FeedbackStore(path, max_bytes=500, flush_interval=0.01)
+    for i in range(20):
+        store.append(_entry(i, doc_type="factura" if i < 10 else "contrato"))
+        store.flush()
+    store.close()
+
+    assert list(tmp_path.glob("fb.*.jsonl"))
+
+    reopened = FeedbackStore(path, max_bytes=500)
+    stats = reopened.stats()
+    assert stats["total"] == 20
+    assert stats["por_doc_type"]["factura"] == {"total": 10, "correct": 5, "accuracy": 0.5}
+    assert len(list(reopened.iter_entries())) == 20
+    reopened.close()
+
+
+def test_stats_are_per_tenant(tmp_path):
+    path = tmp_path / "fb.jsonl"
+    store = FeedbackStore(path, max_bytes=10**9, flush_interval=0.01)
+    store.append(_entry(0))                                  # sin tenant → tenant por defecto
+    store.append({**_entry(1), "tenant": "acme"})
+    store.append({**_entry(2), "tenant": "acme"})
+    assert store.stats()["total"] == 1
+    assert store.stats("acme")["total"] == 2
+    assert store.stats("otro")["total"] == 0
+    store.close()
+
+    reopened = FeedbackStore(path, max_bytes=10**9)         # el historial se re-cuenta por tenant
+    assert reopened.stats("acme") == store.stats("acme")
+    assert reopened.stats()["total"] == 1
+    reopened.close()
+
+
+def test_migrates_legacy_json(tmp_path):
+    legacy = tmp_path / "feedback_log.json"
+    legacy.write_text(json.dumps([_entry(0), _entry(1)]), encoding="utf-8")
+
+    store = FeedbackStore(tmp_path / "fb.jsonl", max_bytes=10**9, legacy_path=legacy)
+    assert store.stats()["total"] == 2
+    assert not legacy.exists()
+    store.close()
+
+
+def test_feedback_endpoint_does_not_block_event_loop(monkeypatch):
+    from app.api import feedback
+
+    class SlowStore:
+        def append(self, entry):
+            pass
+
+        def stats(self, tenant=None):
+            time.sleep(0.3)                     # historial cargándose
+            return {"total": 7}
+
+    monkeypatch.setattr(feedback, "feedback_store", SlowStore())
+    data = feedback.Feedback(question="q", answer="a", correct=True)
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        result = await feedback.save_feedback(data, tenant="default")
+        task.cancel()
+        return result, ticks
+
+    result, ticks = asyncio.run(scenario())
+    assert result == {"status": "feedback_saved", "count": 7}
+    assert ticks >= 10
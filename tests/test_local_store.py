@@ -0,0 +1,87 @@
+# tests/test_local_store.py
+
+import numpy as np
+import pytest
+
+from app.vectorstore.local_store import LocalIndex
+
+
+def _vec(*values):
+    return np.asarray(values, dtype=np.float32)
+
+
+def test_query_orders_by_cosine_and_filters():
+    index = LocalIndex(dim=3)
+    index.upsert([
+        ("a", _vec(1, 0, 0), {"doc_type": "contrato", "provider": "openai"}),
+        ("b", _vec(0.9, 0.1, 0), {"doc_type": "factura", "provider": "openai"}),
+        ("c", _vec(0, 1, 0), {"doc_type": "contrato", "provider": "hf"}),
+    ])
+
+    res = index.query(_vec(1, 0, 0), top_k=2)
+    assert [m["id"] for m in res["matches"]] == ["a", "b"]
+    assert res["matches"][0]["score"] > 0.99
+
+    res = index.query(_vec(1, 0, 0), top_k=5, filter={"doc_type": {"$eq": "contrato"}})
+    assert [m["id"] for m in res["matches"]] == ["a", "c"]
+
+    res = index.query(_vec(1, 0, 0), top_k=5,
+                      filter={"provider": {"$in": ["hf"]}, "doc_type": {"$eq": "contrato"}})
+    assert [m["id"] for m in res["matches"]] == ["c"]
+
+
+def test_upsert_update_delete_keep_postings_consistent():
+    index = LocalIndex(dim=2)
+    index.upsert([("doc#1", _vec(1, 0), {"doc_type": "contrato"}),
+                  ("doc#2", _vec(0, 1), {"doc_type": "contrato"})])
+
+    index.update("doc#1", {"doc_type": "factura"})
+    ids = [m["id"] for m in index.query(_vec(1, 0), filter={"doc_type": "contrato"})["matches"]]
+    assert ids == ["doc#2"]
+
+    index.delete(["doc#2"])
+    assert len(index) == 1
+    assert index.query(_vec(0, 1), filter={"doc_type": "contrato"})["matches"] == []
+
+    # la fila liberada se reutiliza
+    index.upsert([("doc#3", _vec(0, 1), {"doc_type": "correo"})])
+    assert len(index.ids) == 2
+    assert list(index.list(prefix="doc#")) == [["doc#1", "doc#3"]]
+    assert index.fetch(["doc#3"])["doc#3"]["metadata"] == {"doc_type": "correo"}
+
+
+def test_dimension_mismatch_raises():
+    index = LocalIndex(dim=3)
+    with pytest.raises(ValueError):
+        index.upsert([("x", [1.0, 0.0], {})])
+
+
+@pytest.mark.parametrize("quantization", ["int8", "binary"])
+def test_quantized_two_phase_search_matches_exact_top1(quantization):
+    rng = np.random.default_rng(0)
+    data = rng.normal(size=(500, 64)).astype(np.float32)
+    exact = LocalIndex(dim=64)
+    quant = LocalIndex(dim=64, quantization=quantization, rescore_factor=10)
+    items = [(f"v{i}", data[i], {}) for i in range(len(data))]
+    exact.upsert(items)
+    quant.upsert(items)
+
+    for i in range(0, 500, 50):
+        q = data[i] + rng.normal(scale=0.05, size=64).astype(np.float32)
+        e = exact.query(q, top_k=5)["matches"]
+        a = quant.query(q, top_k=5)["matches"]
+        assert a[0]["id"] == e[0]["id"] == f"v{i}"
+        # el re-score en float32 devuelve los mismos scores exactos
+        assert a[0]["score"] == pytest.approx(e[0]["score"], abs=1e-5)
+
+    assert quant.memory_bytes()["codes"] < exact.memory_bytes()["float"]
+
+
+def test_int8_without_float_tier_uses_approximate_scores():
+    index = LocalIndex(dim=3, quantization="int8", keep_float=False)
+    index.upsert([("a", _vec(1, 0, 0), {}), ("b", _vec(0, 1, 0), {})])
+
+    assert index.memory_bytes()["float"] == 0
+    res = index.query(_vec(1, 0.1, 0), top_k=1, include_values=True)
+    assert res["matches"][0]["id"] == "a"
+    assert res["matches"][0]["values"] == pytest.approx([1, 0, 0], abs=0.01)
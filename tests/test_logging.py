@@ -0,0 +1,97 @@
+# tests/test_logging.py
+
+import io
+import json
+import logging
+
+from fastapi.testclient import TestClient
+
+from app.core import logger as log
+from app.core.metrics import LOG_DROPPED
+from app.main import app
+
+
+def _capture(name: str, use_async: bool = True, sampling=None, rate_limits=None):
+    stream = io.StringIO()
+    sink = logging.StreamHandler(stream)
+    sink.setFormatter(log.JsonFormatter())
+    if use_async:
+        handlers, listener = log.build_handlers(log_file=None, console=False,
+                                                sampling=sampling, rate_limits=rate_limits)
+        listener.handlers = (sink,)
+        listener.start()
+    else:
+        for f in log.build_filters(sampling, rate_limits):
+            sink.addFilter(f)
+        handlers, listener = [sink], None
+
+    lg = logging.getLogger(name)
+    lg.handlers = handlers
+    lg.setLevel(logging.DEBUG)
+    lg.propagate = False
+    return lg, listener, stream
+
+
+def _lines(stream) -> list[dict]:
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_json_lines_carry_request_id_and_extras():
+    lg, listener, stream = _capture("rag_service_test_json")
+    token = log.bind_request_id("req-123")
+    try:
+        lg.info("hola %s", "mundo", extra={"tenant": "acme"})
+    finally:
+        log.reset_request_id(token)
+    listener.stop()
+
+    [line] = _lines(stream)
+    assert line["msg"] == "hola mundo"
+    assert line["request_id"] == "req-123"
+    assert line["tenant"] == "acme"
+    assert line["level"] == "INFO"
+
+
+def test_sampling_and_rate_limit_per_category():
+    lg, _, stream = _capture("rag_service.ratetest", use_async=False,
+                             sampling={"ratetest": 1.0, "muted": 0.0}, rate_limits={"ratetest": 3})
+    muted = logging.getLogger("rag_service.muted")
+    muted.handlers, muted.propagate = lg.handlers, False
+
+    before = LOG_DROPPED.value(category="ratetest", reason="rate_limited")
+    for i in range(10):
+        lg.info("llamada %d", i)
+        muted.info("muestreado %d", i)
+    lg.warning("siempre pasa")
+
+    lines = _lines(stream)
+    assert [l["msg"] for l in lines] == ["llamada 0", "llamada 1", "llamada 2", "siempre pasa"]
+    assert LOG_DROPPED.value(category="ratetest", reason="rate_limited") == before + 7
+    assert LOG_DROPPED.value(category="muted", reason="sampled") >= 10
+
+
+def test_parse_rates():
+    assert log.parse_rates(" embeddings=0.1, llm=20 ") == {"embeddings": 0.1, "llm": 20.0}
+    assert log.parse_rates("") == {}
+    assert log.category_of("rag_service.embeddings") == "embeddings"
+    assert log.category_of("rag_service") == "service"
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handlers, listener = log.build_handlers(log_file=None, console=False, queue_size=2)
+    lg = logging.getLogger("rag_service.test_queue")
+    lg.handlers = handlers
+    lg.propagate = False
+    before = LOG_DROPPED.value(category="test_queue", reason="queue_full")
+    for i in range(5):                       # listener sin arrancar: nadie consume
+        lg.warning("mensaje %d", i)
+    assert LOG_DROPPED.value(category="test_queue", reason="queue_full") == before + 3
+    assert handlers[0].queue.qsize() == 2
+
+
+def test_request_id_header_is_echoed():
+    client = TestClient(app)
+    resp = client.get("/health", headers={"X-Request-Id": "abc-1"})
+    assert resp.headers["X-Request-Id"] == "abc-1"
+    resp = client.get("/health")
+    assert resp.headers["X-Request-Id"] == resp.headers["X-Trace-Id"]
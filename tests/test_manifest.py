@@ -0,0 +1,36 @@
+# tests/test_manifest.py
+
+import json
+
+from app.vectorstore.manifest import DocumentManifest
+
+
+def test_put_get_list_remove_and_visible_to_other_instances(tmp_path):
+    path = tmp_path / "manifest.sqlite3"
+    a, b = DocumentManifest(path), DocumentManifest(path)       # dos procesos / workers
+
+    a.put("doc1", {"chunk_ids": ["doc1#x", "doc1#y"], "summary": "resumen", "doc_type": "contrato"})
+    a.put("doc2", {"chunk_ids": ["doc2#z"], "doc_type": "factura"}, tenant="acme")
+
+    entry = b.get("doc1")
+    assert entry["chunk_ids"] == ["doc1#x", "doc1#y"] and entry["summary"] == "resumen"
+    assert [e["document_id"] for e in b.list()] == ["doc1"]
+    assert "chunk_ids" not in b.list()[0] and "summary" not in b.list()[0]
+    assert [e["document_id"] for e in b.list("acme")] == ["doc2"]
+
+    assert a.remove("doc1")["doc_type"] == "contrato"
+    assert b.get("doc1") is None and a.remove("doc1") is None
+
+
+def test_legacy_json_manifest_is_imported_once(tmp_path):
+    (tmp_path / "manifest.json").write_text(json.dumps({
+        "viejo": {"document_id": "viejo", "chunk_ids": ["viejo#1"], "doc_type": "email"},
+        "acme:nuevo": {"document_id": "nuevo", "tenant": "acme", "chunk_ids": []},
+    }), encoding="utf-8")
+
+    m = DocumentManifest(tmp_path / "manifest.sqlite3")
+    assert m.get("viejo")["chunk_ids"] == ["viejo#1"]
+    assert m.get("nuevo", "acme") is not None
+    m.remove("viejo")
+    m.close()
+    assert DocumentManifest(tmp_path / "manifest.sqlite3").get("viejo") is None
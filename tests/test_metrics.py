@@ -0,0 +1,71 @@
+# tests/test_metrics.py
+
+from app.core.metrics import (
+    PROVIDER_LABELS, REGISTRY, STAGE_LATENCY, Counter, Histogram, Registry, StageTimer, bounded, stage,
+)
+
+
+def test_histogram_render_is_cumulative():
+    registry = Registry()
+    h = Histogram("t_seconds", "test", ["stage"], buckets=(0.1, 1.0), registry=registry)
+    h.observe(0.05, stage="a")
+    h.observe(0.5, stage="a")
+    h.observe(5.0, stage="a")
+
+    text = registry.render()
+    assert 't_seconds_bucket{stage="a",le="0.1"} 1' in text
+    assert 't_seconds_bucket{stage="a",le="1.0"} 2' in text
+    assert 't_seconds_bucket{stage="a",le="+Inf"} 3' in text
+    assert 't_seconds_count{stage="a"} 3' in text
+
+
+def test_counter_labels():
+    registry = Registry()
+    c = Counter("t_total", "test", ["kind"], registry=registry)
+    c.inc(kind="llm")
+    c.inc(2, kind="llm")
+    assert c.value(kind="llm") == 3
+    assert 't_total{kind="llm"} 3.0' in registry.render()
+
+
+def test_stage_timer_collects_nested_calls():
+    stage("fuera_de_timer")   # no-op sin timer activo
+
+    with StageTimer("test") as timer:
+        with stage("embed"):
+            pass
+        with stage("embed"):
+            pass
+
+    assert set(timer.durations) == {"embed"}
+    before = STAGE_LATENCY.count(pipeline="test", stage="embed", provider="hf", doc_type="factura")
+    timer.observe(provider="hf", doc_type="factura")
+    assert STAGE_LATENCY.count(pipeline="test", stage="embed", provider="hf", doc_type="factura") == before + 1
+
+
+def test_request_labels_outside_vocabulary_are_other():
+    assert bounded("openai", PROVIDER_LABELS, "default") == "openai"
+    assert bounded(None, PROVIDER_LABELS, "default") == "default"
+    assert bounded("junk0", PROVIDER_LABELS, "default") == "other"
+
+    with StageTimer("test") as timer:
+        with stage("embed"):
+            pass
+    timer.observe(provider="junk1", doc_type="tipo-inventado")
+    assert STAGE_LATENCY.count(pipeline="test", stage="embed", provider="other", doc_type="other") >= 1
+    assert "junk1" not in REGISTRY.render() and "tipo-inventado" not in REGISTRY.render()
+
+
+def test_unknown_paths_share_one_endpoint_label():
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    client = TestClient(app)
+    for path in ("/wp-admin", "/a8f3c2e1", "/health"):
+        client.get(path)
+
+    text = client.get("/metrics").text
+    assert 'endpoint="other"' in text
+    assert 'endpoint="/health"' in text
+    assert "wp-admin" not in text and "a8f3c2e1" not in text
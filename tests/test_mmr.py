@@ -0,0 +1,57 @@
+# tests/test_mmr.py
+
+import numpy as np
+
+from app.rag import retriever
+from app.rag.mmr import mmr
+from app.vectorstore import local_store
+from benchmarks.fakes import FakeEmbedder, FakeLLM
+from benchmarks.run import PROVIDER, offline_environment
+
+
+def _unit(v):
+    v = np.asarray(v, dtype=np.float32)
+    return v / np.linalg.norm(v)
+
+
+def test_mmr_skips_near_duplicates():
+    query = _unit([1, 0, 0])
+    dup = _unit([0.9, 0.3, 0])
+    candidates = [dup, dup + 0.001, dup - 0.001, _unit([0.7, 0, 0.7])]
+
+    assert set(mmr(query, candidates, 2, lambda_=1.0)) <= {0, 1, 2}
+    picked = mmr(query, candidates, 2, lambda_=0.5)
+    assert picked[0] in (0, 1, 2) and picked[1] == 3
+
+
+def test_mmr_lambda_one_is_relevance_order():
+    rng = np.random.default_rng(0)
+    query = rng.normal(size=16)
+    candidates = rng.normal(size=(30, 16))
+    sims = (candidates / np.linalg.norm(candidates, axis=1, keepdims=True)) @ _unit(query)
+    assert mmr(query, candidates, 10, lambda_=1.0) == list(np.argsort(-sims)[:10])
+    assert len(set(mmr(query, candidates, 50, lambda_=0.3))) == 30
+
+
+def test_retrieve_diversifies_pool(tmp_path):
+    embed = FakeEmbedder(dim=64)
+    with offline_environment(tmp_path, embed, FakeLLM()):
+        local_store.create_index("bench-index", dim=64)
+        clause = "El proveedor pagará una multa del diez por ciento por cada día de retraso"
+        texts = [f"{clause} {'.' * i}" for i in range(8)] + [
+            "Multa por retraso en la entrega del informe trimestral de ventas",
+            "Retraso en el pago de la factura genera intereses de mora",
+        ]
+        vectors = embed(texts)
+        local_store.upsert_vectors("bench-index", [
+            (f"c{i}", vectors[i], {"document_id": "doc" if i < 8 else f"otro{i}", "chunk_index": i, "provider": PROVIDER})
+            for i in range(len(texts))
+        ])
+
+        query = "multa por retraso del proveedor"
+        plain = retriever.retrieve(query, top_k=3, provider=PROVIDER, mmr_lambda=1.0)
+        diverse = retriever.retrieve(query, top_k=3, provider=PROVIDER, mmr_lambda=0.5)
+
+    assert {h["metadata"]["document_id"] for h in plain} == {"doc"}
+    assert len({h["metadata"]["document_id"] for h in diverse}) == 3
+    assert all("values" not in h for h in diverse)
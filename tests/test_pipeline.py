@@ -0,0 +1,20 @@
+# tests/test_pipeline.py
+
+from app.rag import ingestion, pipeline
+from benchmarks.fakes import FakeEmbedder, FakeLLM
+from benchmarks.run import PROVIDER, offline_environment
+
+
+def test_sources_keep_excerpt_and_preview(tmp_path):
+    text = "Contrato de servicios. El contratista cobra honorarios mensuales por el soporte. " * 3
+    with offline_environment(tmp_path, FakeEmbedder(dim=64), FakeLLM()):
+        path = tmp_path / "contrato.txt"
+        path.write_text(text, encoding="utf-8")
+        ingestion.ingest_file_to_pinecone(str(path), provider=PROVIDER, document_id="c1")
+        result = pipeline.answer_question("honorarios", top_k=3, provider=PROVIDER)
+
+    assert result["sources"]
+    for source in result["sources"]:
+        assert source["document_id"] == "c1"
+        assert source["text_excerpt"] and source["preview"] in text
+        assert source["length"] >= len(source["text_excerpt"])
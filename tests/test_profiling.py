@@ -0,0 +1,39 @@
+# tests/test_profiling.py
+
+import time
+
+import pytest
+
+from app.core import profiling
+from app.core.profiling import RequestProfiler
+from app.core.scheduler import FairScheduler
+
+
+def trabajo_del_worker(seconds: float = 0.15) -> int:
+    end, n = time.perf_counter() + seconds, 0
+    while time.perf_counter() < end:
+        n += 1
+    return n
+
+
+@pytest.fixture
+def sched(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", tmp_path)
+    return FairScheduler(workers=2)
+
+
+@pytest.mark.parametrize("mode,suffix", [("cprofile", ".txt"), ("sample", ".collapsed")])
+def test_request_profile_covers_scheduled_jobs(sched, mode, suffix):
+    with RequestProfiler("query", mode) as prof:
+        assert sched.submit("a", "query", trabajo_del_worker).result(timeout=5) > 0
+
+    report = prof.path.with_suffix(suffix).read_text(encoding="utf-8")
+    assert "trabajo_del_worker" in report
+
+
+def test_jobs_outside_a_profiled_request_are_not_measured(sched):
+    with RequestProfiler("otro", "cprofile") as prof:
+        pass
+    sched.submit("a", "query", trabajo_del_worker, 0.01).result(timeout=5)
+    assert prof._workers == []
+    assert profiling._current.get() is None
@@ -0,0 +1,82 @@
+# tests/test_projection.py
+
+import os
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.rag import projection
+from app.rag.projection import PCAProjection, reduce_dimensions
+
+
+def _low_rank(n=300, full=64, rank=8, seed=0):
+    rng = np.random.default_rng(seed)
+    return (rng.normal(size=(n, rank)) @ rng.normal(size=(rank, full))).astype(np.float32)
+
+
+def test_pca_keeps_neighbours_and_roundtrips(tmp_path):
+    x = _low_rank()
+    proj = PCAProjection.fit(x, 16, model="m")
+    assert proj.explained_variance > 0.99
+
+    path = tmp_path / "p.npz"
+    proj.save(path)
+    loaded = PCAProjection.load(path)
+    y = loaded.transform(x)
+    assert y.shape == (300, 16)
+    assert np.allclose(np.linalg.norm(y, axis=1), 1.0, atol=1e-5)
+
+    # el vecino más cercano (coseno) se conserva
+    xc = x / np.linalg.norm(x, axis=1, keepdims=True)
+    full_nn = np.argsort(-(xc @ xc[0]))[1]
+    red_nn = np.argsort(-(y @ y[0]))[1]
+    assert full_nn == red_nn
+
+
+def test_fit_needs_enough_samples():
+    with pytest.raises(ValueError):
+        PCAProjection.fit(np.ones((10, 64), dtype=np.float32), 32)
+
+
+def test_reduce_uses_saved_projection_or_truncates(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "EMB_PROJECTION_DIR", tmp_path)
+    projection.invalidate_cache()
+    x = _low_rank()
+
+    truncated = reduce_dimensions(x, "modelo/x", 16)
+    expected = x[:, :16] / np.linalg.norm(x[:, :16], axis=1, keepdims=True)
+    assert np.allclose(truncated, expected, atol=1e-6)
+
+    PCAProjection.fit(x, 16, model="modelo/x").save(projection.projection_path("modelo/x", 16))
+    projection.invalidate_cache()
+    reduced = reduce_dimensions(x, "modelo/x", 16)
+    assert not np.allclose(reduced, expected)
+    assert reduce_dimensions(x, "modelo/x", None).shape == (300, 64)
+    projection.invalidate_cache()
+
+
+def test_projection_is_reloaded_and_salts_the_space(tmp_path, monkeypatch):
+    from app.rag.embeddings import embedding_space
+
+    monkeypatch.setattr(settings, "EMB_PROJECTION_DIR", tmp_path)
+    monkeypatch.setattr(settings, "EMB_DIMENSIONS", 16)
+    monkeypatch.setattr(settings, "EMB_MODEL", "modelo/y")
+    projection.invalidate_cache()
+    x = _low_rank()
+
+    # sin PCA: se trunca y el miss NO queda cacheado para siempre
+    assert embedding_space("sentence_transformers") == "sentence_transformers@16/truncate"
+    assert embedding_space("openai") == "openai@16"
+
+    path = projection.projection_path("modelo/y", 16)
+    PCAProjection.fit(x, 16, model="modelo/y").save(path)     # otro proceso ajusta la PCA
+    first = embedding_space("sentence_transformers")
+    assert first.startswith("sentence_transformers@16/pca:")
+    assert not np.allclose(reduce_dimensions(x, "modelo/y", 16),
+                           x[:, :16] / np.linalg.norm(x[:, :16], axis=1, keepdims=True))
+
+    PCAProjection.fit(x[::-1] * 2, 16, model="modelo/y").save(path)
+    os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 1_000_000))
+    assert embedding_space("sentence_transformers") not in (first, "sentence_transformers@16/truncate")
+    projection.invalidate_cache()
@@ -0,0 +1,148 @@
+# tests/test_resilience.py
+
+import threading
+import time
+
+import pytest
+
+from app.core import resilience
+from app.core.config import settings
+from app.core.metrics import BREAKER_REJECTED, BREAKER_TRIPS, PROVIDER_HEDGES, PROVIDER_REROUTES
+from app.core.resilience import CircuitBreaker, ProviderUnavailable, resilient_call
+
+
+@pytest.fixture(autouse=True)
+def fresh_breakers(monkeypatch):
+    monkeypatch.setattr(settings, "BREAKER_FAILURE_THRESHOLD", 2)
+    monkeypatch.setattr(settings, "BREAKER_RESET_SECONDS", 60.0)
+    monkeypatch.setattr(settings, "HEDGE_ENABLED", True)
+    monkeypatch.setattr(settings, "HEDGE_DEFAULT_DELAY", 0.05)
+    resilience.reset()
+    yield
+    resilience.reset()
+
+
+def _fail():
+    raise RuntimeError("boom")
+
+
+def test_breaker_trips_half_opens_and_closes(monkeypatch):
+    b = CircuitBreaker("t", "p", failure_threshold=2, reset_timeout=10.0)
+    b.record_failure()
+    assert b.allow()
+    b.record_failure()
+    assert b.state == "open" and not b.allow()
+
+    now = time.monotonic()
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: now + 11)
+    assert b.allow()            # una sola llamada de prueba
+    assert not b.allow()
+    b.record_failure()
+    assert b.state == "open"
+
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: now + 30)
+    assert b.allow()
+    b.record_success(0.1)
+    assert b.state == "closed" and b.allow()
+
+
+def test_hedge_fires_after_delay_and_first_success_wins():
+    release = threading.Event()
+
+    def slow():
+        release.wait(2)
+        return "slow"
+
+    before = PROVIDER_HEDGES.value(kind="test_hedge", provider="b")
+    t0 = time.perf_counter()
+    result = resilient_call("test_hedge", [("a", slow), ("b", lambda: "fast")], timeout=2)
+    elapsed = time.perf_counter() - t0
+    release.set()
+
+    assert result == "fast"
+    assert 0.04 <= elapsed < 1.0
+    assert PROVIDER_HEDGES.value(kind="test_hedge", provider="b") == before + 1
+
+
+def test_no_hedge_when_primary_is_fast():
+    calls = []
+    result = resilient_call("test_fast", [("a", lambda: calls.append("a") or "ok"),
+                                          ("b", lambda: calls.append("b") or "no")])
+    assert result == "ok" and calls == ["a"]
+
+
+def test_open_circuit_reroutes_then_fast_fails():
+    trips = BREAKER_TRIPS.value(kind="test_open", provider="a")
+    for _ in range(2):
+        assert resilient_call("test_open", [("a", _fail), ("b", lambda: "b")]) == "b"
+    assert BREAKER_TRIPS.value(kind="test_open", provider="a") == trips + 1
+    assert resilience.breaker("test_open", "a").state == "open"
+
+    reroutes = PROVIDER_REROUTES.value(kind="test_open", source="a", target="b", reason="open")
+    assert resilient_call("test_open", [("a", _fail), ("b", lambda: "b")]) == "b"
+    assert PROVIDER_REROUTES.value(kind="test_open", source="a", target="b", reason="open") == reroutes + 1
+
+    rejected = BREAKER_REJECTED.value(kind="test_open", provider="a")
+    t0 = time.perf_counter()
+    with pytest.raises(ProviderUnavailable):
+        resilient_call("test_open", [("a", lambda: time.sleep(1)), ("a", lambda: time.sleep(1))])
+    assert time.perf_counter() - t0 < 0.1
+    assert BREAKER_REJECTED.value(kind="test_open", provider="a") == rejected + 2
+
+
+def test_generate_answer_falls_back_when_llm_is_down(monkeypatch):
+    from app.rag import llm_router
+
+    monkeypatch.setattr(llm_router, "_call_chat", lambda provider, prompt: _fail())
+    for _ in range(3):
+        answer = llm_router.generate_answer("hola", provider="openai")
+        assert answer.startswith("⚠️")
+    assert resilience.health()["llm/openai"]["state"] == "open"
+
+
+def test_large_embedding_batches_use_own_breaker_without_hedge(monkeypatch):
+    from app.rag import embeddings
+
+    monkeypatch.setattr(settings, "EMB_HEDGE_MAX_TEXTS", 2)
+    monkeypatch.setattr(settings, "EMB_TIMEOUT", 0.01)
+    monkeypatch.setattr(settings, "EMB_TIMEOUT_PER_TEXT", 0.1)
+    calls, timeouts = [], []
+
+    def slow(texts, timeout):
+        calls.append(len(texts))
+        timeouts.append(timeout)
+        time.sleep(0.2)                       # > HEDGE_DEFAULT_DELAY y > EMB_TIMEOUT
+        return [[0.0]] * len(texts)
+
+    hedges = PROVIDER_HEDGES.value(kind="embedding_batch", provider="hf")
+    assert len(embeddings._remote_embed("hf", slow, ["t"] * 5)) == 5
+    assert calls == [5]                                       # sin copia del lote
+    assert timeouts == [pytest.approx(0.51)]                  # plazo escalado
+    assert PROVIDER_HEDGES.value(kind="embedding_batch", provider="hf") == hedges
+    assert "embedding/hf" not in resilience.health()          # no toca el breaker de queries
+    assert resilience.health()["embedding_batch/hf"]["calls"] == 1
+
+
+def test_openai_embeddings_use_a_client_per_call_timeout(monkeypatch):
+    import openai
+
+    from app.rag import embeddings
+
+    seen = []
+
+    class FakeClient:
+        def __init__(self, api_key=None, base_url=None, timeout=None):
+            seen.append(timeout)
+            self.embeddings = self
+
+        def create(self, model, input, **kwargs):
+            return type("R", (), {"data": [type("E", (), {"embedding": [0.0]})() for _ in input]})()
+
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", "sk-test")
+    monkeypatch.setattr(openai, "OpenAI", FakeClient)
+    global_timeout = getattr(openai, "timeout", None)
+
+    embeddings._openai_embed(["a"], 3.0)
+    embeddings._openai_embed(["a"] * 50, 120.0)
+    assert seen == [3.0, 120.0]
+    assert getattr(openai, "timeout", None) == global_timeout
@@ -0,0 +1,147 @@
+# tests/test_routing.py
+
+from pathlib import Path
+
+import pytest
+
+from app.core.config import settings
+from app.rag import ingestion, retriever
+from app.vectorstore import local_store, routing
+from benchmarks.fakes import FakeEmbedder, FakeLLM
+from benchmarks.run import offline_environment
+
+
+@pytest.fixture
+def routed(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "VECTOR_ROUTING", "provider_doc_type")
+    routing.reset_cache()
+    with offline_environment(tmp_path, FakeEmbedder(dim=64), FakeLLM()):
+        yield tmp_path
+    for name in [n for n in local_store._indexes if n.startswith("bench-index")]:
+        local_store._indexes.pop(name)
+    routing.reset_cache()
+
+
+def test_query_routes_per_mode(monkeypatch):
+    monkeypatch.setattr(settings, "PINECONE_INDEX", "rag")
+    monkeypatch.setattr(settings, "VECTOR_ROUTING", "shared")
+    assert routing.query_routes("hf", "contrato") == [
+        routing.Route("rag", None, {"provider": {"$eq": "hf"}, "doc_type": {"$eq": "contrato"}})
+    ]
+
+    monkeypatch.setattr(settings, "VECTOR_ROUTING", "provider")
+    assert routing.query_routes("sentence_transformers", None) == [
+        routing.Route("rag-sentence-transformers", None, None)
+    ]
+
+    monkeypatch.setattr(settings, "VECTOR_ROUTING", "provider_doc_type")
+    assert routing.query_routes("openai", "factura") == [routing.Route("rag-openai", "factura", None)]
+
+
+def _write(path: Path, text: str) -> str:
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def test_ingest_and_retrieve_by_namespace(routed):
+    contrato = _write(routed / "a.txt", "Contrato de servicios. El contratista cobra honorarios mensuales.")
+    factura = _write(routed / "b.txt", "Factura número 12. Subtotal, IVA y valor total a pagar.")
+    ingestion.ingest_file_to_pinecone(contrato, provider="sentence_transformers", document_id="a")
+    ingestion.ingest_file_to_pinecone(factura, provider="sentence_transformers", document_id="b")
+
+    index = "bench-index-sentence-transformers"
+    # chunks por doc_type + un namespace hermano con el vector de cada documento
+    assert sorted(local_store.list_namespaces(index)) == ["contrato", "contrato__docs", "factura", "factura__docs"]
+    assert routing.query_routes("sentence_transformers", None) == [
+        routing.Route(index, "contrato", None), routing.Route(index, "factura", None)
+    ]
+
+    only = retriever.retrieve("honorarios", top_k=5, doc_type="contrato", provider="sentence_transformers")
+    assert {h["metadata"]["document_id"] for h in only} == {"a"}
+
+    both = retriever.retrieve("valor total", top_k=5, provider="sentence_transformers")
+    assert {h["metadata"]["document_id"] for h in both} == {"a", "b"}
+
+    # mismo document_id, ahora detectado como factura: los vectores cambian de namespace
+    _write(routed / "a.txt", "Factura de honorarios. Subtotal e IVA del contrato.")
+    ingestion.ingest_file_to_pinecone(contrato, provider="sentence_transformers", document_id="a")
+    assert local_store.list_vector_ids(index, "a#", namespace="contrato") == []
+    assert local_store.list_vector_ids(index, "a#", namespace="factura")
+    assert local_store.list_vector_ids(index, "a", namespace="contrato__docs") == []
+    assert local_store.list_vector_ids(index, "a", namespace="factura__docs") == ["a"]
+
+    ingestion.delete_document("a")
+    assert local_store.list_vector_ids(index, "a#", namespace="factura") == []
+    assert local_store.list_vector_ids(index, "a", namespace="factura__docs") == []
+
+
+def test_tenants_are_isolated(routed):
+    for tenant, text in [("acme", "Contrato de servicios y honorarios de acme."),
+                         ("globex", "Contrato de servicios y honorarios de globex.")]:
+        path = _write(routed / f"{tenant}.txt", text)
+        ingestion.ingest_file_to_pinecone(path, provider="sentence_transformers",
+                                          document_id="crm-1", tenant=tenant)
+
+    for tenant in ("acme", "globex"):
+        hits = retriever.hydrate(
+            retriever.retrieve("honorarios", top_k=5, provider="sentence_transformers", tenant=tenant),
+            tenant
+        )
+        assert hits and all(tenant in h["text"] for h in hits)
+        assert ingestion.manifest.get("crm-1", tenant)["tenant"] == tenant
+
+    assert retriever.retrieve("honorarios", top_k=5, provider="sentence_transformers") == []
+    assert ingestion.delete_document("crm-1", tenant="acme")["deleted_chunks"] == 1
+    assert ingestion.manifest.get("crm-1", "globex") is not None
+
+
+def test_same_filename_without_document_id_does_not_overwrite(routed):
+    path = routed / "subida.txt"
+    first = ingestion.ingest_file_to_pinecone(
+        _write(path, "Contrato de servicios con honorarios mensuales."), provider="sentence_transformers")
+    second = ingestion.ingest_file_to_pinecone(
+        _write(path, "Contrato de arriendo con canon y depósito."), provider="sentence_transformers")
+
+    assert first["document_id"] != second["document_id"]
+    index = "bench-index-sentence-transformers"
+    assert local_store.list_vector_ids(index, first["document_id"] + "#", namespace="contrato")
+    assert local_store.list_vector_ids(index, second["document_id"] + "#", namespace="contrato")
+
+
+def test_reingest_embeds_only_changed_chunks(routed, monkeypatch):
+    clausulas = [
+        f"Cláusula {i}. El contratista {nombre} presta servicios de consultoría y cobra "
+        f"honorarios mensuales según el anexo {i}. " * 6
+        for i, nombre in enumerate(["alfa", "beta", "gama", "delta", "epsilon", "zeta", "eta", "theta"])
+    ]
+    path = routed / "contrato.txt"
+    index = "bench-index-sentence-transformers"
+
+    embedded = []
+    encode = ingestion.embed_texts.encode
+    monkeypatch.setattr(ingestion.embed_texts, "encode", lambda texts: embedded.append(texts) or encode(texts))
+
+    def ingest():
+        embedded.clear()
+        _write(path, "Contrato de servicios.\n\n" + "\n\n".join(clausulas))
+        result = ingestion.ingest_file_to_pinecone(str(path), provider="sentence_transformers", document_id="d1")
+        return result["cambios"], set(local_store.list_vector_ids(index, "d1#", namespace="contrato"))
+
+    cambios, first_ids = ingest()
+    assert cambios == {"nuevos": len(first_ids), "sin_cambios": 0, "eliminados": 0}
+
+    clausulas[3] = clausulas[3].replace("delta", "omega")      # se edita un solo párrafo
+    cambios, second_ids = ingest()
+    assert 0 < cambios["nuevos"] < len(first_ids)
+    assert cambios["nuevos"] + cambios["sin_cambios"] == len(second_ids)
+    # el primer lote son los chunks: solo llegan al embedder los del párrafo editado
+    assert len(embedded[0]) == cambios["nuevos"]
+    assert all("omega" in text for text in embedded[0])
+    stale = first_ids - second_ids
+    assert len(stale) == cambios["eliminados"] > 0
+    assert not stale & set(local_store.list_vector_ids(index, "d1#", namespace="contrato"))
+
+    cambios, third_ids = ingest()
+    assert cambios == {"nuevos": 0, "sin_cambios": len(second_ids), "eliminados": 0}
+    assert third_ids == second_ids
+    assert embedded == []
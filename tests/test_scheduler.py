@@ -0,0 +1,77 @@
+# tests/test_scheduler.py
+
+import threading
+import time
+
+import pytest
+
+from app.core.metrics import SCHEDULER_REJECTED
+from app.core.scheduler import FairScheduler, RateLimiter
+from app.core.tenancy import TenantQuotaExceeded
+
+
+def test_round_robin_lets_quiet_tenant_skip_the_flood():
+    sched = FairScheduler(workers=1, max_queue=100)
+    gate = threading.Event()
+    order = []
+
+    first = sched.submit("ruidoso", "query", gate.wait)     # ocupa el único worker
+    time.sleep(0.05)
+    for i in range(20):
+        sched.submit("ruidoso", "query", order.append, f"r{i}")
+    quiet = sched.submit("tranquilo", "query", order.append, "t0")
+
+    gate.set()
+    first.result(timeout=5)
+    quiet.result(timeout=5)
+    # el tenant tranquilo entra en el segundo turno, no detrás de las 20
+    assert order.index("t0") <= 1
+
+
+def test_per_tenant_and_global_limits():
+    sched = FairScheduler(workers=4, tenant_limits={"ingest": 1}, global_limits={"ingest": 2})
+    running, peak, lock = [], {"a": 0, "total": 0}, threading.Lock()
+
+    def job(tenant):
+        with lock:
+            running.append(tenant)
+            peak["a"] = max(peak["a"], running.count("a"))
+            peak["total"] = max(peak["total"], len(running))
+        time.sleep(0.03)
+        with lock:
+            running.remove(tenant)
+
+    futures = [sched.submit(t, "ingest", job, t) for t in ["a"] * 4 + ["b"] * 2 + ["c"] * 2]
+    for f in futures:
+        f.result(timeout=5)
+    assert peak == {"a": 1, "total": 2}
+
+
+def test_queue_limit_and_rate_limit():
+    sched = FairScheduler(workers=1, max_queue=2)
+    gate = threading.Event()
+    sched.submit("a", "query", gate.wait)
+    time.sleep(0.05)
+    sched.submit("a", "query", lambda: None)
+    sched.submit("a", "query", lambda: None)
+    before = SCHEDULER_REJECTED.value(kind="query", reason="queue_full")
+    with pytest.raises(TenantQuotaExceeded):
+        sched.submit("a", "query", lambda: None)
+    assert SCHEDULER_REJECTED.value(kind="query", reason="queue_full") == before + 1
+    assert SCHEDULER_REJECTED.labelnames == ("kind", "reason")    # el tenant va al log, no al label
+    sched.submit("b", "query", lambda: None)     # la cola de otro tenant no se ve afectada
+    gate.set()
+
+    limiter = RateLimiter(per_minute=60, burst=2)
+    limiter.acquire("a")
+    limiter.acquire("a")
+    with pytest.raises(TenantQuotaExceeded) as exc:
+        limiter.acquire("a")
+    assert 0 < exc.value.retry_after <= 1.0
+    limiter.acquire("b")
+
+
+def test_errors_propagate_to_caller():
+    sched = FairScheduler(workers=1)
+    with pytest.raises(ZeroDivisionError):
+        sched.submit("a", "query", lambda: 1 / 0).result(timeout=5)
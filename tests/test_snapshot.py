@@ -0,0 +1,71 @@
+# tests/test_snapshot.py
+
+import json
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.vectorstore import local_store, snapshot
+
+
+@pytest.fixture
+def local(monkeypatch):
+    monkeypatch.setattr(settings, "VECTOR_BACKEND", "local")
+    monkeypatch.setattr(settings, "LOCAL_STORE_QUANTIZATION", "none")
+    yield
+    for name in ("snap-src", "snap-dst"):
+        local_store._indexes.pop(name, None)
+
+
+def _populate(n: int = 50, dim: int = 16):
+    rng = np.random.default_rng(0)
+    local_store.create_index("snap-src", dim=dim)
+    local_store.upsert_vectors("snap-src", [
+        (f"doc{i % 5}#{i}", rng.normal(size=dim), {"document_id": f"doc{i % 5}", "chunk_index": i})
+        for i in range(n)
+    ])
+    local_store.upsert_vectors("snap-src", [("doc0", rng.normal(size=dim), {"document_id": "doc0"})],
+                               namespace="__docs")
+    return rng.normal(size=dim)
+
+
+def _ids(index: str, query, **kwargs):
+    return [m["id"] for m in local_store.query_index(index, query, top_k=10, **kwargs)["matches"]]
+
+
+def test_export_import_roundtrip_with_mmap(local, tmp_path):
+    query = _populate()
+    header = snapshot.export_snapshot("snap-src", tmp_path, batch_size=7)
+
+    assert (tmp_path / snapshot.HEADER).exists()
+    assert {e["namespace"]: e["rows"] for e in header["namespaces"]} == {"": 50, "__docs": 1}
+    first = json.loads((tmp_path / header["namespaces"][0]["metadata"]).read_text().splitlines()[0])
+    assert set(first) == {"id", "metadata"}
+
+    loaded = snapshot.import_snapshot(tmp_path, index_name="snap-dst")
+    assert loaded == {"": 50, "__docs": 1}
+    assert isinstance(local_store.get_index("snap-dst").vectors, np.memmap)
+
+    assert _ids("snap-dst", query) == _ids("snap-src", query)
+    flt = {"document_id": {"$in": ["doc1", "doc2"]}}
+    assert _ids("snap-dst", query, filter=flt) == _ids("snap-src", query, filter=flt)
+
+    # escrituras tras el mmap: copy-on-write, el snapshot no cambia
+    local_store.delete_vectors("snap-dst", ["doc1#1"])
+    local_store.upsert_vectors("snap-dst", [("nuevo", query, {"document_id": "nuevo"})])
+    assert _ids("snap-dst", query)[0] == "nuevo"
+    assert "doc1#1" not in _ids("snap-dst", query, filter={"document_id": "doc1"})
+    again = np.load(tmp_path / header["namespaces"][0]["vectors"])
+    assert np.count_nonzero(np.linalg.norm(again, axis=1)) == 50
+
+
+def test_float16_snapshot_imports_by_upsert(local, tmp_path):
+    query = _populate()
+    header = snapshot.export_snapshot("snap-src", tmp_path, dtype="float16")
+    assert np.load(tmp_path / header["namespaces"][0]["vectors"]).dtype == np.float16
+
+    snapshot.import_snapshot(tmp_path, index_name="snap-dst", batch_size=8, workers=2)
+    assert not isinstance(local_store.get_index("snap-dst").vectors, np.memmap)
+    assert len(local_store.get_index("snap-dst")) == 50
+    assert set(_ids("snap-dst", query)[:5]) <= set(_ids("snap-src", query))
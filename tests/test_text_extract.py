@@ -0,0 +1,63 @@
+# tests/test_text_extract.py
+
+import zipfile
+
+import openpyxl
+
+from app.utils.text_extract import (
+    extract_text_docx,
+    extract_text_excel,
+    iter_text_docx,
+    iter_text_excel,
+)
+
+
+W = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+
+
+def _write_docx(path, body_xml: str):
+    xml = f'<?xml version="1.0" encoding="UTF-8"?><w:document {W}><w:body>{body_xml}</w:body></w:document>'
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("word/document.xml", xml)
+
+
+def _p(text: str) -> str:
+    return f"<w:p><w:r><w:t>{text}</w:t></w:r></w:p>"
+
+
+def test_docx_includes_tables(tmp_path):
+    path = tmp_path / "contrato.docx"
+    table = (
+        "<w:tbl>"
+        f"<w:tr><w:tc>{_p('Cláusula')}</w:tc><w:tc>{_p('Valor')}</w:tc></w:tr>"
+        f"<w:tr><w:tc>{_p('Honorarios')}</w:tc><w:tc>{_p('$1.000')}</w:tc></w:tr>"
+        "</w:tbl>"
+    )
+    _write_docx(path, _p("CONTRATO DE PRESTACIÓN") + table + _p("Firmas"))
+
+    assert extract_text_docx(path) == (
+        "CONTRATO DE PRESTACIÓN\nCláusula | Valor\nHonorarios | $1.000\nFirmas"
+    )
+
+
+def test_docx_respects_max_chars(tmp_path):
+    path = tmp_path / "largo.docx"
+    _write_docx(path, "".join(_p(f"Párrafo {i}") for i in range(100)))
+
+    lines = list(iter_text_docx(path, max_chars=50))
+    assert 0 < len(lines) < 100
+
+
+def test_excel_streaming(tmp_path):
+    path = tmp_path / "clientes.xlsx"
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Clientes"
+    ws.append(["nombre", "ciudad"])
+    ws.append(["ACME", None])
+    ws.append([None, None])
+    ws.append(["Globex", "Cali"])
+    wb.save(path)
+
+    assert extract_text_excel(path) == "--- HOJA: Clientes ---\n\nnombre | ciudad\nACME\nGlobex | Cali"
+    assert list(iter_text_excel(path, max_rows=2))[1:] == ["nombre | ciudad", "ACME"]
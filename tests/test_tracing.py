@@ -0,0 +1,31 @@
+# tests/test_tracing.py
+
+from app.core.tracing import debug_payload, span, start_trace
+
+
+def test_spans_nest_and_sum_timings():
+    with start_trace("POST /query", debug="spans") as trace:
+        with span("retrieve"):
+            with span("embed"):
+                pass
+        with span("retrieve", fallback=True):
+            pass
+        payload = debug_payload()
+
+    assert set(payload["timings"]) == {"retrieve", "embed", "total_ms"}
+    tree = payload["spans"]
+    assert [c["name"] for c in tree["children"]] == ["retrieve", "retrieve"]
+    assert tree["children"][0]["children"][0]["name"] == "embed"
+
+    otlp = trace.to_otlp()["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert len(otlp) == 4
+    assert all(s["traceId"] == trace.trace_id for s in otlp)
+
+
+def test_noop_outside_trace_and_without_header():
+    with span("retrieve") as s:
+        assert s is None
+    assert debug_payload() == {}
+
+    with start_trace("GET /health"):
+        assert debug_payload() == {}
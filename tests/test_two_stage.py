@@ -0,0 +1,58 @@
+# tests/test_two_stage.py
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.rag import ingestion, retriever
+from app.vectorstore import doc_vectors, local_store
+from benchmarks.fakes import FakeEmbedder, FakeLLM
+from benchmarks.run import PROVIDER, offline_environment
+
+DOCS = {
+    "contrato": "Contrato de servicios. El contratista cobra honorarios mensuales por el soporte.",
+    "factura": "Factura número 12. Subtotal, IVA y valor total a pagar por el soporte.",
+    "acta": "Acta de reunión. Asistentes y acuerdos sobre el soporte mensual.",
+}
+
+
+@pytest.fixture
+def corpus(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "DOC_VECTOR_SOURCE", "mean")
+    with offline_environment(tmp_path, FakeEmbedder(dim=64), FakeLLM()):
+        for doc_id, text in DOCS.items():
+            path = Path(tmp_path / f"{doc_id}.txt")
+            path.write_text(text, encoding="utf-8")
+            ingestion.ingest_file_to_pinecone(str(path), provider=PROVIDER, document_id=doc_id)
+        yield
+
+
+def test_mean_vector_is_normalized():
+    v = doc_vectors.mean_vector([[3.0, 0.0], [3.0, 4.0]])
+    assert np.isclose(np.linalg.norm(v), 1.0)
+    assert doc_vectors.mean_vector([]) is None
+
+
+def test_ingest_writes_one_vector_per_document(corpus):
+    ids = local_store.list_vector_ids("bench-index", "", namespace="__docs")
+    assert sorted(ids) == sorted(DOCS)
+    assert ingestion.manifest.get("factura")["doc_vector"] is True
+
+
+def test_two_stage_restricts_chunks_to_top_documents(corpus, monkeypatch):
+    monkeypatch.setattr(settings, "RETRIEVAL_DOC_TOP_K", 1)
+    flat = retriever.retrieve("soporte", top_k=5, provider=PROVIDER, two_stage=False)
+    assert len({h["metadata"]["document_id"] for h in flat}) == 3
+
+    staged = retriever.retrieve("Factura valor total", top_k=5, provider=PROVIDER, two_stage=True)
+    assert {h["metadata"]["document_id"] for h in staged} == {"factura"}
+
+
+def test_two_stage_falls_back_to_flat_without_doc_vectors(corpus):
+    for doc_id in DOCS:
+        local_store.delete_vectors("bench-index", [doc_id], namespace="__docs")
+    flat = retriever.retrieve("soporte", top_k=5, provider=PROVIDER, two_stage=False)
+    staged = retriever.retrieve("soporte", top_k=5, provider=PROVIDER, two_stage=True)
+    assert [h["id"] for h in staged] == [h["id"] for h in flat]